@@ -20,6 +20,73 @@ class Settings(BaseSettings):
     mail_starttls: Optional[bool] = None
     mail_ssl_tls: Optional[bool] = None
 
+    # --- Feed (fan-out-on-write) ---
+    FEED_FANOUT_ATIVO: bool = False
+    FEED_FANOUT_LIMITE_SEGUIDORES: int = 5000
+
+    # --- Fila de efeitos colaterais (notificações, feed, conquistas) ---
+    # Desligada, os efeitos rodam na própria requisição, como antes.
+    FILA_EFEITOS_ATIVA: bool = False
+    FILA_EFEITOS_WORKERS: int = 2
+    FILA_EFEITOS_TAMANHO_LOTE: int = 100
+    FILA_EFEITOS_INTERVALO_SEGUNDOS: float = 1.0
+    FILA_EFEITOS_MAX_TENTATIVAS: int = 5
+
+    # --- Cache das estatísticas do perfil (/usuarios/{username}/stats) ---
+    USER_STATS_CACHE_TTL_SEGUNDOS: int = 300
+    USER_STATS_CACHE_MAX_ITENS: int = 1000 # Cada faixa de datas pedida é uma entrada; as mais antigas saem primeiro
+
+    # --- Cliente da API da NBA (app/services/nba_client.py) ---
+    NBA_API_REQUISICOES_POR_SEGUNDO: float = 0.7 # Token bucket global, compartilhado por todas as chamadas; é o teto da taxa adaptativa
+    NBA_API_TAXA_MINIMA: float = 0.1 # Piso da taxa depois de reduções por 429/timeout
+    NBA_API_TAXA_PASSO: float = 0.05 # Quanto a taxa sobe (req/s) depois de NBA_API_SUCESSOS_PARA_SUBIR_TAXA sucessos seguidos
+    NBA_API_SUCESSOS_PARA_SUBIR_TAXA: int = 20
+    NBA_API_RAJADA: int = 3
+    NBA_API_TIMEOUT_SEGUNDOS: int = 60
+    NBA_API_MAX_TENTATIVAS: int = 4
+    NBA_API_RECUO_BASE_SEGUNDOS: float = 1.0
+    NBA_API_CIRCUITO_LIMITE_FALHAS: int = 5
+    NBA_API_CIRCUITO_ESPERA_SEGUNDOS: float = 60.0
+    NBA_API_POOL_CONEXOES: int = 10
+    NBA_API_CACHE_ATIVO: bool = True
+    NBA_API_CACHE_DIR: str = "data/nba_cache"
+
+    # --- Sincronização de jogadores com a API da NBA ---
+    NBA_SYNC_TAMANHO_LOTE: int = 25 # Jogadores gravados (e checkpoint avançado) por transação
+    NBA_SYNC_SHARDS: int = 4 # Partes da lista de jogadores buscadas em paralelo, cada uma com o próprio checkpoint
+
+    # --- Sincronização incremental de prémios (nba_importer.sync_all_players_awards) ---
+    PREMIOS_DIAS_JOGOS_RECENTES: int = 30 # Jogadores com jogos nesse período são consultados em toda execução, primeiro
+    PREMIOS_REVERIFICAR_INATIVOS_DIAS: int = 90 # Jogadores não ativos e sem jogos recentes só são reconsultados depois disso
+
+    # --- Importação de temporada em pipeline (app/services/importador_temporada.py) ---
+    NBA_IMPORT_WORKERS: int = 4 # Threads buscando box scores; o ritmo continua limitado pelo token bucket global
+    NBA_IMPORT_TAMANHO_LOTE: int = 25 # Jogos finalizados gravados por transação
+
+    # --- Envio pelos WebSockets ao vivo (app/websocket_manager.py) ---
+    WS_FILA_ENVIO_TAMANHO: int = 16 # Mensagens pendentes por cliente; quem passa disso é desconectado
+    WS_ENVIO_TIMEOUT_SEGUNDOS: float = 10.0
+    SSE_HEARTBEAT_SEGUNDOS: float = 15.0 # Comentário enviado aos streams SSE parados, para proxies não fecharem a conexão
+
+    # --- Jogos ao vivo entre processos (app/services/live_broadcast.py) ---
+    LIVE_BROADCAST_BACKEND: str = "memoria" # "memoria" (um processo) ou "postgres" (vários workers/máquinas)
+    LIVE_BROADCAST_DATABASE_URL: Optional[str] = None # Conexão direta para o LISTEN, se a DATABASE_URL passar por pgbouncer
+    LIVE_LEASE_SEGUNDOS: int = 90 # Validade da liderança de um jogo; o líder renova a cada rodada
+
+    # --- Agendador de tarefas (app/scheduler.py) ---
+    SCHEDULER_LEASE_SEGUNDOS: int = 60 # Validade da liderança do agendador; o líder renova a cada terço disso
+    SCHEDULER_TOLERANCIA_ATRASO_SEGUNDOS: int = 3600 # Disparo perdido (ex: troca de líder) ainda roda se atrasou até isso
+
+    # --- Jobs administrativos em segundo plano (app/services/jobs.py) ---
+    JOBS_WORKERS: int = 1 # Por processo; o ritmo das chamadas à API da NBA já é limitado pelo token bucket global
+    JOBS_INTERVALO_SEGUNDOS: float = 5.0 # Espera entre consultas à fila quando não há jobs pendentes
+    JOBS_TIMEOUT_SEM_PROGRESSO_SEGUNDOS: int = 1800 # Job "executando" sem sinal (progresso ou batimento) há mais que isso é dado como abandonado
+
+    # --- Estatísticas de carreira (tabela jogador_career_stats) ---
+    # Linhas mais velhas que isso ainda são servidas, mas disparam uma atualização em segundo plano.
+    CAREER_STATS_MAX_IDADE_HORAS: int = 24
+    CAREER_STATS_WORKERS: int = 2
+
     # This will read the .env file and ignore any extra variables
     model_config = SettingsConfigDict(env_file=".env", extra='ignore')
 
@@ -1,12 +1,59 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, desc
-from datetime import datetime, date, timedelta
+from sqlalchemy.orm import Session, joinedload, aliased
+from sqlalchemy import func, desc, select, exists, or_, and_, update, delete, tuple_, literal, case
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, date, timedelta, timezone
 from typing import List, Optional, Union
 from . import models, schemas, security
 from .models import NivelUsuario
-from .utils import generate_slug
+from .utils import generate_slug, encode_cursor, decode_cursor
+from .config import settings
+from .services import feed_inbox, fila_efeitos
 from fastapi import HTTPException
 import os
+import threading
+import time
+from collections import OrderedDict
+
+# --- Paginação por cursor (keyset) ---
+#
+# Com `cursor` informado, as listagens filtram a partir da chave (valor, id) do
+# último item da página anterior em vez de usar OFFSET, e devolvem
+# {"items": [...], "next_cursor": "..."}. Sem cursor, continuam com skip/limit.
+# Um cursor vazio ("") pede a primeira página no formato paginado.
+
+def _filtrar_por_cursor(query, cursor: str, coluna_id, coluna=None, decrescente: bool = False):
+    """Aplica o filtro de keyset: itens depois de (valor, id) na ordem da listagem."""
+    if not cursor:
+        return query
+    try:
+        valor, ultimo_id = decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    # As chaves de ordenação são sempre datas; um cursor de outra listagem não serve aqui
+    if (coluna is None) != (valor is None) or (valor is not None and not isinstance(valor, datetime)):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if coluna is None:
+        return query.filter(coluna_id < ultimo_id if decrescente else coluna_id > ultimo_id)
+    chave = tuple_(coluna, coluna_id)
+    referencia = tuple_(literal(valor, coluna.type), literal(ultimo_id))
+    return query.filter(chave < referencia if decrescente else chave > referencia)
+
+def _montar_pagina(itens: list, limit: int, chave) -> dict:
+    """Envelope da página; `chave(item)` devolve o (valor, id) usado no próximo cursor."""
+    next_cursor = encode_cursor(*chave(itens[-1])) if itens and len(itens) == limit else None
+    return {"items": itens, "next_cursor": next_cursor}
+
+def _insert_upsert(db: Session):
+    """insert() do dialeto do banco, que oferece on_conflict_do_update/do_nothing (Postgres e SQLite)."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+def get_mapa_api_ids(db: Session, modelo) -> dict:
+    """{api_id: id} de todos os registros de um modelo com api_id (Jogador, Time, Jogo)."""
+    return dict(db.query(modelo.api_id, modelo.id).filter(modelo.api_id.isnot(None)).all())
 
 def get_user(db: Session, user_id: int):
     return db.query(models.Usuario).filter(models.Usuario.id == user_id).first()
@@ -21,8 +68,12 @@ def get_user_by_username(db: Session, username: str):
         joinedload(models.Usuario.time_favorito)
     ).filter(models.Usuario.username == username).first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Usuario).offset(skip).limit(limit).all()
+def get_users(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    query = db.query(models.Usuario).order_by(models.Usuario.id)
+    if cursor is None:
+        return query.offset(skip).limit(limit).all()
+    usuarios = _filtrar_por_cursor(query, cursor, models.Usuario.id).limit(limit).all()
+    return _montar_pagina(usuarios, limit, lambda u: (None, u.id))
 
 def create_user(db: Session, user: schemas.UsuarioCreate):
     hashed_password = security.get_password_hash(user.senha)
@@ -193,6 +244,29 @@ def create_jogador_com_details(db: Session, jogador: schemas.JogadorCreateComDet
     db.refresh(db_jogador)
     return db_jogador
 
+# Campos que a sincronização com a API atualiza em jogadores já existentes
+CAMPOS_DETALHES_JOGADOR = [
+    "posicao", "numero_camisa", "data_nascimento", "ano_draft",
+    "anos_experiencia", "altura", "peso", "nacionalidade",
+]
+
+def get_slugs_jogadores(db: Session) -> set:
+    return {slug for (slug,) in db.query(models.Jogador.slug).filter(models.Jogador.slug.isnot(None))}
+
+def upsert_jogadores(db: Session, jogadores: List[dict]):
+    """
+    Grava um lote de jogadores num único INSERT ... ON CONFLICT (api_id).
+    Jogadores novos entram completos; nos existentes só os detalhes são atualizados,
+    como em update_jogador_details. Todas as linhas devem ter as mesmas chaves. Não faz commit.
+    """
+    if not jogadores:
+        return
+    stmt = _insert_upsert(db)(models.Jogador).values(jogadores)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[models.Jogador.api_id],
+        set_={campo: stmt.excluded[campo] for campo in CAMPOS_DETALHES_JOGADOR}
+    ))
+
 def create_jogador(db: Session, jogador: schemas.JogadorCreate):
     db_jogador = models.Jogador(**jogador.model_dump())
     db.add(db_jogador)
@@ -200,8 +274,12 @@ def create_jogador(db: Session, jogador: schemas.JogadorCreate):
     db.refresh(db_jogador)
     return db_jogador
 
-def get_jogadores(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Jogador).offset(skip).limit(limit).all()
+def get_jogadores(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    query = db.query(models.Jogador).order_by(models.Jogador.id)
+    if cursor is None:
+        return query.offset(skip).limit(limit).all()
+    jogadores = _filtrar_por_cursor(query, cursor, models.Jogador.id).limit(limit).all()
+    return _montar_pagina(jogadores, limit, lambda j: (None, j.id))
 
 def get_jogador_stats_por_temporada(db: Session, jogador_id: int) -> list[schemas.JogadorStatsTemporada]:
     """
@@ -361,83 +439,126 @@ def get_jogador_gamelog_season(db: Session, jogador_id: int, season: str):
         ))
     return gamelog
 
-def add_conquista_jogador(db: Session, jogador_id: int, nome_conquista: str, temporada: str):
-    # Verifica se a conquista já existe para evitar duplicados
-    db_conquista = db.query(models.Conquista_Jogador).filter(
-        models.Conquista_Jogador.jogador_id == jogador_id,
-        models.Conquista_Jogador.nome_conquista == nome_conquista,
-        models.Conquista_Jogador.temporada == temporada
-    ).first()
+def get_jogadores_para_sync_premios(db: Session, limit: Optional[int] = None):
+    """
+    Jogadores (id, api_id, nome, payload_hash) cujos prémios devem ser consultados,
+    por prioridade: com jogos nos últimos PREMIOS_DIAS_JOGOS_RECENTES dias, ativos e
+    nunca consultados. Os demais só entram quando a última consulta passou de
+    PREMIOS_REVERIFICAR_INATIVOS_DIAS, e por último. Dentro de cada grupo, quem foi
+    consultado há mais tempo vem primeiro.
+    """
+    agora = datetime.now(timezone.utc)
+    estado = models.Jogador_Premios_Sync
+    com_jogos_recentes = models.Jogador.id.in_(
+        select(models.Estatistica_Jogador_Jogo.jogador_id)
+        .join(models.Jogo, models.Jogo.id == models.Estatistica_Jogador_Jogo.jogo_id)
+        .where(models.Jogo.data_jogo >= agora - timedelta(days=settings.PREMIOS_DIAS_JOGOS_RECENTES))
+    )
+    ativo = models.Jogador.status == "ativo"
+    nunca_consultado = estado.jogador_id.is_(None)
+    vencido = estado.data_verificacao < agora - timedelta(days=settings.PREMIOS_REVERIFICAR_INATIVOS_DIAS)
+
+    query = db.query(models.Jogador.id, models.Jogador.api_id, models.Jogador.nome, estado.payload_hash)\
+        .outerjoin(estado, estado.jogador_id == models.Jogador.id)\
+        .filter(models.Jogador.api_id.isnot(None),
+                or_(com_jogos_recentes, ativo, nunca_consultado, vencido))\
+        .order_by(case((com_jogos_recentes, 0), (ativo, 1), (nunca_consultado, 2), else_=3),
+                  estado.data_verificacao.asc().nulls_first(), models.Jogador.id)
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+def salvar_premios_jogadores(db: Session, conquistas: List[dict], estados: List[dict]) -> int:
+    """
+    Grava num único lote os prémios (dicts jogador_id, nome_conquista, temporada) com
+    INSERT ... ON CONFLICT DO NOTHING na _jogador_conquista_temporada_uc, e o estado da
+    sincronização de cada jogador consultado (dicts jogador_id, payload_hash,
+    total_premios). data_alteracao só muda quando o hash muda. Retorna quantos prémios
+    eram novos. Não faz commit.
+    """
+    insert = _insert_upsert(db)
+    novos = 0
+    if conquistas:
+        novos = len(db.execute(
+            insert(models.Conquista_Jogador).values(conquistas)
+            .on_conflict_do_nothing(index_elements=["jogador_id", "nome_conquista", "temporada"])
+            .returning(models.Conquista_Jogador.id)
+        ).all())
+    if estados:
+        agora = datetime.now(timezone.utc)
+        tabela = models.Jogador_Premios_Sync
+        stmt = insert(tabela).values([{**e, "data_verificacao": agora, "data_alteracao": agora} for e in estados])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["jogador_id"],
+            set_={
+                "payload_hash": stmt.excluded.payload_hash,
+                "total_premios": stmt.excluded.total_premios,
+                "data_verificacao": stmt.excluded.data_verificacao,
+                "data_alteracao": case((tabela.payload_hash == stmt.excluded.payload_hash, tabela.data_alteracao),
+                                       else_=stmt.excluded.data_alteracao),
+            },
+        ))
+    return novos
 
-    if not db_conquista:
-        nova_conquista = models.Conquista_Jogador(
-            jogador_id=jogador_id,
-            nome_conquista=nome_conquista,
-            temporada=temporada
-        )
-        db.add(nova_conquista)
-        db.commit()
-        db.refresh(nova_conquista)
-        return nova_conquista
-    return db_conquista
+def get_career_stats_salvas(db: Session, jogador_id: int) -> List[models.Jogador_Career_Stats]:
+    """Linhas de jogador_career_stats de um jogador, na ordem da API."""
+    return db.query(models.Jogador_Career_Stats)\
+        .filter(models.Jogador_Career_Stats.jogador_id == jogador_id)\
+        .order_by(models.Jogador_Career_Stats.ordem)\
+        .all()
+
+def salvar_career_stats(db: Session, jogador_id: int, linhas: List[dict]) -> int:
+    """
+    Substitui as estatísticas de carreira de um jogador pelas `linhas` (dicts com os campos
+    de schemas.JogadorCareerStats, na ordem da API). Não faz commit: quem chama decide a transação.
+    """
+    db.execute(delete(models.Jogador_Career_Stats).where(models.Jogador_Career_Stats.jogador_id == jogador_id))
+    if linhas:
+        agora = datetime.now(timezone.utc)
+        db.execute(models.Jogador_Career_Stats.__table__.insert(), [
+            {**linha, "jogador_id": jogador_id, "ordem": ordem, "data_atualizacao": agora}
+            for ordem, linha in enumerate(linhas)
+        ])
+    return len(linhas)
+
+def get_jogadores_career_stats_mais_antigas(db: Session, limit: int = 50) -> List[models.Jogador]:
+    """Jogadores com api_id, primeiro os sem estatísticas gravadas e depois os de estatísticas mais antigas."""
+    atualizacao = db.query(
+        models.Jogador_Career_Stats.jogador_id,
+        func.min(models.Jogador_Career_Stats.data_atualizacao).label("data_atualizacao")
+    ).group_by(models.Jogador_Career_Stats.jogador_id).subquery()
+    return db.query(models.Jogador)\
+        .outerjoin(atualizacao, atualizacao.c.jogador_id == models.Jogador.id)\
+        .filter(models.Jogador.api_id.isnot(None))\
+        .order_by(atualizacao.c.data_atualizacao.asc().nullsfirst(), models.Jogador.id)\
+        .limit(limit)\
+        .all()
+
+def _career_stats_desatualizadas(linhas: List[models.Jogador_Career_Stats]) -> bool:
+    if not linhas:
+        return True
+    mais_antiga = min(linha.data_atualizacao for linha in linhas)
+    if mais_antiga.tzinfo is None:
+        mais_antiga = mais_antiga.replace(tzinfo=timezone.utc)
+    return datetime.now(timezone.utc) - mais_antiga > timedelta(hours=settings.CAREER_STATS_MAX_IDADE_HORAS)
 
 def get_jogador_career_stats(db: Session, jogador_slug: str) -> List[schemas.JogadorCareerStats]:
-    """Busca as estatísticas de carreira de um jogador da NBA API."""
-    from nba_api.stats.endpoints import playercareerstats
-    import time
-    
-    # Primeiro, busca o jogador no banco local para obter o API ID
+    """
+    Estatísticas de carreira de um jogador, lidas da tabela jogador_career_stats.
+    Se não houver linhas ou elas estiverem velhas, devolve o que existe e agenda a
+    atualização pela API da NBA em segundo plano (stale-while-revalidate).
+    """
+    from .services import career_stats
+
     db_jogador = get_jogador_by_slug(db, jogador_slug=jogador_slug)
-    if not db_jogador or not db_jogador.api_id:
-        return []
-    
-    try:
-        # Pausa para evitar rate limiting
-        time.sleep(1.1)
-        
-        # Busca as estatísticas de carreira da NBA API
-        career_stats = playercareerstats.PlayerCareerStats(
-            player_id=db_jogador.api_id,
-            timeout=60
-        )
-        
-        # Pega o DataFrame com as estatísticas por temporada
-        season_totals_df = career_stats.get_data_frames()[0]
-        
-        career_stats_list = []
-        for index, row in season_totals_df.iterrows():
-            career_stat = schemas.JogadorCareerStats(
-                temporada=row['SEASON_ID'],
-                team_abbreviation=row['TEAM_ABBREVIATION'],
-                jogos_disputados=int(row['GP'] or 0),
-                minutos_por_jogo=float(row['MIN'] or 0) / max(int(row['GP'] or 1), 1),
-                field_goals_made=float(row['FGM'] or 0) / max(int(row['GP'] or 1), 1),
-                field_goals_attempted=float(row['FGA'] or 0) / max(int(row['GP'] or 1), 1),
-                field_goal_percentage=float(row['FG_PCT'] or 0),
-                three_pointers_made=float(row['FG3M'] or 0) / max(int(row['GP'] or 1), 1),
-                three_pointers_attempted=float(row['FG3A'] or 0) / max(int(row['GP'] or 1), 1),
-                three_point_percentage=float(row['FG3_PCT'] or 0),
-                free_throws_made=float(row['FTM'] or 0) / max(int(row['GP'] or 1), 1),
-                free_throws_attempted=float(row['FTA'] or 0) / max(int(row['GP'] or 1), 1),
-                free_throw_percentage=float(row['FT_PCT'] or 0),
-                rebounds_offensive=float(row['OREB'] or 0) / max(int(row['GP'] or 1), 1),
-                rebounds_defensive=float(row['DREB'] or 0) / max(int(row['GP'] or 1), 1),
-                rebounds_total=float(row['REB'] or 0) / max(int(row['GP'] or 1), 1),
-                assists=float(row['AST'] or 0) / max(int(row['GP'] or 1), 1),
-                steals=float(row['STL'] or 0) / max(int(row['GP'] or 1), 1),
-                blocks=float(row['BLK'] or 0) / max(int(row['GP'] or 1), 1),
-                turnovers=float(row['TOV'] or 0) / max(int(row['GP'] or 1), 1),
-                personal_fouls=float(row['PF'] or 0) / max(int(row['GP'] or 1), 1),
-                points=float(row['PTS'] or 0) / max(int(row['GP'] or 1), 1),
-            )
-            career_stats_list.append(career_stat)
-        
-        return career_stats_list
-    
-    except Exception as e:
-        print(f"Erro ao buscar estatísticas de carreira para jogador {jogador_slug}: {e}")
+    if not db_jogador:
         return []
 
+    linhas = get_career_stats_salvas(db, jogador_id=db_jogador.id)
+    if db_jogador.api_id and _career_stats_desatualizadas(linhas):
+        career_stats.agendar_atualizacao(db_jogador.id)
+    return [schemas.JogadorCareerStats.model_validate(linha) for linha in linhas]
+
 # --- Funções CRUD para Jogo ---
 
 def get_jogo_by_api_id(db: Session, api_id: int):
@@ -463,6 +584,23 @@ def create_jogo(db: Session, jogo: schemas.JogoCreate):
     db.refresh(db_jogo)
     return db_jogo
 
+def create_jogos_em_lote(db: Session, linhas: List[dict], tamanho_lote: int = 500) -> int:
+    """
+    Insere jogos em lote (dicts com as colunas de Jogo, incluindo api_id e slug).
+    Jogos cujo api_id já existe são ignorados (ON CONFLICT DO NOTHING). Não faz commit.
+    """
+    inseridos = 0
+    for inicio in range(0, len(linhas), tamanho_lote):
+        stmt = _insert_upsert(db)(models.Jogo).values(linhas[inicio:inicio + tamanho_lote])\
+            .on_conflict_do_nothing(index_elements=["api_id"])
+        inseridos += db.execute(stmt).rowcount
+    return inseridos
+
+def update_placares_em_lote(db: Session, placares: List[dict]):
+    """Atualiza placar e status de vários jogos (dicts com id, placar_casa, placar_visitante, status_jogo). Não faz commit."""
+    if placares:
+        db.execute(update(models.Jogo), placares)
+
 def get_jogo(db: Session, jogo_id: int):
     return db.query(models.Jogo).filter(models.Jogo.id == jogo_id).first()
 
@@ -473,6 +611,7 @@ def get_jogos(
     time_id: Optional[int] = None,
     data: Optional[date] = None,
     status: Optional[str] = None,
+    cursor: Optional[str] = None,
 ):
     query = db.query(models.Jogo)
 
@@ -497,39 +636,34 @@ def get_jogos(
         else:
             query = query.filter(models.Jogo.status_jogo == status)
 
-    # Ordena os jogos pela data
-    query = query.order_by(models.Jogo.data_jogo.asc())
+    # Ordena os jogos pela data (id desempata jogos no mesmo horário)
+    query = query.order_by(models.Jogo.data_jogo.asc(), models.Jogo.id.asc())
 
-    return query.offset(skip).limit(limit).all()
+    if cursor is None:
+        return query.offset(skip).limit(limit).all()
+    jogos = _filtrar_por_cursor(query, cursor, models.Jogo.id, models.Jogo.data_jogo).limit(limit).all()
+    return _montar_pagina(jogos, limit, lambda j: (j.data_jogo, j.id))
 
 # --- Funções CRUD para Avaliacao_Jogo ---
 
-def create_avaliacao_jogo(db: Session, avaliacao: schemas.AvaliacaoJogoCreate, usuario_id: int, jogo_id: int):
-    db_avaliacao = models.Avaliacao_Jogo(
-        **avaliacao.model_dump(),
-        usuario_id=usuario_id,
-        jogo_id=jogo_id
-    )
-    db.add(db_avaliacao)
-    db.commit()
-    db.refresh(db_avaliacao)
-    
-    check_conquistas_para_usuario(db, usuario_id=usuario_id)
-
-    return db_avaliacao
-
 def get_avaliacao(db: Session, avaliacao_id: int):
     """Busca uma única avaliação pelo seu ID."""
     return db.query(models.Avaliacao_Jogo).filter(models.Avaliacao_Jogo.id == avaliacao_id).first()
 
-def get_avaliacoes_por_jogo(db: Session, jogo_id: int, usuario_id_logado: Optional[int] = None, skip: int = 0, limit: int = 100):
-    db_avaliacoes = db.query(models.Avaliacao_Jogo).options(
+def get_avaliacoes_por_jogo(db: Session, jogo_id: int, usuario_id_logado: Optional[int] = None, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    query = db.query(models.Avaliacao_Jogo).options(
         joinedload(models.Avaliacao_Jogo.usuario),
         joinedload(models.Avaliacao_Jogo.jogo).options(
             joinedload(models.Jogo.time_casa),
             joinedload(models.Jogo.time_visitante)
         )
-    ).filter(models.Avaliacao_Jogo.jogo_id == jogo_id).order_by(models.Avaliacao_Jogo.data_avaliacao.desc()).offset(skip).limit(limit).all()
+    ).filter(models.Avaliacao_Jogo.jogo_id == jogo_id)\
+     .order_by(models.Avaliacao_Jogo.data_avaliacao.desc(), models.Avaliacao_Jogo.id.desc())
+    if cursor is None:
+        query = query.offset(skip)
+    else:
+        query = _filtrar_por_cursor(query, cursor, models.Avaliacao_Jogo.id, models.Avaliacao_Jogo.data_avaliacao, decrescente=True)
+    db_avaliacoes = query.limit(limit).all()
     
     ids_curtidos = set()
     if usuario_id_logado:
@@ -543,7 +677,9 @@ def get_avaliacoes_por_jogo(db: Session, jogo_id: int, usuario_id_logado: Option
         avaliacao_schema = schemas.AvaliacaoJogo.model_validate(avaliacao)
         avaliacao_schema.curtido_pelo_usuario_atual = avaliacao.id in ids_curtidos
         avaliacoes_finais.append(avaliacao_schema)
-            
+
+    if cursor is not None:
+        return _montar_pagina(avaliacoes_finais, limit, lambda a: (a.data_avaliacao, a.id))
     return avaliacoes_finais
 
 def update_avaliacao(db: Session, avaliacao_id: int, avaliacao: schemas.AvaliacaoJogoCreate, user_id: int):
@@ -554,12 +690,18 @@ def update_avaliacao(db: Session, avaliacao_id: int, avaliacao: schemas.Avaliaca
         raise HTTPException(status_code=403, detail="Não autorizado")
     
     update_data = avaliacao.model_dump(exclude_unset=True)
+    tinha_detalhes = db_avaliacao.nota_ataque_casa is not None and db_avaliacao.nota_defesa_casa is not None
+    antes = snapshot_avaliacao_rollup(db_avaliacao)
 
     for key, value in update_data.items():
         setattr(db_avaliacao, key, value)
+    db.flush() # O recálculo das conquistas (autoflush desligado) precisa ver a avaliação já alterada
+    atualizar_rollup_avaliacao(db, db_avaliacao.jogo_id, antes=antes, depois=snapshot_avaliacao_rollup(db_avaliacao))
+    registrar_avaliacao_atualizada(db, db_avaliacao, tinha_detalhes=tinha_detalhes)
         
     db.commit()
     db.refresh(db_avaliacao)
+    invalidar_cache_user_stats(user_id)
     return db_avaliacao
 
 def delete_avaliacao(db: Session, avaliacao_id: int, user_id: int):
@@ -568,8 +710,13 @@ def delete_avaliacao(db: Session, avaliacao_id: int, user_id: int):
         raise HTTPException(status_code=404, detail="Avaliação não encontrada")
     if db_avaliacao.usuario_id != user_id:
         raise HTTPException(status_code=403, detail="Não autorizado")
+    feed_inbox.remover_avaliacao(db, avaliacao_id=avaliacao_id)
+    registrar_avaliacao_removida(db, db_avaliacao)
+    antes = snapshot_avaliacao_rollup(db_avaliacao)
     db.delete(db_avaliacao)
+    atualizar_rollup_avaliacao(db, db_avaliacao.jogo_id, antes=antes)
     db.commit()
+    invalidar_cache_user_stats(user_id)
     
 def get_avaliacao_com_curtida(db: Session, avaliacao_id: int, usuario_id_logado: Optional[int] = None):
     db_avaliacao = db.query(models.Avaliacao_Jogo).filter(models.Avaliacao_Jogo.id == avaliacao_id).first()
@@ -587,6 +734,119 @@ def get_avaliacao_com_curtida(db: Session, avaliacao_id: int, usuario_id_logado:
 
     return avaliacao_schema
 
+# --- Checkpoints de sincronização ---
+
+def get_sync_checkpoint(db: Session, nome: str):
+    return db.query(models.Sync_Checkpoint).filter(models.Sync_Checkpoint.nome == nome).first()
+
+def iniciar_sync_checkpoint(db: Session, nome: str, itens: list, posicao: int = 0):
+    """Começa uma nova execução, descartando o checkpoint anterior com o mesmo nome."""
+    db.query(models.Sync_Checkpoint).filter(models.Sync_Checkpoint.nome == nome).delete()
+    checkpoint = models.Sync_Checkpoint(nome=nome, itens=itens, posicao=min(posicao, len(itens)))
+    db.add(checkpoint)
+    db.commit()
+    db.refresh(checkpoint)
+    return checkpoint
+
+def get_sync_checkpoints_shards(db: Session, nome: str) -> list:
+    """Checkpoints dos shards de uma execução (nome:0, nome:1...), em ordem."""
+    shards = db.query(models.Sync_Checkpoint).filter(models.Sync_Checkpoint.nome.like(f"{nome}:%")).all()
+    return sorted(shards, key=lambda checkpoint: int(checkpoint.nome.rsplit(":", 1)[1]))
+
+def iniciar_sync_shards(db: Session, nome: str, partes: list) -> list:
+    """Divide a execução `nome` em shards, um checkpoint por parte, descartando os shards anteriores."""
+    db.query(models.Sync_Checkpoint).filter(models.Sync_Checkpoint.nome.like(f"{nome}:%")).delete(synchronize_session=False)
+    shards = [
+        models.Sync_Checkpoint(nome=f"{nome}:{i}", itens=parte, posicao=0, status="em_andamento" if parte else "concluido")
+        for i, parte in enumerate(partes)
+    ]
+    db.add_all(shards)
+    db.commit()
+    return shards
+
+def avancar_sync_checkpoint(db: Session, checkpoint: models.Sync_Checkpoint, posicao: int, novos: int, atualizados: int, concluido: bool = False):
+    """Atualiza o progresso. Não faz commit: deve ir na mesma transação dos dados do lote."""
+    checkpoint.posicao = posicao
+    checkpoint.novos = novos
+    checkpoint.atualizados = atualizados
+    if concluido:
+        checkpoint.status = "concluido"
+
+# --- Leases (liderança entre processos) ---
+
+def adquirir_lease(db: Session, nome: str, dono: str, duracao: timedelta) -> bool:
+    """
+    Assume ou renova o lease `nome` para `dono` por `duracao`. Retorna False se outro
+    processo o detém e ele ainda não venceu. O UPDATE condicional é atômico, então
+    dois processos disputando um lease vencido não saem ambos como donos.
+    """
+    agora = datetime.now(timezone.utc)
+    db.execute(
+        _insert_upsert(db)(models.Lease).values(nome=nome)
+        .on_conflict_do_nothing(index_elements=["nome"])
+    )
+    resultado = db.execute(
+        update(models.Lease)
+        .where(models.Lease.nome == nome,
+               or_(models.Lease.dono.is_(None), models.Lease.dono == dono, models.Lease.expira_em < agora))
+        .values(dono=dono, expira_em=agora + duracao)
+    )
+    db.commit()
+    return resultado.rowcount == 1
+
+def lease_valido(db: Session, nome: str, dono: str) -> bool:
+    """Se `dono` ainda detém o lease `nome` (não vencido)."""
+    return db.query(
+        exists().where(models.Lease.nome == nome, models.Lease.dono == dono,
+                       models.Lease.expira_em > datetime.now(timezone.utc))
+    ).scalar()
+
+def liberar_lease(db: Session, nome: str, dono: str):
+    """Devolve o lease, se ainda for de `dono`, para outro processo assumir sem esperar o vencimento."""
+    db.execute(
+        update(models.Lease)
+        .where(models.Lease.nome == nome, models.Lease.dono == dono)
+        .values(dono=None, expira_em=None)
+    )
+    db.commit()
+
+# --- Execuções das tarefas agendadas ---
+
+def iniciar_execucao_job(db: Session, job_id: str, processo: str) -> models.Execucao_Job:
+    execucao = models.Execucao_Job(job_id=job_id, processo=processo, status="executando")
+    db.add(execucao)
+    db.commit()
+    db.refresh(execucao)
+    return execucao
+
+def finalizar_execucao_job(db: Session, execucao_id: int, duracao_segundos: float, erro: Optional[str] = None):
+    db.execute(
+        update(models.Execucao_Job)
+        .where(models.Execucao_Job.id == execucao_id)
+        .values(status="erro" if erro else "sucesso", erro=erro,
+                data_fim=datetime.now(timezone.utc), duracao_segundos=round(duracao_segundos, 3))
+    )
+    db.commit()
+
+def get_execucoes_jobs(db: Session, job_id: Optional[str] = None, limit: int = 50):
+    query = db.query(models.Execucao_Job)
+    if job_id:
+        query = query.filter(models.Execucao_Job.job_id == job_id)
+    return query.order_by(desc(models.Execucao_Job.data_inicio), desc(models.Execucao_Job.id)).limit(limit).all()
+
+# --- Jobs administrativos ---
+
+def get_job(db: Session, job_id: int):
+    return db.query(models.Job).filter(models.Job.id == job_id).first()
+
+def get_jobs(db: Session, status: Optional[str] = None, tipo: Optional[str] = None, limit: int = 50):
+    query = db.query(models.Job)
+    if status:
+        query = query.filter(models.Job.status == status)
+    if tipo:
+        query = query.filter(models.Job.tipo == tipo)
+    return query.order_by(desc(models.Job.id)).limit(limit).all()
+
 # --- Funções CRUD para Estatistica_Jogador_Jogo ---
 
 def create_estatistica_jogo(db: Session, estatistica: schemas.EstatisticaCreate, jogo_id: int):
@@ -596,6 +856,30 @@ def create_estatistica_jogo(db: Session, estatistica: schemas.EstatisticaCreate,
     db.refresh(db_estatistica)
     return db_estatistica
 
+def inserir_estatisticas_em_lote(db: Session, linhas: List[dict]) -> int:
+    """
+    Insere estatísticas de vários jogos num único INSERT (executemany). `linhas` são dicts com
+    jogo_id, jogador_id, minutos_jogados, pontos, rebotes e assistencias; pares (jogo, jogador)
+    que já existem no banco são ignorados. Não faz commit. Retorna quantas linhas foram inseridas.
+    """
+    if not linhas:
+        return 0
+    existentes = set(
+        db.query(models.Estatistica_Jogador_Jogo.jogo_id, models.Estatistica_Jogador_Jogo.jogador_id)
+        .filter(models.Estatistica_Jogador_Jogo.jogo_id.in_({linha["jogo_id"] for linha in linhas}))
+        .all()
+    )
+    novas = [linha for linha in linhas if (linha["jogo_id"], linha["jogador_id"]) not in existentes]
+    if novas:
+        db.execute(models.Estatistica_Jogador_Jogo.__table__.insert(), novas)
+    return len(novas)
+
+def create_estatisticas_jogo_em_lote(db: Session, jogo_id: int, linhas: List[dict]) -> int:
+    """Grava as estatísticas de um jogo (ver inserir_estatisticas_em_lote) e faz commit."""
+    total = inserir_estatisticas_em_lote(db, [{**linha, "jogo_id": jogo_id} for linha in linhas])
+    db.commit()
+    return total
+
 def get_estatisticas_por_jogo(db: Session, jogo_id: int, skip: int = 0, limit: int = 100):
     """
     Busca estatísticas de um jogo, carregando os dados do jogador de forma otimizada (eager loading).
@@ -623,10 +907,13 @@ def create_avaliacao_jogo(db: Session, avaliacao: schemas.AvaliacaoJogoCreate, u
         jogo_id=jogo_id
     )
     db.add(db_avaliacao)
+    db.flush()
+    feed_inbox.distribuir_avaliacao(db, db_avaliacao)
+    atualizar_rollup_avaliacao(db, jogo_id, depois=snapshot_avaliacao_rollup(db_avaliacao))
+    registrar_avaliacao_criada(db, db_avaliacao)
     db.commit()
     db.refresh(db_avaliacao)
-    
-    check_conquistas_para_usuario(db, usuario_id=usuario_id)
+    invalidar_cache_user_stats(usuario_id)
 
     return db_avaliacao
 
@@ -642,12 +929,12 @@ def follow_user(db: Session, seguidor_id: int, seguido_id: int):
     
     db_follow = models.Seguidor(seguidor_id=seguidor_id, seguido_id=seguido_id)
     db.add(db_follow)
+    db.flush()
+    feed_inbox.preencher_ao_seguir(db, seguidor_id=seguidor_id, seguido_id=seguido_id)
+    registrar_seguir(db, seguidor_id=seguidor_id, seguido_id=seguido_id)
     db.commit()
     db.refresh(db_follow)
     
-    check_conquistas_para_usuario(db, usuario_id=seguidor_id)
-    check_conquistas_para_usuario(db, usuario_id=seguido_id)
-    
     return db_follow
 
 def unfollow_user(db: Session, seguidor_id: int, seguido_id: int):
@@ -657,6 +944,9 @@ def unfollow_user(db: Session, seguidor_id: int, seguido_id: int):
     ).first()
     if db_follow:
         db.delete(db_follow)
+        db.flush() # O recálculo das conquistas (autoflush desligado) não pode contar o follow removido
+        feed_inbox.remover_ao_deixar_de_seguir(db, seguidor_id=seguidor_id, seguido_id=seguido_id)
+        registrar_seguir(db, seguidor_id=seguidor_id, seguido_id=seguido_id, sinal=-1)
         db.commit()
         return True
     return False
@@ -668,13 +958,15 @@ def create_comentario(db: Session, comentario: schemas.ComentarioCreate, usuario
         avaliacao_id=avaliacao_id
     )
     db.add(db_comentario)
+    db.flush() # O recálculo das conquistas (autoflush desligado) precisa ver o comentário novo
     avaliacao = db.query(models.Avaliacao_Jogo).filter(models.Avaliacao_Jogo.id == avaliacao_id).first()
     usuario_que_comentou = db.query(models.Usuario).filter(models.Usuario.id == usuario_id).first()
 
+    # Os efeitos colaterais vão para a fila (ou rodam na hora, se ela estiver desligada)
     # 1. Notifica o autor da avaliação
     if avaliacao and avaliacao.usuario_id != usuario_id:
-        create_notificacao(
-            db=db,
+        fila_efeitos.enfileirar(
+            db, fila_efeitos.TIPO_NOTIFICACAO,
             usuario_id=avaliacao.usuario_id,
             tipo="comentario_avaliacao",
             mensagem=f"{usuario_que_comentou.username} comentou na sua avaliação.",
@@ -682,92 +974,117 @@ def create_comentario(db: Session, comentario: schemas.ComentarioCreate, usuario
             ref_tipo="avaliacao"
         )
     # 2. Adiciona ao feed
-    create_feed_item(
-        db=db,
+    fila_efeitos.enfileirar(
+        db, fila_efeitos.TIPO_FEED_ITEM,
         usuario_id=usuario_id,
         tipo="comentario_avaliacao",
         ref_id=avaliacao.id,
         ref_tipo="avaliacao"
     )
+    # 3. Conquistas
+    registrar_comentario(db, usuario_id=usuario_id)
     
     db.commit()
     db.refresh(db_comentario)
-    check_conquistas_para_usuario(db, usuario_id=usuario_id)
     
     return db_comentario
 
-def get_comentarios_por_avaliacao(db: Session, avaliacao_id: int, skip: int = 0, limit: int = 100):
-    return db.query(models.Comentario_Avaliacao).filter(models.Comentario_Avaliacao.avaliacao_id == avaliacao_id).offset(skip).limit(limit).all()
+def get_comentarios_por_avaliacao(db: Session, avaliacao_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    query = db.query(models.Comentario_Avaliacao)\
+        .filter(models.Comentario_Avaliacao.avaliacao_id == avaliacao_id)\
+        .order_by(models.Comentario_Avaliacao.data_comentario, models.Comentario_Avaliacao.id)
+    if cursor is None:
+        return query.offset(skip).limit(limit).all()
+    comentarios = _filtrar_por_cursor(
+        query, cursor, models.Comentario_Avaliacao.id, models.Comentario_Avaliacao.data_comentario
+    ).limit(limit).all()
+    return _montar_pagina(comentarios, limit, lambda c: (c.data_comentario, c.id))
+
+def _somar_curtidas(db: Session, avaliacao_id: int, delta: int):
+    """
+    Soma `delta` ao contador de curtidas num único UPDATE atômico (que também trava a
+    linha da avaliação até o commit). Retorna (curtidas, autor da avaliação) ou None
+    se a avaliação não existe.
+    """
+    return db.execute(
+        update(models.Avaliacao_Jogo)
+        .where(models.Avaliacao_Jogo.id == avaliacao_id)
+        .values(curtidas=func.coalesce(models.Avaliacao_Jogo.curtidas, 0) + delta)
+        .returning(models.Avaliacao_Jogo.curtidas, models.Avaliacao_Jogo.usuario_id)
+        .execution_options(synchronize_session=False)
+    ).first()
 
 def like_avaliacao(db: Session, usuario_id: int, avaliacao_id: int):
-    # 1. Verifica se a curtida já existe (correto)
-    db_like = db.query(models.Curtida_Avaliacao).filter(
-        models.Curtida_Avaliacao.usuario_id == usuario_id,
-        models.Curtida_Avaliacao.avaliacao_id == avaliacao_id
-    ).first()
-    if db_like:
+    # 1. Incrementa o contador; se a avaliação não existe, não há o que curtir
+    resultado = _somar_curtidas(db, avaliacao_id, 1)
+    if resultado is None:
+        db.rollback()
+        return 0
+    total_curtidas, autor_id = resultado
+
+    # 2. Insere a curtida na mesma transação. Curtida repetida viola a constraint
+    # _avaliacao_usuario_uc e o rollback desfaz também o incremento.
+    db.add(models.Curtida_Avaliacao(usuario_id=usuario_id, avaliacao_id=avaliacao_id))
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
         return None
 
-    # 2. Adiciona a nova curtida e faz o commit inicial
-    db_like = models.Curtida_Avaliacao(usuario_id=usuario_id, avaliacao_id=avaliacao_id)
-    db.add(db_like)
-    db.commit()
-
-    # 3. Busca a avaliação e atualiza o contador com o valor real do banco
-    avaliacao = db.query(models.Avaliacao_Jogo).filter(models.Avaliacao_Jogo.id == avaliacao_id).first()
-    if avaliacao:
-        total_curtidas = db.query(func.count(models.Curtida_Avaliacao.id)).filter(
-            models.Curtida_Avaliacao.avaliacao_id == avaliacao_id
-        ).scalar()
-        
-        avaliacao.curtidas = total_curtidas
-
-        # 4. Notificações e Feed (correto)
-        if avaliacao.usuario_id != usuario_id:
-            usuario_que_curtiu = db.query(models.Usuario).filter(models.Usuario.id == usuario_id).first()
-            create_notificacao(
-                db=db,
-                usuario_id=avaliacao.usuario_id,
-                tipo="curtida_avaliacao",
-                mensagem=f"{usuario_que_curtiu.username} curtiu sua avaliação.",
-                ref_id=avaliacao.id,
-                ref_tipo="avaliacao"
-            )
-        create_feed_item(
-            db=db,
-            usuario_id=usuario_id,
-            tipo="curtiu_avaliacao",
-            ref_id=avaliacao.id,
+    # 3. Notificações, Feed e Conquistas vão para a fila
+    if autor_id != usuario_id:
+        username = db.query(models.Usuario.username).filter(models.Usuario.id == usuario_id).scalar()
+        fila_efeitos.enfileirar(
+            db, fila_efeitos.TIPO_NOTIFICACAO,
+            usuario_id=autor_id,
+            tipo="curtida_avaliacao",
+            mensagem=f"{username} curtiu sua avaliação.",
+            ref_id=avaliacao_id,
             ref_tipo="avaliacao"
         )
-        
-        check_conquistas_para_usuario(db, usuario_id=avaliacao.usuario_id)
-        
-        db.commit()
-        return total_curtidas
-        
-    return 0
+    fila_efeitos.enfileirar(
+        db, fila_efeitos.TIPO_FEED_ITEM,
+        usuario_id=usuario_id,
+        tipo="curtiu_avaliacao",
+        ref_id=avaliacao_id,
+        ref_tipo="avaliacao"
+    )
+    registrar_curtida(db, avaliacao_id=avaliacao_id, autor_id=autor_id)
+
+    db.commit()
+    return total_curtidas
 
 def unlike_avaliacao(db: Session, usuario_id: int, avaliacao_id: int):
-    db_like = db.query(models.Curtida_Avaliacao).filter(
-        models.Curtida_Avaliacao.usuario_id == usuario_id,
-        models.Curtida_Avaliacao.avaliacao_id == avaliacao_id
-    ).first()
+    removidas = db.execute(
+        delete(models.Curtida_Avaliacao).where(
+            models.Curtida_Avaliacao.usuario_id == usuario_id,
+            models.Curtida_Avaliacao.avaliacao_id == avaliacao_id
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+    if not removidas:
+        db.rollback()
+        return None
 
-    if db_like:
-        db.delete(db_like)
-        db.commit()
-        
-        avaliacao = db.query(models.Avaliacao_Jogo).filter(models.Avaliacao_Jogo.id == avaliacao_id).first()
-        if avaliacao:
-            total_curtidas = db.query(func.count(models.Curtida_Avaliacao.id)).filter(
-                models.Curtida_Avaliacao.avaliacao_id == avaliacao_id
-            ).scalar()
-            avaliacao.curtidas = total_curtidas
-            db.commit()
-            return total_curtidas
-            
-    return None
+    resultado = _somar_curtidas(db, avaliacao_id, -1)
+    db.commit()
+    return resultado[0] if resultado else None
+
+def reconciliar_curtidas(db: Session) -> int:
+    """
+    Corrige divergências entre Avaliacao_Jogo.curtidas e as linhas de Curtida_Avaliacao
+    (ex.: curtidas apagadas em cascata ou escritas fora da API). Retorna quantas avaliações foram ajustadas.
+    """
+    total_real = select(func.count(models.Curtida_Avaliacao.id))\
+        .where(models.Curtida_Avaliacao.avaliacao_id == models.Avaliacao_Jogo.id)\
+        .scalar_subquery()
+    ajustadas = db.execute(
+        update(models.Avaliacao_Jogo)
+        .where(models.Avaliacao_Jogo.curtidas.is_distinct_from(total_real))
+        .values(curtidas=total_real)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return ajustadas
 
 # --- Funções para Notificações e Feed ---
 
@@ -789,18 +1106,50 @@ def create_feed_item(db: Session, usuario_id: int, tipo: str, ref_id: int, ref_t
         referencia_tipo=ref_tipo
     )
     db.add(db_item)
+    if feed_inbox.fanout_ativo():
+        db.flush()
+        feed_inbox.distribuir_atividade(db, db_item)
 
 def get_notificacoes_por_usuario(db: Session, usuario_id: int):
     return db.query(models.Notificacao).filter(models.Notificacao.usuario_id == usuario_id).order_by(models.Notificacao.data_criacao.desc()).all()
 
-def get_feed_para_usuario(db: Session, usuario_id: int):
+def get_feed_para_usuario(db: Session, usuario_id: int, limit: int = 50):
+    if feed_inbox.fanout_ativo():
+        # Caixa de entrada materializada: uma varredura pelo índice (usuario_id, data_item)
+        atividades = db.query(models.Feed_Atividade)\
+            .join(models.Feed_Inbox, models.Feed_Inbox.feed_atividade_id == models.Feed_Atividade.id)\
+            .options(joinedload(models.Feed_Atividade.usuario))\
+            .filter(models.Feed_Inbox.usuario_id == usuario_id)\
+            .order_by(models.Feed_Inbox.data_item.desc())\
+            .limit(limit).all()
+
+        # Celebridades não são distribuídas na escrita: busca as atividades delas na leitura
+        atividades_celebridades = db.query(models.Feed_Atividade)\
+            .options(joinedload(models.Feed_Atividade.usuario))\
+            .filter(models.Feed_Atividade.usuario_id.in_(feed_inbox.seguidos_celebridades(db, usuario_id)))\
+            .order_by(models.Feed_Atividade.data_atividade.desc())\
+            .limit(limit).all()
+
+        return _mesclar_por_data(atividades, atividades_celebridades, lambda a: a.data_atividade, limit)
+
     # 1. Encontra quem o usuário segue
     seguidos_ids = db.query(models.Seguidor.seguido_id).filter(models.Seguidor.seguidor_id == usuario_id).all()
     # Converte a lista de tuplas para uma lista de IDs
     ids_para_buscar = [id for id, in seguidos_ids]
     
     # 2. Busca atividades dessas pessoas
-    return db.query(models.Feed_Atividade).filter(models.Feed_Atividade.usuario_id.in_(ids_para_buscar)).order_by(models.Feed_Atividade.data_atividade.desc()).limit(50).all()
+    return db.query(models.Feed_Atividade).filter(models.Feed_Atividade.usuario_id.in_(ids_para_buscar)).order_by(models.Feed_Atividade.data_atividade.desc()).limit(limit).all()
+
+def _mesclar_por_data(itens: list, outros_itens: list, chave_data, limit: int) -> list:
+    """Junta duas listas já ordenadas por data (desc), removendo duplicados pelo id."""
+    vistos = set()
+    mesclados = []
+    for item in sorted(itens + outros_itens, key=chave_data, reverse=True):
+        if item.id in vistos:
+            continue
+        vistos.add(item.id)
+        mesclados.append(item)
+    return mesclados[:limit]
 
 def authenticate_user(db: Session, email: str, password: str):
     user = get_user_by_email(db, email=email)
@@ -885,23 +1234,20 @@ def get_trending_games(db: Session, limit: int = 3):
     
     return jogos_com_avaliacao
         
-def add_conquista_time(db: Session, time_id: int, nome_conquista: str, temporada: str):
-    db_conquista = db.query(models.Conquista_Time).filter(
-        models.Conquista_Time.time_id == time_id,
-        models.Conquista_Time.nome_conquista == nome_conquista,
-        models.Conquista_Time.temporada == temporada
-    ).first()
-
-    if not db_conquista:
-        nova_conquista = models.Conquista_Time(
-            time_id=time_id,
-            nome_conquista=nome_conquista,
-            temporada=temporada
-        )
-        db.add(nova_conquista)
-        db.commit()
-        return nova_conquista
-    return None
+def salvar_conquistas_times(db: Session, conquistas: List[dict]) -> List[tuple]:
+    """
+    Grava as conquistas (dicts time_id, nome_conquista, temporada) num único INSERT ...
+    ON CONFLICT DO NOTHING na _time_conquista_temporada_uc. Retorna (time_id, temporada)
+    das que eram novas. Não faz commit.
+    """
+    if not conquistas:
+        return []
+    insert = _insert_upsert(db)
+    return [tuple(linha) for linha in db.execute(
+        insert(models.Conquista_Time).values(conquistas)
+        .on_conflict_do_nothing(index_elements=["time_id", "nome_conquista", "temporada"])
+        .returning(models.Conquista_Time.time_id, models.Conquista_Time.temporada)
+    ).all()]
 
 def get_time_by_slug(db: Session, time_slug: str):
     return db.query(models.Time).filter(models.Time.slug == time_slug).first()
@@ -958,14 +1304,8 @@ XP_PARA_NIVEL = {
     NivelUsuario.GOAT: 2500
 }
 
-def update_nivel_usuario(db: Session, usuario_id: int):
-    """
-    Verifica o XP de um usuário e atualiza seu nível se necessário.
-    """
-    db_usuario = db.query(models.Usuario).filter(models.Usuario.id == usuario_id).first()
-    if not db_usuario:
-        return
-
+def _atualizar_nivel(db_usuario: models.Usuario):
+    """Recalcula o nível do usuário a partir do XP que ele já tem carregado."""
     novo_nivel = db_usuario.nivel_usuario 
     for nivel, xp_necessario in XP_PARA_NIVEL.items():
         if db_usuario.pontos_experiencia >= xp_necessario:
@@ -975,130 +1315,387 @@ def update_nivel_usuario(db: Session, usuario_id: int):
         db_usuario.nivel_usuario = novo_nivel
         print(f"Usuário {db_usuario.username} subiu para o nível: {novo_nivel.value}!")
 
+def update_nivel_usuario(db: Session, usuario_id: int):
+    """
+    Verifica o XP de um usuário e atualiza seu nível se necessário.
+    """
+    db_usuario = db.query(models.Usuario).filter(models.Usuario.id == usuario_id).first()
+    if not db_usuario:
+        return
+    _atualizar_nivel(db_usuario)
+
 def popular_conquistas(db: Session):
     """
-    Verifica e cria as conquistas padrão no banco de dados se elas não existirem.
+    Grava as conquistas padrão num único INSERT ... ON CONFLICT (upsert em lote).
+    Conquistas existentes têm nome, descrição e pontos sincronizados com DEFINICOES_CONQUISTAS.
+    Roda no deploy, via `python -m app.migrate`.
     """
-    for id, detalhes in DEFINICOES_CONQUISTAS.items():
-        db_conquista = db.query(models.Conquista).filter(models.Conquista.id == id).first()
-        if not db_conquista:
-            nova_conquista = models.Conquista(
-                id=id,
-                nome=detalhes["nome"],
-                descricao=detalhes["descricao"],
-                pontos_experiencia=detalhes["pontos"]
-            )
-            db.add(nova_conquista)
+    upsert = _insert_upsert(db)
+    linhas = [
+        {"id": id, "nome": detalhes["nome"], "descricao": detalhes["descricao"], "pontos_experiencia": detalhes["pontos"]}
+        for id, detalhes in DEFINICOES_CONQUISTAS.items()
+    ]
+    stmt = upsert(models.Conquista).values(linhas)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[models.Conquista.id],
+        set_={
+            "nome": stmt.excluded.nome,
+            "descricao": stmt.excluded.descricao,
+            "pontos_experiencia": stmt.excluded.pontos_experiencia,
+        }
+    ))
     db.commit()
 
 def grant_conquista_usuario(db: Session, usuario_id: int, conquista_id: int):
     """
     Atribui uma conquista a um usuário, adiciona XP e verifica se subiu de nível.
     """
-    db_possui_conquista = db.query(models.Usuario_Conquista).filter(
-        models.Usuario_Conquista.usuario_id == usuario_id,
-        models.Usuario_Conquista.conquista_id == conquista_id
-    ).first()
+    novas = _conceder_conquistas(db, usuario_id, [conquista_id])
+    db.commit()
+    return novas[0] if novas else None
+
+# --- Motor incremental de conquistas ---
+#
+# Cada ação do usuário gera um evento. O evento atualiza os contadores em
+# Progresso_Conquista e avalia apenas as conquistas associadas a ele,
+# sem reler todas as avaliações do usuário.
+
+EVENTO_AVALIACAO = "avaliacao"
+EVENTO_COMENTARIO = "comentario"
+EVENTO_SEGUINDO = "seguindo"
+EVENTO_SEGUIDOR = "seguidor"
+EVENTO_CURTIDA = "curtida"
+
+RIVALRIES = [
+    (2, 14),  # Celtics vs Lakers
+    (17, 7),  # Knicks vs Bulls
+]
+
+# Conquistas que dependem só dos contadores: {id: (evento, atributo do progresso, mínimo)}
+CONQUISTAS_POR_CONTADOR = {
+    1: (EVENTO_AVALIACAO, "total_avaliacoes", 1),           # Primeira Avaliação
+    2: (EVENTO_AVALIACAO, "total_avaliacoes", 10),          # Crítico Ativo
+    13: (EVENTO_AVALIACAO, "total_avaliacoes", 50),         # Crítico Experiente
+    16: (EVENTO_AVALIACAO, "total_avaliacoes", 100),        # Lenda da Análise
+    5: (EVENTO_AVALIACAO, "avaliacoes_time_favorito", 1),   # Coração Valente
+    17: (EVENTO_AVALIACAO, "avaliacoes_time_favorito", 25), # Especialista da Franquia
+    10: (EVENTO_AVALIACAO, "avaliacoes_com_detalhes", 25),  # Analista Tático
+    18: (EVENTO_AVALIACAO, "total_times_avaliados", 30),    # Maratonista da NBA
+    12: (EVENTO_AVALIACAO, "total_avaliacoes_semana", 5),   # Maratonista
+    3: (EVENTO_COMENTARIO, "total_comentarios", 1),         # Comentarista
+    4: (EVENTO_SEGUINDO, "total_seguindo", 5),              # Social
+    9: (EVENTO_SEGUIDOR, "total_seguidores", 10),           # Formador de Opinião
+    15: (EVENTO_SEGUIDOR, "total_seguidores", 25),          # Influenciador
+}
 
-    if not db_possui_conquista:
-        nova_usuario_conquista = models.Usuario_Conquista(
-            usuario_id=usuario_id,
-            conquista_id=conquista_id
-        )
-        db.add(nova_usuario_conquista)
-        
-        db_usuario = db.query(models.Usuario).filter(models.Usuario.id == usuario_id).first()
-        pontos = DEFINICOES_CONQUISTAS[conquista_id]["pontos"]
-        db_usuario.pontos_experiencia += pontos
-        
-        print(f"Conquista '{DEFINICOES_CONQUISTAS[conquista_id]['nome']}' atribuída ao usuário {usuario_id} (+{pontos} XP).")
+def _is_rivalidade(jogo: models.Jogo) -> bool:
+    casa, visitante = jogo.time_casa.api_id, jogo.time_visitante.api_id
+    return any({casa, visitante} == {team1, team2} for team1, team2 in RIVALRIES)
+
+# Conquistas que dependem de uma avaliação específica: {id: (evento, condição)}
+CONQUISTAS_POR_AVALIACAO = {
+    7: (EVENTO_AVALIACAO, lambda av: av.nota_geral == 5.0),                                # Jogo da Temporada
+    6: (EVENTO_AVALIACAO, lambda av: bool(av.jogo.status_jogo) and "OT" in av.jogo.status_jogo), # Na Prorrogação
+    11: (EVENTO_AVALIACAO, lambda av: _is_rivalidade(av.jogo)),                  # Rivalidade Histórica
+    8: (EVENTO_CURTIDA, lambda av: (av.curtidas or 0) >= 10),                              # Voz da Torcida
+    14: (EVENTO_CURTIDA, lambda av: (av.curtidas or 0) >= 50),                             # Ouro Puro
+}
 
-        update_nivel_usuario(db, usuario_id=usuario_id)
+def _inicio_janela_semanal() -> datetime:
+    """Avaliações feitas a partir desta data contam para o "Maratonista"."""
+    return datetime.combine((datetime.now() - timedelta(days=7)).date() + timedelta(days=1), datetime.min.time())
 
-        db.commit()
-        return nova_usuario_conquista
-        
-    return None
+def _total_times_avaliados(progresso: models.Progresso_Conquista) -> int:
+    return sum(1 for total in (progresso.times_avaliados or {}).values() if total > 0)
 
-def check_conquistas_para_usuario(db: Session, usuario_id: int):
+def _total_avaliacoes_semana(progresso: models.Progresso_Conquista) -> int:
+    inicio = _inicio_janela_semanal()
+    return sum(1 for _, data in (progresso.avaliacoes_recentes or []) if datetime.fromisoformat(data) >= inicio)
+
+def _valor_contador(progresso: models.Progresso_Conquista, atributo: str) -> int:
+    if atributo == "total_times_avaliados":
+        return _total_times_avaliados(progresso)
+    if atributo == "total_avaliacoes_semana":
+        return _total_avaliacoes_semana(progresso)
+    return getattr(progresso, atributo) or 0
+
+def _conceder_conquistas(db: Session, usuario_id: int, conquista_ids) -> List[models.Usuario_Conquista]:
     """
-    Função "mestra" que verifica todas as condições de conquistas para um usuário.
+    Concede de uma vez as conquistas que o usuário ainda não tem, somando o XP
+    e atualizando o nível. Não faz commit: fica na transação de quem chamou.
     """
-    db_usuario = db.query(models.Usuario).filter(models.Usuario.id == usuario_id).first()
-    if not db_usuario:
-        return
+    conquista_ids = set(conquista_ids)
+    if not conquista_ids:
+        return []
 
-    # --- Conquistas baseadas em AVALIAÇÕES ---
-    avaliacoes = db.query(models.Avaliacao_Jogo).filter(models.Avaliacao_Jogo.usuario_id == usuario_id).all()
-    total_avaliacoes = len(avaliacoes)
+    ja_possui = {
+        conquista_id for conquista_id, in db.query(models.Usuario_Conquista.conquista_id).filter(
+            models.Usuario_Conquista.usuario_id == usuario_id,
+            models.Usuario_Conquista.conquista_id.in_(conquista_ids)
+        )
+    }
+    novas_ids = sorted(conquista_ids - ja_possui)
+    if not novas_ids:
+        return []
 
-    if total_avaliacoes >= 1: grant_conquista_usuario(db, usuario_id, 1) # Primeira Avaliação
-    if total_avaliacoes >= 10: grant_conquista_usuario(db, usuario_id, 2) # Crítico Ativo
-    if total_avaliacoes >= 50: grant_conquista_usuario(db, usuario_id, 13) # Crítico Experiente
-    if total_avaliacoes >= 100: grant_conquista_usuario(db, usuario_id, 16) # Lenda da Análise
+    db_usuario = db.query(models.Usuario).filter(models.Usuario.id == usuario_id).first()
+    if not db_usuario:
+        return []
 
-    # --- Conquistas baseadas em COMENTÁRIOS ---
-    if db.query(models.Comentario_Avaliacao).filter(models.Comentario_Avaliacao.usuario_id == usuario_id).count() >= 1:
-        grant_conquista_usuario(db, usuario_id, 3) # Comentarista
+    novas = []
+    for conquista_id in novas_ids:
+        nova_usuario_conquista = models.Usuario_Conquista(usuario_id=usuario_id, conquista_id=conquista_id)
+        db.add(nova_usuario_conquista)
+        novas.append(nova_usuario_conquista)
 
-    # --- Conquistas baseadas em SEGUIR/SEGUIDORES ---
-    total_seguindo = db.query(models.Seguidor).filter(models.Seguidor.seguidor_id == usuario_id).count()
-    total_seguidores = db.query(models.Seguidor).filter(models.Seguidor.seguido_id == usuario_id).count()
+        pontos = DEFINICOES_CONQUISTAS[conquista_id]["pontos"]
+        db_usuario.pontos_experiencia = (db_usuario.pontos_experiencia or 0) + pontos
+        print(f"Conquista '{DEFINICOES_CONQUISTAS[conquista_id]['nome']}' atribuída ao usuário {usuario_id} (+{pontos} XP).")
 
-    if total_seguindo >= 5: grant_conquista_usuario(db, usuario_id, 4) # Social
-    if total_seguidores >= 10: grant_conquista_usuario(db, usuario_id, 9) # Formador de Opinião
-    if total_seguidores >= 25: grant_conquista_usuario(db, usuario_id, 15) # Influenciador
+    _atualizar_nivel(db_usuario)
+    return novas
 
-    # --- Lógicas mais complexas que iteram sobre as avaliações ---
-    avaliacoes_time_favorito = 0
-    avaliacoes_com_detalhes = 0
-    times_avaliados = set()
+def _buscar_progresso(db: Session, usuario_id: int) -> Optional[models.Progresso_Conquista]:
+    return db.query(models.Progresso_Conquista)\
+        .filter(models.Progresso_Conquista.usuario_id == usuario_id)\
+        .with_for_update()\
+        .first()
 
-    uma_semana_atras = datetime.now() - timedelta(days=7)
-    avaliacoes_na_semana = 0
-    
-    RIVALRIES = [
-        (2, 14),  # Celtics vs Lakers
-        (17, 7),  # Knicks vs Bulls
+def _get_progresso(db: Session, usuario_id: int):
+    """
+    Busca (com lock) os contadores do usuário. Na primeira vez eles são calculados
+    a partir do banco, já refletindo a ação em andamento; por isso retorna também
+    se a linha acabou de ser calculada, para que o evento não seja contado duas vezes.
+    """
+    progresso = _buscar_progresso(db, usuario_id)
+    if progresso is not None:
+        return progresso, False
+    # Se outro evento do mesmo usuário criar a linha ao mesmo tempo, o INSERT viola a
+    # chave primária; a linha dele não viu esta ação, então o evento é aplicado nela.
+    try:
+        with db.begin_nested():
+            return _calcular_progressos(db, [usuario_id])[usuario_id], True
+    except IntegrityError:
+        return _buscar_progresso(db, usuario_id), False
+
+def _avaliar_evento(db: Session, usuario_id: int, evento: str, progresso: models.Progresso_Conquista, avaliacao: Optional[models.Avaliacao_Jogo] = None):
+    """Avalia só as conquistas ligadas ao evento e concede as que foram atingidas."""
+    atingidas = [
+        conquista_id for conquista_id, (evento_conquista, atributo, minimo) in CONQUISTAS_POR_CONTADOR.items()
+        if evento_conquista == evento and _valor_contador(progresso, atributo) >= minimo
+    ]
+    if avaliacao is not None:
+        atingidas += [
+            conquista_id for conquista_id, (evento_conquista, condicao) in CONQUISTAS_POR_AVALIACAO.items()
+            if evento_conquista == evento and condicao(avaliacao)
+        ]
+    return _conceder_conquistas(db, usuario_id, atingidas)
+
+def _aplicar_avaliacao_no_progresso(progresso: models.Progresso_Conquista, avaliacao: models.Avaliacao_Jogo, time_favorito_id: Optional[int], sinal: int, data: Optional[datetime] = None):
+    """Soma (sinal=1) ou subtrai (sinal=-1) uma avaliação dos contadores do usuário."""
+    jogo = avaliacao.jogo
+    progresso.total_avaliacoes += sinal
+    if avaliacao.nota_ataque_casa is not None and avaliacao.nota_defesa_casa is not None:
+        progresso.avaliacoes_com_detalhes += sinal
+    if time_favorito_id and time_favorito_id in (jogo.time_casa_id, jogo.time_visitante_id):
+        progresso.avaliacoes_time_favorito += sinal
+
+    # Colunas JSON só são persistidas quando reatribuídas
+    times = dict(progresso.times_avaliados or {})
+    for time_id in (jogo.time_casa_id, jogo.time_visitante_id):
+        chave = str(time_id)
+        times[chave] = times.get(chave, 0) + sinal
+        if times[chave] <= 0:
+            times.pop(chave)
+    progresso.times_avaliados = times
+
+    inicio = _inicio_janela_semanal()
+    recentes = [
+        [avaliacao_id, data_iso] for avaliacao_id, data_iso in (progresso.avaliacoes_recentes or [])
+        if avaliacao_id != avaliacao.id and datetime.fromisoformat(data_iso) >= inicio
     ]
+    if sinal > 0:
+        recentes.append([avaliacao.id, (data or datetime.now()).isoformat()])
+    progresso.avaliacoes_recentes = recentes
+
+def registrar_avaliacao_criada(db: Session, avaliacao: models.Avaliacao_Jogo):
+    db_usuario = db.query(models.Usuario).filter(models.Usuario.id == avaliacao.usuario_id).first()
+    progresso, recem_calculado = _get_progresso(db, avaliacao.usuario_id)
+    if not recem_calculado:
+        _aplicar_avaliacao_no_progresso(progresso, avaliacao, db_usuario.time_favorito_id, sinal=1)
+    return _avaliar_evento(db, avaliacao.usuario_id, EVENTO_AVALIACAO, progresso, avaliacao=avaliacao)
+
+def registrar_avaliacao_atualizada(db: Session, avaliacao: models.Avaliacao_Jogo, tinha_detalhes: bool):
+    progresso, recem_calculado = _get_progresso(db, avaliacao.usuario_id)
+    if not recem_calculado:
+        tem_detalhes = avaliacao.nota_ataque_casa is not None and avaliacao.nota_defesa_casa is not None
+        progresso.avaliacoes_com_detalhes += int(tem_detalhes) - int(tinha_detalhes)
+    return _avaliar_evento(db, avaliacao.usuario_id, EVENTO_AVALIACAO, progresso, avaliacao=avaliacao)
+
+def registrar_avaliacao_removida(db: Session, avaliacao: models.Avaliacao_Jogo):
+    """Chamada antes do db.delete: a avaliação ainda conta no banco, então sempre é subtraída."""
+    db_usuario = db.query(models.Usuario).filter(models.Usuario.id == avaliacao.usuario_id).first()
+    progresso, _ = _get_progresso(db, avaliacao.usuario_id)
+    _aplicar_avaliacao_no_progresso(progresso, avaliacao, db_usuario.time_favorito_id, sinal=-1)
+
+# Nas interações sociais os contadores são atualizados na transação da ação (é barato
+# e mantém o progresso consistente), mas a avaliação das conquistas passa pela fila
+# de efeitos; como ela só concede o que falta, pode rodar depois e mais de uma vez.
+
+def registrar_comentario(db: Session, usuario_id: int):
+    progresso, recem_calculado = _get_progresso(db, usuario_id)
+    if not recem_calculado:
+        progresso.total_comentarios += 1
+    fila_efeitos.enfileirar(db, fila_efeitos.TIPO_CONQUISTAS, usuario_id=usuario_id, evento=EVENTO_COMENTARIO)
+
+def registrar_seguir(db: Session, seguidor_id: int, seguido_id: int, sinal: int = 1):
+    progresso_seguidor, recem_calculado = _get_progresso(db, seguidor_id)
+    if not recem_calculado:
+        progresso_seguidor.total_seguindo += sinal
+    progresso_seguido, recem_calculado = _get_progresso(db, seguido_id)
+    if not recem_calculado:
+        progresso_seguido.total_seguidores += sinal
+    if sinal > 0:
+        fila_efeitos.enfileirar(db, fila_efeitos.TIPO_CONQUISTAS, usuario_id=seguidor_id, evento=EVENTO_SEGUINDO)
+        fila_efeitos.enfileirar(db, fila_efeitos.TIPO_CONQUISTAS, usuario_id=seguido_id, evento=EVENTO_SEGUIDOR)
+
+def registrar_curtida(db: Session, avaliacao_id: int, autor_id: int):
+    fila_efeitos.enfileirar(db, fila_efeitos.TIPO_CONQUISTAS, usuario_id=autor_id, evento=EVENTO_CURTIDA, avaliacao_id=avaliacao_id)
+
+def avaliar_conquistas(db: Session, usuario_id: int, evento: str, avaliacao_id: Optional[int] = None):
+    """Avalia as conquistas de um evento já contabilizado (usado pela fila de efeitos)."""
+    progresso, _ = _get_progresso(db, usuario_id)
+    avaliacao = None
+    if avaliacao_id is not None:
+        avaliacao = db.query(models.Avaliacao_Jogo).filter(models.Avaliacao_Jogo.id == avaliacao_id).first()
+        if avaliacao is None:
+            return []
+    return _avaliar_evento(db, usuario_id, evento, progresso, avaliacao=avaliacao)
 
-    for av in avaliacoes:
-        # Jogo da Temporada (Nota 5.0)
-        if av.nota_geral == 5.0: grant_conquista_usuario(db, usuario_id, 7)
-        # Na Prorrogação (OT)
-        if av.jogo.status_jogo and "OT" in av.jogo.status_jogo: grant_conquista_usuario(db, usuario_id, 6)
-        # Voz da Torcida (10 curtidas) e Ouro Puro (50 curtidas)
-        if (av.curtidas or 0) >= 10: grant_conquista_usuario(db, usuario_id, 8)
-        if (av.curtidas or 0) >= 50: grant_conquista_usuario(db, usuario_id, 14)
-
-        # Coração Valente e Especialista da Franquia
-        if db_usuario.time_favorito_id and (av.jogo.time_casa_id == db_usuario.time_favorito_id or av.jogo.time_visitante_id == db_usuario.time_favorito_id):
-            avaliacoes_time_favorito += 1
-        
-        # Analista Tático
-        if av.nota_ataque_casa is not None and av.nota_defesa_casa is not None:
-            avaliacoes_com_detalhes += 1
+def _calcular_progressos(db: Session, usuario_ids: Optional[List[int]] = None) -> dict:
+    """
+    Recalcula do zero, com consultas agrupadas, os contadores de progresso de
+    vários usuários (ou de todos, se usuario_ids for None) e grava-os.
+    """
+    def _filtrar(query, coluna):
+        return query.filter(coluna.in_(usuario_ids)) if usuario_ids is not None else query
+
+    Av = models.Avaliacao_Jogo
+
+    total_avaliacoes = dict(_filtrar(db.query(Av.usuario_id, func.count(Av.id)), Av.usuario_id).group_by(Av.usuario_id).all())
+    com_detalhes = dict(_filtrar(db.query(Av.usuario_id, func.count(Av.id)), Av.usuario_id).filter(
+        Av.nota_ataque_casa.isnot(None), Av.nota_defesa_casa.isnot(None)
+    ).group_by(Av.usuario_id).all())
+    time_favorito = dict(_filtrar(db.query(Av.usuario_id, func.count(Av.id)), Av.usuario_id)
+        .join(models.Jogo, Av.jogo_id == models.Jogo.id)
+        .join(models.Usuario, Av.usuario_id == models.Usuario.id)
+        .filter(models.Usuario.time_favorito_id.isnot(None))
+        .filter((models.Jogo.time_casa_id == models.Usuario.time_favorito_id) | (models.Jogo.time_visitante_id == models.Usuario.time_favorito_id))
+        .group_by(Av.usuario_id).all())
+
+    times_avaliados = {}
+    for coluna_time in (models.Jogo.time_casa_id, models.Jogo.time_visitante_id):
+        linhas = _filtrar(db.query(Av.usuario_id, coluna_time, func.count(Av.id)), Av.usuario_id)\
+            .join(models.Jogo, Av.jogo_id == models.Jogo.id)\
+            .group_by(Av.usuario_id, coluna_time).all()
+        for usuario_id, time_id, total in linhas:
+            times = times_avaliados.setdefault(usuario_id, {})
+            times[str(time_id)] = times.get(str(time_id), 0) + total
+
+    recentes = {}
+    for usuario_id, avaliacao_id, data in _filtrar(db.query(Av.usuario_id, Av.id, Av.data_avaliacao), Av.usuario_id)\
+            .filter(Av.data_avaliacao >= _inicio_janela_semanal()).all():
+        recentes.setdefault(usuario_id, []).append([avaliacao_id, data.replace(tzinfo=None).isoformat()])
+
+    Com = models.Comentario_Avaliacao
+    total_comentarios = dict(_filtrar(db.query(Com.usuario_id, func.count(Com.id)), Com.usuario_id).group_by(Com.usuario_id).all())
+    Seg = models.Seguidor
+    total_seguindo = dict(_filtrar(db.query(Seg.seguidor_id, func.count(Seg.id)), Seg.seguidor_id).group_by(Seg.seguidor_id).all())
+    total_seguidores = dict(_filtrar(db.query(Seg.seguido_id, func.count(Seg.id)), Seg.seguido_id).group_by(Seg.seguido_id).all())
+
+    if usuario_ids is None:
+        usuario_ids = [usuario_id for usuario_id, in db.query(models.Usuario.id)]
+
+    existentes = {
+        p.usuario_id: p for p in db.query(models.Progresso_Conquista)
+        .filter(models.Progresso_Conquista.usuario_id.in_(usuario_ids))
+    }
+    progressos = {}
+    for usuario_id in usuario_ids:
+        progresso = existentes.get(usuario_id)
+        if progresso is None:
+            progresso = models.Progresso_Conquista(usuario_id=usuario_id)
+            db.add(progresso)
+        progresso.total_avaliacoes = total_avaliacoes.get(usuario_id, 0)
+        progresso.avaliacoes_com_detalhes = com_detalhes.get(usuario_id, 0)
+        progresso.avaliacoes_time_favorito = time_favorito.get(usuario_id, 0)
+        progresso.times_avaliados = times_avaliados.get(usuario_id, {})
+        progresso.avaliacoes_recentes = recentes.get(usuario_id, [])
+        progresso.total_comentarios = total_comentarios.get(usuario_id, 0)
+        progresso.total_seguindo = total_seguindo.get(usuario_id, 0)
+        progresso.total_seguidores = total_seguidores.get(usuario_id, 0)
+        progressos[usuario_id] = progresso
+    # A sessão usa autoflush=False: grava já para que a próxima busca encontre as linhas
+    db.flush()
+    return progressos
 
-        # Maratonista da NBA
-        times_avaliados.add(av.jogo.time_casa_id)
-        times_avaliados.add(av.jogo.time_visitante_id)
+def _usuarios_com_conquistas_por_avaliacao(db: Session, usuario_ids: Optional[List[int]] = None) -> dict:
+    """
+    Para o recálculo em lote: {conquista_id: {usuario_ids}} das conquistas que
+    dependem de uma avaliação específica, calculadas direto no banco.
+    """
+    Av = models.Avaliacao_Jogo
+    TimeCasa = aliased(models.Time)
+    TimeVisitante = aliased(models.Time)
+
+    def _usuarios(query):
+        if usuario_ids is not None:
+            query = query.filter(Av.usuario_id.in_(usuario_ids))
+        return {usuario_id for usuario_id, in query.distinct()}
+
+    com_jogo = lambda: db.query(Av.usuario_id).join(models.Jogo, Av.jogo_id == models.Jogo.id)
+    rivalidade = or_(*[
+        or_(and_(TimeCasa.api_id == team1, TimeVisitante.api_id == team2),
+            and_(TimeCasa.api_id == team2, TimeVisitante.api_id == team1))
+        for team1, team2 in RIVALRIES
+    ])
+    return {
+        7: _usuarios(db.query(Av.usuario_id).filter(Av.nota_geral == 5.0)),
+        6: _usuarios(com_jogo().filter(models.Jogo.status_jogo.like("%OT%"))),
+        11: _usuarios(com_jogo()
+                      .join(TimeCasa, models.Jogo.time_casa_id == TimeCasa.id)
+                      .join(TimeVisitante, models.Jogo.time_visitante_id == TimeVisitante.id)
+                      .filter(rivalidade)),
+        8: _usuarios(db.query(Av.usuario_id).filter(Av.curtidas >= 10)),
+        14: _usuarios(db.query(Av.usuario_id).filter(Av.curtidas >= 50)),
+    }
 
-        # Maratonista
-        if av.data_avaliacao.date() > uma_semana_atras.date():
-            avaliacoes_na_semana += 1
-            
-        # Rivalidade Histórica
-        for team1, team2 in RIVALRIES:
-            if (av.jogo.time_casa.api_id == team1 and av.jogo.time_visitante.api_id == team2) or \
-               (av.jogo.time_casa.api_id == team2 and av.jogo.time_visitante.api_id == team1):
-                grant_conquista_usuario(db, usuario_id, 11)
+def recalcular_conquistas(db: Session, usuario_ids: Optional[List[int]] = None):
+    """
+    Job de recálculo em lote (backfill): reconstrói os contadores de progresso
+    e concede todas as conquistas já atingidas. Com usuario_ids=None processa todos.
+    """
+    progressos = _calcular_progressos(db, usuario_ids)
+    por_avaliacao = _usuarios_com_conquistas_por_avaliacao(db, usuario_ids)
+
+    total_concedidas = 0
+    for usuario_id, progresso in progressos.items():
+        atingidas = [
+            conquista_id for conquista_id, (_, atributo, minimo) in CONQUISTAS_POR_CONTADOR.items()
+            if _valor_contador(progresso, atributo) >= minimo
+        ]
+        atingidas += [conquista_id for conquista_id, usuarios in por_avaliacao.items() if usuario_id in usuarios]
+        total_concedidas += len(_conceder_conquistas(db, usuario_id, atingidas))
 
+    db.commit()
+    return {"usuarios_processados": len(progressos), "conquistas_concedidas": total_concedidas}
 
-    if avaliacoes_time_favorito >= 1: grant_conquista_usuario(db, usuario_id, 5)
-    if avaliacoes_time_favorito >= 25: grant_conquista_usuario(db, usuario_id, 17)
-    if avaliacoes_com_detalhes >= 25: grant_conquista_usuario(db, usuario_id, 10)
-    if len(times_avaliados) >= 30: grant_conquista_usuario(db, usuario_id, 18)
-    if avaliacoes_na_semana >= 5: grant_conquista_usuario(db, usuario_id, 12)
+def check_conquistas_para_usuario(db: Session, usuario_id: int):
+    """
+    Verifica todas as condições de conquistas para um usuário, recalculando o progresso do zero.
+    O fluxo normal usa os eventos registrar_*; esta função fica para reconciliação.
+    """
+    return recalcular_conquistas(db, usuario_ids=[usuario_id])
 
 
 def get_conquistas_por_usuario(db: Session, user_id: int):
@@ -1153,59 +1750,162 @@ def perform_advanced_search(
 
     return resultados
 
+# --- Rollup das notas por jogo (estatísticas gerais) ---
+
+# Notas agregadas no rollup: sufixo das colunas soma_*/total_* -> coluna em Avaliacao_Jogo
+NOTAS_ROLLUP = {
+    "geral": "nota_geral",
+    "ataque_casa": "nota_ataque_casa",
+    "defesa_casa": "nota_defesa_casa",
+    "ataque_visitante": "nota_ataque_visitante",
+    "defesa_visitante": "nota_defesa_visitante",
+    "arbitragem": "nota_arbitragem",
+    "atmosfera": "nota_atmosfera",
+}
+
+def snapshot_avaliacao_rollup(avaliacao: models.Avaliacao_Jogo) -> dict:
+    """Valores de uma avaliação que entram no rollup, capturados antes de uma edição ou remoção."""
+    valores = {coluna: getattr(avaliacao, coluna) for coluna in NOTAS_ROLLUP.values()}
+    valores["melhor_jogador_id"] = avaliacao.melhor_jogador_id
+    valores["pior_jogador_id"] = avaliacao.pior_jogador_id
+    return valores
+
+def _mais_votado_rollup(votos: dict):
+    """(jogador_id, votos) do mais votado; empates ficam com o menor id."""
+    if not votos:
+        return None, 0
+    jogador_id, total = min(votos.items(), key=lambda item: (-item[1], int(item[0])))
+    return int(jogador_id), total
+
+def _atualizar_destaques_rollup(rollup: models.Jogo_Rating_Rollup):
+    rollup.mvp_jogador_id, rollup.mvp_votos = _mais_votado_rollup(rollup.votos_mvp)
+    rollup.decepcao_jogador_id, rollup.decepcao_votos = _mais_votado_rollup(rollup.votos_decepcao)
+
+def _aplicar_no_rollup(rollup: models.Jogo_Rating_Rollup, valores: dict, sinal: int):
+    """Soma (sinal=1) ou subtrai (sinal=-1) uma avaliação do rollup."""
+    rollup.total_avaliacoes += sinal
+    for nome, coluna in NOTAS_ROLLUP.items():
+        if valores[coluna] is not None:
+            setattr(rollup, f"soma_{nome}", getattr(rollup, f"soma_{nome}") + sinal * valores[coluna])
+            setattr(rollup, f"total_{nome}", getattr(rollup, f"total_{nome}") + sinal)
+
+    # Colunas JSON só são persistidas quando reatribuídas
+    for atributo, chave_valor in (("votos_mvp", "melhor_jogador_id"), ("votos_decepcao", "pior_jogador_id")):
+        if valores[chave_valor] is None:
+            continue
+        votos = dict(getattr(rollup, atributo) or {})
+        chave = str(valores[chave_valor])
+        votos[chave] = votos.get(chave, 0) + sinal
+        if votos[chave] <= 0:
+            votos.pop(chave)
+        setattr(rollup, atributo, votos)
+
+def recalcular_rollup_jogo(db: Session, jogo_id: int) -> Optional[models.Jogo_Rating_Rollup]:
+    """
+    Reconstrói o rollup de um jogo a partir das avaliações (consultas agrupadas).
+    Sem avaliações, não grava nada e retorna None.
+    """
+    Av = models.Avaliacao_Jogo
+    agregados = db.query(
+        func.count(Av.id),
+        *[func.sum(getattr(Av, coluna)) for coluna in NOTAS_ROLLUP.values()],
+        *[func.count(getattr(Av, coluna)) for coluna in NOTAS_ROLLUP.values()],
+    ).filter(Av.jogo_id == jogo_id).one()
+    total_avaliacoes = agregados[0]
+
+    rollup = db.get(models.Jogo_Rating_Rollup, jogo_id)
+    if total_avaliacoes == 0:
+        if rollup is not None:
+            db.delete(rollup)
+        return None
+
+    if rollup is None:
+        rollup = models.Jogo_Rating_Rollup(jogo_id=jogo_id)
+        db.add(rollup)
+
+    rollup.total_avaliacoes = total_avaliacoes
+    n = len(NOTAS_ROLLUP)
+    for i, nome in enumerate(NOTAS_ROLLUP):
+        setattr(rollup, f"soma_{nome}", agregados[1 + i] or 0)
+        setattr(rollup, f"total_{nome}", agregados[1 + n + i])
+
+    def _votos(coluna):
+        return {
+            str(jogador_id): votos for jogador_id, votos in
+            db.query(coluna, func.count(Av.id)).filter(Av.jogo_id == jogo_id, coluna.isnot(None)).group_by(coluna)
+        }
+    rollup.votos_mvp = _votos(Av.melhor_jogador_id)
+    rollup.votos_decepcao = _votos(Av.pior_jogador_id)
+    _atualizar_destaques_rollup(rollup)
+    db.flush()
+    return rollup
+
+def atualizar_rollup_avaliacao(db: Session, jogo_id: int, antes: Optional[dict] = None, depois: Optional[dict] = None):
+    """
+    Aplica ao rollup do jogo a troca de uma avaliação: `antes` sai, `depois` entra
+    (None em criações e remoções, respectivamente). Deve ser chamada depois de a
+    alteração estar na sessão; não faz commit.
+    """
+    rollup = db.query(models.Jogo_Rating_Rollup)\
+        .filter(models.Jogo_Rating_Rollup.jogo_id == jogo_id)\
+        .with_for_update()\
+        .first()
+    if rollup is None:
+        # Primeira vez: reconstrói a partir do banco, que já reflete a alteração.
+        # Se outra requisição criar a linha ao mesmo tempo, o INSERT viola a chave
+        # primária; aí basta recarregar e calcular uma vez mais.
+        db.flush()
+        try:
+            with db.begin_nested():
+                recalcular_rollup_jogo(db, jogo_id)
+        except IntegrityError:
+            recalcular_rollup_jogo(db, jogo_id)
+        return
+
+    if antes is not None:
+        _aplicar_no_rollup(rollup, antes, sinal=-1)
+    if depois is not None:
+        _aplicar_no_rollup(rollup, depois, sinal=1)
+    _atualizar_destaques_rollup(rollup)
+
 def get_estatisticas_gerais_jogo(db: Session, jogo_id: int):
-    # Calcula as médias de todas as notas
-    medias = db.query(
-        func.avg(models.Avaliacao_Jogo.nota_geral).label("media_geral"),
-        func.avg(models.Avaliacao_Jogo.nota_ataque_casa).label("media_ataque_casa"),
-        func.avg(models.Avaliacao_Jogo.nota_defesa_casa).label("media_defesa_casa"),
-        func.avg(models.Avaliacao_Jogo.nota_ataque_visitante).label("media_ataque_visitante"),
-        func.avg(models.Avaliacao_Jogo.nota_defesa_visitante).label("media_defesa_visitante"),
-        func.avg(models.Avaliacao_Jogo.nota_arbitragem).label("media_arbitragem"),
-        func.avg(models.Avaliacao_Jogo.nota_atmosfera).label("media_atmosfera")
-    ).filter(models.Avaliacao_Jogo.jogo_id == jogo_id).first()
-
-    # Encontra o MVP mais votado
-    mvp_query = db.query(
-        models.Avaliacao_Jogo.melhor_jogador_id,
-        func.count(models.Avaliacao_Jogo.melhor_jogador_id).label("votos")
-    ).filter(
-        models.Avaliacao_Jogo.jogo_id == jogo_id,
-        models.Avaliacao_Jogo.melhor_jogador_id.isnot(None)
-    ).group_by(models.Avaliacao_Jogo.melhor_jogador_id).order_by(desc("votos")).first()
-
-    # Encontra a Decepção mais votada
-    decepcao_query = db.query(
-        models.Avaliacao_Jogo.pior_jogador_id,
-        func.count(models.Avaliacao_Jogo.pior_jogador_id).label("votos")
-    ).filter(
-        models.Avaliacao_Jogo.jogo_id == jogo_id,
-        models.Avaliacao_Jogo.pior_jogador_id.isnot(None)
-    ).group_by(models.Avaliacao_Jogo.pior_jogador_id).order_by(desc("votos")).first()
-
-    # Agora a chamada para get_jogador funcionará
-    mvp_jogador = get_jogador(db, mvp_query[0]) if mvp_query else None
-    decepcao_jogador = get_jogador(db, decepcao_query[0]) if decepcao_query else None
+    # Leitura única pela chave primária, já trazendo MVP e Decepção
+    rollup = db.query(models.Jogo_Rating_Rollup).options(
+        joinedload(models.Jogo_Rating_Rollup.mvp_jogador).joinedload(models.Jogador.time_atual),
+        joinedload(models.Jogo_Rating_Rollup.decepcao_jogador).joinedload(models.Jogador.time_atual),
+    ).filter(models.Jogo_Rating_Rollup.jogo_id == jogo_id).first()
+
+    if rollup is None:
+        # Jogos avaliados antes do rollup existir: reconstrói uma vez. Duas primeiras
+        # leituras simultâneas disputam o INSERT, como em atualizar_rollup_avaliacao;
+        # quem perde descarta o savepoint e usa a linha que a outra gravou.
+        try:
+            with db.begin_nested():
+                rollup = recalcular_rollup_jogo(db, jogo_id)
+            if rollup is not None:
+                db.commit()
+        except IntegrityError:
+            rollup = db.query(models.Jogo_Rating_Rollup).filter(models.Jogo_Rating_Rollup.jogo_id == jogo_id).first()
+        if rollup is None:
+            return schemas.JogoEstatisticasGerais(
+                mvp_mais_votado=schemas.JogadorMaisVotado(jogador=None, votos=0),
+                decepcao_mais_votada=schemas.JogadorMaisVotado(jogador=None, votos=0)
+            )
 
-    mvp_info = schemas.JogadorMaisVotado(
-        jogador=mvp_jogador,
-        votos=mvp_query[1] if mvp_query else 0
-    )
-    decepcao_info = schemas.JogadorMaisVotado(
-        jogador=decepcao_jogador,
-        votos=decepcao_query[1] if decepcao_query else 0
-    )
+    def _media(nome):
+        total = getattr(rollup, f"total_{nome}")
+        return round(getattr(rollup, f"soma_{nome}") / total, 1) if total else 0.0
 
     return schemas.JogoEstatisticasGerais(
-        media_geral=round(medias.media_geral or 0, 1),
-        media_ataque_casa=round(medias.media_ataque_casa or 0, 1),
-        media_defesa_casa=round(medias.media_defesa_casa or 0, 1),
-        media_ataque_visitante=round(medias.media_ataque_visitante or 0, 1),
-        media_defesa_visitante=round(medias.media_defesa_visitante or 0, 1),
-        media_arbitragem=round(medias.media_arbitragem or 0, 1),
-        media_atmosfera=round(medias.media_atmosfera or 0, 1),
-        mvp_mais_votado=mvp_info,
-        decepcao_mais_votada=decepcao_info
+        media_geral=_media("geral"),
+        media_ataque_casa=_media("ataque_casa"),
+        media_defesa_casa=_media("defesa_casa"),
+        media_ataque_visitante=_media("ataque_visitante"),
+        media_defesa_visitante=_media("defesa_visitante"),
+        media_arbitragem=_media("arbitragem"),
+        media_atmosfera=_media("atmosfera"),
+        mvp_mais_votado=schemas.JogadorMaisVotado(jogador=rollup.mvp_jogador, votos=rollup.mvp_votos),
+        decepcao_mais_votada=schemas.JogadorMaisVotado(jogador=rollup.decepcao_jogador, votos=rollup.decepcao_votos)
     )
     
 def update_user(db: Session, user_id: int, user_data: schemas.UsuarioUpdate):
@@ -1214,8 +1914,14 @@ def update_user(db: Session, user_id: int, user_data: schemas.UsuarioUpdate):
         return None
     
     update_data = user_data.model_dump(exclude_unset=True)
+    trocou_time_favorito = "time_favorito_id" in update_data and update_data["time_favorito_id"] != db_user.time_favorito_id
     for key, value in update_data.items():
         setattr(db_user, key, value)
+
+    # O contador de avaliações do time favorito depende do time escolhido
+    if trocou_time_favorito:
+        db.flush()
+        _calcular_progressos(db, [user_id])
         
     db.commit()
     db.refresh(db_user)
@@ -1251,30 +1957,72 @@ def get_user_following(db: Session, user_id: int, current_user_id: Optional[int]
         
     return result
 
-def get_user_stats(db: Session, user_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None):
-    # Constrói a query base para avaliações
-    query = db.query(models.Avaliacao_Jogo).filter(models.Avaliacao_Jogo.usuario_id == user_id)
+# Cache das estatísticas do perfil: {(user_id, start_date, end_date): (expira_em, UserStats)}.
+# Todas as entradas têm o mesmo TTL, então a ordem de inserção é a de expiração: as
+# vencidas (e as mais antigas, acima de USER_STATS_CACHE_MAX_ITENS) saem pelo começo.
+_cache_user_stats = OrderedDict()
+_cache_user_stats_lock = threading.Lock()
+
+def _podar_cache_user_stats(agora: float):
+    """Remove as entradas vencidas e as que passam do limite. Chamar com o lock."""
+    while _cache_user_stats:
+        chave, (expira_em, _) = next(iter(_cache_user_stats.items()))
+        if expira_em > agora and len(_cache_user_stats) <= settings.USER_STATS_CACHE_MAX_ITENS:
+            break
+        del _cache_user_stats[chave]
+
+def invalidar_cache_user_stats(user_id: int):
+    """Descarta as estatísticas em cache do usuário (todas as faixas de data)."""
+    with _cache_user_stats_lock:
+        for chave in [chave for chave in _cache_user_stats if chave[0] == user_id]:
+            _cache_user_stats.pop(chave, None)
 
-    # Aplica os filtros de data se eles forem fornecidos
-    if start_date:
-        query = query.filter(models.Avaliacao_Jogo.data_avaliacao >= start_date)
-    if end_date:
-        query = query.filter(models.Avaliacao_Jogo.data_avaliacao <= end_date)
+def get_user_stats(db: Session, user_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None):
+    chave = (user_id, start_date, end_date)
+    agora = time.monotonic()
+    with _cache_user_stats_lock:
+        _podar_cache_user_stats(agora)
+        em_cache = _cache_user_stats.get(chave)
+    if em_cache:
+        return em_cache[1]
+
+    stats = _calcular_user_stats(db, user_id, start_date, end_date)
+    with _cache_user_stats_lock:
+        _cache_user_stats.pop(chave, None) # Reinsere no fim, que é onde ficam as que vencem por último
+        _cache_user_stats[chave] = (agora + settings.USER_STATS_CACHE_TTL_SEGUNDOS, stats)
+        _podar_cache_user_stats(agora)
+    return stats
+
+def _calcular_user_stats(db: Session, user_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None):
+    """
+    Calcula as estatísticas do perfil inteiramente com consultas agrupadas,
+    sem carregar as avaliações do usuário em Python.
+    """
+    Av = models.Avaliacao_Jogo
+
+    def _filtrar(query):
+        query = query.filter(Av.usuario_id == user_id)
+        # Aplica os filtros de data se eles forem fornecidos
+        if start_date:
+            query = query.filter(Av.data_avaliacao >= start_date)
+        if end_date:
+            query = query.filter(Av.data_avaliacao <= end_date)
+        return query
+
+    # Distribuição de notas com intervalos de 0.5 (a mesma consulta dá o total e a média)
+    distribuicao = {}
+    for i in [0.5, 1, 1.5, 2, 2.5, 3, 3.5, 4, 4.5, 5]:
+        distribuicao[i] = 0
 
-    # Executa a query filtrada
-    avaliacoes = query.all()
+    faixa = (func.round(Av.nota_geral * 2) / 2).label("faixa")
+    linhas_faixas = _filtrar(db.query(faixa, func.count(Av.id), func.sum(Av.nota_geral))).group_by(faixa).all()
 
-    total_avaliacoes = len(avaliacoes)
+    total_avaliacoes = sum(total for _, total, _ in linhas_faixas)
     if total_avaliacoes == 0:
-        # Distribuição de notas com intervalos de 0.5
-        distribuicao_notas = {}
-        for i in [0.5, 1, 1.5, 2, 2.5, 3, 3.5, 4, 4.5, 5]:
-            distribuicao_notas[i] = 0
-        
         return schemas.UserStats(
             total_avaliacoes=0,
             media_geral=0.0,
-            distribuicao_notas=distribuicao_notas,
+            distribuicao_notas=distribuicao,
             mvp_mais_votado=None,
             decepcao_mais_votada=None,
             time_mais_avaliado=None,
@@ -1284,186 +2032,95 @@ def get_user_stats(db: Session, user_id: int, start_date: Optional[date] = None,
             time_melhor_defesa=None
         )
 
-    soma_notas = sum(a.nota_geral for a in avaliacoes)
-    media_geral = round(soma_notas / total_avaliacoes, 2)
-
-    # Distribuição de notas com intervalos de 0.5
-    distribuicao = {}
-    for i in [0.5, 1, 1.5, 2, 2.5, 3, 3.5, 4, 4.5, 5]:
-        distribuicao[i] = 0
-    
-    for a in avaliacoes:
-        # Arredonda para o intervalo de 0.5 mais próximo
-        nota_arredondada = round(a.nota_geral * 2) / 2
-        if 0.5 <= nota_arredondada <= 5:
-            distribuicao[nota_arredondada] += 1
-
-    # Encontra o MVP mais votado pelo usuário
-    mvp_query = db.query(
-        models.Avaliacao_Jogo.melhor_jogador_id,
-        func.count(models.Avaliacao_Jogo.melhor_jogador_id).label("votos")
-    ).filter(
-        models.Avaliacao_Jogo.usuario_id == user_id,
-        models.Avaliacao_Jogo.melhor_jogador_id.isnot(None)
-    )
-    
-    # Aplica os mesmos filtros de data para MVP
-    if start_date:
-        mvp_query = mvp_query.filter(models.Avaliacao_Jogo.data_avaliacao >= start_date)
-    if end_date:
-        mvp_query = mvp_query.filter(models.Avaliacao_Jogo.data_avaliacao <= end_date)
-    
-    mvp_result = mvp_query.group_by(models.Avaliacao_Jogo.melhor_jogador_id).order_by(desc("votos")).first()
-
-    # Encontra a Decepção mais votada pelo usuário
-    decepcao_query = db.query(
-        models.Avaliacao_Jogo.pior_jogador_id,
-        func.count(models.Avaliacao_Jogo.pior_jogador_id).label("votos")
-    ).filter(
-        models.Avaliacao_Jogo.usuario_id == user_id,
-        models.Avaliacao_Jogo.pior_jogador_id.isnot(None)
-    )
-    
-    # Aplica os mesmos filtros de data para Decepção
-    if start_date:
-        decepcao_query = decepcao_query.filter(models.Avaliacao_Jogo.data_avaliacao >= start_date)
-    if end_date:
-        decepcao_query = decepcao_query.filter(models.Avaliacao_Jogo.data_avaliacao <= end_date)
-    
-    decepcao_result = decepcao_query.group_by(models.Avaliacao_Jogo.pior_jogador_id).order_by(desc("votos")).first()
-
-    # Busca os dados dos jogadores
-    mvp_jogador = get_jogador(db, mvp_result[0]) if mvp_result else None
-    decepcao_jogador = get_jogador(db, decepcao_result[0]) if decepcao_result else None
+    media_geral = round(sum(soma for _, _, soma in linhas_faixas) / total_avaliacoes, 2)
+    for nota_arredondada, total, _ in linhas_faixas:
+        if nota_arredondada is not None and 0.5 <= nota_arredondada <= 5:
+            distribuicao[float(nota_arredondada)] += total
+
+    # MVP e Decepção mais votados pelo usuário
+    def _mais_votado(coluna):
+        return _filtrar(db.query(coluna, func.count(coluna).label("votos")))\
+            .filter(coluna.isnot(None))\
+            .group_by(coluna)\
+            .order_by(desc("votos"))\
+            .first()
+
+    mvp_result = _mais_votado(Av.melhor_jogador_id)
+    decepcao_result = _mais_votado(Av.pior_jogador_id)
+
+    jogador_ids = [r[0] for r in (mvp_result, decepcao_result) if r]
+    jogadores = {
+        j.id: j for j in db.query(models.Jogador)
+        .options(joinedload(models.Jogador.time_atual))
+        .filter(models.Jogador.id.in_(jogador_ids))
+    } if jogador_ids else {}
 
     mvp_info = schemas.JogadorMaisVotado(
-        jogador=mvp_jogador,
-        votos=mvp_result[1] if mvp_result else 0
+        jogador=jogadores.get(mvp_result[0]),
+        votos=mvp_result[1]
     ) if mvp_result else None
     
     decepcao_info = schemas.JogadorMaisVotado(
-        jogador=decepcao_jogador,
-        votos=decepcao_result[1] if decepcao_result else 0
+        jogador=jogadores.get(decepcao_result[0]),
+        votos=decepcao_result[1]
     ) if decepcao_result else None
 
-    # Por simplicidade, vou implementar as estatísticas de times usando Python
-    # para evitar queries SQL complexas
-    
-    # Coleta dados para estatísticas de times
-    times_stats = {}
-    for avaliacao in avaliacoes:
-        jogo = avaliacao.jogo
-        
-        # Time da casa
-        casa_id = jogo.time_casa_id
-        if casa_id not in times_stats:
-            times_stats[casa_id] = {
-                'avaliacoes': 0, 'soma_geral': 0, 'soma_ataque': 0, 'soma_defesa': 0,
-                'ataque_count': 0, 'defesa_count': 0
-            }
-        times_stats[casa_id]['avaliacoes'] += 1
-        times_stats[casa_id]['soma_geral'] += avaliacao.nota_geral
-        if avaliacao.nota_ataque_casa:
-            times_stats[casa_id]['soma_ataque'] += avaliacao.nota_ataque_casa
-            times_stats[casa_id]['ataque_count'] += 1
-        if avaliacao.nota_defesa_casa:
-            times_stats[casa_id]['soma_defesa'] += avaliacao.nota_defesa_casa
-            times_stats[casa_id]['defesa_count'] += 1
-        
-        # Time visitante
-        visitante_id = jogo.time_visitante_id
-        if visitante_id not in times_stats:
-            times_stats[visitante_id] = {
-                'avaliacoes': 0, 'soma_geral': 0, 'soma_ataque': 0, 'soma_defesa': 0,
-                'ataque_count': 0, 'defesa_count': 0
-            }
-        times_stats[visitante_id]['avaliacoes'] += 1
-        times_stats[visitante_id]['soma_geral'] += avaliacao.nota_geral
-        if avaliacao.nota_ataque_visitante:
-            times_stats[visitante_id]['soma_ataque'] += avaliacao.nota_ataque_visitante
-            times_stats[visitante_id]['ataque_count'] += 1
-        if avaliacao.nota_defesa_visitante:
-            times_stats[visitante_id]['soma_defesa'] += avaliacao.nota_defesa_visitante
-            times_stats[visitante_id]['defesa_count'] += 1
-
-    # Calcula estatísticas
-    time_mais_avaliado_info = None
-    time_melhor_avaliado_info = None
-    time_pior_avaliado_info = None
-    time_melhor_ataque_info = None
-    time_melhor_defesa_info = None
-    
-    if times_stats:
-        # Time mais avaliado
-        time_mais_avaliado_id = max(times_stats.keys(), key=lambda k: times_stats[k]['avaliacoes'])
-        time_mais_avaliado = get_time(db, time_mais_avaliado_id)
-        if time_mais_avaliado:
-            time_mais_avaliado_info = schemas.TimeMaisAvaliado(
-                time=time_mais_avaliado,
-                total_avaliacoes=times_stats[time_mais_avaliado_id]['avaliacoes']
-            )
-        
-        # Time melhor avaliado (com pelo menos 2 avaliações)
-        times_com_min_avaliacoes = {k: v for k, v in times_stats.items() if v['avaliacoes'] >= 2}
-        if times_com_min_avaliacoes:
-            time_melhor_id = max(times_com_min_avaliacoes.keys(), 
-                               key=lambda k: times_com_min_avaliacoes[k]['soma_geral'] / times_com_min_avaliacoes[k]['avaliacoes'])
-            time_melhor = get_time(db, time_melhor_id)
-            if time_melhor:
-                media_melhor = times_stats[time_melhor_id]['soma_geral'] / times_stats[time_melhor_id]['avaliacoes']
-                time_melhor_avaliado_info = schemas.TimeMaisAvaliado(
-                    time=time_melhor,
-                    media_nota=media_melhor
-                )
-            
-        # Time pior avaliado (com pelo menos 2 avaliações)
-        if times_com_min_avaliacoes:
-            time_pior_id = min(times_com_min_avaliacoes.keys(), 
-                              key=lambda k: times_com_min_avaliacoes[k]['soma_geral'] / times_com_min_avaliacoes[k]['avaliacoes'])
-            time_pior = get_time(db, time_pior_id)
-            if time_pior:
-                media_pior = times_stats[time_pior_id]['soma_geral'] / times_stats[time_pior_id]['avaliacoes']
-                time_pior_avaliado_info = schemas.TimeMaisAvaliado(
-                    time=time_pior,
-                    media_nota=media_pior
-                )
-            
-        # Time melhor ataque (com pelo menos 2 avaliações)
-        times_com_ataque = {k: v for k, v in times_stats.items() if v['avaliacoes'] >= 2 and v['ataque_count'] > 0}
-        if times_com_ataque:
-            time_melhor_ataque_id = max(times_com_ataque.keys(), 
-                                      key=lambda k: times_com_ataque[k]['soma_ataque'] / times_com_ataque[k]['ataque_count'])
-            time_melhor_ataque = get_time(db, time_melhor_ataque_id)
-            if time_melhor_ataque:
-                media_ataque = times_stats[time_melhor_ataque_id]['soma_ataque'] / times_stats[time_melhor_ataque_id]['ataque_count']
-                time_melhor_ataque_info = schemas.TimeMaisAvaliado(
-                    time=time_melhor_ataque,
-                    media_ataque=media_ataque
-                )
-            
-        # Time melhor defesa (com pelo menos 2 avaliações)
-        times_com_defesa = {k: v for k, v in times_stats.items() if v['avaliacoes'] >= 2 and v['defesa_count'] > 0}
-        if times_com_defesa:
-            time_melhor_defesa_id = max(times_com_defesa.keys(), 
-                                      key=lambda k: times_com_defesa[k]['soma_defesa'] / times_com_defesa[k]['defesa_count'])
-            time_melhor_defesa = get_time(db, time_melhor_defesa_id)
-            if time_melhor_defesa:
-                media_defesa = times_stats[time_melhor_defesa_id]['soma_defesa'] / times_stats[time_melhor_defesa_id]['defesa_count']
-                time_melhor_defesa_info = schemas.TimeMaisAvaliado(
-                    time=time_melhor_defesa,
-                    media_defesa=media_defesa
-                )
+    # Estatísticas por time: cada avaliação conta para o time da casa e para o visitante.
+    # Notas de ataque/defesa zeradas ou nulas não entram na média (NULLIF + AVG).
+    lado_casa = _filtrar(db.query(
+        models.Jogo.time_casa_id.label("time_id"),
+        Av.nota_geral.label("nota_geral"),
+        func.nullif(Av.nota_ataque_casa, 0).label("nota_ataque"),
+        func.nullif(Av.nota_defesa_casa, 0).label("nota_defesa"),
+    ).join(models.Jogo, Av.jogo_id == models.Jogo.id))
+    lado_visitante = _filtrar(db.query(
+        models.Jogo.time_visitante_id.label("time_id"),
+        Av.nota_geral.label("nota_geral"),
+        func.nullif(Av.nota_ataque_visitante, 0).label("nota_ataque"),
+        func.nullif(Av.nota_defesa_visitante, 0).label("nota_defesa"),
+    ).join(models.Jogo, Av.jogo_id == models.Jogo.id))
+    lados = lado_casa.union_all(lado_visitante).subquery()
+
+    times_stats = {
+        linha.time_id: linha for linha in db.query(
+            lados.c.time_id,
+            func.count().label("avaliacoes"),
+            func.avg(lados.c.nota_geral).label("media_geral"),
+            func.avg(lados.c.nota_ataque).label("media_ataque"),
+            func.avg(lados.c.nota_defesa).label("media_defesa"),
+        ).group_by(lados.c.time_id).order_by(lados.c.time_id).all()
+    }
+
+    # Melhor/pior só consideram times com pelo menos 2 avaliações
+    com_min_avaliacoes = [t for t in times_stats.values() if t.avaliacoes >= 2]
+    com_ataque = [t for t in com_min_avaliacoes if t.media_ataque is not None]
+    com_defesa = [t for t in com_min_avaliacoes if t.media_defesa is not None]
+
+    mais_avaliado = max(times_stats.values(), key=lambda t: t.avaliacoes, default=None)
+    melhor = max(com_min_avaliacoes, key=lambda t: t.media_geral, default=None)
+    pior = min(com_min_avaliacoes, key=lambda t: t.media_geral, default=None)
+    melhor_ataque = max(com_ataque, key=lambda t: t.media_ataque, default=None)
+    melhor_defesa = max(com_defesa, key=lambda t: t.media_defesa, default=None)
+
+    time_ids = {t.time_id for t in (mais_avaliado, melhor, pior, melhor_ataque, melhor_defesa) if t}
+    times = {t.id: t for t in db.query(models.Time).filter(models.Time.id.in_(time_ids))} if time_ids else {}
+
+    def _info_time(linha, **campos):
+        if not linha or linha.time_id not in times:
+            return None
+        return schemas.TimeMaisAvaliado(time=times[linha.time_id], **campos)
+
     return schemas.UserStats(
         total_avaliacoes=total_avaliacoes, 
         media_geral=media_geral, 
         distribuicao_notas=distribuicao,
         mvp_mais_votado=mvp_info,
         decepcao_mais_votada=decepcao_info,
-        time_mais_avaliado=time_mais_avaliado_info,
-        time_melhor_avaliado=time_melhor_avaliado_info,
-        time_pior_avaliado=time_pior_avaliado_info,
-        time_melhor_ataque=time_melhor_ataque_info,
-        time_melhor_defesa=time_melhor_defesa_info
+        time_mais_avaliado=_info_time(mais_avaliado, total_avaliacoes=mais_avaliado.avaliacoes) if mais_avaliado else None,
+        time_melhor_avaliado=_info_time(melhor, media_nota=melhor.media_geral) if melhor else None,
+        time_pior_avaliado=_info_time(pior, media_nota=pior.media_geral) if pior else None,
+        time_melhor_ataque=_info_time(melhor_ataque, media_ataque=melhor_ataque.media_ataque) if melhor_ataque else None,
+        time_melhor_defesa=_info_time(melhor_defesa, media_defesa=melhor_defesa.media_defesa) if melhor_defesa else None
     )
 
 def get_schedule_for_time(db: Session, time_id: int):
@@ -1540,6 +2197,57 @@ def get_highlighted_games(db: Session, tipo_destaque: str = "esta_semana", limit
     
     return jogos_destaque
 
+def _query_avaliacoes_feed(db: Session, usuario_id: int):
+    """
+    Monta a query base dos feeds: cada linha traz a avaliação (com usuário, jogo e
+    os dois times já carregados) e os totais de curtidas, comentários e se o
+    usuário atual já curtiu, tudo calculado no próprio banco em uma única consulta.
+    """
+    total_curtidas = select(func.count(models.Curtida_Avaliacao.id))\
+        .where(models.Curtida_Avaliacao.avaliacao_id == models.Avaliacao_Jogo.id)\
+        .correlate(models.Avaliacao_Jogo)\
+        .scalar_subquery()
+
+    total_comentarios = select(func.count(models.Comentario_Avaliacao.id))\
+        .where(models.Comentario_Avaliacao.avaliacao_id == models.Avaliacao_Jogo.id)\
+        .correlate(models.Avaliacao_Jogo)\
+        .scalar_subquery()
+
+    ja_curtiu = exists().where(
+        models.Curtida_Avaliacao.avaliacao_id == models.Avaliacao_Jogo.id,
+        models.Curtida_Avaliacao.usuario_id == usuario_id
+    ).correlate(models.Avaliacao_Jogo)
+
+    return db.query(
+        models.Avaliacao_Jogo,
+        total_curtidas.label("total_curtidas"),
+        total_comentarios.label("total_comentarios"),
+        ja_curtiu.label("ja_curtiu")
+    ).options(
+        joinedload(models.Avaliacao_Jogo.usuario),
+        joinedload(models.Avaliacao_Jogo.jogo).options(
+            joinedload(models.Jogo.time_casa),
+            joinedload(models.Jogo.time_visitante)
+        )
+    )
+
+def _montar_avaliacoes_feed(resultados) -> List[schemas.AvaliacaoFeed]:
+    """Converte as linhas de _query_avaliacoes_feed nos schemas do feed."""
+    return [
+        schemas.AvaliacaoFeed(
+            id=avaliacao.id,
+            usuario=avaliacao.usuario,
+            jogo=avaliacao.jogo,
+            nota_geral=avaliacao.nota_geral,
+            resenha=avaliacao.resenha,
+            data_avaliacao=avaliacao.data_avaliacao,
+            total_curtidas=total_curtidas or 0,
+            total_comentarios=total_comentarios or 0,
+            ja_curtiu=bool(ja_curtiu)
+        )
+        for avaliacao, total_curtidas, total_comentarios, ja_curtiu in resultados
+    ]
+
 def get_personalized_feed(db: Session, usuario_id: int, limit: int = 10):
     """
     Busca avaliações personalizadas baseadas nos times que o usuário costuma avaliar.
@@ -1566,111 +2274,64 @@ def get_personalized_feed(db: Session, usuario_id: int, limit: int = 10):
                   .limit(5)\
                   .all()
     
+    query = _query_avaliacoes_feed(db, usuario_id)\
+        .filter(models.Avaliacao_Jogo.usuario_id != usuario_id)\
+        .order_by(models.Avaliacao_Jogo.data_avaliacao.desc())
+
     if not top_times:
         # Se o usuário nunca avaliou nada, retorna avaliações recentes
-        avaliacoes = db.query(models.Avaliacao_Jogo)\
-                       .join(models.Usuario, models.Avaliacao_Jogo.usuario_id == models.Usuario.id)\
-                       .join(models.Jogo, models.Avaliacao_Jogo.jogo_id == models.Jogo.id)\
-                       .filter(models.Avaliacao_Jogo.usuario_id != usuario_id)\
-                       .order_by(models.Avaliacao_Jogo.data_avaliacao.desc())\
-                       .limit(limit)\
-                       .all()
-    else:
-        time_ids = [t.time_id for t in top_times]
-        
-        # Buscar avaliações recentes de outros usuários para esses times
-        avaliacoes = db.query(models.Avaliacao_Jogo)\
-                       .join(models.Jogo, models.Avaliacao_Jogo.jogo_id == models.Jogo.id)\
-                       .join(models.Usuario, models.Avaliacao_Jogo.usuario_id == models.Usuario.id)\
-                       .filter(
-                           models.Avaliacao_Jogo.usuario_id != usuario_id,
-                           (models.Jogo.time_casa_id.in_(time_ids)) | 
-                           (models.Jogo.time_visitante_id.in_(time_ids))
-                       )\
-                       .order_by(models.Avaliacao_Jogo.data_avaliacao.desc())\
-                       .limit(limit)\
-                       .all()
+        return _montar_avaliacoes_feed(query.limit(limit).all())
+
+    time_ids = [t.time_id for t in top_times]
     
-    avaliacoes_feed = []
-    for avaliacao in avaliacoes:
-        # Contar curtidas e comentários
-        total_curtidas = db.query(models.Curtida_Avaliacao)\
-                          .filter(models.Curtida_Avaliacao.avaliacao_id == avaliacao.id)\
-                          .count()
-        
-        total_comentarios = db.query(models.Comentario_Avaliacao)\
-                           .filter(models.Comentario_Avaliacao.avaliacao_id == avaliacao.id)\
-                           .count()
-        
-        # Verificar se o usuário atual já curtiu
-        ja_curtiu = db.query(models.Curtida_Avaliacao)\
-                     .filter(
-                         models.Curtida_Avaliacao.avaliacao_id == avaliacao.id,
-                         models.Curtida_Avaliacao.usuario_id == usuario_id
-                     ).first() is not None
-        
-        avaliacao_feed_obj = schemas.AvaliacaoFeed(
-            id=avaliacao.id,
-            usuario=avaliacao.usuario,
-            jogo=avaliacao.jogo,
-            nota_geral=avaliacao.nota_geral,
-            resenha=avaliacao.resenha,
-            data_avaliacao=avaliacao.data_avaliacao,
-            total_curtidas=total_curtidas,
-            total_comentarios=total_comentarios,
-            ja_curtiu=ja_curtiu
-        )
-        avaliacoes_feed.append(avaliacao_feed_obj)
+    # Buscar avaliações recentes de outros usuários para esses times
+    resultados = query.join(models.Jogo, models.Avaliacao_Jogo.jogo_id == models.Jogo.id)\
+                      .filter(
+                          (models.Jogo.time_casa_id.in_(time_ids)) | 
+                          (models.Jogo.time_visitante_id.in_(time_ids))
+                      )\
+                      .limit(limit)\
+                      .all()
     
-    return avaliacoes_feed
+    return _montar_avaliacoes_feed(resultados)
 
 def get_following_feed(db: Session, usuario_id: int, limit: int = 10):
     """
     Busca avaliações das pessoas que o usuário segue.
     """
+    if feed_inbox.fanout_ativo():
+        # Avaliações já distribuídas para a caixa de entrada do usuário
+        resultados = _query_avaliacoes_feed(db, usuario_id)\
+                       .join(models.Feed_Inbox, models.Feed_Inbox.avaliacao_id == models.Avaliacao_Jogo.id)\
+                       .filter(models.Feed_Inbox.usuario_id == usuario_id)\
+                       .order_by(models.Feed_Inbox.data_item.desc())\
+                       .limit(limit)\
+                       .all()
+
+        # Avaliações de celebridades seguidas, lidas na hora (fan-out-on-read)
+        resultados_celebridades = _query_avaliacoes_feed(db, usuario_id)\
+                       .filter(models.Avaliacao_Jogo.usuario_id.in_(feed_inbox.seguidos_celebridades(db, usuario_id)))\
+                       .order_by(models.Avaliacao_Jogo.data_avaliacao.desc())\
+                       .limit(limit)\
+                       .all()
+
+        return _mesclar_por_data(
+            _montar_avaliacoes_feed(resultados),
+            _montar_avaliacoes_feed(resultados_celebridades),
+            lambda a: a.data_avaliacao,
+            limit
+        )
+
     # Buscar usuários seguidos
     usuarios_seguidos = db.query(models.Seguidor.seguido_id)\
                          .filter(models.Seguidor.seguidor_id == usuario_id)\
                          .subquery()
     
-    # Buscar avaliações desses usuários
-    avaliacoes = db.query(models.Avaliacao_Jogo)\
-                   .join(models.Usuario, models.Avaliacao_Jogo.usuario_id == models.Usuario.id)\
-                   .join(models.Jogo, models.Avaliacao_Jogo.jogo_id == models.Jogo.id)\
-                   .filter(models.Avaliacao_Jogo.usuario_id.in_(usuarios_seguidos))\
+    # Buscar avaliações desses usuários, já com os totais de engajamento
+    resultados = _query_avaliacoes_feed(db, usuario_id)\
+                   .filter(models.Avaliacao_Jogo.usuario_id.in_(select(usuarios_seguidos)))\
                    .order_by(models.Avaliacao_Jogo.data_avaliacao.desc())\
                    .limit(limit)\
                    .all()
     
-    avaliacoes_feed = []
-    for avaliacao in avaliacoes:
-        # Contar curtidas e comentários
-        total_curtidas = db.query(models.Curtida_Avaliacao)\
-                          .filter(models.Curtida_Avaliacao.avaliacao_id == avaliacao.id)\
-                          .count()
-        
-        total_comentarios = db.query(models.Comentario_Avaliacao)\
-                           .filter(models.Comentario_Avaliacao.avaliacao_id == avaliacao.id)\
-                           .count()
-        
-        # Verificar se o usuário atual já curtiu
-        ja_curtiu = db.query(models.Curtida_Avaliacao)\
-                     .filter(
-                         models.Curtida_Avaliacao.avaliacao_id == avaliacao.id,
-                         models.Curtida_Avaliacao.usuario_id == usuario_id
-                     ).first() is not None
-        
-        avaliacao_feed_obj = schemas.AvaliacaoFeed(
-            id=avaliacao.id,
-            usuario=avaliacao.usuario,
-            jogo=avaliacao.jogo,
-            nota_geral=avaliacao.nota_geral,
-            resenha=avaliacao.resenha,
-            data_avaliacao=avaliacao.data_avaliacao,
-            total_curtidas=total_curtidas,
-            total_comentarios=total_comentarios,
-            ja_curtiu=ja_curtiu
-        )
-        avaliacoes_feed.append(avaliacao_feed_obj)
-    
-    return avaliacoes_feed
\ No newline at end of file
+    return _montar_avaliacoes_feed(resultados)
@@ -1,28 +1,31 @@
 import contextlib
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from . import models, crud
-from .database import engine, SessionLocal
 from .routers import usuarios, ligas_times, jogadores, jogos, avaliacoes, interacoes, dashboard, admin, uploads, search
-from .scheduler import start_scheduler
+from .scheduler import start_scheduler, stop_scheduler
+from .services import fila_efeitos, career_stats, live_tracker, jobs
 
 
-# Cria as tabelas no banco de dados
-models.Base.metadata.create_all(bind=engine)
-
-db = SessionLocal()
-crud.popular_conquistas(db)
-db.close()
+# O esquema do banco e as conquistas padrão são criados no deploy por
+# `python -m app.migrate` (release_command do fly.toml), não ao subir a aplicação.
 
 @contextlib.asynccontextmanager
 async def lifespan(app: FastAPI):
     start_scheduler()
+    fila_efeitos.iniciar_workers()
+    jobs.iniciar_workers()
     yield
+    stop_scheduler()
+    jobs.parar_workers()
+    fila_efeitos.parar_workers()
+    career_stats.parar()
+    live_tracker.parar()
 
 app = FastAPI(
     title="SlamTalk API",
     description="A API para a plataforma de avaliação de jogos de basquete.",
-    version="0.2.0"
+    version="0.2.0",
+    lifespan=lifespan
 )
 
 origins = [
@@ -0,0 +1,46 @@
+"""
+Migração do banco no deploy.
+
+Aplica as revisões do Alembic (pasta migrations/) até a mais recente e grava as
+conquistas padrão. Bancos criados antes das migrações (por create_all, sem a
+tabela alembic_version) são marcados com a revisão inicial antes do upgrade,
+para que só as revisões seguintes sejam executadas.
+
+Uso (release_command do fly.toml):
+    python -m app.migrate
+"""
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from .database import engine, SessionLocal
+from . import crud
+
+REVISAO_INICIAL = "0001"
+
+ALEMBIC_INI = Path(__file__).resolve().parent.parent / "alembic.ini"
+
+def _config() -> Config:
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "migrations"))
+    return config
+
+def migrar():
+    config = _config()
+
+    inspetor = inspect(engine)
+    if inspetor.has_table("usuarios") and not inspetor.has_table("alembic_version"):
+        print(f"Banco sem controle de versão. Marcando com a revisão inicial {REVISAO_INICIAL}.")
+        command.stamp(config, REVISAO_INICIAL)
+
+    command.upgrade(config, "head")
+
+    db = SessionLocal()
+    try:
+        crud.popular_conquistas(db)
+    finally:
+        db.close()
+    print("Migração concluída.")
+
+if __name__ == "__main__":
+    migrar()
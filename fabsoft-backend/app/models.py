@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Enum, Float, ForeignKey, JSON, UniqueConstraint, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Enum, Float, ForeignKey, JSON, UniqueConstraint, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
@@ -94,6 +94,12 @@ class Jogo(Base):
     liga = relationship("Liga")
     time_casa = relationship("Time", foreign_keys=[time_casa_id])
     time_visitante = relationship("Time", foreign_keys=[time_visitante_id])
+    __table_args__ = (
+        Index('ix_jogos_data_id', 'data_jogo', 'id'),
+        Index('ix_jogos_temporada_data', 'temporada', 'data_jogo'),
+        Index('ix_jogos_time_casa_data', 'time_casa_id', 'data_jogo'),
+        Index('ix_jogos_time_visitante_data', 'time_visitante_id', 'data_jogo'),
+    )
 
 class Avaliacao_Jogo(Base):
     __tablename__ = "avaliacoes_jogo"
@@ -120,6 +126,11 @@ class Avaliacao_Jogo(Base):
     usuario = relationship("Usuario", back_populates="avaliacoes")
     melhor_jogador = relationship("Jogador", foreign_keys=[melhor_jogador_id])
     pior_jogador = relationship("Jogador", foreign_keys=[pior_jogador_id])
+    __table_args__ = (
+        Index('ix_avaliacoes_jogo_jogo_data_id', 'jogo_id', 'data_avaliacao', 'id'),
+        Index('ix_avaliacoes_jogo_usuario_data', 'usuario_id', 'data_avaliacao'),
+        Index('ix_avaliacoes_jogo_data', 'data_avaliacao'),
+    )
 
 class Estatistica_Jogador_Jogo(Base):
     __tablename__ = "estatisticas_jogador_jogo"
@@ -135,6 +146,10 @@ class Estatistica_Jogador_Jogo(Base):
     jogador_id = Column(Integer, ForeignKey("jogadores.id"))
     jogo = relationship("Jogo")
     jogador = relationship("Jogador")
+    __table_args__ = (
+        Index('ix_estatisticas_jogador_jogo_jogador_jogo', 'jogador_id', 'jogo_id'),
+        Index('ix_estatisticas_jogador_jogo_jogo', 'jogo_id'),
+    )
 
 class Seguidor(Base):
     __tablename__ = 'seguidores'
@@ -142,7 +157,46 @@ class Seguidor(Base):
     seguidor_id = Column(Integer, ForeignKey('usuarios.id'))
     seguido_id = Column(Integer, ForeignKey('usuarios.id'))
     data_inicio = Column(DateTime(timezone=True), server_default=func.now())
-    __table_args__ = (UniqueConstraint('seguidor_id', 'seguido_id', name='_seguidor_seguido_uc'),)
+    __table_args__ = (
+        UniqueConstraint('seguidor_id', 'seguido_id', name='_seguidor_seguido_uc'),
+        # seguidor_id já é coberto pela constraint; este cobre a busca por seguidores de alguém
+        Index('ix_seguidores_seguido_seguidor', 'seguido_id', 'seguidor_id'),
+    )
+
+class Jogo_Rating_Rollup(Base):
+    """
+    Agregado pré-calculado das avaliações de um jogo (somas, contagens e votos de
+    MVP/Decepção), mantido incrementalmente a cada avaliação criada, editada ou apagada.
+    Cada nota guarda soma e quantidade de valores não nulos, como o AVG do SQL.
+    """
+    __tablename__ = 'jogo_rating_rollup'
+    jogo_id = Column(Integer, ForeignKey('jogos.id'), primary_key=True)
+    total_avaliacoes = Column(Integer, default=0, nullable=False)
+    soma_geral = Column(Float, default=0, nullable=False)
+    total_geral = Column(Integer, default=0, nullable=False)
+    soma_ataque_casa = Column(Float, default=0, nullable=False)
+    total_ataque_casa = Column(Integer, default=0, nullable=False)
+    soma_defesa_casa = Column(Float, default=0, nullable=False)
+    total_defesa_casa = Column(Integer, default=0, nullable=False)
+    soma_ataque_visitante = Column(Float, default=0, nullable=False)
+    total_ataque_visitante = Column(Integer, default=0, nullable=False)
+    soma_defesa_visitante = Column(Float, default=0, nullable=False)
+    total_defesa_visitante = Column(Integer, default=0, nullable=False)
+    soma_arbitragem = Column(Float, default=0, nullable=False)
+    total_arbitragem = Column(Integer, default=0, nullable=False)
+    soma_atmosfera = Column(Float, default=0, nullable=False)
+    total_atmosfera = Column(Integer, default=0, nullable=False)
+    votos_mvp = Column(JSON, default=dict) # {jogador_id: votos}
+    votos_decepcao = Column(JSON, default=dict) # {jogador_id: votos}
+    # Mais votados, desnormalizados para a leitura ser um único SELECT
+    mvp_jogador_id = Column(Integer, ForeignKey('jogadores.id'), nullable=True)
+    mvp_votos = Column(Integer, default=0, nullable=False)
+    decepcao_jogador_id = Column(Integer, ForeignKey('jogadores.id'), nullable=True)
+    decepcao_votos = Column(Integer, default=0, nullable=False)
+    data_atualizacao = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    mvp_jogador = relationship("Jogador", foreign_keys=[mvp_jogador_id])
+    decepcao_jogador = relationship("Jogador", foreign_keys=[decepcao_jogador_id])
 
 class Comentario_Avaliacao(Base):
     __tablename__ = 'comentarios_avaliacao'
@@ -155,6 +209,10 @@ class Comentario_Avaliacao(Base):
     resposta_para_id = Column(Integer, ForeignKey('comentarios_avaliacao.id'), nullable=True)
     avaliacao = relationship("Avaliacao_Jogo")
     usuario = relationship("Usuario")
+    __table_args__ = (
+        Index('ix_comentarios_avaliacao_avaliacao_data_id', 'avaliacao_id', 'data_comentario', 'id'),
+        Index('ix_comentarios_avaliacao_usuario', 'usuario_id'),
+    )
 
 class Curtida_Avaliacao(Base):
     __tablename__ = 'curtidas_avaliacao'
@@ -162,7 +220,10 @@ class Curtida_Avaliacao(Base):
     avaliacao_id = Column(Integer, ForeignKey('avaliacoes_jogo.id'))
     usuario_id = Column(Integer, ForeignKey('usuarios.id'))
     data_curtida = Column(DateTime(timezone=True), server_default=func.now())
-    __table_args__ = (UniqueConstraint('avaliacao_id', 'usuario_id', name='_avaliacao_usuario_uc'),)
+    __table_args__ = (
+        UniqueConstraint('avaliacao_id', 'usuario_id', name='_avaliacao_usuario_uc'),
+        Index('ix_curtidas_avaliacao_usuario_avaliacao', 'usuario_id', 'avaliacao_id'),
+    )
 
 class Conquista(Base):
     __tablename__ = 'conquistas'
@@ -182,6 +243,23 @@ class Usuario_Conquista(Base):
     conquista = relationship("Conquista")
     __table_args__ = (UniqueConstraint('usuario_id', 'conquista_id', name='_usuario_conquista_uc'),)
 
+class Progresso_Conquista(Base):
+    """
+    Contadores por usuário mantidos pelo motor incremental de conquistas,
+    para que cada evento avalie apenas as conquistas que afeta sem reler o histórico.
+    """
+    __tablename__ = 'progresso_conquistas'
+    usuario_id = Column(Integer, ForeignKey('usuarios.id'), primary_key=True)
+    total_avaliacoes = Column(Integer, default=0, nullable=False)
+    avaliacoes_com_detalhes = Column(Integer, default=0, nullable=False)
+    avaliacoes_time_favorito = Column(Integer, default=0, nullable=False)
+    times_avaliados = Column(JSON, default=dict) # {time_id: nº de avaliações envolvendo o time}
+    avaliacoes_recentes = Column(JSON, default=list) # [[avaliacao_id, data ISO], ...] da janela semanal
+    total_comentarios = Column(Integer, default=0, nullable=False)
+    total_seguindo = Column(Integer, default=0, nullable=False)
+    total_seguidores = Column(Integer, default=0, nullable=False)
+    data_atualizacao = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class Notificacao(Base):
     __tablename__ = 'notificacoes'
     id = Column(Integer, primary_key=True, index=True)
@@ -193,6 +271,9 @@ class Notificacao(Base):
     referencia_id = Column(Integer)
     referencia_tipo = Column(String)
     usuario = relationship("Usuario")
+    __table_args__ = (
+        Index('ix_notificacoes_usuario_data', 'usuario_id', 'data_criacao'),
+    )
 
 class Feed_Atividade(Base):
     __tablename__ = 'feed_atividades'
@@ -203,7 +284,129 @@ class Feed_Atividade(Base):
     referencia_id = Column(Integer)
     referencia_tipo = Column(String)
     usuario = relationship("Usuario")
+    __table_args__ = (
+        Index('ix_feed_atividades_usuario_data', 'usuario_id', 'data_atividade'),
+    )
+
+class Feed_Inbox(Base):
+    """
+    Caixa de entrada materializada do feed de cada usuário (fan-out-on-write).
+    Cada linha aponta para uma atividade ou para uma avaliação de alguém que o usuário segue.
+    """
+    __tablename__ = 'feed_inbox'
+    id = Column(Integer, primary_key=True, index=True)
+    usuario_id = Column(Integer, ForeignKey('usuarios.id'), nullable=False) # Dono da caixa de entrada
+    autor_id = Column(Integer, ForeignKey('usuarios.id'), nullable=False)
+    feed_atividade_id = Column(Integer, ForeignKey('feed_atividades.id'), nullable=True)
+    avaliacao_id = Column(Integer, ForeignKey('avaliacoes_jogo.id'), nullable=True)
+    data_item = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    feed_atividade = relationship("Feed_Atividade")
+    avaliacao = relationship("Avaliacao_Jogo")
+    __table_args__ = (
+        Index('ix_feed_inbox_usuario_data', 'usuario_id', 'data_item'),
+        Index('ix_feed_inbox_usuario_autor', 'usuario_id', 'autor_id'),
+    )
+
+class Tarefa_Pendente(Base):
+    """
+    Outbox da fila de efeitos colaterais (notificações, feed, conquistas).
+    As tarefas são gravadas na mesma transação da ação principal e executadas
+    depois pelos workers de app/services/fila_efeitos.py.
+    """
+    __tablename__ = 'tarefas_pendentes'
+    id = Column(Integer, primary_key=True, index=True)
+    tipo = Column(String, nullable=False) # "notificacao", "feed_item" ou "conquistas"
+    payload = Column(JSON, nullable=False)
+    status = Column(String, default="pendente", nullable=False) # pendente, processando, erro
+    tentativas = Column(Integer, default=0, nullable=False)
+    erro = Column(String, nullable=True)
+    data_criacao = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    data_inicio = Column(DateTime(timezone=True), nullable=True) # Quando um worker pegou a tarefa
+    __table_args__ = (
+        Index('ix_tarefas_pendentes_status_id', 'status', 'id'),
+    )
+
+class Sync_Checkpoint(Base):
+    """
+    Ponto de retomada das sincronizações longas com a API da NBA.
+    Guarda a lista de itens da execução e quantos já foram gravados, para que uma
+    execução interrompida continue exatamente de onde parou.
+    """
+    __tablename__ = 'sync_checkpoints'
+    nome = Column(String, primary_key=True) # Ex: "jogadores"
+    itens = Column(JSON, nullable=False) # Lista fixada no início da execução
+    posicao = Column(Integer, default=0, nullable=False) # Quantos itens de `itens` já foram processados
+    status = Column(String, default="em_andamento", nullable=False) # em_andamento, concluido
+    novos = Column(Integer, default=0, nullable=False)
+    atualizados = Column(Integer, default=0, nullable=False)
+    data_inicio = Column(DateTime(timezone=True), server_default=func.now())
+    data_atualizacao = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class Jogo_Ao_Vivo(Base):
+    """
+    Estado compartilhado de um jogo acompanhado ao vivo, usado pelo backend "postgres"
+    de app/services/live_broadcast.py: quem é o processo líder (o único que consulta a
+    API da NBA) até quando, e o último snapshot publicado por ele.
+    """
+    __tablename__ = 'jogos_ao_vivo'
+    game_api_id = Column(Integer, primary_key=True, autoincrement=False)
+    lider = Column(String, nullable=True) # Identificador do processo (host:pid:sufixo)
+    lease_ate = Column(DateTime(timezone=True), nullable=True)
+    seq = Column(Integer, default=0, nullable=False) # Seq da última mensagem publicada
+    snapshot = Column(JSON, nullable=True) # schemas.LiveBoxscore completo, com o play-by-play
+    data_atualizacao = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+class Lease(Base):
+    """
+    Liderança entre processos (vários workers do uvicorn ou máquinas do Fly): o
+    processo `dono` detém o lease `nome` até `expira_em` e precisa renová-lo antes
+    disso. Usado pelo agendador de tarefas (app/scheduler.py).
+    """
+    __tablename__ = 'leases'
+    nome = Column(String, primary_key=True) # Ex: "scheduler"
+    dono = Column(String, nullable=True) # Identificador do processo (host:pid:sufixo)
+    expira_em = Column(DateTime(timezone=True), nullable=True)
+
+class Execucao_Job(Base):
+    """Uma execução de tarefa agendada (app/scheduler.py): quem rodou, quanto tempo levou e como terminou."""
+    __tablename__ = 'execucoes_jobs'
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String, nullable=False) # Id da tarefa no agendador, ex: "sync_future_games"
+    processo = Column(String, nullable=False)
+    status = Column(String, default="executando", nullable=False) # executando, sucesso, erro
+    erro = Column(String, nullable=True)
+    data_inicio = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    data_fim = Column(DateTime(timezone=True), nullable=True)
+    duracao_segundos = Column(Float, nullable=True)
+
+    __table_args__ = (Index('ix_execucoes_jobs_job_id_data_inicio', 'job_id', 'data_inicio'),)
+
+class Job(Base):
+    """
+    Sincronização administrativa em segundo plano (app/services/jobs.py): o que rodar,
+    o progresso enquanto roda e o resultado. As linhas ficam como histórico.
+    """
+    __tablename__ = 'jobs'
+    id = Column(Integer, primary_key=True, index=True)
+    tipo = Column(String, nullable=False) # Função do nba_importer, ex: "sync_all_players_awards"
+    parametros = Column(JSON, nullable=True)
+    origem = Column(String, nullable=True) # Ex: "admin:username" ou "agendador"
+    status = Column(String, default="pendente", nullable=False) # pendente, executando, sucesso, erro, cancelado
+    cancelar = Column(Boolean, default=False, nullable=False) # Cancelamento pedido; o job para no próximo ponto seguro
+    processo = Column(String, nullable=True) # Processo que está executando (host:pid:sufixo)
+    feitos = Column(Integer, default=0, nullable=False)
+    total = Column(Integer, nullable=True)
+    falhas = Column(Integer, default=0, nullable=False)
+    erros = Column(JSON, nullable=True) # Últimos erros de itens (jogadores, times...) que não pararam o job
+    erro = Column(String, nullable=True) # Erro que encerrou o job
+    resultado = Column(JSON, nullable=True)
+    data_criacao = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    data_inicio = Column(DateTime(timezone=True), nullable=True)
+    data_atualizacao = Column(DateTime(timezone=True), nullable=True) # Último progresso gravado
+    data_fim = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (Index('ix_jobs_status_id', 'status', 'id'),)
+
 class Conquista_Jogador(Base):
     __tablename__ = 'conquistas_jogador'
     id = Column(Integer, primary_key=True, index=True)
@@ -213,7 +416,56 @@ class Conquista_Jogador(Base):
 
     jogador = relationship("Jogador")
     __table_args__ = (UniqueConstraint('jogador_id', 'nome_conquista', 'temporada', name='_jogador_conquista_temporada_uc'),)
-    
+
+class Jogador_Premios_Sync(Base):
+    """
+    Último payload de prémios (PlayerAwards) visto para cada jogador, usado pela
+    sincronização incremental do nba_importer: payload igual ao anterior não é regravado,
+    e jogadores sem jogos recentes nem status ativo só são consultados de tempos em tempos.
+    """
+    __tablename__ = 'jogador_premios_sync'
+    jogador_id = Column(Integer, ForeignKey('jogadores.id', ondelete="CASCADE"), primary_key=True, autoincrement=False)
+    payload_hash = Column(String(64), nullable=False) # sha256 dos prémios (descrição e temporada), ordenados
+    total_premios = Column(Integer, default=0, nullable=False)
+    data_verificacao = Column(DateTime(timezone=True), nullable=False) # Última consulta à API
+    data_alteracao = Column(DateTime(timezone=True), nullable=False) # Última vez que o payload mudou
+
+class Jogador_Career_Stats(Base):
+    """
+    Médias por jogo de cada temporada da carreira de um jogador, copiadas da API da NBA
+    (PlayerCareerStats) pelo nba_importer. A página de carreira lê só desta tabela.
+    """
+    __tablename__ = 'jogador_career_stats'
+    id = Column(Integer, primary_key=True, index=True)
+    jogador_id = Column(Integer, ForeignKey('jogadores.id', ondelete="CASCADE"), nullable=False)
+    ordem = Column(Integer, nullable=False) # Posição da linha na resposta da API (cronológica; trocas de time geram várias linhas na temporada)
+    temporada = Column(String, nullable=False) # Ex: "2023-24"
+    team_abbreviation = Column(String, nullable=False)
+    jogos_disputados = Column(Integer, nullable=False)
+    minutos_por_jogo = Column(Float, nullable=False)
+    field_goals_made = Column(Float, nullable=False)
+    field_goals_attempted = Column(Float, nullable=False)
+    field_goal_percentage = Column(Float, nullable=False)
+    three_pointers_made = Column(Float, nullable=False)
+    three_pointers_attempted = Column(Float, nullable=False)
+    three_point_percentage = Column(Float, nullable=False)
+    free_throws_made = Column(Float, nullable=False)
+    free_throws_attempted = Column(Float, nullable=False)
+    free_throw_percentage = Column(Float, nullable=False)
+    rebounds_offensive = Column(Float, nullable=False)
+    rebounds_defensive = Column(Float, nullable=False)
+    rebounds_total = Column(Float, nullable=False)
+    assists = Column(Float, nullable=False)
+    steals = Column(Float, nullable=False)
+    blocks = Column(Float, nullable=False)
+    turnovers = Column(Float, nullable=False)
+    personal_fouls = Column(Float, nullable=False)
+    points = Column(Float, nullable=False)
+    data_atualizacao = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    jogador = relationship("Jogador")
+    __table_args__ = (UniqueConstraint('jogador_id', 'ordem', name='_jogador_career_stats_ordem_uc'),)
+
 class Conquista_Time(Base):
     __tablename__ = 'conquistas_time'
     id = Column(Integer, primary_key=True, index=True)
@@ -1,17 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
 from sqlalchemy.orm import Session
 from ..dependencies import get_db
-from ..services import nba_importer
+from ..services import fila_efeitos, nba_client, jobs
 from ..routers.usuarios import get_current_user
-from .. import schemas
-from ..schemas import SyncAwardsResponse, SyncAllAwardsResponse, SyncChampionshipsResponse, SyncAllChampionshipsResponse, SyncCareerStatsResponse, SyncAllCareerStatsResponse
+from .. import schemas, crud
+from ..websocket_manager import manager
 
 router = APIRouter(
     prefix="/admin",
     tags=["Administrativo"],
 )
 
-@router.post("/sync-teams", response_model=schemas.SyncResponse)
+# As sincronizações com a API da NBA rodam como jobs em segundo plano (app/services/jobs.py):
+# os endpoints /sync-* só enfileiram e devolvem o job, acompanhado em GET /admin/jobs/{job_id}.
+
+def _enfileirar(db: Session, current_user: schemas.Usuario, tipo: str, **parametros):
+    return jobs.descrever(jobs.enfileirar(db, tipo, origem=f"admin:{current_user.username}", **parametros))
+
+@router.post("/sync-teams", response_model=schemas.Job, status_code=202)
 def sync_teams_endpoint(
     db: Session = Depends(get_db),
     current_user: schemas.Usuario = Depends(get_current_user)
@@ -20,22 +27,23 @@ def sync_teams_endpoint(
     Endpoint para acionar a sincronização de times da NBA.
     Protegido por autenticação.
     """
-    resultado = nba_importer.sync_nba_teams(db)
-    return resultado
+    return _enfileirar(db, current_user, "sync_nba_teams")
 
-@router.post("/sync-players", response_model=schemas.SyncResponse)
+@router.post("/sync-players", response_model=schemas.Job, status_code=202)
 def sync_players_endpoint(
     db: Session = Depends(get_db),
     current_user: schemas.Usuario = Depends(get_current_user),
-    skip: int = Query(0, description="Número de jogadores a saltar (para retomar sincronização).")
+    skip: int = Query(0, description="Começa uma nova sincronização a partir deste jogador, ignorando o checkpoint."),
+    reiniciar: bool = Query(False, description="Descarta o checkpoint e sincroniza do início."),
+    shards: Optional[int] = Query(None, ge=1, le=16, description="Partes buscadas em paralelo numa nova execução (padrão: NBA_SYNC_SHARDS).")
 ):
     """
     Endpoint para acionar a sincronização de jogadores da NBA.
+    Por padrão, retoma a última execução interrompida a partir do checkpoint.
     """
-    resultado = nba_importer.sync_nba_players(db, skip=skip)
-    return resultado
+    return _enfileirar(db, current_user, "sync_nba_players", skip=skip, reiniciar=reiniciar, shards=shards)
 
-@router.post("/sync-games/{season}", response_model=schemas.SyncResponse)
+@router.post("/sync-games/{season}", response_model=schemas.Job, status_code=202)
 def sync_games_endpoint(
     season: str,
     db: Session = Depends(get_db),
@@ -44,11 +52,11 @@ def sync_games_endpoint(
     """
     Endpoint para acionar a sincronização de jogos de uma temporada da NBA.
     Exemplo de temporada: '2023-24'
+    Usa a importação em pipeline (ScheduleLeagueV2) e cai para o LeagueGameFinder se ela falhar.
     """
-    resultado = nba_importer.sync_nba_games(db, season=season)
-    return resultado
+    return _enfileirar(db, current_user, "sync_nba_games_v2", season=season)
 
-@router.post("/sync-future-games", response_model=schemas.SyncResponse)
+@router.post("/sync-future-games", response_model=schemas.Job, status_code=202)
 def sync_future_games_endpoint(
     db: Session = Depends(get_db),
     current_user: schemas.Usuario = Depends(get_current_user)
@@ -56,10 +64,9 @@ def sync_future_games_endpoint(
     """
     Endpoint para buscar e salvar jogos agendados para os próximos 30 dias.
     """
-    resultado = nba_importer.sync_future_games(db)
-    return resultado
+    return _enfileirar(db, current_user, "sync_future_games")
 
-@router.post("/sync-awards/{jogador_id}", response_model=SyncAwardsResponse)
+@router.post("/sync-awards/{jogador_id}", response_model=schemas.Job, status_code=202)
 def sync_awards_endpoint(
     jogador_id: int,
     db: Session = Depends(get_db),
@@ -69,23 +76,22 @@ def sync_awards_endpoint(
     Endpoint para acionar a sincronização de prémios para um jogador específico
     usando o ID INTERNO do banco de dados.
     """
-    resultado = nba_importer.sync_player_awards(db, jogador_id=jogador_id)
-    return resultado
+    return _enfileirar(db, current_user, "sync_player_awards", jogador_id=jogador_id)
 
     
-@router.post("/sync-all-awards", response_model=SyncAllAwardsResponse)
+@router.post("/sync-all-awards", response_model=schemas.Job, status_code=202)
 def sync_all_awards_endpoint(
     db: Session = Depends(get_db),
-    current_user: schemas.Usuario = Depends(get_current_user)
+    current_user: schemas.Usuario = Depends(get_current_user),
+    limit: Optional[int] = Query(None, ge=1, description="Máximo de jogadores consultados, pela ordem de prioridade.")
 ):
     """
-    Endpoint para acionar a sincronização de prémios para TODOS os jogadores
-    no banco de dados. ATENÇÃO: Este processo pode demorar muito tempo.
+    Endpoint para acionar a sincronização incremental de prémios: jogadores com jogos
+    recentes e ativos primeiro; quem não mudou desde a última consulta não é regravado.
     """
-    resultado = nba_importer.sync_all_players_awards(db)
-    return resultado
+    return _enfileirar(db, current_user, "sync_all_players_awards", limit=limit)
 
-@router.post("/sync-championships/{time_id}", response_model=SyncChampionshipsResponse)
+@router.post("/sync-championships/{time_id}", response_model=schemas.Job, status_code=202)
 def sync_championships_endpoint(
     time_id: int,
     db: Session = Depends(get_db),
@@ -95,10 +101,9 @@ def sync_championships_endpoint(
     Endpoint para acionar a sincronização de títulos para um time específico
     usando o ID INTERNO do banco de dados.
     """
-    resultado = nba_importer.sync_team_championships(db, time_id=time_id)
-    return resultado
+    return _enfileirar(db, current_user, "sync_team_championships", time_id=time_id)
 
-@router.post("/sync-all-championships", response_model=SyncAllChampionshipsResponse)
+@router.post("/sync-all-championships", response_model=schemas.Job, status_code=202)
 def sync_all_championships_endpoint(
     db: Session = Depends(get_db),
     current_user: schemas.Usuario = Depends(get_current_user)
@@ -107,32 +112,116 @@ def sync_all_championships_endpoint(
     Endpoint para acionar a sincronização de títulos para TODOS os times
     no banco de dados.
     """
-    resultado = nba_importer.sync_all_teams_championships(db)
-    return resultado
+    return _enfileirar(db, current_user, "sync_all_teams_championships")
 
-@router.post("/sync-career-stats/{jogador_id}", response_model=SyncCareerStatsResponse)
+@router.post("/sync-career-stats/{jogador_id}", response_model=schemas.Job, status_code=202)
 def sync_career_stats_endpoint(
     jogador_id: int,
     db: Session = Depends(get_db),
     current_user: schemas.Usuario = Depends(get_current_user)
 ):
     """
-    Endpoint para validar e testar o acesso às estatísticas de carreira 
+    Endpoint para sincronizar as estatísticas de carreira (tabela jogador_career_stats)
     de um jogador específico usando o ID INTERNO do banco de dados.
     """
-    resultado = nba_importer.sync_player_career_stats(db, jogador_id=jogador_id)
-    return resultado
+    return _enfileirar(db, current_user, "sync_player_career_stats", jogador_id=jogador_id)
 
-@router.post("/sync-all-career-stats", response_model=SyncAllCareerStatsResponse)
+@router.post("/sync-all-career-stats", response_model=schemas.Job, status_code=202)
 def sync_all_career_stats_endpoint(
     limit: int = 50,
     db: Session = Depends(get_db),
     current_user: schemas.Usuario = Depends(get_current_user)
 ):
     """
-    Endpoint para validar o acesso às estatísticas de carreira para múltiplos jogadores.
+    Endpoint para sincronizar as estatísticas de carreira de múltiplos jogadores,
+    começando pelos nunca sincronizados e pelos de dados mais antigos.
     ATENÇÃO: Limitado por padrão a 50 jogadores para evitar sobrecarga da API da NBA.
-    Use o parâmetro 'limit' para ajustar o número de jogadores testados.
+    Use o parâmetro 'limit' para ajustar o número de jogadores sincronizados.
+    """
+    return _enfileirar(db, current_user, "sync_all_players_career_stats", limit=limit)
+
+@router.get("/jobs", response_model=List[schemas.Job])
+def listar_jobs_endpoint(
+    db: Session = Depends(get_db),
+    current_user: schemas.Usuario = Depends(get_current_user),
+    status: Optional[str] = Query(None, description="pendente, executando, sucesso, erro ou cancelado."),
+    tipo: Optional[str] = Query(None, description="Ex: sync_all_players_awards."),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """
+    Histórico dos jobs de sincronização, do mais recente para o mais antigo.
+    """
+    return [jobs.descrever(job) for job in crud.get_jobs(db, status=status, tipo=tipo, limit=limit)]
+
+@router.get("/jobs/{job_id}", response_model=schemas.Job)
+def job_endpoint(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    """
+    Estado de um job: progresso (feitos/total), itens por segundo, ETA, erros e resultado.
+    """
+    job = crud.get_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return jobs.descrever(job)
+
+@router.post("/jobs/{job_id}/cancelar", response_model=schemas.Job)
+def cancelar_job_endpoint(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    """
+    Cancela um job. Pendente, é cancelado na hora; em execução, para no próximo ponto
+    seguro (depois de gravar o que já buscou) e termina com status "cancelado".
+    """
+    job = crud.get_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    if job.status in jobs.STATUS_FINAIS:
+        raise HTTPException(status_code=409, detail=f"O job já terminou ({job.status})")
+    return jobs.descrever(jobs.cancelar(db, job))
+
+@router.get("/fila-efeitos/metricas", response_model=schemas.FilaEfeitosMetricas)
+def fila_efeitos_metricas_endpoint(
+    db: Session = Depends(get_db),
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    """
+    Profundidade e atraso da fila de efeitos colaterais (notificações, feed e conquistas).
+    """
+    return fila_efeitos.get_metricas(db)
+
+@router.get("/nba-api/metricas", response_model=schemas.NbaApiMetricas)
+def nba_api_metricas_endpoint(
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    """
+    Estado do circuit breaker e contadores por endpoint (sucessos, erros, cache e latência)
+    das chamadas à API da NBA desde que o processo subiu.
+    """
+    return nba_client.get_metricas()
+
+@router.get("/websocket/metricas", response_model=schemas.WebSocketMetricas)
+def websocket_metricas_endpoint(
+    current_user: schemas.Usuario = Depends(get_current_user)
+):
+    """
+    Clientes conectados aos jogos ao vivo e, por jogo, mensagens enviadas, clientes
+    descartados e latência de envio.
+    """
+    return manager.get_metricas()
+
+@router.get("/scheduler/execucoes", response_model=List[schemas.ExecucaoJob])
+def scheduler_execucoes_endpoint(
+    db: Session = Depends(get_db),
+    current_user: schemas.Usuario = Depends(get_current_user),
+    job_id: Optional[str] = Query(None, description="Filtra por tarefa, ex: sync_future_games_job."),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """
+    Execuções mais recentes das tarefas agendadas: processo que rodou, duração e resultado.
     """
-    resultado = nba_importer.sync_all_players_career_stats(db, limit=limit)
-    return resultado
\ No newline at end of file
+    return crud.get_execucoes_jobs(db, job_id=job_id, limit=limit)
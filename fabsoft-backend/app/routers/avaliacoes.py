@@ -1,22 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Union
 from .. import crud, schemas
 from ..dependencies import get_db
 from ..routers.usuarios import try_get_current_user, get_current_user
 
 router = APIRouter(tags=["Avaliações e Estatísticas"])
 
-@router.get("/jogos/{jogo_id}/avaliacoes/", response_model=List[schemas.AvaliacaoJogo])
+@router.get("/jogos/{jogo_id}/avaliacoes/", response_model=Union[List[schemas.AvaliacaoJogo], schemas.Pagina[schemas.AvaliacaoJogo]])
 def read_avaliacoes_for_jogo(
     jogo_id: int,
     db: Session = Depends(get_db),
     current_user: Optional[schemas.Usuario] = Depends(try_get_current_user),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description='Cursor da paginação por keyset: "" para a primeira página, depois o next_cursor recebido. Com cursor, a resposta vem em {items, next_cursor} e skip é ignorado.'),
 ):
     user_id = current_user.id if current_user else None
-    avaliacoes = crud.get_avaliacoes_por_jogo(db, jogo_id=jogo_id, usuario_id_logado=user_id, skip=skip, limit=limit)
+    avaliacoes = crud.get_avaliacoes_por_jogo(db, jogo_id=jogo_id, usuario_id_logado=user_id, skip=skip, limit=limit, cursor=cursor)
     return avaliacoes
 
 @router.post("/jogos/{jogo_id}/estatisticas/", response_model=schemas.Estatistica)
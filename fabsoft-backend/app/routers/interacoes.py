@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union
 from .. import crud, schemas
 from ..dependencies import get_db
 from ..routers.usuarios import get_current_user
@@ -40,9 +40,15 @@ def create_comentario_endpoint(
         raise HTTPException(status_code=404, detail="Avaliação não encontrada")
     return crud.create_comentario(db=db, comentario=comentario, usuario_id=current_user.id, avaliacao_id=avaliacao_id)
 
-@router.get("/avaliacoes/{avaliacao_id}/comentarios", response_model=List[schemas.Comentario])
-def read_comentarios_endpoint(avaliacao_id: int, db: Session = Depends(get_db)):
-    return crud.get_comentarios_por_avaliacao(db=db, avaliacao_id=avaliacao_id)
+@router.get("/avaliacoes/{avaliacao_id}/comentarios", response_model=Union[List[schemas.Comentario], schemas.Pagina[schemas.Comentario]])
+def read_comentarios_endpoint(
+    avaliacao_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description='Cursor da paginação por keyset: "" para a primeira página, depois o next_cursor recebido. Com cursor, a resposta vem em {items, next_cursor} e skip é ignorado.'),
+    db: Session = Depends(get_db)
+):
+    return crud.get_comentarios_por_avaliacao(db=db, avaliacao_id=avaliacao_id, skip=skip, limit=limit, cursor=cursor)
 
 @router.post("/avaliacoes/{avaliacao_id}/like", response_model=schemas.CurtidaResponse)
 def like_avaliacao_endpoint(
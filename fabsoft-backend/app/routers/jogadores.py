@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Path
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union
 from .. import crud, schemas
 from ..dependencies import get_db
 
@@ -8,16 +8,17 @@ router = APIRouter(prefix="/jogadores", tags=["Jogadores"])
 
 @router.get(
     "/",
-    response_model=List[schemas.Jogador],
+    response_model=Union[List[schemas.Jogador], schemas.Pagina[schemas.Jogador]],
     summary="Listar todos os jogadores",
     description="Retorna uma lista paginada de todos os jogadores no banco de dados."
 )
 def read_jogadores(
     skip: int = Query(0, ge=0, description="Número de registos a saltar para paginação."),
     limit: int = Query(100, ge=1, le=1000, description="Número máximo de registos a retornar."),
+    cursor: Optional[str] = Query(None, description='Cursor da paginação por keyset: "" para a primeira página, depois o next_cursor recebido. Com cursor, a resposta vem em {items, next_cursor} e skip é ignorado.'),
     db: Session = Depends(get_db)
 ):
-    return crud.get_jogadores(db, skip=skip, limit=limit)
+    return crud.get_jogadores(db, skip=skip, limit=limit, cursor=cursor)
 
 @router.get(
     "/{jogador_slug}/details",
@@ -58,15 +59,16 @@ def read_jogador_gamelog(
     "/{jogador_slug}/career-stats",
     response_model=List[schemas.JogadorCareerStats],
     summary="Obter estatísticas de carreira de um jogador",
-    description="Retorna as estatísticas detalhadas de carreira de um jogador por temporada, obtidas diretamente da NBA API."
+    description="Retorna as estatísticas detalhadas de carreira de um jogador por temporada, sincronizadas da NBA API. Dados antigos ou ausentes são atualizados em segundo plano."
 )
 def read_jogador_career_stats(
     jogador_slug: str = Path(..., description="O slug do jogador a ser consultado."),
     db: Session = Depends(get_db)
 ):
     """
-    Este endpoint busca as estatísticas completas de carreira de um jogador
-    diretamente da NBA API, incluindo dados detalhados por temporada.
+    Este endpoint lê as estatísticas completas de carreira de um jogador do banco.
+    Se ainda não houver dados, responde 404 e a sincronização fica agendada,
+    então uma nova consulta em instantes já os encontra.
     """
     career_stats = crud.get_jogador_career_stats(db, jogador_slug=jogador_slug)
     if not career_stats:
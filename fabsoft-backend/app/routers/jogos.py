@@ -1,111 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, Path
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, Path, Query, Header
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 from datetime import date
-import asyncio
-from nba_api.stats.endpoints import boxscoretraditionalv2, playbyplayv2, boxscoresummaryv2
 from .. import crud, schemas, models
 from ..dependencies import get_db
-from ..websocket_manager import manager
+from ..database import SessionLocal
+from ..services import live_tracker
 from ..routers.usuarios import get_current_user
 
 router = APIRouter(prefix="/jogos", tags=["Jogos"])
 
-nba_api_headers = {
-    'Host': 'stats.nba.com',
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/117.0',
-    'Accept': 'application/json, text/plain, */*',
-    'Accept-Language': 'en-US,en;q=0.5',
-    'Referer': 'https://www.nba.com/',
-    'Accept-Encoding': 'gzip, deflate, br',
-    'Connection': 'keep-alive',
-    'x-nba-stats-origin': 'stats',
-    'x-nba-stats-token': 'true'
-}
-
-# Dicionários para manter as tarefas de fundo
-live_games_tasks: Dict[str, asyncio.Task] = {}
-
-async def track_real_game(game_api_id: str):
-    """
-    Tarefa de fundo que busca dados reais de um jogo da NBA API e os transmite.
-    """
-    print(f"Iniciando tracking real para o jogo API ID: {game_api_id}...")
-    
-    while True:
-        try:
-            boxscore = boxscoretraditionalv2.BoxScoreTraditionalV2(
-                game_id=game_api_id, timeout=30, headers=nba_api_headers
-            )
-            player_stats_df = boxscore.player_stats.get_data_frame()
-            team_stats_df = boxscore.team_stats.get_data_frame()
-
-            summary = boxscoresummaryv2.BoxScoreSummaryV2(
-                game_id=game_api_id, timeout=30, headers=nba_api_headers
-            )
-            line_score_df = summary.line_score.get_data_frame()
-            game_info_df = summary.game_info.get_data_frame()
-            
-            pbp = playbyplayv2.PlayByPlayV2(
-                game_id=game_api_id, timeout=30, headers=nba_api_headers
-            )
-            pbp_df = pbp.play_by_play.get_data_frame()
-
-            home_team_row = team_stats_df.iloc[0]
-            away_team_row = team_stats_df.iloc[1]
-
-            home_players = [
-                schemas.LivePlayerStats(**player)
-                for player in player_stats_df[player_stats_df['TEAM_ID'] == home_team_row['TEAM_ID']].to_dict('records')
-            ]
-            away_players = [
-                schemas.LivePlayerStats(**player)
-                for player in player_stats_df[player_stats_df['TEAM_ID'] == away_team_row['TEAM_ID']].to_dict('records')
-            ]
-            
-            home_team = schemas.LiveTeamStats(
-                team_id=home_team_row['TEAM_ID'], team_name=home_team_row['TEAM_NAME'],
-                team_abbreviation=home_team_row['TEAM_ABBREVIATION'], points=home_team_row['PTS'],
-                fg_pct=home_team_row['FG_PCT'], fg3_pct=home_team_row['FG3_PCT'], ft_pct=home_team_row['FT_PCT'],
-                rebounds=home_team_row['REB'], assists=home_team_row['AST'], turnovers=home_team_row['TO'],
-                players=home_players
-            )
-            
-            away_team = schemas.LiveTeamStats(
-                team_id=away_team_row['TEAM_ID'], team_name=away_team_row['TEAM_NAME'],
-                team_abbreviation=away_team_row['TEAM_ABBREVIATION'], points=away_team_row['PTS'],
-                fg_pct=away_team_row['FG_PCT'], fg3_pct=away_team_row['FG3_PCT'], ft_pct=away_team_row['FT_PCT'],
-                rebounds=away_team_row['REB'], assists=away_team_row['AST'], turnovers=away_team_row['TO'],
-                players=away_players
-            )
-            
-            play_by_play_events = [
-                schemas.PlayByPlayEvent(
-                    event_num=event['EVENTNUM'], clock=event['PCTIMESTRING'],
-                    period=event['PERIOD'], description=event.get('HOMEDESCRIPTION') or event.get('VISITORDESCRIPTION') or event.get('NEUTRALDESCRIPTION')
-                ) for event in pbp_df.to_dict('records')
-            ]
-
-            live_data = schemas.LiveBoxscore(
-                game_id=game_api_id,
-                game_status_text=game_info_df.iloc[0]['GAME_STATUS_TEXT'],
-                period=line_score_df.iloc[0]['GAME_SEQUENCE'],
-                home_team=home_team,
-                away_team=away_team,
-                play_by_play=play_by_play_events
-            )
-            
-            await manager.broadcast(live_data.model_dump(), int(game_api_id))
-            
-            await asyncio.sleep(20)
-
-        except asyncio.CancelledError:
-            print(f"Tracking para o jogo {game_api_id} terminado.")
-            break
-        except Exception as e:
-            print(f"Erro ao buscar dados para o jogo {game_api_id}: {e}")
-            await asyncio.sleep(30)
-
 @router.get("/upcoming", response_model=List[schemas.Jogo])
 def read_upcoming_games(db: Session = Depends(get_db)):
     """
@@ -124,23 +29,49 @@ async def websocket_endpoint(
         await websocket.close(code=1008, reason="Jogo não encontrado ou sem ID da API.")
         return
         
-    game_api_id = str(db_jogo.api_id)
-
-    await manager.connect(websocket, int(game_api_id))
-    
-    if game_api_id not in live_games_tasks:
-        live_games_tasks[game_api_id] = asyncio.create_task(track_real_game(game_api_id))
+    game_api_id = int(db_jogo.api_id)
+    await live_tracker.assinar(websocket, game_api_id)
 
     try:
         while True:
             await websocket.receive_text()
     except WebSocketDisconnect:
-        manager.disconnect(websocket, int(game_api_id))
+        live_tracker.cancelar_assinatura(websocket, game_api_id)
         print(f"Cliente desconectado do jogo {game_api_id}.")
-        if game_api_id in manager.active_connections and not manager.active_connections[int(game_api_id)]:
-            task = live_games_tasks.pop(game_api_id, None)
-            if task:
-                task.cancel()
+
+def _game_api_id_do_jogo(
+    jogo_id: int = Path(..., description="O ID INTERNO (do banco de dados) do jogo a ser acompanhado.")
+) -> int:
+    """
+    Busca o api_id do jogo numa sessão própria, fechada antes de o stream começar
+    (com Depends(get_db) ela ficaria aberta durante toda a conexão).
+    """
+    db = SessionLocal()
+    try:
+        db_jogo = crud.get_jogo(db, jogo_id=jogo_id)
+        game_api_id = db_jogo.api_id if db_jogo else None
+    finally:
+        db.close()
+    if not game_api_id:
+        raise HTTPException(status_code=404, detail="Jogo não encontrado ou sem ID da API.")
+    return int(game_api_id)
+
+@router.get("/{jogo_id}/live/stream")
+async def live_stream(
+    game_api_id: int = Depends(_game_api_id_do_jogo),
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    Box score ao vivo por Server-Sent Events, para clientes que só leem: as mesmas
+    mensagens do WebSocket (snapshot e deltas), com o seq como id do evento. Ao
+    reconectar com Last-Event-ID, o cliente recebe só os deltas que perdeu.
+    """
+    ultimo_seq = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    return StreamingResponse(
+        live_tracker.eventos_sse(game_api_id, ultimo_seq),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get("/trending", response_model=List[schemas.JogoComAvaliacao])
 def read_trending_games(db: Session = Depends(get_db)):
@@ -165,7 +96,7 @@ def read_highlighted_games(
 def create_jogo(jogo: schemas.JogoCreate, db: Session = Depends(get_db)):
     return crud.create_jogo(db=db, jogo=jogo)
 
-@router.get("/", response_model=List[schemas.Jogo])
+@router.get("/", response_model=Union[List[schemas.Jogo], schemas.Pagina[schemas.Jogo]])
 def read_jogos(
     skip: int = 0,
     limit: int = 100,
@@ -173,8 +104,9 @@ def read_jogos(
     time_id: Optional[int] = None,
     data: Optional[date] = None,
     status: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description='Cursor da paginação por keyset: "" para a primeira página, depois o next_cursor recebido. Com cursor, a resposta vem em {items, next_cursor} e skip é ignorado.'),
 ):
-    return crud.get_jogos(db, skip=skip, limit=limit, time_id=time_id, data=data, status=status)
+    return crud.get_jogos(db, skip=skip, limit=limit, time_id=time_id, data=data, status=status, cursor=cursor)
 
 @router.get("/slug/{slug}", response_model=schemas.Jogo)
 def read_jogo_by_slug(slug: str, db: Session = Depends(get_db)):
@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import jwt, JWTError
-from typing import List, Optional
+from typing import List, Optional, Union
 from sqlalchemy.orm import Session
 from datetime import date
 
@@ -83,9 +83,14 @@ def login_for_access_token(db: Session = Depends(get_db), form_data: OAuth2Passw
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
-@router.get("/", response_model=List[schemas.Usuario])
-def read_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    users = crud.get_users(db, skip=skip, limit=limit)
+@router.get("/", response_model=Union[List[schemas.Usuario], schemas.Pagina[schemas.Usuario]])
+def read_users(
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description='Cursor da paginação por keyset: "" para a primeira página, depois o next_cursor recebido. Com cursor, a resposta vem em {items, next_cursor} e skip é ignorado.'),
+    db: Session = Depends(get_db)
+):
+    users = crud.get_users(db, skip=skip, limit=limit, cursor=cursor)
     return users
 
 @router.get("/me", response_model=schemas.Usuario)
@@ -1,107 +1,259 @@
+"""
+Tarefas agendadas (APScheduler).
+
+Com vários workers do uvicorn ou várias máquinas do Fly, todo processo passa pelo
+lifespan, mas só um roda o agendador: os processos disputam o lease "scheduler"
+(tabela leases) e quem o detém inicia o BackgroundScheduler, renovando o lease a
+cada terço de SCHEDULER_LEASE_SEGUNDOS. Se o líder cai, outro assume quando o lease
+vence. As tarefas ficam na tabela apscheduler_jobs, com o próximo horário de cada
+uma, então o novo líder continua de onde o anterior parou: um disparo já feito não
+se repete, e um perdido durante a troca roda uma vez se ainda estiver dentro de
+SCHEDULER_TOLERANCIA_ATRASO_SEGUNDOS. Cada execução fica registrada em execucoes_jobs.
+
+As sincronizações com a API da NBA rodam pelo jobs.executar(): continuam na thread
+do agendador, mas aparecem em /admin/jobs com progresso e podem ser canceladas.
+"""
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.triggers.cron import CronTrigger
 from sqlalchemy.orm import Session
-from .database import SessionLocal
-from .services import nba_importer
+from datetime import timedelta
+from .config import settings
+from .database import SessionLocal, engine
+from .services import jobs
+from . import crud
+import functools
 import logging
+import os
+import socket
+import threading
 import time
+import uuid
 
 # Configuração básica de logging para ver os logs do scheduler
 logging.basicConfig(level=logging.INFO)
 logging.getLogger('apscheduler').setLevel(logging.INFO)
 
+NOME_LEASE = "scheduler"
+PROCESSO = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+def _registrar_execucao(tarefa):
+    """
+    Roda a tarefa só se este processo ainda for o líder e registra a execução em
+    execucoes_jobs. A tarefa sinaliza falha levantando a exceção (depois de logá-la).
+    """
+    @functools.wraps(tarefa)
+    def executar():
+        db: Session = SessionLocal()
+        try:
+            if not crud.lease_valido(db, NOME_LEASE, PROCESSO):
+                logging.warning(f"Tarefa {tarefa.__name__} ignorada: este processo não é mais o líder do agendador.")
+                return
+            execucao_id = crud.iniciar_execucao_job(db, tarefa.__name__, PROCESSO).id
+        finally:
+            db.close() # Não segura uma conexão do pool durante a tarefa
+        inicio = time.monotonic()
+        erro = None
+        try:
+            tarefa()
+        except Exception as e:
+            erro = repr(e)
+        db = SessionLocal()
+        try:
+            crud.finalizar_execucao_job(db, execucao_id, time.monotonic() - inicio, erro)
+        finally:
+            db.close()
+    return executar
+
 # --- Funções que serão executadas pelo agendador ---
 
+@_registrar_execucao
 def sync_future_games_job():
     """
     Tarefa diária para sincronizar os jogos futuros.
     """
     logging.info("Iniciando tarefa agendada: Sincronização de jogos futuros...")
-    db: Session = SessionLocal()
     try:
-        nba_importer.sync_future_games(db)
+        jobs.executar("sync_future_games", origem="agendador")
         logging.info("Sincronização de jogos futuros concluída com sucesso.")
     except Exception as e:
         logging.error(f"Erro na sincronização de jogos futuros: {e}")
-    finally:
-        db.close()
+        raise
 
+@_registrar_execucao
 def sync_all_players_awards_job():
     """
     Tarefa semanal para sincronizar os prémios de todos os jogadores.
     """
     logging.info("Iniciando tarefa agendada: Sincronização de prémios dos jogadores...")
-    db: Session = SessionLocal()
     try:
-        nba_importer.sync_all_players_awards(db)
+        jobs.executar("sync_all_players_awards", origem="agendador")
         logging.info("Sincronização de prémios concluída com sucesso.")
     except Exception as e:
         logging.error(f"Erro na sincronização de prémios: {e}")
-    finally:
-        db.close()
+        raise
 
+@_registrar_execucao
 def sync_all_teams_championships_job():
     """
     Tarefa anual para sincronizar os títulos dos times.
     """
     logging.info("Iniciando tarefa agendada: Sincronização de títulos dos times...")
-    db: Session = SessionLocal()
     try:
-        nba_importer.sync_all_teams_championships(db)
+        jobs.executar("sync_all_teams_championships", origem="agendador")
         logging.info("Sincronização de títulos concluída com sucesso.")
     except Exception as e:
         logging.error(f"Erro na sincronização de títulos: {e}")
-    finally:
-        db.close()
+        raise
 
+@_registrar_execucao
 def sync_players_in_batches_job():
     """
-    Tarefa semanal para sincronizar os jogadores em lotes para evitar rate limits.
+    Tarefa semanal para sincronizar os jogadores. A lista é dividida em shards buscados em
+    paralelo no ritmo adaptativo do cliente da API da NBA, sem pausas fixas, e uma execução
+    interrompida é retomada de onde parou na semana seguinte (ou num novo job).
     """
-    logging.info("Iniciando tarefa agendada: Sincronização de jogadores em lotes...")
+    logging.info("Iniciando tarefa agendada: Sincronização de jogadores em shards...")
+    try:
+        resultado = jobs.executar("sync_nba_players", origem="agendador")
+        logging.info(f"Sincronização de jogadores concluída: {resultado['jogadores_processados']} jogadores processados"
+                     f"{' (interrompida; continua na próxima execução)' if resultado.get('interrompido') else ''}.")
+    except Exception as e:
+        logging.error(f"Erro na sincronização de jogadores em shards: {e}")
+        raise
+
+@_registrar_execucao
+def reconciliar_curtidas_job():
+    """
+    Tarefa diária que corrige eventuais divergências no contador de curtidas das avaliações.
+    """
+    logging.info("Iniciando tarefa agendada: Reconciliação do contador de curtidas...")
     db: Session = SessionLocal()
     try:
-        # Primeiro lote
-        logging.info("Sincronizando primeiro lote de jogadores (0-349)...")
-        nba_importer.sync_nba_players(db, skip=0, limit=350)
-        
-        # Pausa entre os lotes para segurança
-        logging.info("Pausa de 60 segundos entre os lotes...")
-        time.sleep(60)
-
-        # Segundo lote
-        logging.info("Sincronizando segundo lote de jogadores (350-700)...")
-        nba_importer.sync_nba_players(db, skip=350, limit=350)
-
-        logging.info("Sincronização de jogadores em lotes concluída com sucesso.")
+        ajustadas = crud.reconciliar_curtidas(db)
+        logging.info(f"Reconciliação de curtidas concluída: {ajustadas} avaliações ajustadas.")
     except Exception as e:
-        logging.error(f"Erro na sincronização de jogadores em lotes: {e}")
+        logging.error(f"Erro na reconciliação de curtidas: {e}")
+        raise
     finally:
         db.close()
 
 # --- Configuração e inicialização do Scheduler ---
 
-scheduler = BackgroundScheduler(timezone="America/Sao_Paulo")
-
-def start_scheduler():
-    """
-    Adiciona todas as tarefas ao agendador e o inicia.
-    """
+# (tarefa, campos do gatilho cron). O id de cada tarefa no agendador é o nome da função.
+TAREFAS = [
     # Sincronizar jogos futuros: 1x por dia
-    scheduler.add_job(sync_future_games_job, 'cron', hour=3, minute=0)
+    (sync_future_games_job, dict(hour=3, minute=0)),
 
     # Sincronizar prémios dos jogadores: 1x por semana, na terça-feira
-    scheduler.add_job(sync_all_players_awards_job, 'cron', day_of_week='tue', hour=4, minute=0)
-    
+    (sync_all_players_awards_job, dict(day_of_week='tue', hour=4, minute=0)),
+
     # Sincronizar jogadores em lotes: 1x por semana, na terça-feira
     # (um pouco depois dos prémios)
-    scheduler.add_job(sync_players_in_batches_job, 'cron', day_of_week='tue', hour=4, minute=30)
+    (sync_players_in_batches_job, dict(day_of_week='tue', hour=4, minute=30)),
+
+    # Reconciliar contador de curtidas: 1x por dia, de madrugada
+    (reconciliar_curtidas_job, dict(hour=3, minute=30)),
 
     # Sincronizar títulos dos times: 1x por ano, em Agosto
-    scheduler.add_job(sync_all_teams_championships_job, 'cron', month='aug', day=1, hour=5, minute=0)
+    (sync_all_teams_championships_job, dict(month='aug', day=1, hour=5, minute=0)),
+]
+
+_scheduler: BackgroundScheduler = None
+_parar = threading.Event()
+_eleicao: threading.Thread = None
+
+def _criar_scheduler() -> BackgroundScheduler:
+    return BackgroundScheduler(
+        jobstores={"default": SQLAlchemyJobStore(engine=engine)},
+        job_defaults={
+            "coalesce": True, # Vários disparos perdidos viram uma execução só
+            "max_instances": 1,
+            "misfire_grace_time": settings.SCHEDULER_TOLERANCIA_ATRASO_SEGUNDOS,
+        },
+        timezone="America/Sao_Paulo",
+    )
 
+def _sincronizar_tarefas(scheduler: BackgroundScheduler):
+    """
+    Deixa o job store igual a TAREFAS. Tarefas com o mesmo gatilho são mantidas como
+    estão, para não perder o próximo horário gravado; as que saíram do código são removidas.
+    """
+    ids = set()
+    for tarefa, campos in TAREFAS:
+        gatilho = CronTrigger(timezone=scheduler.timezone, **campos)
+        existente = scheduler.get_job(tarefa.__name__)
+        if existente is None or str(existente.trigger) != str(gatilho):
+            scheduler.add_job(tarefa, gatilho, id=tarefa.__name__, replace_existing=True)
+        ids.add(tarefa.__name__)
+    for job in scheduler.get_jobs():
+        if job.id not in ids:
+            job.remove()
+
+def _assumir():
+    global _scheduler
+    scheduler = _criar_scheduler()
+    scheduler.start(paused=True)
     try:
-        scheduler.start()
-        logging.info("Agendador de tarefas iniciado com sucesso.")
-    except (KeyboardInterrupt, SystemExit):
-        scheduler.shutdown()
-        logging.info("Agendador de tarefas parado.")
\ No newline at end of file
+        _sincronizar_tarefas(scheduler)
+    except Exception:
+        scheduler.shutdown(wait=False)
+        raise
+    scheduler.resume()
+    _scheduler = scheduler
+    logging.info(f"Processo {PROCESSO} assumiu o agendador de tarefas.")
+
+def _renunciar():
+    global _scheduler
+    scheduler, _scheduler = _scheduler, None
+    # Tarefas em andamento terminam sozinhas; o novo líder não as repete
+    scheduler.shutdown(wait=False)
+    logging.info(f"Processo {PROCESSO} deixou o agendador de tarefas.")
+
+def _eleger():
+    """Disputa (ou renova) o lease a cada terço da validade e liga ou desliga o agendador conforme o resultado."""
+    duracao = timedelta(seconds=settings.SCHEDULER_LEASE_SEGUNDOS)
+    while True:
+        try:
+            db: Session = SessionLocal()
+            try:
+                lider = crud.adquirir_lease(db, NOME_LEASE, PROCESSO, duracao)
+            finally:
+                db.close()
+        except Exception as e:
+            # Sem conseguir renovar não dá para garantir que o lease ainda é nosso
+            logging.error(f"Erro ao renovar a liderança do agendador: {e}")
+            lider = False
+        try:
+            if lider and _scheduler is None:
+                _assumir()
+            elif not lider and _scheduler is not None:
+                _renunciar()
+        except Exception as e:
+            logging.error(f"Erro ao iniciar o agendador de tarefas: {e}")
+        if _parar.wait(settings.SCHEDULER_LEASE_SEGUNDOS / 3):
+            return
+
+def start_scheduler():
+    """
+    Entra na disputa pelo agendador. Só o processo líder inicia o BackgroundScheduler.
+    """
+    global _eleicao
+    _parar.clear()
+    _eleicao = threading.Thread(target=_eleger, name="eleicao-scheduler", daemon=True)
+    _eleicao.start()
+
+def stop_scheduler():
+    """Para o agendador e devolve o lease, para outro processo assumir sem esperar o vencimento."""
+    _parar.set()
+    if _eleicao is not None:
+        _eleicao.join(timeout=10)
+    if _scheduler is not None:
+        _renunciar()
+    db: Session = SessionLocal()
+    try:
+        crud.liberar_lease(db, NOME_LEASE, PROCESSO)
+    except Exception as e:
+        logging.error(f"Erro ao liberar a liderança do agendador: {e}")
+    finally:
+        db.close()
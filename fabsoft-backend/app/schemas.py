@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, field_validator, RootModel
-from typing import Optional, List, Union
+from typing import Optional, List, Union, Generic, TypeVar, Dict, Any
 from datetime import datetime, date
 from .models import NivelUsuario, StatusUsuario
 
@@ -172,12 +172,15 @@ class SyncAwardsResponse(BaseModel):
     
 class SyncAllAwardsResponse(BaseModel):
     total_premios_sincronizados: int
+    jogadores_consultados: Optional[int] = None
+    jogadores_inalterados: Optional[int] = None
 
 class SyncCareerStatsResponse(BaseModel):
     stats_sincronizadas: int
     
 class SyncAllCareerStatsResponse(BaseModel):
-    total_stats_validadas: int
+    jogadores_sincronizados: int
+    total_stats_sincronizadas: int
 
 # --- Schemas para Usuario ---
 class UsuarioBase(BaseModel):
@@ -361,6 +364,12 @@ class TokenData(BaseModel):
 class SyncResponse(BaseModel):
     total_sincronizado: int
     novos_adicionados: int
+    # Preenchidos pela importação de temporada em pipeline
+    jogos_finalizados: Optional[int] = None
+    falhas: Optional[int] = None
+    interrompido: Optional[bool] = None
+    duracao_segundos: Optional[float] = None
+    jogos_por_segundo: Optional[float] = None
     
 class ConquistaTime(BaseModel):
     nome_conquista: str
@@ -372,10 +381,88 @@ class TimeDetails(Time):
     
 class SyncChampionshipsResponse(BaseModel):
     novos_titulos_adicionados: int
+    novas_temporadas: List[str] = []
 
 class SyncAllChampionshipsResponse(BaseModel):
     total_titulos_sincronizados: int
+    titulos_na_api: Optional[int] = None
+    novos: Dict[str, List[str]] = {} # Nome do time -> temporadas dos títulos que entraram
+    times_com_erro: List[str] = []
+
+class FilaEfeitosMetricas(BaseModel):
+    ativa: bool
+    workers: int
+    pendentes: int
+    processando: int
+    com_erro: int
+    atraso_atual_segundos: Optional[float] = None # Idade da tarefa mais antiga ainda não concluída
+    processadas: int
+    falhas: int
+    ultimo_atraso_segundos: Optional[float] = None
+    atraso_medio_segundos: Optional[float] = None
+
+class NbaApiEndpointMetricas(BaseModel):
+    sucessos: int
+    erros: int
+    retentativas: int
+    sobrecargas: int # 429/503 ou timeout, que reduzem a taxa adaptativa
+    cache_hits: int
+    rejeitadas_circuito: int
+    latencia_media_ms: Optional[float] = None
+    latencia_max_ms: float
+    ultimo_erro: Optional[str] = None
+
+class NbaApiMetricas(BaseModel):
+    circuito: str # fechado, aberto ou meio_aberto
+    taxa_requisicoes_por_segundo: float # Taxa atual do token bucket adaptativo
+    reducoes_taxa: int
+    endpoints: Dict[str, NbaApiEndpointMetricas]
+
+class WebSocketJogoMetricas(BaseModel):
+    conexoes: int
+    mensagens_enviadas: int
+    descartadas_lentas: int # Clientes desconectados por encher a fila de envio
+    desconectadas_erro: int
+    latencia_media_ms: Optional[float] = None # Da entrada na fila até o envio terminar
+    latencia_max_ms: float
+
+class WebSocketMetricas(BaseModel):
+    conexoes: int
+    jogos: Dict[int, WebSocketJogoMetricas] # Por api_id do jogo
     
+class Job(BaseModel):
+    id: int
+    tipo: str
+    parametros: Dict[str, Any]
+    origem: Optional[str] = None
+    status: str # pendente, executando, sucesso, erro, cancelado
+    cancelar: bool # Cancelamento pedido (o job para no próximo ponto seguro)
+    processo: Optional[str] = None
+    feitos: int
+    total: Optional[int] = None
+    falhas: int
+    erros: List[str] # Últimos erros de itens que não pararam o job
+    erro: Optional[str] = None
+    resultado: Optional[Dict[str, Any]] = None
+    itens_por_segundo: Optional[float] = None
+    eta_segundos: Optional[float] = None
+    data_criacao: datetime
+    data_inicio: Optional[datetime] = None
+    data_atualizacao: Optional[datetime] = None
+    data_fim: Optional[datetime] = None
+
+class ExecucaoJob(BaseModel):
+    id: int
+    job_id: str
+    processo: str
+    status: str # executando, sucesso, erro
+    erro: Optional[str] = None
+    data_inicio: datetime
+    data_fim: Optional[datetime] = None
+    duracao_segundos: Optional[float] = None
+
+    model_config = {"from_attributes": True}
+
 class ComparacaoJogadoresResponse(BaseModel):
     jogador1: JogadorDetails
     jogador2: JogadorDetails
@@ -520,4 +607,11 @@ class JogoDestaque(BaseModel):
     total_avaliacoes: int = 0
     media_geral: float = 0.0
     tipo_destaque: str  # "esta_semana", "ultimos_3_dias", "ontem", "tournament"
-    model_config = {"from_attributes": True}
\ No newline at end of file
+    model_config = {"from_attributes": True}
+
+# --- Schemas para Paginação por Cursor ---
+T = TypeVar("T")
+
+class Pagina(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None  # None quando não há próxima página
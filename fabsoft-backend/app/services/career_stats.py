@@ -0,0 +1,53 @@
+"""
+Atualização em segundo plano das estatísticas de carreira (stale-while-revalidate).
+
+A rota /jogadores/{slug}/career-stats lê só da tabela jogador_career_stats. Quando as
+linhas de um jogador não existem ou são mais velhas que CAREER_STATS_MAX_IDADE_HORAS,
+a leitura devolve o que houver e pede uma atualização aqui: um pool pequeno de
+threads (CAREER_STATS_WORKERS) busca os dados na API da NBA pelo nba_importer, cada
+tarefa com a sua própria sessão. Pedidos repetidos para um jogador que já está na
+fila são ignorados, então várias visitas à mesma página geram uma única chamada.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from ..config import settings
+from ..database import SessionLocal
+
+_lock = threading.Lock()
+_pendentes = set()
+_executor = None
+
+def _atualizar(jogador_id: int):
+    from . import nba_importer
+
+    db = SessionLocal()
+    try:
+        nba_importer.sync_player_career_stats(db, jogador_id=jogador_id)
+    except Exception as e:
+        db.rollback()
+        print(f"Erro ao atualizar estatísticas de carreira do jogador {jogador_id} em segundo plano: {e}")
+    finally:
+        db.close()
+        with _lock:
+            _pendentes.discard(jogador_id)
+
+def agendar_atualizacao(jogador_id: int) -> bool:
+    """Agenda a atualização das estatísticas de um jogador. Retorna False se ela já estava na fila."""
+    global _executor
+    with _lock:
+        if jogador_id in _pendentes:
+            return False
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.CAREER_STATS_WORKERS, thread_name_prefix="career-stats")
+        _pendentes.add(jogador_id)
+    _executor.submit(_atualizar, jogador_id)
+    return True
+
+def parar(esperar: bool = False):
+    """Descarta as atualizações que ainda não começaram. Usado no desligamento da aplicação."""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+        _pendentes.clear()
+    if executor is not None:
+        executor.shutdown(wait=esperar, cancel_futures=True)
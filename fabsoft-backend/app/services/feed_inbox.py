@@ -0,0 +1,146 @@
+"""
+Caixa de entrada materializada do feed (fan-out-on-write).
+
+Quando FEED_FANOUT_ATIVO está ligado, cada atividade ou avaliação nova é copiada
+para a caixa de entrada (tabela feed_inbox) de todos os seguidores do autor, e a
+leitura do feed vira uma única varredura pelo índice (usuario_id, data_item).
+Autores com mais seguidores que FEED_FANOUT_LIMITE_SEGUIDORES ("celebridades")
+não são distribuídos na escrita: os seus itens são buscados na leitura (fan-out-on-read).
+
+Uso do backfill para popular as caixas de entrada com os dados existentes:
+    python -m app.services.feed_inbox backfill
+"""
+from sqlalchemy import func, select, insert, delete, literal
+from sqlalchemy.orm import Session
+from ..config import settings
+from .. import models
+
+# Quantidade de itens copiados para a caixa de entrada ao começar a seguir alguém
+ITENS_AO_SEGUIR = 50
+
+def fanout_ativo() -> bool:
+    return settings.FEED_FANOUT_ATIVO
+
+def _total_seguidores(seguido_id_col):
+    """Subquery correlacionada com o total de seguidores de um usuário."""
+    return select(func.count(models.Seguidor.id))\
+        .where(models.Seguidor.seguido_id == seguido_id_col)\
+        .scalar_subquery()
+
+def is_celebridade(db: Session, autor_id: int) -> bool:
+    total = db.query(func.count(models.Seguidor.id)).filter(models.Seguidor.seguido_id == autor_id).scalar()
+    return total > settings.FEED_FANOUT_LIMITE_SEGUIDORES
+
+def seguidos_celebridades(db: Session, usuario_id: int):
+    """
+    Subquery com os IDs dos usuários seguidos por `usuario_id` que são celebridades,
+    ou seja, cujos itens não estão na caixa de entrada e precisam ser lidos na hora.
+    """
+    Seguidos = models.Seguidor
+    return select(Seguidos.seguido_id).where(
+        Seguidos.seguidor_id == usuario_id,
+        _total_seguidores(Seguidos.seguido_id) > settings.FEED_FANOUT_LIMITE_SEGUIDORES
+    )
+
+def _distribuir(db: Session, autor_id: int, coluna: str, referencia_id: int):
+    """Copia um item para a caixa de entrada de todos os seguidores do autor, num único INSERT ... SELECT."""
+    if is_celebridade(db, autor_id):
+        return
+    seguidores = select(
+        models.Seguidor.seguidor_id, models.Seguidor.seguido_id, literal(referencia_id)
+    ).where(models.Seguidor.seguido_id == autor_id)
+    db.execute(insert(models.Feed_Inbox).from_select(
+        ["usuario_id", "autor_id", coluna], seguidores
+    ))
+
+def distribuir_atividade(db: Session, atividade: models.Feed_Atividade):
+    """Distribui um item de Feed_Atividade recém-criado (precisa já ter id)."""
+    if not fanout_ativo():
+        return
+    _distribuir(db, atividade.usuario_id, "feed_atividade_id", atividade.id)
+
+def distribuir_avaliacao(db: Session, avaliacao: models.Avaliacao_Jogo):
+    """Distribui uma Avaliacao_Jogo recém-criada (precisa já ter id)."""
+    if not fanout_ativo():
+        return
+    _distribuir(db, avaliacao.usuario_id, "avaliacao_id", avaliacao.id)
+
+def remover_avaliacao(db: Session, avaliacao_id: int):
+    """Remove das caixas de entrada uma avaliação que foi apagada."""
+    db.execute(delete(models.Feed_Inbox).where(models.Feed_Inbox.avaliacao_id == avaliacao_id))
+
+def preencher_ao_seguir(db: Session, seguidor_id: int, seguido_id: int):
+    """Copia os itens mais recentes do novo seguido para a caixa de entrada do seguidor."""
+    if not fanout_ativo() or is_celebridade(db, seguido_id):
+        return
+
+    atividades = select(
+        literal(seguidor_id), models.Feed_Atividade.usuario_id,
+        models.Feed_Atividade.id, models.Feed_Atividade.data_atividade
+    ).where(models.Feed_Atividade.usuario_id == seguido_id)\
+     .order_by(models.Feed_Atividade.data_atividade.desc())\
+     .limit(ITENS_AO_SEGUIR)
+    db.execute(insert(models.Feed_Inbox).from_select(
+        ["usuario_id", "autor_id", "feed_atividade_id", "data_item"], atividades
+    ))
+
+    avaliacoes = select(
+        literal(seguidor_id), models.Avaliacao_Jogo.usuario_id,
+        models.Avaliacao_Jogo.id, models.Avaliacao_Jogo.data_avaliacao
+    ).where(models.Avaliacao_Jogo.usuario_id == seguido_id)\
+     .order_by(models.Avaliacao_Jogo.data_avaliacao.desc())\
+     .limit(ITENS_AO_SEGUIR)
+    db.execute(insert(models.Feed_Inbox).from_select(
+        ["usuario_id", "autor_id", "avaliacao_id", "data_item"], avaliacoes
+    ))
+
+def remover_ao_deixar_de_seguir(db: Session, seguidor_id: int, seguido_id: int):
+    db.execute(delete(models.Feed_Inbox).where(
+        models.Feed_Inbox.usuario_id == seguidor_id,
+        models.Feed_Inbox.autor_id == seguido_id
+    ))
+
+def backfill(db: Session):
+    """
+    Reconstrói todas as caixas de entrada a partir de Seguidor, Feed_Atividade e Avaliacao_Jogo.
+    Idempotente: limpa a tabela e repopula com dois INSERT ... SELECT.
+    """
+    db.execute(delete(models.Feed_Inbox))
+
+    nao_celebridade = _total_seguidores(models.Seguidor.seguido_id) <= settings.FEED_FANOUT_LIMITE_SEGUIDORES
+
+    atividades = select(
+        models.Seguidor.seguidor_id, models.Feed_Atividade.usuario_id,
+        models.Feed_Atividade.id, models.Feed_Atividade.data_atividade
+    ).join(models.Feed_Atividade, models.Feed_Atividade.usuario_id == models.Seguidor.seguido_id)\
+     .where(nao_celebridade)
+    total_atividades = db.execute(insert(models.Feed_Inbox).from_select(
+        ["usuario_id", "autor_id", "feed_atividade_id", "data_item"], atividades
+    )).rowcount
+
+    avaliacoes = select(
+        models.Seguidor.seguidor_id, models.Avaliacao_Jogo.usuario_id,
+        models.Avaliacao_Jogo.id, models.Avaliacao_Jogo.data_avaliacao
+    ).join(models.Avaliacao_Jogo, models.Avaliacao_Jogo.usuario_id == models.Seguidor.seguido_id)\
+     .where(nao_celebridade)
+    total_avaliacoes = db.execute(insert(models.Feed_Inbox).from_select(
+        ["usuario_id", "autor_id", "avaliacao_id", "data_item"], avaliacoes
+    )).rowcount
+
+    db.commit()
+    print(f"Backfill do feed concluído: {total_atividades} atividades e {total_avaliacoes} avaliações distribuídas.")
+    return {"atividades": total_atividades, "avaliacoes": total_avaliacoes}
+
+if __name__ == "__main__":
+    import sys
+    from ..database import SessionLocal
+
+    if len(sys.argv) < 2 or sys.argv[1] != "backfill":
+        print("Uso: python -m app.services.feed_inbox backfill")
+        sys.exit(1)
+
+    db = SessionLocal()
+    try:
+        backfill(db)
+    finally:
+        db.close()
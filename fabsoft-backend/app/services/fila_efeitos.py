@@ -0,0 +1,240 @@
+"""
+Fila de efeitos colaterais das interações sociais (outbox no banco).
+
+Curtidas, comentários e follows geram notificações, itens de feed e checagem de
+conquistas. Com FILA_EFEITOS_ATIVA ligado, esses efeitos não rodam mais dentro da
+requisição: viram linhas em tarefas_pendentes, gravadas na mesma transação da ação
+principal (se a ação der rollback, as tarefas somem junto). Depois do commit, os
+workers em segundo plano pegam as tarefas em lotes e as executam.
+
+Desligada (padrão), enfileirar() executa o efeito na hora, na sessão da requisição.
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event, func, update, delete
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..database import SessionLocal
+from .. import models
+
+TIPO_NOTIFICACAO = "notificacao"
+TIPO_FEED_ITEM = "feed_item"
+TIPO_CONQUISTAS = "conquistas"
+
+# Tarefas em "processando" há mais tempo que isso são consideradas abandonadas
+# (ex.: o processo caiu no meio do lote) e voltam para a fila.
+TIMEOUT_PROCESSANDO = timedelta(minutes=5)
+
+def fila_ativa() -> bool:
+    return settings.FILA_EFEITOS_ATIVA
+
+# --- Handlers ---
+
+def _executar(db: Session, tipo: str, payload: dict):
+    from .. import crud
+
+    if tipo == TIPO_NOTIFICACAO:
+        crud.create_notificacao(db=db, **payload)
+    elif tipo == TIPO_FEED_ITEM:
+        crud.create_feed_item(db=db, **payload)
+    elif tipo == TIPO_CONQUISTAS:
+        crud.avaliar_conquistas(db=db, **payload)
+    else:
+        raise ValueError(f"Tipo de tarefa desconhecido: {tipo}")
+
+# --- Produção ---
+
+def _acordar_workers(session):
+    _fila.acordar()
+
+def enfileirar(db: Session, tarefa: str, **payload):
+    """
+    Registra um efeito colateral. Não faz commit: a tarefa entra na transação de quem
+    chamou e os workers são acordados quando ela for confirmada.
+    """
+    if not fila_ativa():
+        _executar(db, tarefa, payload)
+        return
+    db.add(models.Tarefa_Pendente(tipo=tarefa, payload=payload))
+    if not event.contains(db, "after_commit", _acordar_workers):
+        event.listen(db, "after_commit", _acordar_workers, once=True)
+
+# --- Consumo ---
+
+def _reservar_lote(db: Session, tamanho: int):
+    """
+    Marca até `tamanho` tarefas pendentes como "processando" e devolve os ids reservados.
+    FOR UPDATE SKIP LOCKED evita que dois workers peguem as mesmas linhas no Postgres;
+    o filtro por status no UPDATE cobre bancos sem esse suporte (SQLite).
+    """
+    agora = datetime.now(timezone.utc)
+    db.execute(
+        update(models.Tarefa_Pendente)
+        .where(models.Tarefa_Pendente.status == "processando",
+               models.Tarefa_Pendente.data_inicio < agora - TIMEOUT_PROCESSANDO)
+        .values(status="pendente")
+    )
+    candidatos = db.query(models.Tarefa_Pendente.id)\
+        .filter(models.Tarefa_Pendente.status == "pendente")\
+        .order_by(models.Tarefa_Pendente.id)\
+        .limit(tamanho)\
+        .with_for_update(skip_locked=True)\
+        .all()
+    if not candidatos:
+        db.commit()
+        return []
+    reservados = db.execute(
+        update(models.Tarefa_Pendente)
+        .where(models.Tarefa_Pendente.id.in_([c.id for c in candidatos]),
+               models.Tarefa_Pendente.status == "pendente")
+        .values(status="processando", data_inicio=agora)
+        .returning(models.Tarefa_Pendente.id)
+    ).scalars().all()
+    db.commit()
+    return sorted(reservados)
+
+def processar_lote(db: Session, tamanho: int = None) -> int:
+    """
+    Executa um lote de tarefas numa única transação. Cada tarefa roda num savepoint,
+    então uma falha só afeta a própria tarefa, que volta para a fila até esgotar as tentativas.
+    Retorna quantas tarefas foram processadas.
+    """
+    ids = _reservar_lote(db, tamanho or settings.FILA_EFEITOS_TAMANHO_LOTE)
+    if not ids:
+        return 0
+
+    tarefas = db.query(models.Tarefa_Pendente)\
+        .filter(models.Tarefa_Pendente.id.in_(ids))\
+        .order_by(models.Tarefa_Pendente.id)\
+        .all()
+    concluidas = []
+    for tarefa in tarefas:
+        try:
+            with db.begin_nested():
+                _executar(db, tarefa.tipo, tarefa.payload)
+            concluidas.append(tarefa)
+        except Exception as e:
+            tarefa.tentativas += 1
+            tarefa.erro = str(e)[:500]
+            tarefa.status = "erro" if tarefa.tentativas >= settings.FILA_EFEITOS_MAX_TENTATIVAS else "pendente"
+            _fila.registrar_falha()
+            print(f"Erro ao processar tarefa {tarefa.id} ({tarefa.tipo}): {e}")
+
+    agora = datetime.now(timezone.utc)
+    for tarefa in concluidas:
+        criada = tarefa.data_criacao if tarefa.data_criacao.tzinfo else tarefa.data_criacao.replace(tzinfo=timezone.utc)
+        _fila.registrar_atraso((agora - criada).total_seconds())
+    if concluidas:
+        db.execute(delete(models.Tarefa_Pendente).where(models.Tarefa_Pendente.id.in_([t.id for t in concluidas])))
+    db.commit()
+
+    _fila.registrar_processadas(len(concluidas))
+    return len(tarefas)
+
+def drenar(db: Session) -> int:
+    """Processa lotes até a fila esvaziar. Útil em scripts e para esvaziar a fila no desligamento."""
+    total = 0
+    while True:
+        processadas = processar_lote(db)
+        if not processadas:
+            return total
+        total += processadas
+
+class FilaEfeitos:
+    """Workers em threads que drenam tarefas_pendentes em segundo plano."""
+
+    def __init__(self):
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self.metricas = {"processadas": 0, "falhas": 0, "ultimo_atraso_segundos": None, "atraso_medio_segundos": None}
+
+    # Os workers atualizam as métricas em paralelo: toda escrita (e a leitura) passa pelo lock
+
+    def registrar_processadas(self, quantidade: int):
+        with self._lock:
+            self.metricas["processadas"] += quantidade
+
+    def registrar_falha(self):
+        with self._lock:
+            self.metricas["falhas"] += 1
+
+    def copiar_metricas(self) -> dict:
+        with self._lock:
+            return dict(self.metricas)
+
+    def registrar_atraso(self, segundos: float):
+        with self._lock:
+            self.metricas["ultimo_atraso_segundos"] = round(segundos, 3)
+            anterior = self.metricas["atraso_medio_segundos"]
+            # Média móvel exponencial para não guardar histórico
+            self.metricas["atraso_medio_segundos"] = round(segundos if anterior is None else 0.9 * anterior + 0.1 * segundos, 3)
+
+    def acordar(self):
+        self._acordar.set()
+
+    def _loop(self):
+        while not self._parar.is_set():
+            self._acordar.wait(settings.FILA_EFEITOS_INTERVALO_SEGUNDOS)
+            self._acordar.clear()
+            db = SessionLocal()
+            try:
+                while not self._parar.is_set() and processar_lote(db):
+                    pass
+            except Exception as e:
+                db.rollback()
+                print(f"Erro no worker da fila de efeitos: {e}")
+            finally:
+                db.close()
+
+    def iniciar(self):
+        if not fila_ativa() or self._threads:
+            return
+        self._parar.clear()
+        for i in range(settings.FILA_EFEITOS_WORKERS):
+            thread = threading.Thread(target=self._loop, name=f"fila-efeitos-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"Fila de efeitos iniciada com {len(self._threads)} worker(s).")
+
+    def parar(self, timeout: float = 10.0):
+        self._parar.set()
+        self._acordar.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+_fila = FilaEfeitos()
+
+def iniciar_workers():
+    _fila.iniciar()
+
+def parar_workers():
+    _fila.parar()
+
+def get_metricas(db: Session) -> dict:
+    """Profundidade da fila e atraso de processamento."""
+    por_status = dict(
+        db.query(models.Tarefa_Pendente.status, func.count(models.Tarefa_Pendente.id))
+        .group_by(models.Tarefa_Pendente.status)
+        .all()
+    )
+    mais_antiga = db.query(func.min(models.Tarefa_Pendente.data_criacao))\
+        .filter(models.Tarefa_Pendente.status.in_(["pendente", "processando"]))\
+        .scalar()
+    atraso_atual = None
+    if mais_antiga:
+        if mais_antiga.tzinfo is None:
+            mais_antiga = mais_antiga.replace(tzinfo=timezone.utc)
+        atraso_atual = round((datetime.now(timezone.utc) - mais_antiga).total_seconds(), 3)
+
+    return {
+        "ativa": fila_ativa(),
+        "workers": len(_fila._threads),
+        "pendentes": por_status.get("pendente", 0),
+        "processando": por_status.get("processando", 0),
+        "com_erro": por_status.get("erro", 0),
+        "atraso_atual_segundos": atraso_atual,
+        **_fila.copiar_metricas(),
+    }
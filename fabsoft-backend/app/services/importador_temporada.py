@@ -0,0 +1,331 @@
+"""
+Importação de uma temporada inteira de jogos em pipeline.
+
+Três etapas ligadas por filas limitadas (a etapa mais lenta segura as outras):
+1. busca: NBA_IMPORT_WORKERS threads chamam a API (BoxScoreSummaryV2 quando o
+   calendário não traz o placar, e o box score V3/V2) pelo nba_client, então o
+   ritmo total continua sendo o do token bucket global; as threads só sobrepõem
+   a latência das requisições;
+2. transformação: uma thread converte os DataFrames em linhas (nba_transformacoes);
+3. gravação: a thread que chamou importar_temporada() é a única que usa a sessão
+   e grava NBA_IMPORT_TAMANHO_LOTE jogos por transação (placar + estatísticas).
+
+Placar e estatísticas de um jogo são gravados juntos, e jogos que já têm placar
+são pulados, então uma execução interrompida retoma jogo a jogo: na próxima, só
+os jogos que não chegaram a ser gravados são buscados de novo.
+"""
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+import pandas as pd
+from sqlalchemy.orm import Session, aliased
+from nba_api.stats.endpoints import boxscoresummaryv2, boxscoretraditionalv2, boxscoretraditionalv3
+from .. import crud, models
+from ..config import settings
+from . import nba_client, nba_transformacoes
+
+LIGA_NBA_ID = 1
+STATUS_FINAL = 3 # GAME_STATUS_ID do ScheduleLeagueV2
+
+_FIM = object()
+
+# --- Busca ---
+
+def buscar_box_score(game_id):
+    """Box score dos jogadores: tenta o BoxScoreTraditionalV3 (mais moderno) e cai para o V2."""
+    try:
+        player_stats_df = nba_client.chamar(
+            boxscoretraditionalv3.BoxScoreTraditionalV3,
+            game_id=game_id,
+            start_period=1,
+            end_period=10,
+            start_range=0,
+            end_range=0,
+            range_type=0
+        ).get_data_frames()[0]
+        print(f"    -> Usando BoxScoreTraditionalV3 para jogo {game_id}")
+        return player_stats_df
+    except nba_client.CircuitoAbertoError:
+        raise
+    except Exception as v3_error:
+        print(f"    -> BoxScoreTraditionalV3 falhou, usando V2: {v3_error}")
+        return nba_client.chamar(boxscoretraditionalv2.BoxScoreTraditionalV2, game_id=game_id).get_data_frames()[0]
+
+def _buscar_jogo(jogo: dict) -> dict:
+    """Etapa 1: DataFrames de um jogo finalizado. O resumo só é buscado se o calendário não trouxe o placar."""
+    resumo = None
+    if not (jogo["placar_casa"] or jogo["placar_visitante"]):
+        resumo = nba_client.chamar(boxscoresummaryv2.BoxScoreSummaryV2, game_id=jogo["game_id"]).get_data_frames()
+    return {"resumo": resumo, "box_score": buscar_box_score(jogo["game_id"])}
+
+# --- Transformação ---
+
+def _placar_do_resumo(resumo: list, jogo: dict):
+    """Placar e status a partir do BoxScoreSummaryV2 (GameSummary e LineScore)."""
+    if not resumo or len(resumo) < 6 or resumo[0].empty or resumo[5].empty:
+        raise ValueError("Dados insuficientes do boxscore")
+    line_score = resumo[5]
+    pontos = dict(zip(
+        pd.to_numeric(line_score["TEAM_ID"], errors="coerce").tolist(),
+        pd.to_numeric(line_score["PTS"], errors="coerce").fillna(0).astype(int).tolist(),
+    ))
+    return (
+        pontos.get(jogo["time_casa_api_id"], 0),
+        pontos.get(jogo["time_visitante_api_id"], 0),
+        resumo[0].iloc[0]["GAME_STATUS_TEXT"],
+    )
+
+def _transformar(jogo: dict, dados: dict, mapa_jogadores: dict) -> dict:
+    """Etapa 2: placar e linhas de estatísticas prontas para o INSERT em lote."""
+    if dados["resumo"] is not None:
+        placar_casa, placar_visitante, status = _placar_do_resumo(dados["resumo"], jogo)
+    else:
+        placar_casa, placar_visitante, status = jogo["placar_casa"], jogo["placar_visitante"], "Final"
+    estatisticas = [
+        {**linha, "jogo_id": jogo["id"]}
+        for linha in nba_transformacoes.estatisticas_box_score(dados["box_score"], mapa_jogadores)
+    ]
+    return {
+        "placar": {"id": jogo["id"], "placar_casa": placar_casa, "placar_visitante": placar_visitante, "status_jogo": status},
+        "estatisticas": estatisticas,
+    }
+
+# --- Pipeline ---
+
+def _colocar(fila: queue.Queue, item, parar: threading.Event):
+    """put() que desiste se o pipeline for interrompido, para nenhuma thread ficar presa numa fila cheia."""
+    while not parar.is_set():
+        try:
+            fila.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+class _Progresso:
+    def __init__(self, total: int, job=None):
+        self.total = total
+        self.gravados = 0
+        self.estatisticas = 0
+        self.falhas = 0
+        self.inicio = time.monotonic()
+        self.job = job # jobs.Progresso do job administrativo, se houver
+        self._relatados = 0
+
+    @property
+    def duracao(self) -> float:
+        return time.monotonic() - self.inicio
+
+    def jogos_por_segundo(self) -> float:
+        return self.gravados / self.duracao if self.duracao > 0 else 0.0
+
+    def relatar(self):
+        feitos = self.gravados + self.falhas
+        taxa = self.jogos_por_segundo()
+        restante = f", ~{(self.total - feitos) / taxa / 60:.1f} min restantes" if taxa > 0 and feitos < self.total else ""
+        print(f"  [{feitos}/{self.total}] {self.gravados} jogos gravados, {self.falhas} falhas | "
+              f"{taxa:.2f} jogos/s, {self.estatisticas / self.duracao:.0f} estatísticas/s{restante}")
+        if self.job:
+            self.job.avancar(feitos - self._relatados)
+            self._relatados = feitos
+
+def _gravar_lote(db: Session, lote: list, progresso: _Progresso):
+    """Etapa 3: grava o lote numa transação. Se ela falhar, tenta jogo a jogo para isolar o problema."""
+    try:
+        crud.update_placares_em_lote(db, [item["placar"] for item in lote])
+        progresso.estatisticas += crud.inserir_estatisticas_em_lote(db, [e for item in lote for e in item["estatisticas"]])
+        db.commit()
+        progresso.gravados += len(lote)
+        return
+    except Exception as e:
+        db.rollback()
+        if len(lote) == 1:
+            progresso.falhas += 1
+            print(f"Erro ao gravar o jogo {lote[0]['placar']['id']}: {e}")
+            return
+    for item in lote:
+        _gravar_lote(db, [item], progresso)
+
+def _jogos_novos(games_df: pd.DataFrame, season: str, times: dict, existentes: dict) -> list:
+    """Linhas de Jogo para os jogos do calendário que ainda não estão no banco."""
+    linhas = []
+    for game_id, casa_api, visitante_api, data in zip(
+        games_df["GAME_ID"].tolist(), games_df["HOME_TEAM_ID"].tolist(),
+        games_df["VISITOR_TEAM_ID"].tolist(), games_df["GAME_DATE"].tolist()
+    ):
+        if not game_id or int(game_id) in existentes or not data:
+            continue
+        casa, visitante = times.get(casa_api), times.get(visitante_api)
+        if not casa or not visitante:
+            continue
+        linhas.append({
+            "api_id": int(game_id),
+            "slug": f"{visitante.sigla.lower()}-vs-{casa.sigla.lower()}-{int(game_id)}",
+            "data_jogo": datetime.strptime(data, "%Y-%m-%d").replace(tzinfo=timezone.utc),
+            "temporada": season,
+            "liga_id": LIGA_NBA_ID,
+            "time_casa_id": casa.id,
+            "time_visitante_id": visitante.id,
+        })
+    return linhas
+
+def _jogos_pendentes(db: Session, games_df: pd.DataFrame) -> list:
+    """Jogos finalizados no calendário que ainda estão sem placar no banco, na ordem do calendário."""
+    finalizados = games_df[pd.to_numeric(games_df["GAME_STATUS_ID"], errors="coerce") == STATUS_FINAL]
+    if finalizados.empty:
+        return []
+    placares_calendario = {
+        int(game_id): (int(casa or 0), int(visitante or 0))
+        for game_id, casa, visitante in zip(
+            finalizados["GAME_ID"].tolist(),
+            pd.to_numeric(finalizados["HOME_TEAM_SCORE"], errors="coerce").fillna(0).tolist(),
+            pd.to_numeric(finalizados["AWAY_TEAM_SCORE"], errors="coerce").fillna(0).tolist(),
+        )
+    }
+    TimeCasa, TimeVisitante = aliased(models.Time), aliased(models.Time)
+    linhas = db.query(
+        models.Jogo.id, models.Jogo.api_id, models.Jogo.data_jogo,
+        TimeCasa.api_id.label("time_casa_api_id"), TimeVisitante.api_id.label("time_visitante_api_id"),
+    ).join(TimeCasa, TimeCasa.id == models.Jogo.time_casa_id)\
+     .join(TimeVisitante, TimeVisitante.id == models.Jogo.time_visitante_id)\
+     .filter(models.Jogo.api_id.in_(list(placares_calendario)),
+             (models.Jogo.placar_casa == 0) | models.Jogo.placar_casa.is_(None))\
+     .all()
+
+    agora = datetime.now(timezone.utc)
+    pendentes = []
+    for linha in linhas:
+        data_jogo = linha.data_jogo if linha.data_jogo.tzinfo else linha.data_jogo.replace(tzinfo=timezone.utc)
+        if data_jogo >= agora:
+            continue
+        placar_casa, placar_visitante = placares_calendario[linha.api_id]
+        pendentes.append({
+            "id": linha.id, "game_id": f"{linha.api_id:010d}",
+            "time_casa_api_id": linha.time_casa_api_id, "time_visitante_api_id": linha.time_visitante_api_id,
+            "placar_casa": placar_casa, "placar_visitante": placar_visitante,
+        })
+    return sorted(pendentes, key=lambda jogo: jogo["game_id"])
+
+def importar_temporada(db: Session, season: str, games_df: pd.DataFrame, workers: int = None, tamanho_lote: int = None,
+                       progresso_job=None) -> dict:
+    """
+    Importa os jogos de `games_df` (formato de _get_games_from_schedule_v2): insere os jogos
+    novos em lote e depois busca, transforma e grava os jogos finalizados em pipeline.
+    `progresso_job` (jobs.Progresso) recebe o avanço a cada lote gravado, e um cancelamento
+    pedido por ele para a importação depois do lote, como uma interrupção.
+    """
+    workers = workers or settings.NBA_IMPORT_WORKERS
+    tamanho_lote = tamanho_lote or settings.NBA_IMPORT_TAMANHO_LOTE
+
+    times = {time_obj.api_id: time_obj for time_obj in db.query(models.Time).filter(models.Time.api_id.isnot(None))}
+    novos = crud.create_jogos_em_lote(db, _jogos_novos(games_df, season, times, crud.get_mapa_api_ids(db, models.Jogo)))
+    db.commit()
+    print(f"{novos} novos jogos adicionados.")
+
+    pendentes = _jogos_pendentes(db, games_df)
+    print(f"{len(pendentes)} jogos finalizados a importar com {workers} worker(s), {tamanho_lote} jogos por transação.")
+    progresso = _Progresso(len(pendentes), progresso_job)
+    if progresso_job:
+        progresso_job.definir_total(len(pendentes))
+    if not pendentes:
+        return {"total_sincronizado": len(games_df), "novos_adicionados": novos, "jogos_finalizados": 0,
+                "falhas": 0, "interrompido": False, "duracao_segundos": 0.0, "jogos_por_segundo": 0.0}
+
+    mapa_jogadores = crud.get_mapa_api_ids(db, models.Jogador)
+    entrada = queue.Queue()
+    for jogo in pendentes:
+        entrada.put(jogo)
+    buscados = queue.Queue(maxsize=2 * workers)
+    transformados = queue.Queue(maxsize=2 * tamanho_lote)
+    parar = threading.Event()
+    circuito_aberto = threading.Event()
+
+    def buscar():
+        while not parar.is_set() and not circuito_aberto.is_set():
+            try:
+                jogo = entrada.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                _colocar(buscados, (jogo, _buscar_jogo(jogo), None), parar)
+            except nba_client.CircuitoAbertoError as e:
+                # A API está fora: para de buscar, mas grava o que já foi buscado;
+                # os jogos que faltam ficam para a próxima execução
+                if not circuito_aberto.is_set():
+                    print(f"Importação interrompida: {e}")
+                circuito_aberto.set()
+            except Exception as e:
+                _colocar(buscados, (jogo, None, e), parar)
+        _colocar(buscados, _FIM, parar)
+
+    def transformar():
+        finalizados = 0
+        while finalizados < workers and not parar.is_set():
+            try:
+                item = buscados.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if item is _FIM:
+                finalizados += 1
+                continue
+            jogo, dados, erro = item
+            if erro is None:
+                try:
+                    _colocar(transformados, (jogo, _transformar(jogo, dados, mapa_jogadores), None), parar)
+                    continue
+                except Exception as e:
+                    erro = e
+            _colocar(transformados, (jogo, None, erro), parar)
+        _colocar(transformados, _FIM, parar)
+
+    threads = [threading.Thread(target=buscar, name=f"importador-busca-{i}", daemon=True) for i in range(workers)]
+    threads.append(threading.Thread(target=transformar, name="importador-transformacao", daemon=True))
+    for thread in threads:
+        thread.start()
+
+    lote = []
+    try:
+        while True:
+            try:
+                item = transformados.get(timeout=5)
+            except queue.Empty:
+                item = None
+            if item is _FIM:
+                break
+            if item is not None:
+                jogo, resultado, erro = item
+                if erro is not None:
+                    progresso.falhas += 1
+                    print(f"Erro ao buscar detalhes do jogo ID {jogo['game_id']}: {erro}")
+                    if progresso_job:
+                        progresso_job.erro_item(f"Jogo {jogo['game_id']}: {erro}")
+                else:
+                    lote.append(resultado)
+            # Grava quando o lote enche ou quando a fila para de andar, para o progresso não ficar parado
+            if lote and (len(lote) >= tamanho_lote or item is None):
+                _gravar_lote(db, lote, progresso)
+                lote = []
+                progresso.relatar()
+                if progresso_job:
+                    progresso_job.checar()
+    finally:
+        parar.set()
+        if lote:
+            _gravar_lote(db, lote, progresso)
+            progresso.relatar()
+        for thread in threads:
+            thread.join(timeout=5)
+
+    interrompido = circuito_aberto.is_set() or progresso.gravados + progresso.falhas < len(pendentes)
+    print(f"Importação da temporada {season} {'interrompida' if interrompido else 'concluída'}: "
+          f"{progresso.gravados}/{len(pendentes)} jogos finalizados gravados em {progresso.duracao:.1f}s "
+          f"({progresso.jogos_por_segundo():.2f} jogos/s, {progresso.estatisticas} estatísticas).")
+    return {
+        "total_sincronizado": len(games_df),
+        "novos_adicionados": novos,
+        "jogos_finalizados": progresso.gravados,
+        "falhas": progresso.falhas,
+        "interrompido": interrompido,
+        "duracao_segundos": round(progresso.duracao, 1),
+        "jogos_por_segundo": round(progresso.jogos_por_segundo(), 3),
+    }
@@ -0,0 +1,261 @@
+"""
+Consultor de índices.
+
+Executa as funções de leitura mais usadas do crud.py, captura o SQL que elas geram
+e roda EXPLAIN em cada consulta, listando as varreduras completas de tabela
+(SQLite: "SCAN <tabela>" sem índice; Postgres: nós "Seq Scan").
+
+Uso:
+    # Banco SQLite em memória, criado a partir dos models e populado com dados sintéticos
+    python -m app.services.index_advisor
+
+    # Banco existente (SQLite ou Postgres). Tudo roda dentro de uma transação
+    # desfeita no final, então nada é gravado.
+    python -m app.services.index_advisor --url "$DATABASE_URL"
+
+Em Postgres, tabelas pequenas costumam ser lidas com Seq Scan mesmo havendo índice
+(o planejador acha mais barato); por isso o relatório mostra as linhas estimadas.
+"""
+import argparse
+import json
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event, func, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from ..database import Base
+from .. import models, crud
+
+# --- Dados sintéticos ---
+
+def popular_banco_sintetico(db: Session, usuarios: int = 200, jogos: int = 1200, avaliacoes_por_usuario: int = 30):
+    """Popula um banco vazio com um volume pequeno mas realista para o planejador."""
+    rnd = random.Random(42)
+    db.execute(insert(models.Liga), [{"id": 1, "nome": "NBA", "pais": "USA"}])
+    db.execute(insert(models.Time), [
+        {"id": i, "api_id": i, "nome": f"Time {i}", "sigla": f"T{i:02d}", "slug": f"time-{i}", "liga_id": 1}
+        for i in range(1, 31)
+    ])
+    db.execute(insert(models.Jogador), [
+        {"id": i, "api_id": i, "nome": f"Jogador {i}", "nome_normalizado": f"jogador {i}",
+         "slug": f"jogador-{i}", "time_atual_id": (i % 30) + 1}
+        for i in range(1, 451)
+    ])
+    db.execute(insert(models.Usuario), [
+        {"id": i, "username": f"usuario{i}", "email": f"usuario{i}@exemplo.com", "senha": "x",
+         "time_favorito_id": (i % 30) + 1, "pontos_experiencia": 0}
+        for i in range(1, usuarios + 1)
+    ])
+
+    inicio = datetime.now() - timedelta(days=jogos // 6)
+    linhas_jogos = []
+    for i in range(1, jogos + 1):
+        casa = rnd.randint(1, 30)
+        visitante = rnd.choice([t for t in range(1, 31) if t != casa])
+        data = inicio + timedelta(hours=4 * i)
+        linhas_jogos.append({
+            "id": i, "api_id": i, "slug": f"jogo-{i}", "data_jogo": data,
+            "temporada": "2024-25" if i <= jogos // 2 else "2025-26",
+            "status_jogo": "Final" if data < datetime.now() else "agendado",
+            "liga_id": 1, "time_casa_id": casa, "time_visitante_id": visitante,
+        })
+    db.execute(insert(models.Jogo), linhas_jogos)
+
+    db.execute(insert(models.Estatistica_Jogador_Jogo), [
+        {"jogo_id": jogo["id"], "jogador_id": rnd.randint(1, 450), "pontos": rnd.randint(0, 40),
+         "rebotes": rnd.randint(0, 15), "assistencias": rnd.randint(0, 12), "minutos_jogados": rnd.uniform(5, 40)}
+        for jogo in linhas_jogos for _ in range(10)
+    ])
+
+    jogos_passados = [jogo["id"] for jogo in linhas_jogos if jogo["status_jogo"] == "Final"]
+    linhas_avaliacoes = []
+    for usuario_id in range(1, usuarios + 1):
+        for jogo_id in rnd.sample(jogos_passados, min(avaliacoes_por_usuario, len(jogos_passados))):
+            linhas_avaliacoes.append({
+                "id": len(linhas_avaliacoes) + 1, "usuario_id": usuario_id, "jogo_id": jogo_id,
+                "nota_geral": rnd.choice([1, 2, 2.5, 3, 3.5, 4, 4.5, 5]),
+                "nota_ataque_casa": rnd.choice([None, 3, 4, 5]), "nota_defesa_casa": rnd.choice([None, 2, 3, 4]),
+                "melhor_jogador_id": rnd.choice([None, rnd.randint(1, 450)]),
+                "pior_jogador_id": rnd.choice([None, rnd.randint(1, 450)]),
+                "curtidas": 0, "data_avaliacao": datetime.now() - timedelta(minutes=rnd.randint(0, 60 * 24 * 90)),
+            })
+    db.execute(insert(models.Avaliacao_Jogo), linhas_avaliacoes)
+
+    seguidores = {(rnd.randint(1, usuarios), rnd.randint(1, usuarios)) for _ in range(usuarios * 15)}
+    db.execute(insert(models.Seguidor), [
+        {"seguidor_id": a, "seguido_id": b} for a, b in seguidores if a != b
+    ])
+    curtidas = {(rnd.randint(1, len(linhas_avaliacoes)), rnd.randint(1, usuarios)) for _ in range(len(linhas_avaliacoes))}
+    db.execute(insert(models.Curtida_Avaliacao), [
+        {"avaliacao_id": a, "usuario_id": u} for a, u in curtidas
+    ])
+    db.execute(insert(models.Comentario_Avaliacao), [
+        {"avaliacao_id": rnd.randint(1, len(linhas_avaliacoes)), "usuario_id": rnd.randint(1, usuarios), "comentario": "..."}
+        for _ in range(len(linhas_avaliacoes) // 2)
+    ])
+    db.execute(insert(models.Notificacao), [
+        {"usuario_id": rnd.randint(1, usuarios), "tipo": "curtida_avaliacao", "mensagem": "...",
+         "referencia_id": 1, "referencia_tipo": "avaliacao"}
+        for _ in range(usuarios * 20)
+    ])
+    db.execute(insert(models.Feed_Atividade), [
+        {"usuario_id": rnd.randint(1, usuarios), "tipo_atividade": "curtiu_avaliacao",
+         "referencia_id": rnd.randint(1, len(linhas_avaliacoes)), "referencia_tipo": "avaliacao"}
+        for _ in range(usuarios * 20)
+    ])
+    db.flush()
+
+# --- Cenários ---
+
+def _parametros(db: Session) -> dict:
+    """Escolhe ids "quentes" do próprio banco para alimentar os cenários."""
+    Av = models.Avaliacao_Jogo
+    usuario_id = db.query(Av.usuario_id).group_by(Av.usuario_id).order_by(func.count(Av.id).desc()).limit(1).scalar()
+    jogo_id = db.query(Av.jogo_id).group_by(Av.jogo_id).order_by(func.count(Av.id).desc()).limit(1).scalar()
+    Est = models.Estatistica_Jogador_Jogo
+    jogador_id = db.query(Est.jogador_id).group_by(Est.jogador_id).order_by(func.count(Est.id).desc()).limit(1).scalar()
+    avaliacao_id = db.query(func.max(Av.id)).filter(Av.jogo_id == jogo_id).scalar()
+    usuario = crud.get_user(db, usuario_id) if usuario_id else None
+    return {
+        "usuario_id": usuario_id,
+        "username": usuario.username if usuario else None,
+        "jogo_id": jogo_id,
+        "avaliacao_id": avaliacao_id,
+        "jogador_id": jogador_id,
+        "time_id": db.query(func.min(models.Time.id)).scalar(),
+        "temporada": db.query(func.max(models.Jogo.temporada)).scalar(),
+    }
+
+CENARIOS = {
+    "get_personalized_feed": lambda db, p: crud.get_personalized_feed(db, p["usuario_id"]),
+    "get_following_feed": lambda db, p: crud.get_following_feed(db, p["usuario_id"]),
+    "get_feed_para_usuario": lambda db, p: crud.get_feed_para_usuario(db, p["usuario_id"]),
+    "get_notificacoes_por_usuario": lambda db, p: crud.get_notificacoes_por_usuario(db, p["usuario_id"]),
+    "get_user_profile_by_username": lambda db, p: crud.get_user_profile_by_username(db, p["username"]),
+    "get_user_stats": lambda db, p: crud._calcular_user_stats(db, p["usuario_id"]),
+    "get_user_followers": lambda db, p: crud.get_user_followers(db, p["usuario_id"], current_user_id=p["usuario_id"]),
+    "get_user_following": lambda db, p: crud.get_user_following(db, p["usuario_id"], current_user_id=p["usuario_id"]),
+    "get_avaliacoes_por_jogo": lambda db, p: crud.get_avaliacoes_por_jogo(db, p["jogo_id"], usuario_id_logado=p["usuario_id"]),
+    "get_comentarios_por_avaliacao": lambda db, p: crud.get_comentarios_por_avaliacao(db, p["avaliacao_id"]),
+    "get_estatisticas_gerais_jogo": lambda db, p: crud.get_estatisticas_gerais_jogo(db, p["jogo_id"]),
+    "get_estatisticas_por_jogo": lambda db, p: crud.get_estatisticas_por_jogo(db, p["jogo_id"]),
+    "get_jogos": lambda db, p: crud.get_jogos(db),
+    "get_jogos (time)": lambda db, p: crud.get_jogos(db, time_id=p["time_id"]),
+    "get_upcoming_games": lambda db, p: crud.get_upcoming_games(db),
+    "get_trending_games": lambda db, p: crud.get_trending_games(db),
+    "get_highlighted_games": lambda db, p: crud.get_highlighted_games(db),
+    "get_schedule_for_time": lambda db, p: crud.get_schedule_for_time(db, p["time_id"]),
+    "get_recent_games_for_time": lambda db, p: crud.get_recent_games_for_time(db, p["time_id"]),
+    "get_time_record": lambda db, p: crud.get_time_record(db, p["time_id"], p["temporada"]),
+    "get_jogador_stats_por_temporada": lambda db, p: crud.get_jogador_stats_por_temporada(db, p["jogador_id"]),
+    "get_jogador_gamelog_season": lambda db, p: crud.get_jogador_gamelog_season(db, p["jogador_id"], p["temporada"]),
+    "get_jogos (cursor)": lambda db, p: _segunda_pagina(lambda c: crud.get_jogos(db, status="Final", limit=20, cursor=c)),
+    "get_avaliacoes_por_jogo (cursor)": lambda db, p: _segunda_pagina(lambda c: crud.get_avaliacoes_por_jogo(db, p["jogo_id"], limit=20, cursor=c)),
+    "get_comentarios_por_avaliacao (cursor)": lambda db, p: _segunda_pagina(lambda c: crud.get_comentarios_por_avaliacao(db, p["avaliacao_id"], limit=20, cursor=c)),
+}
+
+def _segunda_pagina(listar):
+    """Lê a primeira página e a seguinte, para o EXPLAIN pegar a consulta com o filtro do cursor."""
+    primeira = listar("")
+    return listar(primeira["next_cursor"] or "")
+
+# --- EXPLAIN ---
+
+def _varreduras_sqlite(conn, statement, parameters, tabelas):
+    varreduras = []
+    for linha in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters):
+        detalhe = linha[-1]
+        partes = detalhe.split()
+        # "SCAN jogos" é varredura completa; "SCAN jogos USING INDEX ..." percorre um índice
+        if len(partes) >= 2 and partes[0] == "SCAN" and partes[1] in tabelas and "INDEX" not in detalhe:
+            varreduras.append((partes[1], None))
+    return varreduras
+
+def _varreduras_postgres(conn, statement, parameters, tabelas):
+    plano = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+    if isinstance(plano, str):
+        plano = json.loads(plano)
+    varreduras = []
+    pendentes = [plano[0]["Plan"]]
+    while pendentes:
+        no = pendentes.pop()
+        if no.get("Node Type") == "Seq Scan" and no.get("Relation Name") in tabelas:
+            varreduras.append((no["Relation Name"], no.get("Plan Rows")))
+        pendentes.extend(no.get("Plans", []))
+    return varreduras
+
+def analisar(engine, popular: bool = False) -> dict:
+    """
+    Roda os cenários e retorna {tabela: [(cenario, linhas_estimadas, sql), ...]}
+    com as varreduras completas encontradas.
+    """
+    capturadas = []
+    cenario_atual = [None]
+
+    def _capturar(conn, cursor, statement, parameters, context, executemany):
+        inicio = statement.lstrip()[:6].upper()
+        if cenario_atual[0] and not executemany and inicio in ("SELECT", "WITH"):
+            capturadas.append((cenario_atual[0], statement, parameters))
+
+    tabelas = set(Base.metadata.tables)
+    explicar = _varreduras_postgres if engine.dialect.name == "postgresql" else _varreduras_sqlite
+
+    with engine.connect() as conn:
+        transacao = conn.begin()
+        db = Session(bind=conn, join_transaction_mode="create_savepoint")
+        try:
+            if popular:
+                Base.metadata.create_all(bind=conn)
+                popular_banco_sintetico(db)
+            parametros = _parametros(db)
+
+            event.listen(engine, "before_cursor_execute", _capturar)
+            try:
+                for nome, executar in CENARIOS.items():
+                    cenario_atual[0] = nome
+                    try:
+                        # Commits feitos pelo crud só liberam o savepoint da sessão
+                        executar(db, parametros)
+                    except Exception as e:
+                        db.rollback()
+                        print(f"[aviso] cenário {nome} falhou: {e}")
+            finally:
+                cenario_atual[0] = None
+                event.remove(engine, "before_cursor_execute", _capturar)
+
+            resultado = defaultdict(list)
+            vistas = set()
+            for nome, statement, parameters in capturadas:
+                if statement in vistas:
+                    continue
+                vistas.add(statement)
+                for tabela, linhas in explicar(conn, statement, parameters, tabelas):
+                    resultado[tabela].append((nome, linhas, " ".join(statement.split())))
+            return dict(resultado)
+        finally:
+            db.close()
+            transacao.rollback()
+
+def imprimir_relatorio(resultado: dict):
+    if not resultado:
+        print("Nenhuma varredura completa de tabela encontrada.")
+        return
+    print(f"Varreduras completas em {len(resultado)} tabela(s):\n")
+    for tabela, ocorrencias in sorted(resultado.items(), key=lambda item: -len(item[1])):
+        print(f"== {tabela} ({len(ocorrencias)} consulta(s))")
+        for cenario, linhas, sql in ocorrencias:
+            estimativa = f" ~{linhas} linhas" if linhas is not None else ""
+            print(f"   - {cenario}{estimativa}: {sql[:160]}{'...' if len(sql) > 160 else ''}")
+        print()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aponta consultas do crud.py que fazem varredura completa de tabela.")
+    parser.add_argument("--url", help="URL de um banco existente. Sem ela, usa SQLite em memória com dados sintéticos.")
+    args = parser.parse_args()
+
+    if args.url:
+        engine = create_engine(args.url)
+    else:
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    imprimir_relatorio(analisar(engine, popular=not args.url))
@@ -0,0 +1,385 @@
+"""
+Jobs administrativos em segundo plano (sincronizações com a API da NBA).
+
+Os endpoints /admin/sync-* só enfileiram: gravam uma linha em jobs e devolvem o id
+na hora. Workers em threads (JOBS_WORKERS por processo) pegam os jobs pendentes
+com FOR UPDATE SKIP LOCKED, então vários processos dividem a fila sem rodar o
+mesmo job duas vezes. O agendador usa executar(), que roda o job na própria thread
+mas com o mesmo registro, progresso e cancelamento.
+
+As funções do nba_importer que aceitam `progresso` recebem um Progresso ligado ao
+job: ele grava feitos/total/falhas na tabela (no máximo a cada
+INTERVALO_PROGRESSO_SEGUNDOS) e, em checar(), levanta JobCancelado se alguém pediu o
+cancelamento. O cancelamento é cooperativo: o importador só para nos pontos em
+que chama checar(), sempre depois de gravar o que já buscou.
+
+Enquanto o job roda, uma thread de batimento regrava data_atualizacao (etapas longas
+podem passar muito tempo sem chamar avancar()/checar()). Jobs interrompidos pelo
+desligamento do processo voltam para a fila (as sincronizações retomam de onde
+pararam); jobs "executando" sem sinal há mais de JOBS_TIMEOUT_SEM_PROGRESSO_SEGUNDOS
+(o processo caiu) são marcados como erro, e o processo original, se voltar, não
+sobrescreve mais esse status.
+"""
+import inspect
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..database import SessionLocal
+from .. import models
+
+# Funções do nba_importer que podem virar job; o tipo do job é o nome da função
+TIPOS = (
+    "sync_nba_teams", "sync_nba_players", "sync_nba_games_v2", "sync_future_games",
+    "sync_player_awards", "sync_all_players_awards",
+    "sync_team_championships", "sync_all_teams_championships",
+    "sync_player_career_stats", "sync_all_players_career_stats",
+)
+STATUS_FINAIS = ("sucesso", "erro", "cancelado")
+INTERVALO_PROGRESSO_SEGUNDOS = 2.0
+MAX_ERROS_GUARDADOS = 20
+TENTATIVAS_FINALIZAR = 3
+
+PROCESSO = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+class JobCancelado(Exception):
+    """Cancelamento pedido pelo admin (ou desligamento do processo); o job para no ponto seguro atual."""
+
+class _JobInterrompido(JobCancelado):
+    """O processo está desligando: o job volta para a fila em vez de ser cancelado."""
+
+def _agora() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _utc(data: datetime) -> datetime:
+    return data if data is None or data.tzinfo else data.replace(tzinfo=timezone.utc)
+
+# --- Progresso ---
+
+class Progresso:
+    """Progresso de uma sincronização. Esta versão não faz nada: é o padrão quando não há job."""
+
+    def definir_total(self, total: int):
+        pass
+
+    def avancar(self, quantidade: int = 1):
+        pass
+
+    def erro_item(self, mensagem: str):
+        pass
+
+    def checar(self):
+        pass
+
+class _ProgressoJob(Progresso):
+    """Progresso ligado a uma linha de jobs, gravado numa sessão própria (fora da transação do importador)."""
+
+    def __init__(self, job_id: int, parar: threading.Event):
+        self.job_id = job_id
+        self._parar = parar
+        self.feitos = 0
+        self.total = None
+        self.falhas = 0
+        self.erros = []
+        self._cancelar = False
+        self._ultima_gravacao = 0.0
+        self._lock = threading.Lock() # A thread de batimento também grava
+
+    def definir_total(self, total: int):
+        self.total = total
+        self.gravar()
+
+    def avancar(self, quantidade: int = 1):
+        self.feitos += quantidade
+        if time.monotonic() - self._ultima_gravacao >= INTERVALO_PROGRESSO_SEGUNDOS:
+            self.gravar()
+
+    def erro_item(self, mensagem: str):
+        self.falhas += 1
+        self.erros = (self.erros + [mensagem[:500]])[-MAX_ERROS_GUARDADOS:]
+
+    def checar(self):
+        if time.monotonic() - self._ultima_gravacao >= INTERVALO_PROGRESSO_SEGUNDOS:
+            self.gravar()
+        if self._parar.is_set():
+            raise _JobInterrompido()
+        if self._cancelar:
+            raise JobCancelado()
+
+    def gravar(self, levantar: bool = False, **campos) -> bool:
+        """
+        Grava o progresso (e `campos`) e lê se o cancelamento foi pedido. Só altera o job
+        enquanto ele estiver "executando" por este processo; retorna se alterou. Erros do
+        banco são apenas registrados, a menos que `levantar` seja True.
+        """
+        with self._lock:
+            db = SessionLocal()
+            try:
+                linha = db.execute(
+                    update(models.Job)
+                    .where(models.Job.id == self.job_id, models.Job.status == "executando",
+                           models.Job.processo == PROCESSO)
+                    .values(feitos=self.feitos, total=self.total, falhas=self.falhas, erros=self.erros,
+                            data_atualizacao=_agora(), **campos)
+                    .returning(models.Job.cancelar)
+                ).first()
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                if levantar:
+                    raise
+                print(f"Erro ao gravar o progresso do job {self.job_id}: {e}")
+                return False
+            finally:
+                db.close()
+                self._ultima_gravacao = time.monotonic()
+            if linha is None:
+                return False
+            self._cancelar = bool(linha.cancelar)
+            return True
+
+# --- Produção ---
+
+def enfileirar(db: Session, tipo: str, origem: str = None, **parametros) -> models.Job:
+    """Cria o job pendente e acorda os workers deste processo. Faz commit."""
+    if tipo not in TIPOS:
+        raise ValueError(f"Tipo de job desconhecido: {tipo}")
+    job = models.Job(tipo=tipo, parametros=parametros, origem=origem, status="pendente")
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    _runner.acordar()
+    return job
+
+def executar(tipo: str, origem: str = None, **parametros):
+    """
+    Cria o job e o roda na thread atual (usado pelo agendador). Retorna o resultado;
+    levanta JobCancelado se ele for cancelado e a exceção original se falhar.
+    """
+    if tipo not in TIPOS:
+        raise ValueError(f"Tipo de job desconhecido: {tipo}")
+    db = SessionLocal()
+    try:
+        job = models.Job(tipo=tipo, parametros=parametros, origem=origem, status="executando",
+                         processo=PROCESSO, data_inicio=_agora(), data_atualizacao=_agora())
+        db.add(job)
+        db.commit()
+        job_id = job.id
+    finally:
+        db.close()
+    return _rodar(job_id, tipo, parametros, _runner.parar_evento, levantar=True)
+
+def cancelar(db: Session, job: models.Job) -> models.Job:
+    """
+    Pendente: cancela na hora. Executando: marca o pedido, e o job para no próximo
+    checar(). Faz commit e devolve o job atualizado.
+    """
+    db.execute(
+        update(models.Job)
+        .where(models.Job.id == job.id, models.Job.status == "pendente")
+        .values(status="cancelado", cancelar=True, data_fim=_agora())
+    )
+    db.execute(
+        update(models.Job)
+        .where(models.Job.id == job.id, models.Job.status == "executando")
+        .values(cancelar=True)
+    )
+    db.commit()
+    db.refresh(job)
+    return job
+
+# --- Execução ---
+
+def _funcao(tipo: str):
+    from . import nba_importer
+
+    return getattr(nba_importer, tipo)
+
+def _serializavel(resultado):
+    """O resultado vai para uma coluna JSON: o que o json não aceita vira texto."""
+    try:
+        return json.loads(json.dumps(resultado, default=str))
+    except (TypeError, ValueError):
+        return {"repr": repr(resultado)[:2000]}
+
+def _manter_vivo(progresso: _ProgressoJob, parar: threading.Event):
+    """Regrava data_atualizacao até `parar`, para o job não ser dado como abandonado numa etapa longa."""
+    intervalo = settings.JOBS_TIMEOUT_SEM_PROGRESSO_SEGUNDOS / 4
+    while not parar.wait(intervalo):
+        progresso.gravar()
+
+def _finalizar(job_id: int, progresso: _ProgressoJob, status: str, **campos):
+    """
+    Grava o status final, tentando de novo se o banco falhar; se não conseguir, levanta
+    (o job ficaria "executando" até ser dado como abandonado). Jobs que não estão mais
+    "executando" por este processo não são tocados.
+    """
+    for tentativa in range(1, TENTATIVAS_FINALIZAR + 1):
+        try:
+            gravado = progresso.gravar(levantar=True, status=status,
+                                       data_fim=None if status == "pendente" else _agora(), **campos)
+            break
+        except Exception as e:
+            if tentativa == TENTATIVAS_FINALIZAR:
+                raise
+            print(f"Erro ao finalizar o job {job_id} (tentativa {tentativa}): {e}")
+            time.sleep(tentativa)
+    if not gravado:
+        print(f"Job {job_id} não está mais executando por este processo; status '{status}' descartado.")
+
+def _rodar(job_id: int, tipo: str, parametros: dict, parar: threading.Event, levantar: bool = False):
+    progresso = _ProgressoJob(job_id, parar)
+    funcao = _funcao(tipo)
+    argumentos = dict(parametros)
+    if "progresso" in inspect.signature(funcao).parameters:
+        argumentos["progresso"] = progresso
+    parar_batimento = threading.Event()
+    batimento = threading.Thread(target=_manter_vivo, args=(progresso, parar_batimento),
+                                 name=f"jobs-batimento-{job_id}", daemon=True)
+    batimento.start()
+    db = SessionLocal()
+    try:
+        resultado = funcao(db, **argumentos)
+    except _JobInterrompido:
+        db.rollback()
+        print(f"Job {job_id} ({tipo}) interrompido pelo desligamento; volta para a fila.")
+        _finalizar(job_id, progresso, "pendente", processo=None)
+        if levantar:
+            raise
+        return None
+    except JobCancelado:
+        db.rollback()
+        print(f"Job {job_id} ({tipo}) cancelado.")
+        _finalizar(job_id, progresso, "cancelado")
+        if levantar:
+            raise
+        return None
+    except Exception as e:
+        db.rollback()
+        print(f"Erro no job {job_id} ({tipo}): {e}")
+        _finalizar(job_id, progresso, "erro", erro=str(e)[:2000])
+        if levantar:
+            raise
+        return None
+    finally:
+        parar_batimento.set()
+        db.close()
+    _finalizar(job_id, progresso, "sucesso", resultado=_serializavel(resultado))
+    return resultado
+
+def _reservar(db: Session):
+    """
+    Pega o job pendente mais antigo e o marca como "executando" por este processo.
+    Antes, marca como erro os jobs cujo processo parou de dar sinal.
+    """
+    agora = _agora()
+    db.execute(
+        update(models.Job)
+        .where(models.Job.status == "executando",
+               models.Job.data_atualizacao < agora - timedelta(seconds=settings.JOBS_TIMEOUT_SEM_PROGRESSO_SEGUNDOS))
+        .values(status="erro", erro="Abandonado: o processo que executava o job parou de responder.", data_fim=agora)
+    )
+    candidato = db.query(models.Job.id)\
+        .filter(models.Job.status == "pendente")\
+        .order_by(models.Job.id)\
+        .limit(1)\
+        .with_for_update(skip_locked=True)\
+        .first()
+    if candidato is None:
+        db.commit()
+        return None
+    reservado = db.execute(
+        update(models.Job)
+        .where(models.Job.id == candidato.id, models.Job.status == "pendente")
+        .values(status="executando", processo=PROCESSO, data_inicio=agora, data_atualizacao=agora,
+                feitos=0, total=None, falhas=0, erros=None)
+        .returning(models.Job.id, models.Job.tipo, models.Job.parametros)
+    ).first()
+    db.commit()
+    return reservado
+
+class JobRunner:
+    """Workers em threads que executam os jobs pendentes, um de cada vez por worker."""
+
+    def __init__(self):
+        self._acordar = threading.Event()
+        self.parar_evento = threading.Event()
+        self._threads = []
+
+    def acordar(self):
+        self._acordar.set()
+
+    def _loop(self):
+        while not self.parar_evento.is_set():
+            self._acordar.wait(settings.JOBS_INTERVALO_SEGUNDOS)
+            self._acordar.clear()
+            while not self.parar_evento.is_set():
+                db = SessionLocal()
+                try:
+                    job = _reservar(db)
+                except Exception as e:
+                    db.rollback()
+                    print(f"Erro ao buscar jobs pendentes: {e}")
+                    job = None
+                finally:
+                    db.close()
+                if job is None:
+                    break
+                try:
+                    _rodar(job.id, job.tipo, job.parametros or {}, self.parar_evento)
+                except Exception as e:
+                    # A gravação final falhou mesmo depois das novas tentativas: o worker segue
+                    print(f"Erro ao finalizar o job {job.id}: {e}")
+
+    def iniciar(self):
+        if self._threads:
+            return
+        self.parar_evento.clear()
+        for i in range(settings.JOBS_WORKERS):
+            thread = threading.Thread(target=self._loop, name=f"jobs-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def parar(self, timeout: float = 10.0):
+        """Pede que os jobs em andamento parem no próximo checar() (e voltem para a fila) e espera os workers."""
+        self.parar_evento.set()
+        self._acordar.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+_runner = JobRunner()
+
+def iniciar_workers():
+    _runner.iniciar()
+
+def parar_workers():
+    _runner.parar()
+
+# --- Consulta ---
+
+def descrever(job: models.Job) -> dict:
+    """Campos do job mais itens por segundo e ETA, calculados do progresso gravado."""
+    itens_por_segundo = eta_segundos = None
+    inicio, atualizacao = _utc(job.data_inicio), _utc(job.data_atualizacao)
+    if inicio and atualizacao and job.feitos:
+        decorrido = (atualizacao - inicio).total_seconds()
+        if decorrido > 0:
+            itens_por_segundo = round(job.feitos / decorrido, 3)
+            if job.status == "executando" and job.total:
+                eta_segundos = round(max(job.total - job.feitos, 0) / itens_por_segundo, 1)
+    return {
+        "id": job.id, "tipo": job.tipo, "parametros": job.parametros or {}, "origem": job.origem,
+        "status": job.status, "cancelar": job.cancelar, "processo": job.processo,
+        "feitos": job.feitos, "total": job.total, "falhas": job.falhas, "erros": job.erros or [],
+        "erro": job.erro, "resultado": job.resultado,
+        "itens_por_segundo": itens_por_segundo, "eta_segundos": eta_segundos,
+        "data_criacao": job.data_criacao, "data_inicio": job.data_inicio,
+        "data_atualizacao": job.data_atualizacao, "data_fim": job.data_fim,
+    }
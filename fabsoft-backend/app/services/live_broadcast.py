@@ -0,0 +1,270 @@
+"""
+Backends de publicação dos jogos ao vivo entre processos (LIVE_BROADCAST_BACKEND).
+
+Para cada jogo com clientes conectados, o live_tracker de cada processo disputa a
+liderança; só o líder consulta a API da NBA. O que ele publica chega aos
+rastreadores dos outros processos, que repassam aos próprios sockets e guardam o
+estado para quem se conectar depois.
+
+- "memoria": um único processo (o padrão). O processo é sempre o líder e não há
+  para quem repassar; o último snapshot fica em memória.
+- "postgres": vários workers do uvicorn ou várias máquinas do Fly. A liderança é um
+  lease na tabela jogos_ao_vivo (lider, lease_ate), disputado sob um advisory lock
+  transacional para que só um processo avalie o lease de cada vez. O líder renova
+  o lease a cada rodada, e a publicação só é aceita enquanto ele for válido, então
+  um líder travado que perdeu o lease não publica por cima do novo. Cada
+  publicação grava o snapshot completo na tabela e faz NOTIFY no canal
+  jogos_ao_vivo na mesma transação; mensagens acima do limite do NOTIFY viram um
+  aviso para reler o snapshot da tabela.
+
+O LISTEN exige uma conexão direta: se a DATABASE_URL passar por pgbouncer em modo
+transação (o endpoint -pooler do Neon, por exemplo), configure
+LIVE_BROADCAST_DATABASE_URL com o endpoint direto.
+"""
+import asyncio
+import json
+import os
+import socket
+import uuid
+from datetime import timedelta
+from typing import Optional, Tuple
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import make_url
+from .. import models
+from ..config import settings
+from ..database import SessionLocal
+
+CANAL = "jogos_ao_vivo"
+LIMITE_NOTIFY_BYTES = 7900 # O Postgres recusa payloads de NOTIFY a partir de 8000 bytes
+NAMESPACE_LOCK = 0x4C495645 # Primeira chave do pg_try_advisory_xact_lock(int, int); a segunda é o game_api_id
+INTERVALO_VIGIA_SEGUNDOS = 30
+
+class BackendMemoria:
+    """Um processo só: sempre líder, sem repasse."""
+
+    def __init__(self):
+        self._snapshots = {}
+
+    async def iniciar(self, receptor):
+        pass
+
+    def parar(self):
+        self._snapshots.clear()
+
+    async def adquirir_lideranca(self, game_api_id: int) -> bool:
+        return True
+
+    async def liberar_lideranca(self, game_api_id: int):
+        self._snapshots.pop(game_api_id, None)
+
+    async def publicar(self, game_api_id: int, mensagem: dict, dados: dict) -> bool:
+        self._snapshots[game_api_id] = (mensagem["seq"], dados)
+        return True
+
+    async def ultimo_snapshot(self, game_api_id: int) -> Optional[Tuple[int, dict]]:
+        return self._snapshots.get(game_api_id)
+
+class BackendPostgres:
+    """Liderança por lease na tabela jogos_ao_vivo e repasse por LISTEN/NOTIFY."""
+
+    def __init__(self, url_escuta: str = None):
+        self.id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._url_escuta = make_url(url_escuta or settings.DATABASE_URL).set(drivername="postgresql")
+        self._conexao = None
+        self._receptor = None
+        self._loop = None
+        self._fila: Optional[asyncio.Queue] = None
+        self._tarefas = []
+
+    # --- Escuta ---
+
+    async def iniciar(self, receptor):
+        """`receptor(game_api_id, mensagem)` recebe, em ordem, o que os outros processos publicarem."""
+        self._receptor = receptor
+        self._loop = asyncio.get_running_loop()
+        self._fila = asyncio.Queue()
+        await self._conectar()
+        self._tarefas = [asyncio.create_task(self._consumir()), asyncio.create_task(self._vigiar())]
+
+    def _abrir_conexao(self):
+        import psycopg2
+
+        conexao = psycopg2.connect(self._url_escuta.render_as_string(hide_password=False))
+        conexao.autocommit = True
+        with conexao.cursor() as cursor:
+            cursor.execute(f"LISTEN {CANAL}")
+        return conexao
+
+    async def _conectar(self):
+        self._conexao = await asyncio.to_thread(self._abrir_conexao)
+        self._loop.add_reader(self._conexao.fileno(), self._ler_notificacoes)
+
+    def _desconectar(self):
+        conexao, self._conexao = self._conexao, None
+        if conexao is None:
+            return
+        try:
+            self._loop.remove_reader(conexao.fileno())
+            conexao.close()
+        except Exception:
+            pass
+
+    def _ler_notificacoes(self):
+        try:
+            self._conexao.poll()
+        except Exception as e:
+            print(f"Conexão de LISTEN dos jogos ao vivo caiu: {e}")
+            self._desconectar()
+            return
+        while self._conexao.notifies:
+            self._fila.put_nowait(self._conexao.notifies.pop(0).payload)
+
+    async def _consumir(self):
+        while True:
+            payload = await self._fila.get()
+            try:
+                mensagem = json.loads(payload)
+                if mensagem.pop("origem") == self.id:
+                    continue
+                game_api_id = mensagem.pop("jogo")
+                if mensagem["tipo"] == "recarregar":
+                    ultimo = await self.ultimo_snapshot(game_api_id)
+                    if ultimo is None:
+                        continue
+                    mensagem = {"tipo": "snapshot", "seq": ultimo[0], "dados": ultimo[1]}
+                await self._receptor(game_api_id, mensagem)
+            except Exception as e:
+                print(f"Erro ao repassar mensagem de jogo ao vivo: {e}")
+
+    def _ping(self):
+        with self._conexao.cursor() as cursor:
+            cursor.execute("SELECT 1")
+
+    async def _vigiar(self):
+        """Reabre a conexão de LISTEN se ela cair (inclusive quedas silenciosas, detectadas pelo ping)."""
+        while True:
+            await asyncio.sleep(INTERVALO_VIGIA_SEGUNDOS)
+            try:
+                if self._conexao is None or self._conexao.closed:
+                    self._desconectar()
+                    await self._conectar()
+                    print("Conexão de LISTEN dos jogos ao vivo reaberta.")
+                else:
+                    await asyncio.to_thread(self._ping)
+                    self._ler_notificacoes() # O ping pode ter recebido notificações
+            except Exception as e:
+                print(f"Erro na conexão de LISTEN dos jogos ao vivo: {e}")
+                self._desconectar()
+
+    def parar(self):
+        """Encerra a escuta e libera as lideranças deste processo. Usado no desligamento da aplicação."""
+        for tarefa in self._tarefas:
+            tarefa.cancel()
+        self._tarefas = []
+        if self._loop is not None:
+            self._desconectar()
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(models.Jogo_Ao_Vivo)
+                .where(models.Jogo_Ao_Vivo.lider == self.id)
+                .values(lider=None, lease_ate=None)
+            )
+            db.commit()
+        except Exception as e:
+            print(f"Erro ao liberar as lideranças dos jogos ao vivo: {e}")
+        finally:
+            db.close()
+
+    # --- Liderança e publicação (no banco, fora do event loop) ---
+
+    def _adquirir(self, game_api_id: int) -> bool:
+        db = SessionLocal()
+        try:
+            # Outro processo avaliando o lease deste jogo agora: desta vez ele fica com a vez
+            if not db.execute(select(func.pg_try_advisory_xact_lock(NAMESPACE_LOCK, game_api_id))).scalar():
+                db.rollback()
+                return False
+            db.execute(
+                insert(models.Jogo_Ao_Vivo).values(game_api_id=game_api_id, seq=0)
+                .on_conflict_do_nothing(index_elements=["game_api_id"])
+            )
+            tabela = models.Jogo_Ao_Vivo
+            lider = db.execute(
+                update(tabela)
+                .where(tabela.game_api_id == game_api_id,
+                       or_(tabela.lider.is_(None), tabela.lider == self.id, tabela.lease_ate < func.now()))
+                .values(lider=self.id, lease_ate=func.now() + timedelta(seconds=settings.LIVE_LEASE_SEGUNDOS))
+                .returning(tabela.game_api_id)
+            ).first()
+            db.commit()
+            return lider is not None
+        finally:
+            db.close()
+
+    def _liberar(self, game_api_id: int):
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(models.Jogo_Ao_Vivo)
+                .where(models.Jogo_Ao_Vivo.game_api_id == game_api_id, models.Jogo_Ao_Vivo.lider == self.id)
+                .values(lider=None, lease_ate=None)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _publicar(self, game_api_id: int, mensagem: dict, dados: dict) -> bool:
+        tabela = models.Jogo_Ao_Vivo
+        db = SessionLocal()
+        try:
+            aceita = db.execute(
+                update(tabela)
+                .where(tabela.game_api_id == game_api_id, tabela.lider == self.id, tabela.lease_ate > func.now())
+                .values(seq=mensagem["seq"], snapshot=dados)
+                .returning(tabela.game_api_id)
+            ).first()
+            if aceita is None: # Lease perdido: outro processo já pode ser o líder
+                db.rollback()
+                return False
+            payload = json.dumps({"origem": self.id, "jogo": game_api_id, **mensagem}, separators=(",", ":"), ensure_ascii=False)
+            if len(payload.encode("utf-8")) > LIMITE_NOTIFY_BYTES:
+                payload = json.dumps({"origem": self.id, "jogo": game_api_id, "tipo": "recarregar", "seq": mensagem["seq"]})
+            db.execute(select(func.pg_notify(CANAL, payload))) # Entregue só no commit, junto com o snapshot
+            db.commit()
+            return True
+        finally:
+            db.close()
+
+    def _ultimo_snapshot(self, game_api_id: int) -> Optional[Tuple[int, dict]]:
+        db = SessionLocal()
+        try:
+            linha = db.query(models.Jogo_Ao_Vivo.seq, models.Jogo_Ao_Vivo.snapshot)\
+                .filter(models.Jogo_Ao_Vivo.game_api_id == game_api_id)\
+                .first()
+        finally:
+            db.close()
+        return (linha.seq, linha.snapshot) if linha and linha.snapshot else None
+
+    async def adquirir_lideranca(self, game_api_id: int) -> bool:
+        """Assume ou renova a liderança do jogo. Retorna False se outro processo a tem."""
+        return await asyncio.to_thread(self._adquirir, game_api_id)
+
+    async def liberar_lideranca(self, game_api_id: int):
+        await asyncio.to_thread(self._liberar, game_api_id)
+
+    async def publicar(self, game_api_id: int, mensagem: dict, dados: dict) -> bool:
+        """Grava o snapshot `dados` e envia `mensagem` aos outros processos. False se o lease foi perdido."""
+        return await asyncio.to_thread(self._publicar, game_api_id, mensagem, dados)
+
+    async def ultimo_snapshot(self, game_api_id: int) -> Optional[Tuple[int, dict]]:
+        """(seq, snapshot) da última publicação do jogo, ou None."""
+        return await asyncio.to_thread(self._ultimo_snapshot, game_api_id)
+
+def criar_backend():
+    if settings.LIVE_BROADCAST_BACKEND == "postgres":
+        return BackendPostgres(settings.LIVE_BROADCAST_DATABASE_URL)
+    if settings.LIVE_BROADCAST_BACKEND != "memoria":
+        raise ValueError(f"LIVE_BROADCAST_BACKEND desconhecido: {settings.LIVE_BROADCAST_BACKEND}")
+    return BackendMemoria()
@@ -0,0 +1,425 @@
+"""
+Acompanhamento ao vivo dos jogos da NBA (WebSocket /jogos/ws/jogos/{jogo_id}).
+
+Há no máximo um rastreador por jogo em cada processo, não importa quantos clientes
+estejam conectados, e só o rastreador líder (um por jogo entre todos os processos,
+eleito pelo backend de app/services/live_broadcast.py) consulta a API. A cada
+INTERVALO_SEGUNDOS o líder busca o resumo e o box score, guarda o último estado e
+publica só o que mudou; os demais recebem a mesma mensagem pelo backend, aplicam o
+delta ao próprio estado e a repassam aos seus clientes:
+
+    {"tipo": "snapshot", "seq": 7, "dados": <schemas.LiveBoxscore completo>}
+    {"tipo": "delta", "seq": 8,
+     "jogo": {"game_status_text": "...", "period": 3},          # só campos alterados
+     "times": {"home_team": {"points": 88}},                     # só campos alterados
+     "jogadores": {"home_team": [{"player_id": 1, "points": 20}]},
+     "play_by_play": [<eventos com event_num acima do último enviado>]}
+
+Quem se conecta recebe uma vez o snapshot completo e depois os deltas; um delta
+com seq menor ou igual ao do snapshot já está contido nele e deve ser ignorado.
+Um rastreador que perde mensagens (seq fora de ordem) relê o último snapshot
+publicado e o envia aos clientes no lugar do delta. Quando não há estado anterior,
+a numeração começa nos segundos desde EPOCA_SEQ, então um seq de antes de um
+reinício nunca coincide com um da numeração nova.
+
+O mesmo fluxo é servido por SSE (GET /jogos/{jogo_id}/live/stream, em eventos_sse)
+com o seq como id do evento: quem reconecta com Last-Event-ID recebe só os deltas
+que perdeu, se ainda estiverem nos últimos HISTORICO_MENSAGENS, ou o snapshot.
+O play-by-play só é buscado quando o box score (ou o período/status) mudou, e a
+partir do período do último evento conhecido, em vez do jogo inteiro.
+
+As chamadas ao nba_api são bloqueantes (requests), então rodam num pool de threads
+próprio (WORKERS) e nunca no event loop; resumo e box score são buscados ao mesmo
+tempo. Cancelar o rastreador cancela as chamadas que ainda estão na fila do pool;
+uma requisição já em andamento termina na thread em até TIMEOUT_API_SEGUNDOS e o
+resultado é descartado.
+"""
+import asyncio
+import functools
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+import pandas as pd
+from nba_api.stats.endpoints import boxscoretraditionalv2, playbyplayv2, boxscoresummaryv2
+from .. import schemas
+from ..config import settings
+from ..websocket_manager import ConexaoDescartada, manager
+from . import live_broadcast, nba_client
+
+INTERVALO_SEGUNDOS = 20
+INTERVALO_ERRO_SEGUNDOS = 30
+TIMEOUT_API_SEGUNDOS = 30
+# Margem sobre o timeout HTTP para a espera no token bucket global do nba_client
+TIMEOUT_BUSCA_SEGUNDOS = TIMEOUT_API_SEGUNDOS + 15
+WORKERS = 4 # Threads compartilhadas por todos os jogos acompanhados
+HISTORICO_MENSAGENS = 50 # Deltas guardados para retomar streams SSE pelo Last-Event-ID
+EPOCA_SEQ = 1735689600 # 2025-01-01 UTC
+SSE_RETRY_MS = 3000
+
+nba_api_headers = {
+    'Host': 'stats.nba.com',
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/117.0',
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Referer': 'https://www.nba.com/',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'x-nba-stats-origin': 'stats',
+    'x-nba-stats-token': 'true'
+}
+
+LADOS = ("home_team", "away_team")
+CAMPOS_JOGO = ("game_status_text", "period")
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+def _chamar(endpoint_cls, game_id: str, **parametros):
+    return nba_client.chamar(
+        endpoint_cls, game_id=game_id, timeout=TIMEOUT_API_SEGUNDOS, max_tentativas=1, usar_cache=False,
+        headers=nba_api_headers, **parametros
+    )
+
+async def _buscar_em_thread(endpoint_cls, game_id: str, **parametros):
+    """Faz a chamada bloqueante no pool do rastreador e espera por ela sem travar o event loop."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="live-tracker")
+    futuro = asyncio.get_running_loop().run_in_executor(
+        _executor, functools.partial(_chamar, endpoint_cls, game_id, **parametros)
+    )
+    return await asyncio.wait_for(futuro, timeout=TIMEOUT_BUSCA_SEGUNDOS)
+
+# --- Montagem do estado ---
+
+def _numero(valor, tipo=int):
+    """Converte valores da API (que podem vir None/NaN) para int/float, com 0 como padrão."""
+    if valor is None or pd.isna(valor):
+        return tipo(0)
+    return tipo(valor)
+
+def _minutos(valor) -> str:
+    """'34:12' (ou o '34.000000:12' do V2) no formato MM:SS do schema."""
+    if not isinstance(valor, str) or ":" not in valor:
+        return "00:00"
+    minutos, segundos = valor.split(":", 1)
+    return f"{int(float(minutos)):02d}:{int(float(segundos)):02d}"
+
+def _jogadores(player_stats_df: pd.DataFrame, team_id) -> list:
+    return [
+        schemas.LivePlayerStats(
+            player_id=linha["PLAYER_ID"], player_name=linha["PLAYER_NAME"],
+            position=linha.get("START_POSITION") or "", minutes=_minutos(linha.get("MIN")),
+            points=_numero(linha.get("PTS")), rebounds=_numero(linha.get("REB")), assists=_numero(linha.get("AST")),
+            steals=_numero(linha.get("STL")), blocks=_numero(linha.get("BLK")),
+        ).model_dump()
+        for linha in player_stats_df[player_stats_df["TEAM_ID"] == team_id].to_dict("records")
+    ]
+
+def _time(linha: dict, player_stats_df: pd.DataFrame) -> dict:
+    return schemas.LiveTeamStats(
+        team_id=linha["TEAM_ID"], team_name=linha["TEAM_NAME"], team_abbreviation=linha["TEAM_ABBREVIATION"],
+        points=_numero(linha.get("PTS")), fg_pct=_numero(linha.get("FG_PCT"), float),
+        fg3_pct=_numero(linha.get("FG3_PCT"), float), ft_pct=_numero(linha.get("FT_PCT"), float),
+        rebounds=_numero(linha.get("REB")), assists=_numero(linha.get("AST")), turnovers=_numero(linha.get("TO")),
+        players=_jogadores(player_stats_df, linha["TEAM_ID"]),
+    ).model_dump()
+
+def montar_times(player_stats_df: pd.DataFrame, team_stats_df: pd.DataFrame, home_team_id=None) -> dict:
+    """{"home_team": ..., "away_team": ...} no formato de schemas.LiveTeamStats."""
+    linhas = team_stats_df.to_dict("records")
+    if home_team_id is not None and len(linhas) == 2 and linhas[1]["TEAM_ID"] == home_team_id:
+        linhas.reverse()
+    return {"home_team": _time(linhas[0], player_stats_df), "away_team": _time(linhas[1], player_stats_df)}
+
+def eventos_novos(pbp_df: pd.DataFrame, depois_de: int) -> list:
+    """Eventos do play-by-play com event_num maior que `depois_de`, em ordem."""
+    eventos = [
+        schemas.PlayByPlayEvent(
+            event_num=evento["EVENTNUM"], clock=evento.get("PCTIMESTRING") or "", period=evento["PERIOD"],
+            description=evento.get("HOMEDESCRIPTION") or evento.get("VISITORDESCRIPTION") or evento.get("NEUTRALDESCRIPTION") or "",
+        ).model_dump()
+        for evento in pbp_df[pbp_df["EVENTNUM"] > depois_de].to_dict("records")
+    ]
+    return sorted(eventos, key=lambda evento: evento["event_num"])
+
+# --- Deltas ---
+
+def _alterados(anterior: dict, atual: dict, ignorar=()) -> dict:
+    return {campo: valor for campo, valor in atual.items() if campo not in ignorar and anterior.get(campo) != valor}
+
+def calcular_delta(anterior: dict, atual: dict, novos_eventos: list) -> Optional[dict]:
+    """
+    Diferença entre dois estados (dicts de LiveBoxscore sem o play-by-play acumulado).
+    Jogadores novos vão completos; os demais, só com player_id e os campos alterados.
+    Retorna None se nada mudou.
+    """
+    delta = {}
+    jogo = {campo: atual[campo] for campo in CAMPOS_JOGO if anterior.get(campo) != atual[campo]}
+    if jogo:
+        delta["jogo"] = jogo
+
+    times, jogadores = {}, {}
+    for lado in LADOS:
+        campos = _alterados(anterior[lado], atual[lado], ignorar=("players",))
+        if campos:
+            times[lado] = campos
+        antes = {jogador["player_id"]: jogador for jogador in anterior[lado]["players"]}
+        mudancas = []
+        for jogador in atual[lado]["players"]:
+            if jogador["player_id"] not in antes:
+                mudancas.append(jogador)
+                continue
+            campos = _alterados(antes[jogador["player_id"]], jogador)
+            if campos:
+                mudancas.append({"player_id": jogador["player_id"], **campos})
+        if mudancas:
+            jogadores[lado] = mudancas
+    if times:
+        delta["times"] = times
+    if jogadores:
+        delta["jogadores"] = jogadores
+    if novos_eventos:
+        delta["play_by_play"] = novos_eventos
+    return delta or None
+
+def aplicar_delta(estado: dict, delta: dict) -> dict:
+    """Inverso de calcular_delta para o estado sem o play-by-play (os eventos são só anexados)."""
+    novo = {**estado, **delta.get("jogo", {})}
+    for lado in LADOS:
+        alterados = delta.get("jogadores", {}).get(lado, [])
+        if lado not in delta.get("times", {}) and not alterados:
+            continue
+        jogadores = {jogador["player_id"]: jogador for jogador in estado[lado]["players"]}
+        for jogador in alterados:
+            jogadores[jogador["player_id"]] = {**jogadores.get(jogador["player_id"], {}), **jogador}
+        novo[lado] = {**estado[lado], **delta.get("times", {}).get(lado, {}), "players": list(jogadores.values())}
+    return novo
+
+# --- Rastreador ---
+
+class RastreadorJogo:
+    """Estado ao vivo de um jogo e a tarefa que o atualiza enquanto houver clientes."""
+
+    def __init__(self, game_api_id: int):
+        self.game_api_id = game_api_id
+        self.game_id = f"{game_api_id:010d}"
+        self.estado: Optional[dict] = None # LiveBoxscore sem o play-by-play
+        self.play_by_play: list = []
+        self.seq = 0
+        self.recentes = deque(maxlen=HISTORICO_MENSAGENS) # Últimos deltas, em ordem de seq
+        self.lider = False
+        self.tarefa: Optional[asyncio.Task] = None
+
+    @property
+    def ultimo_evento(self) -> int:
+        return self.play_by_play[-1]["event_num"] if self.play_by_play else 0
+
+    def mensagem_snapshot(self) -> Optional[dict]:
+        if self.estado is None:
+            return None
+        return {"tipo": "snapshot", "seq": self.seq, "dados": {**self.estado, "play_by_play": self.play_by_play}}
+
+    def mensagens_desde(self, ultimo_seq: Optional[int]) -> list:
+        """
+        O que um cliente que já tem o estado `ultimo_seq` precisa receber: nada, os deltas
+        seguintes (se todos ainda estiverem no histórico) ou o snapshot.
+        """
+        if self.estado is None:
+            return []
+        if ultimo_seq == self.seq:
+            return []
+        if ultimo_seq is not None and ultimo_seq < self.seq:
+            faltando = [mensagem for mensagem in self.recentes if mensagem["seq"] > ultimo_seq]
+            if faltando and faltando[0]["seq"] == ultimo_seq + 1:
+                return faltando
+        return [self.mensagem_snapshot()]
+
+    def _carregar(self, seq: int, dados: dict):
+        self.estado = {campo: valor for campo, valor in dados.items() if campo != "play_by_play"}
+        self.play_by_play = list(dados["play_by_play"])
+        self.seq = seq
+        self.recentes.clear()
+
+    async def sincronizar(self):
+        """Adota o último snapshot publicado, se for mais novo que o local, e o envia aos clientes deste processo."""
+        ultimo = await _backend.ultimo_snapshot(self.game_api_id)
+        if ultimo and ultimo[0] > self.seq:
+            self._carregar(*ultimo)
+            await manager.broadcast(self.mensagem_snapshot(), self.game_api_id)
+
+    async def receber(self, mensagem: dict):
+        """Mensagem publicada pelo líder em outro processo."""
+        if mensagem["seq"] <= self.seq:
+            return
+        if mensagem["tipo"] == "snapshot":
+            self._carregar(mensagem["seq"], mensagem["dados"])
+        elif self.estado is not None and mensagem["seq"] == self.seq + 1:
+            self.estado = aplicar_delta(self.estado, mensagem)
+            self.play_by_play.extend(mensagem.get("play_by_play", []))
+            self.seq = mensagem["seq"]
+            self.recentes.append(mensagem)
+        else:
+            await self.sincronizar() # Mensagem perdida: o delta não se aplica ao estado local
+            return
+        await manager.broadcast(mensagem, self.game_api_id)
+
+    async def _buscar(self):
+        """Uma rodada de chamadas à API. Retorna (estado novo, eventos novos)."""
+        resumo, boxscore = await asyncio.gather(
+            _buscar_em_thread(boxscoresummaryv2.BoxScoreSummaryV2, self.game_id),
+            _buscar_em_thread(boxscoretraditionalv2.BoxScoreTraditionalV2, self.game_id),
+        )
+        resumo = resumo.game_summary.get_data_frame().iloc[0]
+        estado = {
+            "game_id": self.game_id,
+            "game_status_text": resumo["GAME_STATUS_TEXT"],
+            "period": _numero(resumo["LIVE_PERIOD"]),
+            **montar_times(boxscore.player_stats.get_data_frame(), boxscore.team_stats.get_data_frame(), resumo["HOME_TEAM_ID"]),
+        }
+
+        # Box score e situação do jogo iguais aos anteriores: não houve jogada nova, então o play-by-play não é buscado
+        if self.estado is not None and all(estado[campo] == self.estado[campo] for campo in (*LADOS, *CAMPOS_JOGO)):
+            return estado, []
+        periodo_inicial = self.play_by_play[-1]["period"] if self.play_by_play else 0
+        pbp = await _buscar_em_thread(playbyplayv2.PlayByPlayV2, self.game_id, start_period=str(periodo_inicial))
+        pbp_df = pbp.play_by_play.get_data_frame()
+        return estado, eventos_novos(pbp_df, self.ultimo_evento)
+
+    async def atualizar(self):
+        """(Líder) Busca o estado atual e publica o snapshot (primeira vez) ou o delta."""
+        estado, novos_eventos = await self._buscar()
+        if self.estado is None:
+            seq = max(self.seq + 1, int(time.time()) - EPOCA_SEQ)
+            mensagem = {"tipo": "snapshot", "seq": seq, "dados": {**estado, "play_by_play": novos_eventos}}
+        else:
+            delta = calcular_delta(self.estado, estado, novos_eventos)
+            if delta is None:
+                return
+            mensagem = {"tipo": "delta", "seq": self.seq + 1, **delta}
+
+        play_by_play = self.play_by_play + novos_eventos
+        if not await _backend.publicar(self.game_api_id, mensagem, {**estado, "play_by_play": play_by_play}):
+            print(f"Liderança do jogo {self.game_api_id} perdida; publicação descartada.")
+            self.lider = False
+            return
+        self.estado, self.play_by_play, self.seq = estado, play_by_play, mensagem["seq"]
+        if mensagem["tipo"] == "delta":
+            self.recentes.append(mensagem)
+        else:
+            self.recentes.clear()
+        await manager.broadcast(mensagem, self.game_api_id)
+
+    async def executar(self):
+        print(f"Iniciando tracking real para o jogo API ID: {self.game_api_id}...")
+        try:
+            while True:
+                try:
+                    if not self.lider:
+                        # Seguidor (ou líder recém-eleito): parte do último estado publicado
+                        await self.sincronizar()
+                    lider = await _backend.adquirir_lideranca(self.game_api_id)
+                    if lider != self.lider:
+                        print(f"Jogo {self.game_api_id}: este processo {'assumiu' if lider else 'deixou'} a consulta à API.")
+                    self.lider = lider
+                    if self.lider:
+                        await self.atualizar()
+                    await asyncio.sleep(INTERVALO_SEGUNDOS)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"Erro ao buscar dados para o jogo {self.game_api_id}: {e}")
+                    await asyncio.sleep(INTERVALO_ERRO_SEGUNDOS)
+        except asyncio.CancelledError:
+            print(f"Tracking para o jogo {self.game_api_id} terminado.")
+            if self.lider:
+                try:
+                    await _backend.liberar_lideranca(self.game_api_id)
+                except Exception as e:
+                    print(f"Erro ao liberar a liderança do jogo {self.game_api_id}: {e}")
+
+_rastreadores: Dict[int, RastreadorJogo] = {}
+_backend = None
+_backend_lock = asyncio.Lock()
+
+async def _receber(game_api_id: int, mensagem: dict):
+    rastreador = _rastreadores.get(game_api_id)
+    if rastreador is not None:
+        await rastreador.receber(mensagem)
+
+async def _iniciar_backend():
+    global _backend
+    async with _backend_lock:
+        if _backend is None:
+            backend = live_broadcast.criar_backend()
+            await backend.iniciar(_receber)
+            _backend = backend
+
+async def assinar(websocket, game_api_id: int):
+    """
+    Registra o cliente no jogo: envia o snapshot atual, se já houver um, e inicia o
+    rastreador caso seja o primeiro cliente do jogo.
+    """
+    await _iniciar_backend()
+    await manager.connect(websocket, game_api_id)
+    await _enviar_estado_atual(websocket, game_api_id)
+
+async def _enviar_estado_atual(chave, game_api_id: int, ultimo_seq: Optional[int] = None):
+    """Inicia o rastreador do jogo, se preciso, ou envia ao cliente o que ele ainda não tem."""
+    rastreador = _rastreadores.get(game_api_id)
+    if rastreador is None:
+        rastreador = _rastreadores[game_api_id] = RastreadorJogo(game_api_id)
+        rastreador.tarefa = asyncio.create_task(rastreador.executar())
+        return
+    for mensagem in rastreador.mensagens_desde(ultimo_seq):
+        await manager.enviar(chave, game_api_id, mensagem)
+
+async def eventos_sse(game_api_id: int, ultimo_seq: Optional[int] = None):
+    """
+    Corpo de um stream SSE do jogo: as mesmas mensagens do WebSocket, com o seq como id
+    do evento, e um comentário a cada SSE_HEARTBEAT_SEGUNDOS sem mensagens. Termina (e
+    libera o rastreador, se for o último cliente) quando o cliente desconecta.
+    """
+    await _iniciar_backend()
+    conexao = manager.conectar_stream(game_api_id)
+    try:
+        await _enviar_estado_atual(conexao, game_api_id, ultimo_seq)
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        while True:
+            try:
+                item = await manager.proxima_mensagem(conexao, timeout=settings.SSE_HEARTBEAT_SEGUNDOS)
+            except ConexaoDescartada:
+                print(f"Stream SSE lento no jogo {game_api_id} encerrado.")
+                return
+            if item is None:
+                yield ": ping\n\n"
+                continue
+            evento_id, texto = item
+            yield f"id: {evento_id}\ndata: {texto}\n\n"
+    finally:
+        cancelar_assinatura(conexao.chave, game_api_id)
+
+def cancelar_assinatura(websocket, game_api_id: int):
+    """Remove o cliente e encerra o rastreador quando o jogo fica sem clientes."""
+    manager.disconnect(websocket, game_api_id)
+    if not manager.active_connections.get(game_api_id):
+        rastreador = _rastreadores.pop(game_api_id, None)
+        if rastreador and rastreador.tarefa:
+            rastreador.tarefa.cancel()
+
+def parar():
+    """
+    Encerra os rastreadores, libera as lideranças deste processo e descarta as chamadas
+    que ainda não começaram. Usado no desligamento da aplicação.
+    """
+    global _executor, _backend
+    for rastreador in _rastreadores.values():
+        if rastreador.tarefa:
+            rastreador.tarefa.cancel()
+    _rastreadores.clear()
+    backend, _backend = _backend, None
+    if backend is not None:
+        backend.parar()
+    executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
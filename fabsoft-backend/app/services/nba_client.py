@@ -0,0 +1,264 @@
+"""
+Cliente único para as chamadas à stats.nba.com (nba_api).
+
+Toda chamada passa por chamar(), que aplica:
+- um token bucket global, compartilhado por sincronizações, rotas e crud, no lugar
+  das pausas fixas espalhadas pelo código. A taxa é adaptativa: começa em
+  NBA_API_REQUISICOES_POR_SEGUNDO, cai 30% a cada 429 ou timeout (até
+  NBA_API_TAXA_MINIMA) e volta a subir aos poucos enquanto as respostas vierem bem;
+- uma sessão HTTP com keep-alive e pool de conexões, usada pelo nba_api;
+- retentativas com recuo exponencial e jitter;
+- um circuit breaker: depois de NBA_API_CIRCUITO_LIMITE_FALHAS falhas seguidas,
+  as chamadas falham na hora por NBA_API_CIRCUITO_ESPERA_SEGUNDOS, sem bater na API;
+- cache em disco das respostas, por endpoint e parâmetros, com TTL por endpoint
+  (TTL_POR_ENDPOINT); endpoints de jogos ao vivo não são cacheados;
+- contadores de chamadas, erros, cache e latência por endpoint (get_metricas).
+
+Uso:
+    career = nba_client.chamar(playercareerstats.PlayerCareerStats, player_id=2544)
+    df = career.get_data_frames()[0]
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from nba_api.stats.library.http import NBAStatsHTTP, NBAStatsResponse
+from ..config import settings
+from .rate_limiter import TokenBucket, TaxaAdaptativa
+
+# Tempo de vida do cache em segundos. Endpoints fora da lista não são cacheados.
+TTL_POR_ENDPOINT = {
+    "commonallplayers": 6 * 3600,
+    "commonplayerinfo": 24 * 3600,
+    "playerawards": 24 * 3600,
+    "teamdetails": 24 * 3600,
+    "playercareerstats": 12 * 3600,
+    "scheduleleaguev2": 3600,
+    "leaguegamefinder": 15 * 60,
+    "scoreboardv2": 60,
+}
+
+# Respostas que indicam que a API está limitando as chamadas
+STATUS_SOBRECARGA = (429, 503)
+
+class CircuitoAbertoError(Exception):
+    """A API da NBA falhou seguidamente e as chamadas estão suspensas temporariamente."""
+
+# --- Sessão HTTP ---
+
+_sessao_lock = threading.Lock()
+_sessao_configurada = False
+
+def _configurar_sessao():
+    """Troca a sessão padrão do nba_api por uma com pool de conexões keep-alive."""
+    global _sessao_configurada
+    with _sessao_lock:
+        if _sessao_configurada:
+            return
+        sessao = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=2, pool_maxsize=settings.NBA_API_POOL_CONEXOES, max_retries=0)
+        sessao.mount("https://", adaptador)
+        sessao.mount("http://", adaptador)
+        NBAStatsHTTP.set_session(sessao)
+        _sessao_configurada = True
+
+# --- Circuit breaker ---
+
+class CircuitBreaker:
+    def __init__(self, limite_falhas: int, espera_segundos: float):
+        self.limite_falhas = limite_falhas
+        self.espera_segundos = espera_segundos
+        self._falhas = 0
+        self._aberto_ate = None
+        self._testando = False
+        self._lock = threading.Lock()
+
+    @property
+    def estado(self) -> str:
+        with self._lock:
+            if self._aberto_ate is None:
+                return "fechado"
+            return "aberto" if time.monotonic() < self._aberto_ate else "meio_aberto"
+
+    def permitir(self):
+        """Levanta CircuitoAbertoError se o circuito estiver aberto. No meio-aberto, deixa passar uma chamada de teste."""
+        with self._lock:
+            if self._aberto_ate is None:
+                return
+            restante = self._aberto_ate - time.monotonic()
+            if restante > 0 or self._testando:
+                raise CircuitoAbertoError(f"API da NBA indisponível; nova tentativa em {max(restante, 0):.0f}s")
+            self._testando = True
+
+    def registrar_sucesso(self):
+        with self._lock:
+            self._falhas = 0
+            self._aberto_ate = None
+            self._testando = False
+
+    def registrar_falha(self):
+        with self._lock:
+            self._falhas += 1
+            if self._testando or self._falhas >= self.limite_falhas:
+                self._aberto_ate = time.monotonic() + self.espera_segundos
+                self._testando = False
+                print(f"Circuito da API da NBA aberto por {self.espera_segundos:.0f}s após {self._falhas} falha(s).")
+
+# --- Cache em disco ---
+
+def _chave_cache(endpoint: str, parametros: dict) -> str:
+    texto = json.dumps(sorted((k, str(v)) for k, v in parametros.items()))
+    return os.path.join(settings.NBA_API_CACHE_DIR, endpoint, hashlib.sha1(texto.encode("utf-8")).hexdigest() + ".json")
+
+def _ler_cache(endpoint: str, parametros: dict):
+    ttl = TTL_POR_ENDPOINT.get(endpoint)
+    if not ttl or not settings.NBA_API_CACHE_ATIVO:
+        return None
+    caminho = _chave_cache(endpoint, parametros)
+    try:
+        if time.time() - os.path.getmtime(caminho) > ttl:
+            return None
+        with open(caminho, "r", encoding="utf-8") as arquivo:
+            return arquivo.read()
+    except OSError:
+        return None
+
+def _gravar_cache(endpoint: str, parametros: dict, conteudo: str):
+    if not TTL_POR_ENDPOINT.get(endpoint) or not settings.NBA_API_CACHE_ATIVO:
+        return
+    caminho = _chave_cache(endpoint, parametros)
+    try:
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        temporario = f"{caminho}.{threading.get_ident()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            arquivo.write(conteudo)
+        os.replace(temporario, caminho)
+    except OSError as e:
+        print(f"Não foi possível gravar o cache de {endpoint}: {e}")
+
+# --- Métricas ---
+
+class _Metricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._por_endpoint = {}
+
+    def _item(self, endpoint: str) -> dict:
+        return self._por_endpoint.setdefault(endpoint, {
+            "sucessos": 0, "erros": 0, "retentativas": 0, "sobrecargas": 0, "cache_hits": 0, "rejeitadas_circuito": 0,
+            "latencia_media_ms": None, "latencia_max_ms": 0.0, "ultimo_erro": None,
+        })
+
+    def contar(self, endpoint: str, campo: str, erro: str = None):
+        with self._lock:
+            item = self._item(endpoint)
+            item[campo] += 1
+            if erro:
+                item["ultimo_erro"] = erro[:200]
+
+    def latencia(self, endpoint: str, segundos: float):
+        ms = segundos * 1000
+        with self._lock:
+            item = self._item(endpoint)
+            anterior = item["latencia_media_ms"]
+            # Média móvel exponencial para não guardar histórico
+            item["latencia_media_ms"] = round(ms if anterior is None else 0.9 * anterior + 0.1 * ms, 1)
+            item["latencia_max_ms"] = round(max(item["latencia_max_ms"], ms), 1)
+
+    def copia(self) -> dict:
+        with self._lock:
+            return {endpoint: dict(item) for endpoint, item in self._por_endpoint.items()}
+
+# --- Cliente ---
+
+_limitador = TokenBucket(settings.NBA_API_REQUISICOES_POR_SEGUNDO, settings.NBA_API_RAJADA)
+_taxa = TaxaAdaptativa(
+    _limitador,
+    minima=min(settings.NBA_API_TAXA_MINIMA, settings.NBA_API_REQUISICOES_POR_SEGUNDO),
+    maxima=settings.NBA_API_REQUISICOES_POR_SEGUNDO,
+    passo=settings.NBA_API_TAXA_PASSO,
+    sucessos_para_subir=settings.NBA_API_SUCESSOS_PARA_SUBIR_TAXA,
+)
+_circuito = CircuitBreaker(settings.NBA_API_CIRCUITO_LIMITE_FALHAS, settings.NBA_API_CIRCUITO_ESPERA_SEGUNDOS)
+_metricas = _Metricas()
+
+def _sobrecarga(endpoint, erro: Exception) -> bool:
+    """Se a falha indica que a API está limitando as chamadas (429/503 ou timeout)."""
+    if isinstance(erro, requests.exceptions.Timeout):
+        return True
+    # O nba_api não levanta erro de HTTP: a resposta fica no endpoint e o erro vem do JSON inválido
+    resposta = getattr(endpoint, "nba_response", None)
+    return getattr(resposta, "_status_code", None) in STATUS_SOBRECARGA
+
+def _espera_recuo(tentativa: int) -> float:
+    """Recuo exponencial com jitter completo: aleatório entre 0 e base * 2^tentativa."""
+    return random.uniform(0, settings.NBA_API_RECUO_BASE_SEGUNDOS * (2 ** tentativa))
+
+def chamar(endpoint_cls, timeout: int = None, max_tentativas: int = None, usar_cache: bool = True, **parametros):
+    """
+    Instancia e executa um endpoint do nba_api (ex: playerawards.PlayerAwards) pelo cliente
+    compartilhado. `parametros` são os argumentos do construtor do endpoint. Retorna o
+    endpoint já carregado, pronto para get_data_frames(), get_dict() etc.
+    """
+    _configurar_sessao()
+    timeout = timeout or settings.NBA_API_TIMEOUT_SEGUNDOS
+    max_tentativas = max_tentativas or settings.NBA_API_MAX_TENTATIVAS
+
+    endpoint = endpoint_cls(timeout=timeout, get_request=False, **parametros)
+    nome = endpoint.endpoint
+
+    if usar_cache:
+        conteudo = _ler_cache(nome, endpoint.parameters)
+        if conteudo is not None:
+            endpoint.nba_response = NBAStatsResponse(response=conteudo, status_code=200, url=None)
+            endpoint.load_response()
+            _metricas.contar(nome, "cache_hits")
+            return endpoint
+
+    for tentativa in range(max_tentativas):
+        try:
+            _circuito.permitir()
+        except CircuitoAbertoError:
+            _metricas.contar(nome, "rejeitadas_circuito")
+            raise
+
+        _limitador.adquirir()
+        inicio = time.monotonic()
+        endpoint.nba_response = None
+        try:
+            endpoint.get_request()  # Faz a requisição e carrega os data sets (load_response)
+        except Exception as e:
+            _metricas.latencia(nome, time.monotonic() - inicio)
+            _metricas.contar(nome, "erros", erro=str(e))
+            _circuito.registrar_falha()
+            if _sobrecarga(endpoint, e):
+                _metricas.contar(nome, "sobrecargas")
+                if _taxa.registrar_sobrecarga():
+                    print(f"  -> {nome}: API limitando as chamadas. Taxa reduzida para {_taxa.taxa:.2f} req/s.")
+            if tentativa == max_tentativas - 1:
+                raise
+            espera = _espera_recuo(tentativa)
+            _metricas.contar(nome, "retentativas")
+            print(f"  -> {nome}: tentativa {tentativa + 1} falhou ({e}). Nova tentativa em {espera:.1f}s...")
+            time.sleep(espera)
+            continue
+
+        _metricas.latencia(nome, time.monotonic() - inicio)
+        _metricas.contar(nome, "sucessos")
+        _circuito.registrar_sucesso()
+        _taxa.registrar_sucesso()
+        if usar_cache:
+            _gravar_cache(nome, endpoint.parameters, endpoint.nba_response.get_response())
+        return endpoint
+
+def get_metricas() -> dict:
+    return {
+        "circuito": _circuito.estado,
+        "taxa_requisicoes_por_segundo": round(_taxa.taxa, 3),
+        "reducoes_taxa": _taxa.reducoes,
+        "endpoints": _metricas.copia(),
+    }
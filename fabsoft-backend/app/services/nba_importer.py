@@ -4,15 +4,22 @@ from nba_api.stats.static import teams
 from nba_api.stats.endpoints import (
     commonallplayers, leaguegamefinder, boxscoresummaryv2,
     boxscoretraditionalv2, boxscoretraditionalv3, commonplayerinfo,
-    playerawards, teamdetails, scheduleleaguev2
+    playerawards, teamdetails, scheduleleaguev2, playercareerstats
 )
 from nba_api.stats.endpoints import scoreboardv2
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 from .. import crud, schemas, models
+from ..config import settings
+from ..utils import generate_slug
+from . import nba_client, nba_transformacoes, importador_temporada, jobs
+import hashlib
+import json
 import math
-import time
+import queue
 import re
+import threading
 
 def _convert_height_to_cm(height_str: str) -> Optional[int]:
     if not height_str or '-' not in height_str:
@@ -33,125 +40,220 @@ def _convert_weight_to_kg(weight_lbs: str) -> Optional[float]:
         return None
     
 
-def sync_nba_players(db: Session, skip: int = 0):
-    """
-    Sincroniza os jogadores da NBA em lotes, com uma estratégia de retentativa
-    robusta (exponential backoff) e a capacidade de saltar jogadores já processados.
+CHECKPOINT_JOGADORES = "jogadores"
+URL_FOTO_JOGADOR = "https://ak-static.cms.nba.com/wp-content/uploads/headshots/nba/latest/260x190/{}.png"
 
-    :param db: A sessão da base de dados.
-    :param skip: O número de jogadores a saltar no início (para retomar uma sincronização).
+def _linha_jogador(item: dict, details, time_id: Optional[int], slug: Optional[str]) -> dict:
+    """Converte o resumo da lista de jogadores e o CommonPlayerInfo numa linha da tabela jogadores."""
+    data_nascimento_str = details.get('BIRTHDATE')
+    draft_year_str = details.get('DRAFT_YEAR')
+    numero_camisa_str = details.get('JERSEY')
+    return {
+        "api_id": item["id"],
+        "nome": item["nome"],
+        "nome_normalizado": item["nome"].lower(),
+        "slug": slug,
+        "time_atual_id": time_id,
+        "foto_url": URL_FOTO_JOGADOR.format(item["id"]),
+        "status": "ativo",
+        "posicao": details.get('POSITION'),
+        "numero_camisa": int(numero_camisa_str) if numero_camisa_str and numero_camisa_str.isdigit() else None,
+        "data_nascimento": datetime.strptime(data_nascimento_str, '%Y-%m-%dT%H:%M:%S') if data_nascimento_str else None,
+        "ano_draft": int(draft_year_str) if draft_year_str and draft_year_str != 'Undrafted' else None,
+        "anos_experiencia": details.get('SEASON_EXP'),
+        "altura": _convert_height_to_cm(details.get('HEIGHT')),
+        "peso": _convert_weight_to_kg(details.get('WEIGHT')),
+        "nacionalidade": details.get('COUNTRY'),
+    }
+
+def _gravar_lote_jogadores(db: Session, checkpoint, lote: list, posicao: int, contagem: dict, concluido: bool = False):
+    """
+    Grava o lote com um único upsert e avança o checkpoint na mesma transação.
+    Se o lote falhar, grava jogador a jogador para não perder os demais.
     """
-    print(f"Iniciando a sincronização de jogadores da NBA em lotes (a começar do jogador #{skip + 1})...")
-    
-    player_data = None
-    max_retries = 5
-    
-    print("Buscando a lista completa de jogadores da API...")
     try:
-        player_data_endpoint = commonallplayers.CommonAllPlayers(is_only_current_season=1, timeout=60)
-        player_data = player_data_endpoint.get_data_frames()[0]
-        print(f" -> Lista de {len(player_data)} jogadores recebida com sucesso!")
+        crud.upsert_jogadores(db, [linha for linha, _ in lote])
     except Exception as e:
-        print(f"ERRO CRÍTICO: Não foi possível buscar a lista de jogadores da NBA. Sincronização abortada. Erro: {e}")
-        return {"total_sincronizado": 0, "novos_adicionados": 0, "jogadores_processados": 0}
+        db.rollback()
+        print(f"  -> Falha ao gravar o lote ({e}). A gravar jogador a jogador...")
+        for linha, novo in lote:
+            try:
+                with db.begin_nested():
+                    crud.upsert_jogadores(db, [linha])
+            except Exception as e:
+                contagem["novos" if novo else "atualizados"] -= 1
+                print(f"ERRO ao gravar jogador ID {linha['api_id']}: {e}. A avançar para o próximo.")
+    crud.avancar_sync_checkpoint(db, checkpoint, posicao, contagem["novos"], contagem["atualizados"], concluido=concluido)
+    db.commit()
 
-    jogadores_adicionados = 0
-    jogadores_atualizados = 0
-    total_jogadores = len(player_data)
-    jogadores_processados_nesta_execucao = 0
-    
-    if skip > 0:
-        player_data = player_data.iloc[skip:]
+def _buscar_shard(indice: int, itens: list, posicao: int, saida: queue.Queue, parar: threading.Event, circuito_aberto: threading.Event):
+    """
+    Busca os detalhes dos jogadores de um shard, em ordem, a partir de `posicao`, e
+    coloca (shard, posição depois do item, item, detalhes, erro) em `saida`. O ritmo é o
+    do token bucket global, compartilhado com os outros shards.
+    """
+    try:
+        for posicao in range(posicao, len(itens)):
+            if parar.is_set() or circuito_aberto.is_set():
+                return
+            item = itens[posicao]
+            try:
+                player_info_df = nba_client.chamar(commonplayerinfo.CommonPlayerInfo, player_id=item["id"]).get_data_frames()
+                saida.put((indice, posicao + 1, item, player_info_df, None))
+            except nba_client.CircuitoAbertoError as e:
+                # A API está fora: o shard para sem avançar, e o jogador fica para a próxima execução
+                if not circuito_aberto.is_set():
+                    print(f"Sincronização de jogadores interrompida: {e}")
+                circuito_aberto.set()
+                return
+            except Exception as e:
+                saida.put((indice, posicao + 1, item, None, e))
+    finally:
+        saida.put((indice, None, None, None, None))
 
-    for i, player_summary in player_data.iterrows():
-        print(f"Processando jogador {i + 1}/{total_jogadores}: {player_summary['DISPLAY_FIRST_LAST']}...")
-        db_jogador = crud.get_jogador_by_api_id(db, api_id=player_summary['PERSON_ID'])
-        
+def sync_nba_players(db: Session, skip: int = 0, reiniciar: bool = False, shards: int = None, progresso: jobs.Progresso = None):
+    """
+    Sincroniza os jogadores da NBA de forma retomável.
+
+    A lista de jogadores da execução fica num checkpoint (tabela sync_checkpoints) e é
+    dividida em NBA_SYNC_SHARDS shards (jogadores:0, jogadores:1...), cada um com o próprio
+    checkpoint. Uma thread por shard busca os detalhes dos jogadores, todas no ritmo do
+    token bucket global do nba_client, cuja taxa se adapta aos 429 e timeouts da API;
+    assim a execução anda tão rápido quanto a API deixa, sem pausas fixas. A gravação fica
+    nesta thread: a cada NBA_SYNC_TAMANHO_LOTE jogadores de um shard, um único upsert junto
+    com o avanço do checkpoint do shard. Se a execução for interrompida (inclusive pelo
+    circuit breaker), a próxima chamada continua cada shard do primeiro jogador não gravado.
+
+    :param db: A sessão da base de dados.
+    :param skip: Começa uma nova execução a partir deste jogador, ignorando o checkpoint.
+    :param reiniciar: Descarta o checkpoint e começa uma nova execução do início.
+    :param shards: Número de shards de uma nova execução (padrão: NBA_SYNC_SHARDS). Uma
+        execução retomada mantém os shards com que começou.
+    :param progresso: Progresso do job; o cancelamento é atendido logo depois de gravar um lote.
+    """
+    progresso = progresso or jobs.Progresso()
+    checkpoint = crud.get_sync_checkpoint(db, CHECKPOINT_JOGADORES)
+    checkpoints_shards = []
+    if checkpoint and checkpoint.status == "em_andamento" and not reiniciar and not skip:
+        checkpoints_shards = crud.get_sync_checkpoints_shards(db, CHECKPOINT_JOGADORES)
+        print(f"Retomando a sincronização de jogadores ({len(checkpoint.itens)} jogadores)...")
+    else:
+        print("Buscando a lista completa de jogadores da API...")
         try:
-            player_info_df = None
-            for attempt in range(max_retries):
-                try:
-                    # A pausa inicial antes de cada tentativa
-                    time.sleep(1.5 + attempt)
+            player_data = nba_client.chamar(commonallplayers.CommonAllPlayers, is_only_current_season=1).get_data_frames()[0]
+            print(f" -> Lista de {len(player_data)} jogadores recebida com sucesso!")
+        except Exception as e:
+            print(f"ERRO CRÍTICO: Não foi possível buscar a lista de jogadores da NBA. Sincronização abortada. Erro: {e}")
+            return {"total_sincronizado": 0, "novos_adicionados": 0, "jogadores_processados": 0}
 
-                    player_info_df = commonplayerinfo.CommonPlayerInfo(
-                        player_id=player_summary['PERSON_ID'],
-                        timeout=60
-                    ).get_data_frames()
-                    break
-                except Exception as e:
-                    if attempt < max_retries - 1:
-                        # Implementação do recuo exponencial
-                        wait_time = 2 ** attempt  # 1, 2, 4, 8, 16 segundos...
-                        print(f"  -> Tentativa {attempt + 1} falhou. A aguardar {wait_time}s antes de tentar novamente... Erro: {e}")
-                        time.sleep(wait_time)
-                    else:
-                        print(f"ERRO FINAL após {max_retries} tentativas para o jogador ID {player_summary['PERSON_ID']}. A avançar...")
-                        raise e
+        itens = [
+            {"id": int(row.PERSON_ID), "nome": row.DISPLAY_FIRST_LAST, "time": int(row.TEAM_ID)}
+            for row in player_data.itertuples(index=False)
+        ]
+        checkpoint = crud.iniciar_sync_checkpoint(db, CHECKPOINT_JOGADORES, itens, posicao=skip)
+        print(f"Iniciando a sincronização de jogadores da NBA (a começar do jogador #{checkpoint.posicao + 1})...")
+
+    if not checkpoints_shards:
+        # Distribuição intercalada: cada shard fica com jogadores de todos os times
+        restantes = checkpoint.itens[checkpoint.posicao:]
+        quantidade = max(1, min(shards or settings.NBA_SYNC_SHARDS, len(restantes)))
+        checkpoints_shards = crud.iniciar_sync_shards(
+            db, CHECKPOINT_JOGADORES, [restantes[i::quantidade] for i in range(quantidade)]
+        )
 
-            if not player_info_df or player_info_df[0].empty:
-                print(f"  -> Não foram encontrados detalhes para o jogador. A avançar.")
+    total_jogadores = len(checkpoint.itens)
+    estados = [
+        {"checkpoint": cp, "posicao": cp.posicao, "gravada": cp.posicao, "lote": [],
+         "contagem": {"novos": cp.novos, "atualizados": cp.atualizados}}
+        for cp in checkpoints_shards
+    ]
+    ja_processados = checkpoint.posicao + sum(estado["posicao"] for estado in estados)
+    progresso.definir_total(total_jogadores)
+    progresso.avancar(ja_processados)
+
+    # Um SELECT para cada mapa, em vez de duas consultas por jogador
+    jogadores_por_api_id = crud.get_mapa_api_ids(db, models.Jogador)
+    times_por_api_id = crud.get_mapa_api_ids(db, models.Time)
+    slugs = crud.get_slugs_jogadores(db)
+
+    tamanho_lote = settings.NBA_SYNC_TAMANHO_LOTE
+    saida = queue.Queue()
+    parar = threading.Event()
+    circuito_aberto = threading.Event()
+    threads = [
+        threading.Thread(target=_buscar_shard, name=f"sync-jogadores-{i}", daemon=True,
+                         args=(i, estado["checkpoint"].itens, estado["posicao"], saida, parar, circuito_aberto))
+        for i, estado in enumerate(estados) if estado["checkpoint"].status != "concluido"
+    ]
+    print(f"{total_jogadores - ja_processados} jogadores a processar em {len(threads)} shard(s).")
+    for thread in threads:
+        thread.start()
+
+    def gravar(estado):
+        concluido = estado["posicao"] >= len(estado["checkpoint"].itens)
+        _gravar_lote_jogadores(db, estado["checkpoint"], estado["lote"], estado["posicao"], estado["contagem"], concluido=concluido)
+        estado["lote"] = []
+        estado["gravada"] = estado["posicao"]
+
+    ativos = len(threads)
+    try:
+        while ativos:
+            indice, posicao, item, player_info_df, erro = saida.get()
+            if posicao is None:
+                ativos -= 1
                 continue
-            
-            details = player_info_df[0].iloc[0]
-            data_nascimento_str = details.get('BIRTHDATE')
-            data_nascimento = datetime.strptime(data_nascimento_str, '%Y-%m-%dT%H:%M:%S').date() if data_nascimento_str else None
-            anos_experiencia = details.get('SEASON_EXP')
-            draft_year_str = details.get('DRAFT_YEAR')
-            ano_draft = int(draft_year_str) if draft_year_str and draft_year_str != 'Undrafted' else None
-            posicao = details.get('POSITION')
-            numero_camisa_str = details.get('JERSEY')
-            numero_camisa = int(numero_camisa_str) if numero_camisa_str and numero_camisa_str.isdigit() else None
-            altura_cm = _convert_height_to_cm(details.get('HEIGHT'))
-            peso_kg = _convert_weight_to_kg(details.get('WEIGHT'))
-            nacionalidade = details.get('COUNTRY')
-
-            if not db_jogador:
-                time_local = crud.get_time_by_api_id(db, api_id=player_summary['TEAM_ID'])
-                if time_local:
-                    print(f"  -> Adicionando novo jogador ao banco de dados.")
-                    foto_url = f"https://ak-static.cms.nba.com/wp-content/uploads/headshots/nba/latest/260x190/{player_summary['PERSON_ID']}.png"
-                    
-                    db_jogador = crud.create_jogador_com_details(db, jogador=schemas.JogadorCreateComDetails(
-                        api_id=player_summary['PERSON_ID'],
-                        nome=player_summary['DISPLAY_FIRST_LAST'],
-                        nome_normalizado=player_summary['DISPLAY_FIRST_LAST'].lower(),
-                        time_atual_id=time_local.id,
-                        foto_url=foto_url,
-                        posicao=posicao,
-                        numero_camisa=numero_camisa,
-                        data_nascimento=data_nascimento,
-                        ano_draft=ano_draft,
-                        anos_experiencia=anos_experiencia,
-                        altura=altura_cm,
-                        peso=peso_kg,
-                        nacionalidade=nacionalidade
-                    ))
-                    jogadores_adicionados += 1
-            else:
-                print(f"  -> Atualizando jogador no banco de dados.")
-                crud.update_jogador_details(
-                    db,
-                    jogador_id=db_jogador.id,
-                    posicao=posicao,
-                    numero_camisa=numero_camisa,
-                    data_nascimento=data_nascimento,
-                    ano_draft=ano_draft,
-                    anos_experiencia=anos_experiencia,
-                    altura=altura_cm,
-                    peso=peso_kg,
-                    nacionalidade=nacionalidade
-                )
-                jogadores_atualizados += 1
-            
-            jogadores_processados_nesta_execucao += 1
+            estado = estados[indice]
+            estado["posicao"] = posicao
+            contagem = estado["contagem"]
+            if erro is not None:
+                print(f"ERRO ao processar jogador ID {item['id']}: {erro}. A avançar para o próximo.")
+                progresso.erro_item(f"Jogador {item['id']} ({item['nome']}): {erro}")
+            elif not player_info_df or player_info_df[0].empty:
+                print(f"  -> Não foram encontrados detalhes para o jogador {item['nome']}. A avançar.")
+            elif item["id"] in jogadores_por_api_id:
+                estado["lote"].append((_linha_jogador(item, player_info_df[0].iloc[0], None, None), False))
+                contagem["atualizados"] += 1
+            elif item["time"] in times_por_api_id:
+                slug = generate_slug(item["nome"].lower())
+                if slug in slugs:
+                    slug = f"{slug}-{item['id']}"
+                slugs.add(slug)
+                linha = _linha_jogador(item, player_info_df[0].iloc[0], times_por_api_id[item["time"]], slug)
+                estado["lote"].append((linha, True))
+                jogadores_por_api_id[item["id"]] = None  # Já está no lote; o id sai no commit
+                contagem["novos"] += 1
+            progresso.avancar()
 
-        except Exception as e:
-            print(f"ERRO ao processar jogador ID {player_summary['PERSON_ID']}: {e}. A avançar para o próximo.")
-            continue
+            if posicao - estado["gravada"] >= tamanho_lote or posicao >= len(estado["checkpoint"].itens):
+                gravar(estado)
+                print(f"  -> Lote do shard {indice} gravado ({posicao}/{len(estado['checkpoint'].itens)}).")
+                progresso.checar()
+    finally:
+        parar.set()
+        for estado in estados:
+            if estado["posicao"] > estado["gravada"]:
+                gravar(estado)
+        for thread in threads:
+            thread.join(timeout=5)
 
-    print(f"\nSincronização COMPLETA terminada. {jogadores_adicionados} novos jogadores adicionados, {jogadores_atualizados} atualizados.")
-    return {"total_sincronizado": total_jogadores, "novos_adicionados": jogadores_adicionados, "jogadores_processados": jogadores_processados_nesta_execucao}
+    processados = checkpoint.posicao + sum(estado["posicao"] for estado in estados) - ja_processados
+    novos = checkpoint.novos + sum(estado["contagem"]["novos"] for estado in estados)
+    atualizados = checkpoint.atualizados + sum(estado["contagem"]["atualizados"] for estado in estados)
+    interrompido = any(estado["checkpoint"].status != "concluido" for estado in estados)
+    if not interrompido:
+        crud.avancar_sync_checkpoint(db, checkpoint, total_jogadores, novos, atualizados, concluido=True)
+        db.commit()
+        print(f"\nSincronização COMPLETA terminada. {novos} novos jogadores adicionados, {atualizados} atualizados.")
+    else:
+        print(f"\nSincronização de jogadores interrompida: {processados} jogadores processados nesta execução; "
+              f"a próxima continua de onde parou.")
+    return {
+        "total_sincronizado": total_jogadores,
+        "novos_adicionados": novos,
+        "jogadores_processados": processados,
+        "interrompido": interrompido,
+        "shards": len(estados),
+    }
 
 def safe_int(value):
     """Safely converts a value to an integer, handling None and NaN."""
@@ -159,12 +261,15 @@ def safe_int(value):
         return 0
     return int(value)
 
-def sync_nba_teams(db: Session):
+def sync_nba_teams(db: Session, progresso: jobs.Progresso = None):
+    progresso = progresso or jobs.Progresso()
     print("Iniciando a sincronização de times da NBA...")
     nba_teams = teams.get_teams()
     times_adicionados = 0
     liga_nba_id = 1
+    progresso.definir_total(len(nba_teams))
     for team_data in nba_teams:
+        progresso.checar()
         time_existente = crud.get_time_by_api_id(db, api_id=team_data['id'])
         if not time_existente:
             print(f"Adicionando novo time: {team_data['full_name']}")
@@ -179,12 +284,21 @@ def sync_nba_teams(db: Session):
             )
             crud.create_time(db=db, time=novo_time)
             times_adicionados += 1
+        progresso.avancar()
     print(f"Sincronização concluída. {times_adicionados} novos times adicionados.")
     return {"total_sincronizado": len(nba_teams), "novos_adicionados": times_adicionados}
 
-def sync_nba_games_v2(db: Session, season: str):
+def _gravar_box_score(db: Session, db_jogo: models.Jogo, game_id, mapa_jogadores: dict) -> int:
+    """Busca o box score do jogo e grava as estatísticas dos jogadores conhecidos num único INSERT."""
+    linhas = nba_transformacoes.estatisticas_box_score(importador_temporada.buscar_box_score(game_id), mapa_jogadores)
+    return crud.create_estatisticas_jogo_em_lote(db, jogo_id=db_jogo.id, linhas=linhas)
+
+def sync_nba_games_v2(db: Session, season: str, progresso: jobs.Progresso = None):
     """
     NOVA versão que usa ScheduleLeagueV2 - método modernizado e mais confiável.
+    Os jogos finalizados são importados em pipeline (ver importador_temporada): busca
+    em paralelo limitada pelo token bucket, transformação por coluna e gravação em lote.
+    Pode ser executada de novo após uma interrupção: só os jogos ainda sem placar são buscados.
     """
     print(f"Iniciando a sincronização de jogos da temporada {season} (método modernizado)...")
     
@@ -197,144 +311,12 @@ def sync_nba_games_v2(db: Session, season: str):
             return {"total_sincronizado": 0, "novos_adicionados": 0}
         
         print(f"Total de jogos encontrados na API: {len(games_df)}")
+        return importador_temporada.importar_temporada(db, season, games_df, progresso_job=progresso)
         
-        jogos_adicionados = 0
-        liga_nba_id = 1
-        
-        for _, game in games_df.iterrows():
-            try:
-                game_id = game.get('GAME_ID')
-                if not game_id:
-                    continue
-                    
-                db_jogo = crud.get_jogo_by_api_id(db, api_id=game_id)
-                
-                if not db_jogo:
-                    home_team_id = game.get('HOME_TEAM_ID')
-                    visitor_team_id = game.get('VISITOR_TEAM_ID')
-                    
-                    if not home_team_id or not visitor_team_id:
-                        continue
-                    
-                    time_casa_local = crud.get_time_by_api_id(db, api_id=home_team_id)
-                    time_visitante_local = crud.get_time_by_api_id(db, api_id=visitor_team_id)
-                    
-                    if time_casa_local and time_visitante_local:
-                        game_date_str = game.get('GAME_DATE', '')
-                        if not game_date_str:
-                            continue
-                            
-                        game_date_naive = datetime.strptime(game_date_str, '%Y-%m-%d')
-                        game_date_aware = datetime.combine(game_date_naive, datetime.min.time(), tzinfo=timezone.utc)
-                        
-                        db_jogo = crud.create_jogo(db, jogo=schemas.JogoCreate(
-                            api_id=game_id,
-                            data_jogo=game_date_aware,
-                            temporada=season,
-                            liga_id=liga_nba_id,
-                            time_casa_id=time_casa_local.id,
-                            time_visitante_id=time_visitante_local.id,
-                        ))
-                        jogos_adicionados += 1
-                
-                # Atualiza estatísticas se o jogo já terminou
-                if (db_jogo and 
-                    db_jogo.data_jogo < datetime.now(timezone.utc) and 
-                    db_jogo.placar_casa == 0 and
-                    game.get('GAME_STATUS_ID', 1) == 3):  # Status 3 = Final
-                    
-                    try:
-                        print(f"Atualizando estatísticas do jogo finalizado ID: {game_id}")
-                        time.sleep(0.6)
-                        
-                        # Usa ScheduleLeagueV2 data se disponível
-                        home_score = game.get('HOME_TEAM_SCORE', 0)
-                        away_score = game.get('AWAY_TEAM_SCORE', 0)
-                        
-                        if home_score > 0 or away_score > 0:
-                            # Atualiza placar direto do ScheduleLeagueV2
-                            crud.update_jogo_scores(
-                                db,
-                                jogo_id=db_jogo.id,
-                                placar_casa=safe_int(home_score),
-                                placar_visitante=safe_int(away_score),
-                                status="Final",
-                            )
-                        else:
-                            # Fallback para BoxScoreSummaryV2 se placar não estiver disponível
-                            summary_df = boxscoresummaryv2.BoxScoreSummaryV2(game_id=game_id, timeout=60).get_data_frames()
-                            
-                            if summary_df and len(summary_df) > 5 and not summary_df[0].empty and not summary_df[5].empty:
-                                game_summary = summary_df[0].iloc[0]
-                                line_score = summary_df[5]
-                                
-                                placar_casa = safe_int(line_score[line_score['TEAM_ID'] == db_jogo.time_casa.api_id]['PTS'].iloc[0])
-                                placar_visitante = safe_int(line_score[line_score['TEAM_ID'] == db_jogo.time_visitante.api_id]['PTS'].iloc[0])
-                                status_final = game_summary['GAME_STATUS_TEXT']
-                                
-                                crud.update_jogo_scores(
-                                    db,
-                                    jogo_id=db_jogo.id,
-                                    placar_casa=placar_casa,
-                                    placar_visitante=placar_visitante,
-                                    status=status_final,
-                                )
-                        
-                        # Busca estatísticas dos jogadores (usa método modernizado)
-                        player_stats_df = None
-                        try:
-                            player_stats_df = boxscoretraditionalv3.BoxScoreTraditionalV3(
-                                game_id=game_id,
-                                start_period=1,
-                                end_period=10,
-                                start_range=0,
-                                end_range=0,
-                                range_type=0,
-                                timeout=60
-                            ).get_data_frames()[0]
-                            print(f"    -> Usando BoxScoreTraditionalV3 para jogo {game_id}")
-                        except Exception as v3_error:
-                            print(f"    -> BoxScoreTraditionalV3 falhou, usando V2: {v3_error}")
-                            player_stats_df = boxscoretraditionalv2.BoxScoreTraditionalV2(game_id=game_id, timeout=60).get_data_frames()[0]
-                        
-                        # Processa estatísticas dos jogadores
-                        for index, p_stat in player_stats_df.iterrows():
-                            player_id = p_stat.get('PLAYER_ID') or p_stat.get('personId')
-                            if not player_id:
-                                continue
-                                
-                            db_player = crud.get_jogador_by_api_id(db, api_id=player_id)
-                            if db_player and not crud.get_estatistica(db, jogo_id=db_jogo.id, jogador_id=db_player.id):
-                                minutos_decimais = 0.0
-                                minutos_str = p_stat.get('MIN') or p_stat.get('minutes')
-                                if isinstance(minutos_str, str) and ':' in minutos_str:
-                                    minutos, segundos = map(int, minutos_str.split(':'))
-                                    minutos_decimais = round(minutos + segundos / 60.0, 2)
-                                
-                                pontos = p_stat.get('PTS') or p_stat.get('points')
-                                rebotes = p_stat.get('REB') or p_stat.get('reboundsTotal')
-                                assistencias = p_stat.get('AST') or p_stat.get('assists')
-                                
-                                nova_stat = schemas.EstatisticaCreate(
-                                    jogador_id=db_player.id,
-                                    minutos_jogados=minutos_decimais,
-                                    pontos=safe_int(pontos),
-                                    rebotes=safe_int(rebotes),
-                                    assistencias=safe_int(assistencias)
-                                )
-                                crud.create_estatistica_jogo(db, estatistica=nova_stat, jogo_id=db_jogo.id)
-                    
-                    except Exception as e:
-                        print(f"Erro ao buscar detalhes do jogo ID {game_id}: {e}")
-                        
-            except Exception as game_error:
-                print(f"Erro ao processar jogo: {game_error}")
-                continue
-        
-        print(f"Sincronização concluída (método modernizado). {jogos_adicionados} novos jogos adicionados.")
-        return {"total_sincronizado": len(games_df), "novos_adicionados": jogos_adicionados}
-        
+    except jobs.JobCancelado:
+        raise
     except Exception as e:
+        db.rollback()
         print(f"Erro na sincronização de jogos (método modernizado): {e}")
         print("Tentando método legacy...")
         return sync_nba_games(db, season)
@@ -346,13 +328,14 @@ def sync_nba_games(db: Session, season: str):
     """
     print(f"Iniciando a sincronização de jogos da temporada {season} (método legacy)...")
     
-    game_finder = leaguegamefinder.LeagueGameFinder(season_nullable=season, timeout=60)
+    game_finder = nba_client.chamar(leaguegamefinder.LeagueGameFinder, season_nullable=season)
     games_df = game_finder.get_data_frames()[0]
     
     print(f"Total de registros de jogos encontrados na API: {len(games_df)}")
 
     jogos_adicionados = 0
     liga_nba_id = 1
+    mapa_jogadores = crud.get_mapa_api_ids(db, models.Jogador)
     
     unique_game_ids = games_df['GAME_ID'].dropna().unique()
 
@@ -389,10 +372,7 @@ def sync_nba_games(db: Session, season: str):
         if db_jogo and db_jogo.data_jogo < datetime.now(timezone.utc) and db_jogo.placar_casa == 0:
             try:
                 print(f"Buscando detalhes do jogo finalizado ID: {game_id}")
-                time.sleep(0.6)
-                
-                timeout_individual = 60
-                summary_df = boxscoresummaryv2.BoxScoreSummaryV2(game_id=game_id, timeout=timeout_individual).get_data_frames()
+                summary_df = nba_client.chamar(boxscoresummaryv2.BoxScoreSummaryV2, game_id=game_id).get_data_frames()
                 
                 if not summary_df or summary_df[0].empty or summary_df[5].empty:
                     print(f"Dados insuficientes do boxscore para o jogo ID {game_id}")
@@ -413,52 +393,7 @@ def sync_nba_games(db: Session, season: str):
                     status=status_final,
                 )
                 
-                # Tenta usar BoxScoreTraditionalV3 primeiro (mais moderno)
-                player_stats_df = None
-                try:
-                    player_stats_df = boxscoretraditionalv3.BoxScoreTraditionalV3(
-                        game_id=game_id,
-                        start_period=1,
-                        end_period=10,
-                        start_range=0,
-                        end_range=0,
-                        range_type=0,
-                        timeout=timeout_individual
-                    ).get_data_frames()[0]
-                    print(f"    -> Usando BoxScoreTraditionalV3 para jogo {game_id}")
-                except Exception as v3_error:
-                    print(f"    -> BoxScoreTraditionalV3 falhou, usando V2: {v3_error}")
-                    player_stats_df = boxscoretraditionalv2.BoxScoreTraditionalV2(game_id=game_id, timeout=timeout_individual).get_data_frames()[0]
-                
-                for index, p_stat in player_stats_df.iterrows():
-                    # Compatibilidade entre V2 e V3
-                    player_id = p_stat.get('PLAYER_ID') or p_stat.get('personId')
-                    if not player_id:
-                        continue
-                        
-                    db_player = crud.get_jogador_by_api_id(db, api_id=player_id)
-                    if db_player and not crud.get_estatistica(db, jogo_id=db_jogo.id, jogador_id=db_player.id):
-                        minutos_decimais = 0.0
-                        
-                        # V3 usa 'minutes', V2 usa 'MIN'
-                        minutos_str = p_stat.get('MIN') or p_stat.get('minutes')
-                        if isinstance(minutos_str, str) and ':' in minutos_str:
-                            minutos, segundos = map(int, minutos_str.split(':'))
-                            minutos_decimais = round(minutos + segundos / 60.0, 2)
-                        
-                        # V3 usa 'points', V2 usa 'PTS'
-                        pontos = p_stat.get('PTS') or p_stat.get('points')
-                        rebotes = p_stat.get('REB') or p_stat.get('reboundsTotal')
-                        assistencias = p_stat.get('AST') or p_stat.get('assists')
-                        
-                        nova_stat = schemas.EstatisticaCreate(
-                            jogador_id=db_player.id,
-                            minutos_jogados=minutos_decimais,
-                            pontos=safe_int(pontos),
-                            rebotes=safe_int(rebotes),
-                            assistencias=safe_int(assistencias)
-                        )
-                        crud.create_estatistica_jogo(db, estatistica=nova_stat, jogo_id=db_jogo.id)
+                _gravar_box_score(db, db_jogo, game_id, mapa_jogadores)
             except Exception as e:
                 print(f"Erro ao buscar detalhes do jogo ID {game_id}: {e}")
 
@@ -483,7 +418,8 @@ def _get_games_from_schedule_v2(season: str = None, silent_fail: bool = False):
             print(f"    -> Buscando jogos via ScheduleLeagueV2 para temporada {season}...")
         
         # Usa o novo endpoint ScheduleLeagueV2
-        schedule = scheduleleaguev2.ScheduleLeagueV2(
+        schedule = nba_client.chamar(
+            scheduleleaguev2.ScheduleLeagueV2,
             league_id="00",  # NBA
             season=season,
             timeout=30
@@ -561,7 +497,8 @@ def _get_scoreboard_data_safely(date_str: str):
             season = f"{date_obj.year - 1}-{str(date_obj.year)[-2:]}"
         
         # Busca jogos da temporada
-        game_finder = leaguegamefinder.LeagueGameFinder(
+        game_finder = nba_client.chamar(
+            leaguegamefinder.LeagueGameFinder,
             season_nullable=season,
             timeout=30
         )
@@ -641,7 +578,7 @@ def _get_scoreboard_data_safely(date_str: str):
     
     # MÉTODO ORIGINAL (mantido como fallback, mas provavelmente falhará)
     try:
-        daily_scoreboard = scoreboardv2.ScoreboardV2(game_date=date_str, timeout=30)
+        daily_scoreboard = nba_client.chamar(scoreboardv2.ScoreboardV2, game_date=date_str, timeout=30)
         
         try:
             raw_data = daily_scoreboard.get_dict()
@@ -824,10 +761,7 @@ def _get_future_games_from_league_finder(db: Session, days_ahead: int = 30, sile
             print(f"Buscando jogos da temporada {season}...")
         
         # Busca todos os jogos da temporada
-        game_finder = leaguegamefinder.LeagueGameFinder(
-            season_nullable=season,
-            timeout=60
-        )
+        game_finder = nba_client.chamar(leaguegamefinder.LeagueGameFinder, season_nullable=season)
         all_games = game_finder.get_data_frames()[0]
         
         if all_games.empty:
@@ -977,7 +911,6 @@ def sync_future_games(db: Session, days_ahead: int = 30, silent_fail: bool = Fal
         
         try:
             games_df = _get_scoreboard_data_safely(date_str)
-            time.sleep(0.6)
 
             if games_df is None or games_df.empty:
                 consecutive_errors += 1
@@ -1105,6 +1038,34 @@ def try_sync_future_games_startup(db: Session):
         print(f"Sincronização silenciosa de jogos futuros falhou: {e}")
         return {"total_sincronizado": 0, "novos_adicionados": 0}
 
+def _temporada_premio(season) -> str:
+    season_str = str(season)
+    if '-' in season_str:
+        # Se já estiver no formato "2018-19", usa diretamente
+        return season_str
+    # Se estiver no formato "2023", formata para "2023-24"
+    ano = int(season_str)
+    return f"{ano}-{str(ano+1)[-2:]}"
+
+def _buscar_premios(api_id: int) -> list:
+    """Prémios do jogador na API como pares (descrição, temporada), sem repetições e ordenados."""
+    awards_endpoint = nba_client.chamar(playerawards.PlayerAwards, player_id=api_id)
+    awards_df = awards_endpoint.get_data_frames()[0]
+    return sorted({
+        (str(award['DESCRIPTION']), _temporada_premio(award['SEASON']))
+        for _, award in awards_df.iterrows()
+    })
+
+def _hash_premios(premios: list) -> str:
+    # A API de estatísticas da NBA não devolve ETag; o hash do payload normalizado faz esse papel
+    return hashlib.sha256(json.dumps(premios, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def _linhas_premios(jogador_id: int, premios: list) -> list:
+    return [
+        {"jogador_id": jogador_id, "nome_conquista": nome, "temporada": temporada}
+        for nome, temporada in premios
+    ]
+
 def sync_player_awards(db: Session, jogador_id: int):
     """
     Busca os prémios (All-Star, MVP, etc.) de um jogador específico e salva-os no banco de dados.
@@ -1116,58 +1077,82 @@ def sync_player_awards(db: Session, jogador_id: int):
 
     print(f"Buscando prémios para {db_jogador.nome} (API ID: {db_jogador.api_id})...")
     try:
-        time.sleep(1.1) # Aumentar a pausa para segurança
-        awards_endpoint = playerawards.PlayerAwards(player_id=db_jogador.api_id, timeout=60)
-        awards_df = awards_endpoint.get_data_frames()[0]
-        
-        premios_adicionados = 0
-        for index, award in awards_df.iterrows():
-            season_str = str(award['SEASON'])
-            temporada_formatada = ""
-            if '-' in season_str:
-                # Se já estiver no formato "2018-19", usa diretamente
-                temporada_formatada = season_str
-            else:
-                # Se estiver no formato "2023", formata para "2023-24"
-                ano = int(season_str)
-                temporada_formatada = f"{ano}-{str(ano+1)[-2:]}"
-
-            # Usamos uma função get_or_create para ser mais robusto
-            crud.add_conquista_jogador(
-                db=db,
-                jogador_id=db_jogador.id,
-                nome_conquista=award['DESCRIPTION'],
-                temporada=temporada_formatada
-            )
-            premios_adicionados += 1
-
-        print(f" -> {len(awards_df)} prémios encontrados e sincronizados para {db_jogador.nome}.")
-        return {"novos_premios_adicionados": premios_adicionados}
-
+        premios = _buscar_premios(db_jogador.api_id)
     except Exception as e:
         print(f"Erro ao buscar prémios para o jogador ID {db_jogador.api_id}: {e}")
-        return {"novos_premios_adicionados": 0}
-    
-def sync_all_players_awards(db: Session):
+        return {"novos_premios_adicionados": 0, "erro": str(e)}
+
+    estado = {"jogador_id": db_jogador.id, "payload_hash": _hash_premios(premios), "total_premios": len(premios)}
+    premios_adicionados = crud.salvar_premios_jogadores(db, _linhas_premios(db_jogador.id, premios), [estado])
+    db.commit()
+    print(f" -> {len(premios)} prémios encontrados para {db_jogador.nome}, {premios_adicionados} novos.")
+    return {"novos_premios_adicionados": premios_adicionados}
+
+def sync_all_players_awards(db: Session, limit: Optional[int] = None, progresso: jobs.Progresso = None):
     """
-    Percorre TODOS os jogadores no banco de dados e busca os seus prémios.
-    Este é um processo LONGO e que consome muitos recursos da API.
+    Sincronização incremental dos prémios: consulta primeiro quem jogou recentemente e
+    os jogadores ativos, e só reconsulta os demais de tempos em tempos
+    (crud.get_jogadores_para_sync_premios). Quem tem o mesmo payload da última consulta
+    só tem a data de verificação atualizada; os prémios dos outros entram em lotes de
+    NBA_SYNC_TAMANHO_LOTE jogadores, numa transação por lote junto com o hash novo.
     """
-    todos_jogadores = crud.get_jogadores(db, limit=6000) # Busca todos os jogadores
+    progresso = progresso or jobs.Progresso()
+    jogadores = crud.get_jogadores_para_sync_premios(db, limit=limit)
     total_premios_adicionados = 0
-    
-    print(f"Iniciando sincronização de prémios para {len(todos_jogadores)} jogadores...")
+    inalterados = 0
+    conquistas, estados = [], []
+
+    def gravar_lote():
+        nonlocal total_premios_adicionados
+        if estados:
+            total_premios_adicionados += crud.salvar_premios_jogadores(db, conquistas, estados)
+            db.commit()
+            conquistas.clear()
+            estados.clear()
+        progresso.checar()
 
-    for i, jogador in enumerate(todos_jogadores):
-        print(f"({i+1}/{len(todos_jogadores)}) Sincronizando prémios para: {jogador.nome}")
-        if jogador.api_id:
-            resultado = sync_player_awards(db, jogador_id=jogador.id)
-            total_premios_adicionados += resultado.get("novos_premios_adicionados", 0)
+    print(f"Iniciando sincronização de prémios para {len(jogadores)} jogadores...")
+    progresso.definir_total(len(jogadores))
+
+    for i, jogador in enumerate(jogadores):
+        print(f"({i+1}/{len(jogadores)}) Sincronizando prémios para: {jogador.nome}")
+        try:
+            premios = _buscar_premios(jogador.api_id)
+        except Exception as e:
+            print(f"Erro ao buscar prémios para o jogador ID {jogador.api_id}: {e}")
+            progresso.erro_item(f"{jogador.nome}: {e}")
+            progresso.avancar()
+            continue
+
+        payload_hash = _hash_premios(premios)
+        if payload_hash == jogador.payload_hash:
+            inalterados += 1
         else:
-            print(f" -> Jogador {jogador.nome} sem API ID. A ignorar.")
+            conquistas.extend(_linhas_premios(jogador.id, premios))
+        estados.append({"jogador_id": jogador.id, "payload_hash": payload_hash, "total_premios": len(premios)})
+        progresso.avancar()
+        if len(estados) >= settings.NBA_SYNC_TAMANHO_LOTE:
+            gravar_lote()
+    gravar_lote()
+
+    print(f"\nSincronização de prémios concluída: {len(jogadores)} jogadores consultados, {inalterados} sem mudanças, "
+          f"{total_premios_adicionados} prémios novos.")
+    return {
+        "total_premios_sincronizados": total_premios_adicionados,
+        "jogadores_consultados": len(jogadores),
+        "jogadores_inalterados": inalterados,
+    }
 
-    print(f"\nSincronização de todos os prémios concluída. Total de prémios sincronizados nesta execução: {total_premios_adicionados}")
-    return {"total_premios_sincronizados": total_premios_adicionados}
+TITULO_NBA = "NBA Champion"
+
+def _buscar_titulos(api_id: int) -> list:
+    """Temporadas (ex: "2022-23") em que o time foi campeão, pelo TeamDetails."""
+    details_endpoint = nba_client.chamar(teamdetails.TeamDetails, team_id=api_id)
+    championships_df = details_endpoint.team_awards_championships.get_data_frame()
+    if championships_df.empty:
+        return []
+    anos = {int(ano) for ano in championships_df['YEARAWARDED']}
+    return [f"{ano-1}-{str(ano)[-2:]}" for ano in sorted(anos)]
 
 def sync_team_championships(db: Session, time_id: int):
     """
@@ -1179,103 +1164,116 @@ def sync_team_championships(db: Session, time_id: int):
 
     print(f"Buscando títulos para {db_time.nome} (API ID: {db_time.api_id})...")
     try:
-        time.sleep(1.1)
-        details_endpoint = teamdetails.TeamDetails(team_id=db_time.api_id, timeout=60)
-        championships_df = details_endpoint.team_awards_championships.get_data_frame()
-        
-        titulos_adicionados = 0
-        if not championships_df.empty:
-            for index, row in championships_df.iterrows():
-                ano = int(row['YEARAWARDED'])
-                temporada = f"{ano-1}-{str(ano)[-2:]}"
-                
-                resultado = crud.add_conquista_time(
-                    db=db,
-                    time_id=db_time.id,
-                    nome_conquista="NBA Champion",
-                    temporada=temporada
-                )
-                if resultado:
-                    titulos_adicionados += 1
-        
-        print(f" -> {titulos_adicionados} novos títulos adicionados para {db_time.nome}.")
-        return {"novos_titulos_adicionados": titulos_adicionados}
-
+        temporadas = _buscar_titulos(db_time.api_id)
     except Exception as e:
         print(f"Erro ao buscar títulos para o time ID {db_time.api_id}: {e}")
-        return {"novos_titulos_adicionados": 0}
-    
-def sync_all_teams_championships(db: Session):
+        return {"novos_titulos_adicionados": 0, "erro": str(e)}
+
+    novos = crud.salvar_conquistas_times(db, [
+        {"time_id": db_time.id, "nome_conquista": TITULO_NBA, "temporada": temporada} for temporada in temporadas
+    ])
+    db.commit()
+    print(f" -> {len(novos)} novos títulos adicionados para {db_time.nome}.")
+    return {"novos_titulos_adicionados": len(novos), "novas_temporadas": [temporada for _, temporada in novos]}
+
+def sync_all_teams_championships(db: Session, progresso: jobs.Progresso = None):
     """
-    Percorre TODOS os times no banco de dados e busca os seus títulos.
+    Busca os títulos de TODOS os times e grava tudo numa única transação.
+
+    As chamadas ao TeamDetails são feitas por NBA_IMPORT_WORKERS threads pelo
+    nba_client (o ritmo é o do token bucket global; as threads só sobrepõem a latência).
+    Nada é gravado antes de todas as respostas chegarem, então um cancelamento no meio
+    não deixa a sincronização pela metade. Retorna o diff: os títulos que entraram,
+    por time, e os times cuja busca falhou (os títulos deles ficam como estavam).
     """
-    todos_times = crud.get_times(db, limit=100)
-    total_titulos_adicionados = 0
-    
+    progresso = progresso or jobs.Progresso()
+    todos_times = [time_obj for time_obj in crud.get_times(db, limit=100) if time_obj.api_id]
+    nomes = {time_obj.id: time_obj.nome for time_obj in todos_times}
+
     print(f"Iniciando sincronização de títulos para {len(todos_times)} times...")
+    progresso.definir_total(len(todos_times))
 
-    for i, time_obj in enumerate(todos_times):
-        print(f"({i+1}/{len(todos_times)}) Sincronizando títulos para: {time_obj.nome}")
-        if time_obj.api_id:
-            resultado = sync_team_championships(db, time_id=time_obj.id)
-            total_titulos_adicionados += resultado.get("novos_titulos_adicionados", 0)
-        else:
-            print(f" -> Time {time_obj.nome} sem API ID. A ignorar.")
+    conquistas, falhas = [], []
+    executor = ThreadPoolExecutor(max_workers=settings.NBA_IMPORT_WORKERS, thread_name_prefix="titulos")
+    try:
+        buscas = {executor.submit(_buscar_titulos, time_obj.api_id): time_obj for time_obj in todos_times}
+        for busca in as_completed(buscas):
+            time_obj = buscas[busca]
+            try:
+                temporadas = busca.result()
+            except Exception as e:
+                print(f"Erro ao buscar títulos para o time ID {time_obj.api_id}: {e}")
+                progresso.erro_item(f"{time_obj.nome}: {e}")
+                falhas.append(time_obj.nome)
+            else:
+                conquistas.extend(
+                    {"time_id": time_obj.id, "nome_conquista": TITULO_NBA, "temporada": temporada} for temporada in temporadas
+                )
+            progresso.avancar()
+            progresso.checar()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    novos = crud.salvar_conquistas_times(db, conquistas)
+    db.commit()
 
-    print(f"\nSincronização de todos os títulos concluída. Total de títulos sincronizados nesta execução: {total_titulos_adicionados}")
-    return {"total_titulos_sincronizados": total_titulos_adicionados}
+    novos_por_time = {}
+    for time_id, temporada in sorted(novos, key=lambda novo: (nomes[novo[0]], novo[1])):
+        novos_por_time.setdefault(nomes[time_id], []).append(temporada)
+    print(f"\nSincronização de todos os títulos concluída: {len(conquistas)} títulos na API, {len(novos)} novos"
+          f"{f', {len(falhas)} times com erro' if falhas else ''}.")
+    return {
+        "total_titulos_sincronizados": len(novos),
+        "titulos_na_api": len(conquistas),
+        "novos": novos_por_time,
+        "times_com_erro": sorted(falhas),
+    }
 
 def sync_player_career_stats(db: Session, jogador_id: int):
     """
-    Busca e armazena as estatísticas de carreira de um jogador específico.
-    Para fins de demonstração, esta função apenas valida se o jogador existe
-    e se conseguimos acessar suas estatísticas da NBA API.
+    Busca as estatísticas de carreira de um jogador na API da NBA e substitui as linhas
+    dele em jogador_career_stats, numa única transação.
     """
     db_jogador = db.query(models.Jogador).filter(models.Jogador.id == jogador_id).first()
     if not db_jogador or not db_jogador.api_id:
         print(f"Jogador com ID local {jogador_id} não encontrado ou sem API ID.")
         return {"stats_sincronizadas": 0}
 
-    print(f"Validando acesso às estatísticas de carreira para {db_jogador.nome} (API ID: {db_jogador.api_id})...")
+    print(f"Sincronizando estatísticas de carreira para {db_jogador.nome} (API ID: {db_jogador.api_id})...")
     try:
-        # Usa a função que já criamos no CRUD
-        career_stats = crud.get_jogador_career_stats(db, jogador_slug=db_jogador.slug)
-        
-        if career_stats:
-            stats_count = len(career_stats)
-            print(f" -> {stats_count} temporadas de estatísticas encontradas para {db_jogador.nome}.")
-            print(f" -> Primeira temporada: {career_stats[0].temporada} - {career_stats[0].points:.1f} PPG")
-            return {"stats_sincronizadas": stats_count}
-        else:
-            print(f" -> Nenhuma estatística de carreira encontrada para {db_jogador.nome}.")
-            return {"stats_sincronizadas": 0}
-
+        career_stats = nba_client.chamar(playercareerstats.PlayerCareerStats, player_id=db_jogador.api_id)
+        linhas = nba_transformacoes.career_stats_por_jogo(career_stats.get_data_frames()[0])
     except Exception as e:
         print(f"Erro ao buscar estatísticas de carreira para o jogador ID {db_jogador.api_id}: {e}")
-        return {"stats_sincronizadas": 0}
+        return {"stats_sincronizadas": 0, "erro": str(e)}
 
-def sync_all_players_career_stats(db: Session, limit: int = 50):
+    # Mesmo sem linhas a gravação acontece: se a API não tem mais dados do jogador, os antigos saem.
+    total = crud.salvar_career_stats(db, jogador_id=db_jogador.id, linhas=linhas)
+    db.commit()
+    print(f" -> {total} temporadas de estatísticas gravadas para {db_jogador.nome}.")
+    return {"stats_sincronizadas": total}
+
+def sync_all_players_career_stats(db: Session, limit: int = 50, progresso: jobs.Progresso = None):
     """
-    Testa o acesso às estatísticas de carreira para vários jogadores.
-    Limitado a um número específico de jogadores para evitar sobrecarga da API.
+    Sincroniza as estatísticas de carreira de até `limit` jogadores, começando pelos que
+    nunca foram sincronizados e depois pelos de dados mais antigos. Rodando periodicamente,
+    percorre o elenco inteiro aos poucos sem sobrecarregar a API da NBA.
     """
-    jogadores = crud.get_jogadores(db, limit=limit)
-    total_stats_validadas = 0
+    progresso = progresso or jobs.Progresso()
+    jogadores = crud.get_jogadores_career_stats_mais_antigas(db, limit=limit)
+    total_stats = 0
     
-    print(f"Iniciando validação de estatísticas de carreira para {len(jogadores)} jogadores...")
+    print(f"Iniciando sincronização de estatísticas de carreira para {len(jogadores)} jogadores...")
+    progresso.definir_total(len(jogadores))
 
     for i, jogador in enumerate(jogadores):
-        print(f"({i+1}/{len(jogadores)}) Validando estatísticas para: {jogador.nome}")
-        if jogador.api_id:
-            resultado = sync_player_career_stats(db, jogador_id=jogador.id)
-            total_stats_validadas += resultado.get("stats_sincronizadas", 0)
-            
-            # Pausa entre jogadores para não sobrecarregar a API
-            if i < len(jogadores) - 1:  # Não pausa no último
-                time.sleep(1.5)
-        else:
-            print(f" -> Jogador {jogador.nome} sem API ID. A ignorar.")
-
-    print(f"\nValidação concluída. Total de temporadas de estatísticas validadas: {total_stats_validadas}")
-    return {"total_stats_validadas": total_stats_validadas}
+        progresso.checar()
+        print(f"({i+1}/{len(jogadores)}) Sincronizando estatísticas para: {jogador.nome}")
+        resultado = sync_player_career_stats(db, jogador_id=jogador.id)
+        total_stats += resultado.get("stats_sincronizadas", 0)
+        if "erro" in resultado:
+            progresso.erro_item(f"{jogador.nome}: {resultado['erro']}")
+        progresso.avancar()
 
+    print(f"\nSincronização concluída. Total de temporadas de estatísticas gravadas: {total_stats}")
+    return {"jogadores_sincronizados": len(jogadores), "total_stats_sincronizadas": total_stats}
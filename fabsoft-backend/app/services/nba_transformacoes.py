@@ -0,0 +1,140 @@
+"""
+Transformações dos DataFrames da API da NBA em linhas prontas para o banco.
+
+Tudo aqui opera por coluna (NumPy), sem iterrows() nem um modelo pydantic por
+linha: a divisão pelas partidas, a conversão de minutos "MM:SS" e a troca de
+NaN/None por zero são feitas de uma vez na coluna inteira. O resultado é uma lista
+de dicts (record batch) que vai direto para um INSERT em lote.
+
+Comparação com a versão linha a linha: python -m benchmarks.transformacoes
+"""
+import numpy as np
+import pandas as pd
+
+# Colunas do SeasonTotalsRegularSeason (PlayerCareerStats) -> campos de jogador_career_stats
+COLUNAS_CAREER_POR_JOGO = {
+    "MIN": "minutos_por_jogo",
+    "FGM": "field_goals_made",
+    "FGA": "field_goals_attempted",
+    "FG3M": "three_pointers_made",
+    "FG3A": "three_pointers_attempted",
+    "FTM": "free_throws_made",
+    "FTA": "free_throws_attempted",
+    "OREB": "rebounds_offensive",
+    "DREB": "rebounds_defensive",
+    "REB": "rebounds_total",
+    "AST": "assists",
+    "STL": "steals",
+    "BLK": "blocks",
+    "TOV": "turnovers",
+    "PF": "personal_fouls",
+    "PTS": "points",
+}
+COLUNAS_CAREER_PERCENTUAIS = {
+    "FG_PCT": "field_goal_percentage",
+    "FG3_PCT": "three_point_percentage",
+    "FT_PCT": "free_throw_percentage",
+}
+
+# Nomes das colunas do box score no V2 e no V3 -> campos de estatisticas_jogador_jogo
+COLUNAS_BOX_SCORE = {
+    "jogador_api_id": ("PLAYER_ID", "personId"),
+    "minutos": ("MIN", "minutes"),
+    "pontos": ("PTS", "points"),
+    "rebotes": ("REB", "reboundsTotal"),
+    "assistencias": ("AST", "assists"),
+}
+
+def matriz_numerica(df: pd.DataFrame, colunas: list) -> np.ndarray:
+    """
+    Matriz float com as `colunas` do DataFrame, na ordem pedida. Colunas ausentes (None ou
+    fora do DataFrame) e valores ausentes ou inválidos viram 0. O DataFrame é convertido
+    numa chamada só; o to_numeric por coluna fica para quando alguma coluna vem como texto.
+    """
+    posicoes = df.columns.get_indexer([coluna for coluna in colunas if coluna is not None])
+    destino = [i for i, coluna in enumerate(colunas) if coluna is not None]
+    presentes = posicoes >= 0
+    posicoes, destino = posicoes[presentes], np.asarray(destino, dtype=np.int64)[presentes]
+
+    matriz = np.full((len(df), len(colunas)), np.nan)
+    try:
+        matriz[:, destino] = df.to_numpy()[:, posicoes].astype(float)
+    except (TypeError, ValueError):
+        for i, posicao in zip(destino, posicoes):
+            matriz[:, i] = pd.to_numeric(df.iloc[:, posicao], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    return np.nan_to_num(matriz, nan=0.0, posinf=0.0, neginf=0.0)
+
+def minutos_decimais(serie: pd.Series) -> np.ndarray:
+    """
+    Minutos em texto para minutos decimais com duas casas. Aceita "34:12", o "34.000000:12"
+    que o V2 às vezes devolve e o ISO 8601 "PT34M12.00S" do V3. Outros valores viram 0.
+    """
+    texto = np.char.strip(serie.fillna("").to_numpy(dtype=str))
+    texto = np.char.rstrip(np.char.replace(np.char.replace(texto, "PT", ""), "M", ":"), "S")
+    partes = np.char.partition(texto, ":")
+    validos = (partes[:, 1] == ":") \
+        & np.char.isdigit(np.char.replace(partes[:, 0], ".", "", count=1)) \
+        & np.char.isdigit(np.char.replace(partes[:, 2], ".", "", count=1))
+    minutos = np.zeros(len(texto))
+    minutos[validos] = np.floor(partes[validos, 0].astype(float)) + partes[validos, 2].astype(float) / 60.0
+    return np.round(minutos, 2)
+
+def _nome_coluna(df: pd.DataFrame, nomes: tuple):
+    """A primeira coluna de `nomes` presente no DataFrame (compatibilidade V2/V3), ou None."""
+    for nome in nomes:
+        if nome in df.columns:
+            return nome
+    return None
+
+def career_stats_por_jogo(season_totals_df: pd.DataFrame) -> list:
+    """
+    Converte o SeasonTotalsRegularSeason do PlayerCareerStats em médias por jogo, na
+    ordem da API. Cada item tem os campos de schemas.JogadorCareerStats.
+    """
+    if season_totals_df is None or season_totals_df.empty:
+        return []
+    colunas = ["GP", *COLUNAS_CAREER_POR_JOGO, *COLUNAS_CAREER_PERCENTUAIS]
+    matriz = matriz_numerica(season_totals_df, colunas)
+    jogos = matriz[:, 0].astype(np.int64)
+    por_jogo = matriz[:, 1:1 + len(COLUNAS_CAREER_POR_JOGO)] / np.maximum(jogos, 1)[:, None]
+    percentuais = matriz[:, 1 + len(COLUNAS_CAREER_POR_JOGO):]
+
+    nomes = ["temporada", "team_abbreviation", "jogos_disputados",
+             *COLUNAS_CAREER_POR_JOGO.values(), *COLUNAS_CAREER_PERCENTUAIS.values()]
+    return [
+        dict(zip(nomes, (temporada, time, jogos_linha, *medias, *pcts)))
+        for temporada, time, jogos_linha, medias, pcts in zip(
+            season_totals_df["SEASON_ID"].astype(str).tolist(),
+            season_totals_df["TEAM_ABBREVIATION"].fillna("").astype(str).tolist(),
+            jogos.tolist(), por_jogo.tolist(), percentuais.tolist(),
+        )
+    ]
+
+def estatisticas_box_score(player_stats_df: pd.DataFrame, mapa_jogadores: dict) -> list:
+    """
+    Converte o box score (BoxScoreTraditionalV2 ou V3) em linhas de estatisticas_jogador_jogo.
+    `mapa_jogadores` é {api_id: id local}; jogadores fora do banco são descartados e,
+    se o box score repetir um jogador, vale a primeira linha.
+    """
+    if player_stats_df is None or player_stats_df.empty:
+        return []
+    nomes = {campo: _nome_coluna(player_stats_df, opcoes) for campo, opcoes in COLUNAS_BOX_SCORE.items()}
+    numeros = matriz_numerica(
+        player_stats_df, [nomes[campo] for campo in ("jogador_api_id", "pontos", "rebotes", "assistencias")]
+    ).astype(np.int64)
+    if nomes["minutos"] is None:
+        minutos = np.zeros(len(player_stats_df))
+    else:
+        minutos = minutos_decimais(player_stats_df[nomes["minutos"]])
+
+    linhas, vistos = [], set()
+    for (api_id, pontos, rebotes, assistencias), minutos_jogados in zip(numeros.tolist(), minutos.tolist()):
+        jogador_id = mapa_jogadores.get(api_id)
+        if jogador_id is None or jogador_id in vistos:
+            continue
+        vistos.add(jogador_id)
+        linhas.append({
+            "jogador_id": jogador_id, "minutos_jogados": minutos_jogados,
+            "pontos": pontos, "rebotes": rebotes, "assistencias": assistencias,
+        })
+    return linhas
@@ -0,0 +1,90 @@
+"""
+Limitador de taxa (token bucket) para as chamadas à API da NBA.
+
+O balde recebe `taxa` fichas por segundo, até no máximo `capacidade`. Cada
+requisição consome uma ficha; sem fichas, adquirir() dorme só o tempo que falta
+para a próxima. Assim as chamadas saem no ritmo permitido sem a pausa fixa
+antes de cada uma, e uma rajada curta é liberada quando o balde está cheio.
+"""
+import threading
+import time
+
+class TokenBucket:
+    def __init__(self, taxa: float, capacidade: int = 1):
+        if taxa <= 0 or capacidade < 1:
+            raise ValueError("taxa deve ser positiva e capacidade pelo menos 1")
+        self.taxa = taxa
+        self.capacidade = capacidade
+        self._fichas = float(capacidade)
+        self._ultima = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _repor(self, agora: float):
+        self._fichas = min(self.capacidade, self._fichas + (agora - self._ultima) * self.taxa)
+        self._ultima = agora
+
+    def adquirir(self, fichas: int = 1) -> float:
+        """Bloqueia até haver `fichas` disponíveis. Retorna quantos segundos esperou."""
+        esperado = 0.0
+        while True:
+            with self._lock:
+                self._repor(time.monotonic())
+                if self._fichas >= fichas:
+                    self._fichas -= fichas
+                    return esperado
+                espera = (fichas - self._fichas) / self.taxa
+            time.sleep(espera)
+            esperado += espera
+
+    def definir_taxa(self, taxa: float):
+        """Muda a taxa a partir de agora; as fichas acumuladas até aqui seguem a taxa anterior."""
+        with self._lock:
+            self._repor(time.monotonic())
+            self.taxa = taxa
+
+class TaxaAdaptativa:
+    """
+    Ajusta a taxa de um TokenBucket pelo que a API responde (AIMD): um 429 ou um
+    timeout corta a taxa por `fator_reducao` (até `minima`); cada `sucessos_para_subir`
+    sucessos seguidos somam `passo` req/s, até `maxima`. Falhas que chegam juntas (várias
+    threads esbarrando no mesmo limite) contam como uma redução só, dentro de
+    `intervalo_reducao` segundos.
+    """
+
+    def __init__(self, balde: TokenBucket, minima: float, maxima: float, passo: float,
+                 sucessos_para_subir: int, fator_reducao: float = 0.7, intervalo_reducao: float = 5.0):
+        self.balde = balde
+        self.minima = minima
+        self.maxima = maxima
+        self.passo = passo
+        self.sucessos_para_subir = sucessos_para_subir
+        self.fator_reducao = fator_reducao
+        self.intervalo_reducao = intervalo_reducao
+        self.reducoes = 0
+        self._sucessos = 0
+        self._ultima_reducao = None
+        self._lock = threading.Lock()
+
+    @property
+    def taxa(self) -> float:
+        return self.balde.taxa
+
+    def registrar_sucesso(self):
+        with self._lock:
+            self._sucessos += 1
+            if self._sucessos < self.sucessos_para_subir or self.balde.taxa >= self.maxima:
+                return
+            self._sucessos = 0
+            self.balde.definir_taxa(min(self.maxima, self.balde.taxa + self.passo))
+
+    def registrar_sobrecarga(self) -> bool:
+        """Um 429 ou timeout. Retorna True se a taxa foi reduzida agora."""
+        with self._lock:
+            self._sucessos = 0
+            agora = time.monotonic()
+            if self._ultima_reducao is not None and agora - self._ultima_reducao < self.intervalo_reducao:
+                return False
+            self._ultima_reducao = agora
+            self.reducoes += 1
+            self.balde.definir_taxa(max(self.minima, self.balde.taxa * self.fator_reducao))
+            return True
@@ -1,5 +1,8 @@
 import unicodedata
 import re
+import base64
+import json
+from datetime import datetime
 
 def generate_slug(text: str) -> str:
     """
@@ -23,4 +26,30 @@ def normalize_text(text: str) -> str:
     if not isinstance(text, str):
         return ""
     return ''.join(c for c in unicodedata.normalize('NFD', text)
-                   if unicodedata.category(c) != 'Mn').lower()
\ No newline at end of file
+                   if unicodedata.category(c) != 'Mn').lower()
+
+def encode_cursor(valor, id: int) -> str:
+    """
+    Gera um cursor opaco de paginação a partir da chave do último item da página
+    (ex: data_jogo e id). O cliente só repassa o valor na próxima requisição.
+    """
+    if isinstance(valor, datetime):
+        valor = {"dt": valor.isoformat()}
+    dados = json.dumps([valor, id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(dados).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Inverso de encode_cursor: devolve (valor, id).
+    Levanta ValueError se o cursor não foi gerado por encode_cursor.
+    """
+    try:
+        dados = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        valor, id = json.loads(dados)
+        if isinstance(valor, dict):
+            valor = datetime.fromisoformat(valor["dt"])
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Cursor inválido")
+    if not isinstance(id, int):
+        raise ValueError("Cursor inválido")
+    return valor, id
@@ -1,25 +1,178 @@
+import asyncio
+import json
+import time
 from fastapi import WebSocket
-from typing import Dict, List
+from typing import Dict, Optional
+from .config import settings
+
+# Código de fechamento para clientes que não acompanham o ritmo das mensagens (1013: Try Again Later)
+CODIGO_CLIENTE_LENTO = 1013
+
+class ConexaoDescartada(Exception):
+    """O gestor removeu o cliente (fila de envio cheia)."""
+
+class _Conexao:
+    """
+    Um cliente: a fila de envio limitada e a tarefa que a esvazia no socket. Streams
+    SSE não têm socket nem tarefa; a própria resposta consome a fila (proxima_mensagem).
+    """
+
+    def __init__(self, websocket: Optional[WebSocket], jogo_id: int):
+        self.websocket = websocket
+        self.jogo_id = jogo_id
+        self.fila: asyncio.Queue = asyncio.Queue(maxsize=settings.WS_FILA_ENVIO_TAMANHO)
+        self.tarefa: asyncio.Task = None
+
+    @property
+    def chave(self):
+        """Chave em active_connections: o socket ou, para streams, a própria conexão."""
+        return self.websocket if self.websocket is not None else self
+
+class _Metricas:
+    def __init__(self):
+        self._por_jogo = {}
+
+    def item(self, jogo_id: int) -> dict:
+        return self._por_jogo.setdefault(jogo_id, {
+            "conexoes": 0, "mensagens_enviadas": 0, "descartadas_lentas": 0, "desconectadas_erro": 0,
+            "latencia_media_ms": None, "latencia_max_ms": 0.0,
+        })
+
+    def latencia(self, jogo_id: int, segundos: float):
+        ms = segundos * 1000
+        item = self.item(jogo_id)
+        anterior = item["latencia_media_ms"]
+        # Média móvel exponencial para não guardar histórico
+        item["latencia_media_ms"] = round(ms if anterior is None else 0.9 * anterior + 0.1 * ms, 1)
+        item["latencia_max_ms"] = round(max(item["latencia_max_ms"], ms), 1)
+        item["mensagens_enviadas"] += 1
+
+    def remover(self, jogo_id: int):
+        self._por_jogo.pop(jogo_id, None)
+
+    def copia(self) -> dict:
+        return {jogo_id: dict(item) for jogo_id, item in self._por_jogo.items()}
 
 class ConnectionManager:
+    """
+    Conexões WebSocket (e streams SSE) por jogo. Cada mensagem é serializada uma vez
+    e colocada na fila de cada cliente; uma tarefa por cliente faz o envio, então um
+    cliente lento não atrasa os outros. Quem enche a fila é desconectado, e sockets que falham no
+    envio (ou passam de WS_ENVIO_TIMEOUT_SEGUNDOS) são removidos sozinhos.
+    """
+
     def __init__(self):
         # Dicionário para guardar conexões ativas por jogo_id
-        self.active_connections: Dict[int, List[WebSocket]] = {}
+        self.active_connections: Dict[int, Dict[WebSocket, _Conexao]] = {}
+        self._metricas = _Metricas()
+        self._fechamentos = set() # Referências às tarefas de close em andamento
 
     async def connect(self, websocket: WebSocket, jogo_id: int):
         await websocket.accept()
-        if jogo_id not in self.active_connections:
-            self.active_connections[jogo_id] = []
-        self.active_connections[jogo_id].append(websocket)
+        conexao = _Conexao(websocket, jogo_id)
+        self.active_connections.setdefault(jogo_id, {})[websocket] = conexao
+        self._metricas.item(jogo_id)["conexoes"] += 1
+        conexao.tarefa = asyncio.create_task(self._escrever(conexao))
+
+    def conectar_stream(self, jogo_id: int) -> _Conexao:
+        """Registra um cliente sem socket (SSE). A conexão devolvida é a chave para enviar/disconnect."""
+        conexao = _Conexao(None, jogo_id)
+        self.active_connections.setdefault(jogo_id, {})[conexao.chave] = conexao
+        self._metricas.item(jogo_id)["conexoes"] += 1
+        return conexao
 
-    def disconnect(self, websocket: WebSocket, jogo_id: int):
-        if jogo_id in self.active_connections:
-            self.active_connections[jogo_id].remove(websocket)
+    def disconnect(self, websocket, jogo_id: int):
+        """Remove o cliente (se ainda estiver registrado) e encerra a tarefa de envio dele."""
+        conexoes = self.active_connections.get(jogo_id)
+        conexao = conexoes.pop(websocket, None) if conexoes else None
+        if conexao is None:
+            return
+        if conexao.tarefa is not None and conexao.tarefa is not asyncio.current_task():
+            conexao.tarefa.cancel()
+        if conexoes:
+            self._metricas.item(jogo_id)["conexoes"] -= 1
+        else:
+            del self.active_connections[jogo_id]
+            self._metricas.remover(jogo_id)
 
     async def broadcast(self, message: dict, jogo_id: int):
-        if jogo_id in self.active_connections:
-            for connection in self.active_connections[jogo_id]:
-                await connection.send_json(message)
+        texto = self._serializar(message)
+        for conexao in list(self.active_connections.get(jogo_id, {}).values()):
+            self._enfileirar(conexao, texto, message.get("seq"))
+
+    async def enviar(self, websocket, jogo_id: int, message: dict):
+        """Envia para um único cliente, pela mesma fila (mantém a ordem em relação aos broadcasts)."""
+        conexao = self.active_connections.get(jogo_id, {}).get(websocket)
+        if conexao:
+            self._enfileirar(conexao, self._serializar(message), message.get("seq"))
+
+    async def proxima_mensagem(self, conexao: _Conexao, timeout: float):
+        """
+        Próxima mensagem de um stream como (id do evento, texto), ou None se nada chegar
+        em `timeout` segundos. Levanta ConexaoDescartada se o cliente foi removido.
+        """
+        try:
+            item = await asyncio.wait_for(conexao.fila.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        if item is None:
+            raise ConexaoDescartada()
+        texto, evento_id, enfileirada_em = item
+        self._metricas.latencia(conexao.jogo_id, time.monotonic() - enfileirada_em)
+        return evento_id, texto
+
+    def get_metricas(self) -> dict:
+        jogos = self._metricas.copia()
+        return {"conexoes": sum(item["conexoes"] for item in jogos.values()), "jogos": jogos}
+
+    # --- Envio ---
+
+    @staticmethod
+    def _serializar(message: dict) -> str:
+        # Mesmo formato do WebSocket.send_json, feito uma vez por mensagem em vez de uma por cliente
+        return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+    def _enfileirar(self, conexao: _Conexao, texto: str, evento_id=None):
+        try:
+            conexao.fila.put_nowait((texto, evento_id, time.monotonic()))
+        except asyncio.QueueFull:
+            print(f"Cliente lento no jogo {conexao.jogo_id}: fila de envio cheia, desconectando.")
+            self._metricas.item(conexao.jogo_id)["descartadas_lentas"] += 1
+            self._descartar(conexao, CODIGO_CLIENTE_LENTO, "Cliente lento")
+
+    async def _escrever(self, conexao: _Conexao):
+        while True:
+            texto, _, enfileirada_em = await conexao.fila.get()
+            try:
+                await asyncio.wait_for(conexao.websocket.send_text(texto), timeout=settings.WS_ENVIO_TIMEOUT_SEGUNDOS)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Erro ao enviar para um cliente do jogo {conexao.jogo_id}: {e!r}. Removendo conexão.")
+                self._metricas.item(conexao.jogo_id)["desconectadas_erro"] += 1
+                self._descartar(conexao)
+                return
+            self._metricas.latencia(conexao.jogo_id, time.monotonic() - enfileirada_em)
+
+    def _descartar(self, conexao: _Conexao, codigo: int = 1011, motivo: str = None):
+        self.disconnect(conexao.chave, conexao.jogo_id)
+        if conexao.websocket is None:
+            # Stream: troca o que estava pendente pelo aviso de fim, lido em proxima_mensagem
+            while not conexao.fila.empty():
+                conexao.fila.get_nowait()
+            conexao.fila.put_nowait(None)
+            return
+        # O close faz o receive_text do endpoint terminar, que então segue a limpeza normal
+        tarefa = asyncio.create_task(self._fechar(conexao.websocket, codigo, motivo))
+        self._fechamentos.add(tarefa)
+        tarefa.add_done_callback(self._fechamentos.discard)
+
+    @staticmethod
+    async def _fechar(websocket: WebSocket, codigo: int, motivo: str):
+        try:
+            await asyncio.wait_for(websocket.close(code=codigo, reason=motivo), timeout=settings.WS_ENVIO_TIMEOUT_SEGUNDOS)
+        except Exception:
+            pass # Socket já morto
 
 # Cria uma instância única do gestor para ser usada na aplicação
-manager = ConnectionManager()
\ No newline at end of file
+manager = ConnectionManager()
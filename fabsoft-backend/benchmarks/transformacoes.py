@@ -0,0 +1,205 @@
+"""
+Micro-benchmark da ingestão de box scores e estatísticas de carreira: a versão
+antiga, linha a linha (iterrows + um modelo pydantic e uma consulta por linha),
+contra a atual, por coluna (app/services/nba_transformacoes.py) com INSERT em lote.
+
+Os dados são sintéticos, com o formato do BoxScoreTraditionalV3 e do
+PlayerCareerStats, no volume de uma temporada completa (1230 jogos). Nada é
+buscado na API. A etapa com banco usa um SQLite em memória.
+
+Uso (na pasta fabsoft-backend, com o .env da aplicação):
+    python -m benchmarks.transformacoes
+    python -m benchmarks.transformacoes --jogos 1230 --jogos-banco 100 --jogadores 530
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app import crud, models, schemas
+from app.database import Base
+from app.services import nba_transformacoes
+from app.services.nba_importer import safe_int
+
+JOGADORES_POR_JOGO = 26
+
+# --- Dados sintéticos ---
+
+def gerar_box_scores(total_jogos: int, api_ids: np.ndarray, rng) -> list:
+    """Um DataFrame no formato do BoxScoreTraditionalV3 por jogo; ~15% de jogadores sem minutos (DNP)."""
+    box_scores = []
+    for _ in range(total_jogos):
+        n = JOGADORES_POR_JOGO
+        minutos = rng.integers(0, 48, n)
+        segundos = rng.integers(0, 60, n)
+        dnp = rng.random(n) < 0.15
+        box_scores.append(pd.DataFrame({
+            "personId": rng.choice(api_ids, n, replace=False),
+            "minutes": np.where(dnp, "", [f"{m}:{s:02d}" for m, s in zip(minutos, segundos)]),
+            "points": np.where(dnp, np.nan, rng.integers(0, 45, n)),
+            "reboundsTotal": np.where(dnp, np.nan, rng.integers(0, 18, n)),
+            "assists": np.where(dnp, np.nan, rng.integers(0, 15, n)),
+        }))
+    return box_scores
+
+def gerar_career_stats(total_jogadores: int, rng) -> list:
+    """Um DataFrame no formato do SeasonTotalsRegularSeason por jogador, com 1 a 18 temporadas."""
+    colunas_totais = ["MIN", "FGM", "FGA", "FG3M", "FG3A", "FTM", "FTA", "OREB", "DREB", "REB", "AST", "STL", "BLK", "TOV", "PF", "PTS"]
+    carreiras = []
+    for _ in range(total_jogadores):
+        n = int(rng.integers(1, 19))
+        df = pd.DataFrame({
+            "SEASON_ID": [f"{ano}-{(ano + 1) % 100:02d}" for ano in range(2024 - n, 2024)],
+            "TEAM_ABBREVIATION": rng.choice(["LAL", "BOS", "GSW", "MIA"], n),
+            "GP": rng.integers(0, 83, n),
+        })
+        for coluna in colunas_totais:
+            df[coluna] = rng.integers(0, 2500, n).astype(float)
+        for coluna in ["FG_PCT", "FG3_PCT", "FT_PCT"]:
+            df[coluna] = np.where(rng.random(n) < 0.05, np.nan, rng.random(n))
+        carreiras.append(df)
+    return carreiras
+
+# --- Versão antiga, linha a linha (como o nba_importer fazia) ---
+
+def _estatistica_da_linha(p_stat: pd.Series, jogador_id: int) -> schemas.EstatisticaCreate:
+    minutos_decimais = 0.0
+    minutos_str = p_stat.get('MIN') or p_stat.get('minutes')
+    if isinstance(minutos_str, str) and ':' in minutos_str:
+        minutos, segundos = map(int, minutos_str.split(':'))
+        minutos_decimais = round(minutos + segundos / 60.0, 2)
+    pontos = p_stat.get('PTS') or p_stat.get('points')
+    rebotes = p_stat.get('REB') or p_stat.get('reboundsTotal')
+    assistencias = p_stat.get('AST') or p_stat.get('assists')
+    return schemas.EstatisticaCreate(
+        jogador_id=jogador_id,
+        minutos_jogados=minutos_decimais,
+        pontos=safe_int(pontos),
+        rebotes=safe_int(rebotes),
+        assistencias=safe_int(assistencias)
+    )
+
+def box_score_linha_a_linha(player_stats_df: pd.DataFrame, mapa_jogadores: dict) -> list:
+    linhas = []
+    for index, p_stat in player_stats_df.iterrows():
+        player_id = p_stat.get('PLAYER_ID') or p_stat.get('personId')
+        if player_id and player_id in mapa_jogadores:
+            linhas.append(_estatistica_da_linha(p_stat, mapa_jogadores[player_id]))
+    return linhas
+
+def career_stats_linha_a_linha(season_totals_df: pd.DataFrame) -> list:
+    career_stats_list = []
+    for index, row in season_totals_df.iterrows():
+        career_stats_list.append(schemas.JogadorCareerStats(
+            temporada=row['SEASON_ID'],
+            team_abbreviation=row['TEAM_ABBREVIATION'],
+            jogos_disputados=int(row['GP'] or 0),
+            minutos_por_jogo=float(row['MIN'] or 0) / max(int(row['GP'] or 1), 1),
+            field_goals_made=float(row['FGM'] or 0) / max(int(row['GP'] or 1), 1),
+            field_goals_attempted=float(row['FGA'] or 0) / max(int(row['GP'] or 1), 1),
+            field_goal_percentage=float(row['FG_PCT'] or 0),
+            three_pointers_made=float(row['FG3M'] or 0) / max(int(row['GP'] or 1), 1),
+            three_pointers_attempted=float(row['FG3A'] or 0) / max(int(row['GP'] or 1), 1),
+            three_point_percentage=float(row['FG3_PCT'] or 0),
+            free_throws_made=float(row['FTM'] or 0) / max(int(row['GP'] or 1), 1),
+            free_throws_attempted=float(row['FTA'] or 0) / max(int(row['GP'] or 1), 1),
+            free_throw_percentage=float(row['FT_PCT'] or 0),
+            rebounds_offensive=float(row['OREB'] or 0) / max(int(row['GP'] or 1), 1),
+            rebounds_defensive=float(row['DREB'] or 0) / max(int(row['GP'] or 1), 1),
+            rebounds_total=float(row['REB'] or 0) / max(int(row['GP'] or 1), 1),
+            assists=float(row['AST'] or 0) / max(int(row['GP'] or 1), 1),
+            steals=float(row['STL'] or 0) / max(int(row['GP'] or 1), 1),
+            blocks=float(row['BLK'] or 0) / max(int(row['GP'] or 1), 1),
+            turnovers=float(row['TOV'] or 0) / max(int(row['GP'] or 1), 1),
+            personal_fouls=float(row['PF'] or 0) / max(int(row['GP'] or 1), 1),
+            points=float(row['PTS'] or 0) / max(int(row['GP'] or 1), 1),
+        ))
+    return career_stats_list
+
+def gravar_box_score_linha_a_linha(db, jogo_id: int, player_stats_df: pd.DataFrame):
+    """O caminho antigo completo: consulta do jogador, checagem de duplicata e um commit por linha."""
+    for index, p_stat in player_stats_df.iterrows():
+        player_id = p_stat.get('PLAYER_ID') or p_stat.get('personId')
+        if not player_id:
+            continue
+        db_player = crud.get_jogador_by_api_id(db, api_id=int(player_id))
+        if db_player and not crud.get_estatistica(db, jogo_id=jogo_id, jogador_id=db_player.id):
+            crud.create_estatistica_jogo(db, estatistica=_estatistica_da_linha(p_stat, db_player.id), jogo_id=jogo_id)
+
+# --- Execução ---
+
+def _cronometrar(funcao, *args) -> float:
+    inicio = time.perf_counter()
+    funcao(*args)
+    return time.perf_counter() - inicio
+
+def _relatorio(nome: str, linhas: int, antigo: float, novo: float):
+    print(f"{nome:<32} {linhas:>7} linhas | linha a linha {antigo:8.3f}s | por coluna {novo:8.3f}s | {antigo / max(novo, 1e-9):6.1f}x")
+
+def _banco_em_memoria(api_ids: np.ndarray, total_jogos: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    db.add(models.Liga(id=1, nome="NBA", pais="EUA"))
+    db.add_all([models.Time(id=i, nome=f"Time {i}", sigla=f"T{i}", liga_id=1) for i in (1, 2)])
+    db.execute(models.Jogador.__table__.insert(), [
+        {"api_id": int(api_id), "nome": f"Jogador {api_id}", "nome_normalizado": f"jogador {api_id}"} for api_id in api_ids
+    ])
+    db.execute(models.Jogo.__table__.insert(), [
+        {"id": i, "data_jogo": pd.Timestamp("2024-01-01").to_pydatetime(), "temporada": "2023-24",
+         "liga_id": 1, "time_casa_id": 1, "time_visitante_id": 2} for i in range(1, 2 * total_jogos + 1)
+    ])
+    db.commit()
+    return db
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara a ingestão linha a linha com a ingestão por coluna.")
+    parser.add_argument("--jogos", type=int, default=1230, help="Jogos na temporada sintética (transformação).")
+    parser.add_argument("--jogos-banco", type=int, default=100, help="Jogos gravados no SQLite em memória (etapa com banco).")
+    parser.add_argument("--jogadores", type=int, default=530, help="Jogadores com estatísticas de carreira.")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.semente)
+    api_ids = np.arange(1_000, 1_000 + args.jogadores)
+    mapa_jogadores = {int(api_id): i + 1 for i, api_id in enumerate(api_ids)}
+    box_scores = gerar_box_scores(args.jogos, api_ids, rng)
+    carreiras = gerar_career_stats(args.jogadores, rng)
+    print(f"Temporada sintética: {args.jogos} jogos, {args.jogadores} jogadores.\n")
+
+    linhas_box = sum(len(df) for df in box_scores)
+    _relatorio(
+        "Box score (transformação)", linhas_box,
+        _cronometrar(lambda: [box_score_linha_a_linha(df, mapa_jogadores) for df in box_scores]),
+        _cronometrar(lambda: [nba_transformacoes.estatisticas_box_score(df, mapa_jogadores) for df in box_scores]),
+    )
+
+    linhas_carreira = sum(len(df) for df in carreiras)
+    _relatorio(
+        "Carreira (transformação)", linhas_carreira,
+        _cronometrar(lambda: [career_stats_linha_a_linha(df) for df in carreiras]),
+        _cronometrar(lambda: [nba_transformacoes.career_stats_por_jogo(df) for df in carreiras]),
+    )
+
+    # Etapa com banco: cada caminho grava os mesmos box scores em jogos diferentes
+    amostra = box_scores[:args.jogos_banco]
+    db = _banco_em_memoria(api_ids, len(amostra))
+    try:
+        def antigo():
+            for jogo_id, df in enumerate(amostra, start=1):
+                gravar_box_score_linha_a_linha(db, jogo_id, df)
+
+        def novo():
+            mapa = crud.get_mapa_api_ids(db, models.Jogador)
+            for jogo_id, df in enumerate(amostra, start=len(amostra) + 1):
+                linhas = nba_transformacoes.estatisticas_box_score(df, mapa)
+                crud.create_estatisticas_jogo_em_lote(db, jogo_id=jogo_id, linhas=linhas)
+
+        _relatorio("Box score + gravação (SQLite)", sum(len(df) for df in amostra), _cronometrar(antigo), _cronometrar(novo))
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+from logging.config import fileConfig
+from alembic import context
+from app.config import settings
+from app.database import engine
+from app import models
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = models.Base.metadata
+
+# Tabelas criadas e mantidas por bibliotecas, não pelos modelos
+TABELAS_EXTERNAS = {"apscheduler_jobs"}
+
+def include_object(objeto, nome, tipo, refletido, comparado_com):
+    return not (tipo == "table" and nome in TABELAS_EXTERNAS)
+
+def run_migrations_offline():
+    """Gera o SQL das revisões sem conectar no banco (alembic upgrade head --sql)."""
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=settings.DATABASE_URL.startswith("sqlite"),
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    conexao = config.attributes.get("connection")
+    if conexao is None:
+        with engine.connect() as conexao:
+            _executar(conexao)
+    else:
+        _executar(conexao)
+
+def _executar(conexao):
+    context.configure(
+        connection=conexao,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        render_as_batch=conexao.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
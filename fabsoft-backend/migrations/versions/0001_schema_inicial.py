@@ -0,0 +1,276 @@
+"""schema inicial
+
+Esquema como era criado por Base.metadata.create_all antes das migrações.
+Bancos que já existiam são apenas marcados com esta revisão por
+`python -m app.migrate`, sem executar o upgrade.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('conquistas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nome', sa.String(), nullable=False),
+    sa.Column('descricao', sa.String(), nullable=True),
+    sa.Column('icone_url', sa.String(), nullable=True),
+    sa.Column('pontos_experiencia', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('nome')
+    )
+    op.create_index(op.f('ix_conquistas_id'), 'conquistas', ['id'], unique=False)
+    op.create_table('ligas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nome', sa.String(), nullable=False),
+    sa.Column('pais', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ligas_id'), 'ligas', ['id'], unique=False)
+    op.create_index(op.f('ix_ligas_nome'), 'ligas', ['nome'], unique=True)
+    op.create_table('times',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('api_id', sa.Integer(), nullable=True),
+    sa.Column('nome', sa.String(), nullable=False),
+    sa.Column('slug', sa.String(), nullable=True),
+    sa.Column('sigla', sa.String(), nullable=False),
+    sa.Column('cidade', sa.String(), nullable=True),
+    sa.Column('logo_url', sa.String(), nullable=True),
+    sa.Column('liga_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['liga_id'], ['ligas.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sigla')
+    )
+    op.create_index(op.f('ix_times_api_id'), 'times', ['api_id'], unique=True)
+    op.create_index(op.f('ix_times_id'), 'times', ['id'], unique=False)
+    op.create_index(op.f('ix_times_nome'), 'times', ['nome'], unique=True)
+    op.create_index(op.f('ix_times_slug'), 'times', ['slug'], unique=True)
+    op.create_table('conquistas_time',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('time_id', sa.Integer(), nullable=True),
+    sa.Column('nome_conquista', sa.String(), nullable=False),
+    sa.Column('temporada', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['time_id'], ['times.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('time_id', 'nome_conquista', 'temporada', name='_time_conquista_temporada_uc')
+    )
+    op.create_index(op.f('ix_conquistas_time_id'), 'conquistas_time', ['id'], unique=False)
+    op.create_table('jogadores',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('api_id', sa.Integer(), nullable=True),
+    sa.Column('nome', sa.String(), nullable=False),
+    sa.Column('nome_normalizado', sa.String(), nullable=False),
+    sa.Column('slug', sa.String(), nullable=True),
+    sa.Column('numero_camisa', sa.Integer(), nullable=True),
+    sa.Column('posicao', sa.String(), nullable=True),
+    sa.Column('data_nascimento', sa.DateTime(), nullable=True),
+    sa.Column('ano_draft', sa.Integer(), nullable=True),
+    sa.Column('anos_experiencia', sa.Integer(), nullable=True),
+    sa.Column('altura', sa.Integer(), nullable=True),
+    sa.Column('peso', sa.Float(), nullable=True),
+    sa.Column('nacionalidade', sa.String(), nullable=True),
+    sa.Column('foto_url', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=True),
+    sa.Column('time_atual_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['time_atual_id'], ['times.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_jogadores_api_id'), 'jogadores', ['api_id'], unique=True)
+    op.create_index(op.f('ix_jogadores_id'), 'jogadores', ['id'], unique=False)
+    op.create_index(op.f('ix_jogadores_slug'), 'jogadores', ['slug'], unique=True)
+    op.create_table('jogos',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('slug', sa.String(), nullable=True),
+    sa.Column('api_id', sa.Integer(), nullable=True),
+    sa.Column('data_jogo', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('temporada', sa.String(), nullable=True),
+    sa.Column('status_jogo', sa.String(), nullable=True),
+    sa.Column('placar_casa', sa.Integer(), nullable=True),
+    sa.Column('placar_visitante', sa.Integer(), nullable=True),
+    sa.Column('arena', sa.String(), nullable=True),
+    sa.Column('arbitros', sa.JSON(), nullable=True),
+    sa.Column('liga_id', sa.Integer(), nullable=True),
+    sa.Column('time_casa_id', sa.Integer(), nullable=True),
+    sa.Column('time_visitante_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['liga_id'], ['ligas.id'], ),
+    sa.ForeignKeyConstraint(['time_casa_id'], ['times.id'], ),
+    sa.ForeignKeyConstraint(['time_visitante_id'], ['times.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_jogos_api_id'), 'jogos', ['api_id'], unique=True)
+    op.create_index(op.f('ix_jogos_id'), 'jogos', ['id'], unique=False)
+    op.create_index(op.f('ix_jogos_slug'), 'jogos', ['slug'], unique=True)
+    op.create_table('usuarios',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(), nullable=False),
+    sa.Column('email', sa.String(), nullable=False),
+    sa.Column('senha', sa.String(), nullable=False),
+    sa.Column('nome_completo', sa.String(), nullable=True),
+    sa.Column('foto_perfil', sa.String(), nullable=True),
+    sa.Column('bio', sa.String(), nullable=True),
+    sa.Column('time_favorito_id', sa.Integer(), nullable=True),
+    sa.Column('data_cadastro', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('data_ultimo_acesso', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('nivel_usuario', sa.Enum('ROOKIE', 'ROLEPLAYER', 'SIXTH_MAN', 'STARTER', 'FRANCHISE_PLAYER', 'GOAT', name='nivelusuario'), nullable=True),
+    sa.Column('pontos_experiencia', sa.Integer(), nullable=True),
+    sa.Column('media_avaliacoes', sa.Float(), nullable=True),
+    sa.Column('total_avaliacoes', sa.Integer(), nullable=True),
+    sa.Column('status', sa.Enum('ATIVO', 'INATIVO', name='statususuario'), nullable=True),
+    sa.ForeignKeyConstraint(['time_favorito_id'], ['times.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_usuarios_email'), 'usuarios', ['email'], unique=True)
+    op.create_index(op.f('ix_usuarios_id'), 'usuarios', ['id'], unique=False)
+    op.create_index(op.f('ix_usuarios_username'), 'usuarios', ['username'], unique=True)
+    op.create_table('avaliacoes_jogo',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('nota_geral', sa.Float(), nullable=False),
+    sa.Column('nota_ataque_casa', sa.Float(), nullable=True),
+    sa.Column('nota_defesa_casa', sa.Float(), nullable=True),
+    sa.Column('nota_ataque_visitante', sa.Float(), nullable=True),
+    sa.Column('nota_defesa_visitante', sa.Float(), nullable=True),
+    sa.Column('nota_arbitragem', sa.Float(), nullable=True),
+    sa.Column('nota_atmosfera', sa.Float(), nullable=True),
+    sa.Column('resenha', sa.String(), nullable=True),
+    sa.Column('data_avaliacao', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('curtidas', sa.Integer(), nullable=True),
+    sa.Column('visualizacoes', sa.Integer(), nullable=True),
+    sa.Column('jogo_id', sa.Integer(), nullable=True),
+    sa.Column('usuario_id', sa.Integer(), nullable=True),
+    sa.Column('melhor_jogador_id', sa.Integer(), nullable=True),
+    sa.Column('pior_jogador_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['jogo_id'], ['jogos.id'], ),
+    sa.ForeignKeyConstraint(['melhor_jogador_id'], ['jogadores.id'], ),
+    sa.ForeignKeyConstraint(['pior_jogador_id'], ['jogadores.id'], ),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_avaliacoes_jogo_id'), 'avaliacoes_jogo', ['id'], unique=False)
+    op.create_table('conquistas_jogador',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('jogador_id', sa.Integer(), nullable=True),
+    sa.Column('nome_conquista', sa.String(), nullable=False),
+    sa.Column('temporada', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['jogador_id'], ['jogadores.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('jogador_id', 'nome_conquista', 'temporada', name='_jogador_conquista_temporada_uc')
+    )
+    op.create_index(op.f('ix_conquistas_jogador_id'), 'conquistas_jogador', ['id'], unique=False)
+    op.create_table('estatisticas_jogador_jogo',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('minutos_jogados', sa.Float(), nullable=True),
+    sa.Column('pontos', sa.Integer(), nullable=True),
+    sa.Column('rebotes', sa.Integer(), nullable=True),
+    sa.Column('assistencias', sa.Integer(), nullable=True),
+    sa.Column('roubos_bola', sa.Integer(), nullable=True),
+    sa.Column('bloqueios', sa.Integer(), nullable=True),
+    sa.Column('turnovers', sa.Integer(), nullable=True),
+    sa.Column('jogo_id', sa.Integer(), nullable=True),
+    sa.Column('jogador_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['jogador_id'], ['jogadores.id'], ),
+    sa.ForeignKeyConstraint(['jogo_id'], ['jogos.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_estatisticas_jogador_jogo_id'), 'estatisticas_jogador_jogo', ['id'], unique=False)
+    op.create_table('feed_atividades',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=True),
+    sa.Column('tipo_atividade', sa.String(), nullable=False),
+    sa.Column('data_atividade', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('referencia_id', sa.Integer(), nullable=True),
+    sa.Column('referencia_tipo', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_feed_atividades_id'), 'feed_atividades', ['id'], unique=False)
+    op.create_table('notificacoes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=True),
+    sa.Column('tipo', sa.String(), nullable=False),
+    sa.Column('mensagem', sa.String(), nullable=False),
+    sa.Column('lida', sa.Boolean(), nullable=True),
+    sa.Column('data_criacao', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('referencia_id', sa.Integer(), nullable=True),
+    sa.Column('referencia_tipo', sa.String(), nullable=True),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_notificacoes_id'), 'notificacoes', ['id'], unique=False)
+    op.create_table('seguidores',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('seguidor_id', sa.Integer(), nullable=True),
+    sa.Column('seguido_id', sa.Integer(), nullable=True),
+    sa.Column('data_inicio', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['seguido_id'], ['usuarios.id'], ),
+    sa.ForeignKeyConstraint(['seguidor_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('seguidor_id', 'seguido_id', name='_seguidor_seguido_uc')
+    )
+    op.create_index(op.f('ix_seguidores_id'), 'seguidores', ['id'], unique=False)
+    op.create_table('usuario_conquistas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('usuario_id', sa.Integer(), nullable=True),
+    sa.Column('conquista_id', sa.Integer(), nullable=True),
+    sa.Column('data_desbloqueio', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['conquista_id'], ['conquistas.id'], ),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('usuario_id', 'conquista_id', name='_usuario_conquista_uc')
+    )
+    op.create_index(op.f('ix_usuario_conquistas_id'), 'usuario_conquistas', ['id'], unique=False)
+    op.create_table('comentarios_avaliacao',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('comentario', sa.String(), nullable=False),
+    sa.Column('data_comentario', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('curtidas', sa.Integer(), nullable=True),
+    sa.Column('avaliacao_id', sa.Integer(), nullable=True),
+    sa.Column('usuario_id', sa.Integer(), nullable=True),
+    sa.Column('resposta_para_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['avaliacao_id'], ['avaliacoes_jogo.id'], ),
+    sa.ForeignKeyConstraint(['resposta_para_id'], ['comentarios_avaliacao.id'], ),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_comentarios_avaliacao_id'), 'comentarios_avaliacao', ['id'], unique=False)
+    op.create_table('curtidas_avaliacao',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('avaliacao_id', sa.Integer(), nullable=True),
+    sa.Column('usuario_id', sa.Integer(), nullable=True),
+    sa.Column('data_curtida', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['avaliacao_id'], ['avaliacoes_jogo.id'], ),
+    sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('avaliacao_id', 'usuario_id', name='_avaliacao_usuario_uc')
+    )
+    op.create_index(op.f('ix_curtidas_avaliacao_id'), 'curtidas_avaliacao', ['id'], unique=False)
+
+
+def downgrade():
+    op.drop_table('curtidas_avaliacao')
+    op.drop_table('comentarios_avaliacao')
+    op.drop_table('usuario_conquistas')
+    op.drop_table('seguidores')
+    op.drop_table('notificacoes')
+    op.drop_table('feed_atividades')
+    op.drop_table('estatisticas_jogador_jogo')
+    op.drop_table('conquistas_jogador')
+    op.drop_table('avaliacoes_jogo')
+    op.drop_table('usuarios')
+    op.drop_table('jogos')
+    op.drop_table('jogadores')
+    op.drop_table('conquistas_time')
+    op.drop_table('times')
+    op.drop_table('ligas')
+    op.drop_table('conquistas')
+    bind = op.get_bind()
+    sa.Enum(name='statususuario').drop(bind, checkfirst=True)
+    sa.Enum(name='nivelusuario').drop(bind, checkfirst=True)
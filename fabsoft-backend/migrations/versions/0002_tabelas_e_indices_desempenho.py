@@ -0,0 +1,150 @@
+"""tabelas e indices de desempenho
+
+Tabelas novas (caixa de entrada do feed, progresso de conquistas, fila de
+efeitos e consolidado de notas por jogo) e os índices compostos das consultas
+mais usadas.
+
+Bancos que rodaram versões com create_all já podem ter parte disso, então
+cada tabela e índice só é criado se ainda não existir.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def _tem_tabela(nome):
+    return sa.inspect(op.get_bind()).has_table(nome)
+
+def _criar_indice(nome, tabela, colunas):
+    existentes = {i["name"] for i in sa.inspect(op.get_bind()).get_indexes(tabela)}
+    if nome not in existentes:
+        op.create_index(nome, tabela, colunas, unique=False)
+
+
+def upgrade():
+    if not _tem_tabela('tarefas_pendentes'):
+        op.create_table('tarefas_pendentes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('tipo', sa.String(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('tentativas', sa.Integer(), nullable=False),
+        sa.Column('erro', sa.String(), nullable=True),
+        sa.Column('data_criacao', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('data_inicio', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    if not _tem_tabela('jogo_rating_rollup'):
+        op.create_table('jogo_rating_rollup',
+        sa.Column('jogo_id', sa.Integer(), nullable=False),
+        sa.Column('total_avaliacoes', sa.Integer(), nullable=False),
+        sa.Column('soma_geral', sa.Float(), nullable=False),
+        sa.Column('total_geral', sa.Integer(), nullable=False),
+        sa.Column('soma_ataque_casa', sa.Float(), nullable=False),
+        sa.Column('total_ataque_casa', sa.Integer(), nullable=False),
+        sa.Column('soma_defesa_casa', sa.Float(), nullable=False),
+        sa.Column('total_defesa_casa', sa.Integer(), nullable=False),
+        sa.Column('soma_ataque_visitante', sa.Float(), nullable=False),
+        sa.Column('total_ataque_visitante', sa.Integer(), nullable=False),
+        sa.Column('soma_defesa_visitante', sa.Float(), nullable=False),
+        sa.Column('total_defesa_visitante', sa.Integer(), nullable=False),
+        sa.Column('soma_arbitragem', sa.Float(), nullable=False),
+        sa.Column('total_arbitragem', sa.Integer(), nullable=False),
+        sa.Column('soma_atmosfera', sa.Float(), nullable=False),
+        sa.Column('total_atmosfera', sa.Integer(), nullable=False),
+        sa.Column('votos_mvp', sa.JSON(), nullable=True),
+        sa.Column('votos_decepcao', sa.JSON(), nullable=True),
+        sa.Column('mvp_jogador_id', sa.Integer(), nullable=True),
+        sa.Column('mvp_votos', sa.Integer(), nullable=False),
+        sa.Column('decepcao_jogador_id', sa.Integer(), nullable=True),
+        sa.Column('decepcao_votos', sa.Integer(), nullable=False),
+        sa.Column('data_atualizacao', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['decepcao_jogador_id'], ['jogadores.id'], ),
+        sa.ForeignKeyConstraint(['jogo_id'], ['jogos.id'], ),
+        sa.ForeignKeyConstraint(['mvp_jogador_id'], ['jogadores.id'], ),
+        sa.PrimaryKeyConstraint('jogo_id')
+        )
+
+    if not _tem_tabela('progresso_conquistas'):
+        op.create_table('progresso_conquistas',
+        sa.Column('usuario_id', sa.Integer(), nullable=False),
+        sa.Column('total_avaliacoes', sa.Integer(), nullable=False),
+        sa.Column('avaliacoes_com_detalhes', sa.Integer(), nullable=False),
+        sa.Column('avaliacoes_time_favorito', sa.Integer(), nullable=False),
+        sa.Column('times_avaliados', sa.JSON(), nullable=True),
+        sa.Column('avaliacoes_recentes', sa.JSON(), nullable=True),
+        sa.Column('total_comentarios', sa.Integer(), nullable=False),
+        sa.Column('total_seguindo', sa.Integer(), nullable=False),
+        sa.Column('total_seguidores', sa.Integer(), nullable=False),
+        sa.Column('data_atualizacao', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+        sa.PrimaryKeyConstraint('usuario_id')
+        )
+
+    if not _tem_tabela('feed_inbox'):
+        op.create_table('feed_inbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('usuario_id', sa.Integer(), nullable=False),
+        sa.Column('autor_id', sa.Integer(), nullable=False),
+        sa.Column('feed_atividade_id', sa.Integer(), nullable=True),
+        sa.Column('avaliacao_id', sa.Integer(), nullable=True),
+        sa.Column('data_item', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(['autor_id'], ['usuarios.id'], ),
+        sa.ForeignKeyConstraint(['avaliacao_id'], ['avaliacoes_jogo.id'], ),
+        sa.ForeignKeyConstraint(['feed_atividade_id'], ['feed_atividades.id'], ),
+        sa.ForeignKeyConstraint(['usuario_id'], ['usuarios.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+    _criar_indice('ix_tarefas_pendentes_id', 'tarefas_pendentes', ['id'])
+    _criar_indice('ix_tarefas_pendentes_status_id', 'tarefas_pendentes', ['status', 'id'])
+    _criar_indice('ix_feed_inbox_id', 'feed_inbox', ['id'])
+    _criar_indice('ix_feed_inbox_usuario_autor', 'feed_inbox', ['usuario_id', 'autor_id'])
+    _criar_indice('ix_feed_inbox_usuario_data', 'feed_inbox', ['usuario_id', 'data_item'])
+    _criar_indice('ix_avaliacoes_jogo_data', 'avaliacoes_jogo', ['data_avaliacao'])
+    _criar_indice('ix_avaliacoes_jogo_jogo_data', 'avaliacoes_jogo', ['jogo_id', 'data_avaliacao'])
+    _criar_indice('ix_avaliacoes_jogo_usuario_data', 'avaliacoes_jogo', ['usuario_id', 'data_avaliacao'])
+    _criar_indice('ix_comentarios_avaliacao_avaliacao', 'comentarios_avaliacao', ['avaliacao_id'])
+    _criar_indice('ix_comentarios_avaliacao_usuario', 'comentarios_avaliacao', ['usuario_id'])
+    _criar_indice('ix_curtidas_avaliacao_usuario_avaliacao', 'curtidas_avaliacao', ['usuario_id', 'avaliacao_id'])
+    _criar_indice('ix_estatisticas_jogador_jogo_jogador_jogo', 'estatisticas_jogador_jogo', ['jogador_id', 'jogo_id'])
+    _criar_indice('ix_estatisticas_jogador_jogo_jogo', 'estatisticas_jogador_jogo', ['jogo_id'])
+    _criar_indice('ix_feed_atividades_usuario_data', 'feed_atividades', ['usuario_id', 'data_atividade'])
+    _criar_indice('ix_jogos_data_jogo', 'jogos', ['data_jogo'])
+    _criar_indice('ix_jogos_temporada_data', 'jogos', ['temporada', 'data_jogo'])
+    _criar_indice('ix_jogos_time_casa_data', 'jogos', ['time_casa_id', 'data_jogo'])
+    _criar_indice('ix_jogos_time_visitante_data', 'jogos', ['time_visitante_id', 'data_jogo'])
+    _criar_indice('ix_notificacoes_usuario_data', 'notificacoes', ['usuario_id', 'data_criacao'])
+    _criar_indice('ix_seguidores_seguido_seguidor', 'seguidores', ['seguido_id', 'seguidor_id'])
+
+
+def downgrade():
+    op.drop_index('ix_seguidores_seguido_seguidor', table_name='seguidores')
+    op.drop_index('ix_notificacoes_usuario_data', table_name='notificacoes')
+    op.drop_index('ix_jogos_time_visitante_data', table_name='jogos')
+    op.drop_index('ix_jogos_time_casa_data', table_name='jogos')
+    op.drop_index('ix_jogos_temporada_data', table_name='jogos')
+    op.drop_index('ix_jogos_data_jogo', table_name='jogos')
+    op.drop_index('ix_feed_atividades_usuario_data', table_name='feed_atividades')
+    op.drop_index('ix_estatisticas_jogador_jogo_jogo', table_name='estatisticas_jogador_jogo')
+    op.drop_index('ix_estatisticas_jogador_jogo_jogador_jogo', table_name='estatisticas_jogador_jogo')
+    op.drop_index('ix_curtidas_avaliacao_usuario_avaliacao', table_name='curtidas_avaliacao')
+    op.drop_index('ix_comentarios_avaliacao_usuario', table_name='comentarios_avaliacao')
+    op.drop_index('ix_comentarios_avaliacao_avaliacao', table_name='comentarios_avaliacao')
+    op.drop_index('ix_avaliacoes_jogo_usuario_data', table_name='avaliacoes_jogo')
+    op.drop_index('ix_avaliacoes_jogo_jogo_data', table_name='avaliacoes_jogo')
+    op.drop_index('ix_avaliacoes_jogo_data', table_name='avaliacoes_jogo')
+    op.drop_table('feed_inbox')
+    op.drop_table('progresso_conquistas')
+    op.drop_table('jogo_rating_rollup')
+    op.drop_table('tarefas_pendentes')
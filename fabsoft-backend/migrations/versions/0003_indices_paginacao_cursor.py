@@ -0,0 +1,49 @@
+"""indices da paginacao por cursor
+
+A paginação por cursor ordena por (data, id). Os índices de jogos, avaliações
+por jogo e comentários por avaliação ganham o id no fim, para que a próxima
+página seja lida direto do índice, sem ordenar.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# (índice antigo, índice novo, tabela, colunas do novo)
+TROCAS = [
+    ('ix_jogos_data_jogo', 'ix_jogos_data_id', 'jogos', ['data_jogo', 'id']),
+    ('ix_avaliacoes_jogo_jogo_data', 'ix_avaliacoes_jogo_jogo_data_id', 'avaliacoes_jogo', ['jogo_id', 'data_avaliacao', 'id']),
+    ('ix_comentarios_avaliacao_avaliacao', 'ix_comentarios_avaliacao_avaliacao_data_id', 'comentarios_avaliacao', ['avaliacao_id', 'data_comentario', 'id']),
+]
+
+
+def _indices(tabela):
+    return {i["name"] for i in sa.inspect(op.get_bind()).get_indexes(tabela)}
+
+
+def upgrade():
+    for antigo, novo, tabela, colunas in TROCAS:
+        existentes = _indices(tabela)
+        if novo not in existentes:
+            op.create_index(novo, tabela, colunas, unique=False)
+        if antigo in existentes:
+            op.drop_index(antigo, table_name=tabela)
+
+
+def downgrade():
+    colunas_antigas = {
+        'ix_jogos_data_jogo': ['data_jogo'],
+        'ix_avaliacoes_jogo_jogo_data': ['jogo_id', 'data_avaliacao'],
+        'ix_comentarios_avaliacao_avaliacao': ['avaliacao_id'],
+    }
+    for antigo, novo, tabela, _ in TROCAS:
+        op.create_index(antigo, tabela, colunas_antigas[antigo], unique=False)
+        op.drop_index(novo, table_name=tabela)
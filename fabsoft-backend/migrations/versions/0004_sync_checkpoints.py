@@ -0,0 +1,35 @@
+"""checkpoints de sincronizacao
+
+Tabela sync_checkpoints, usada para retomar a sincronização de jogadores
+de onde ela parou.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sync_checkpoints',
+    sa.Column('nome', sa.String(), nullable=False),
+    sa.Column('itens', sa.JSON(), nullable=False),
+    sa.Column('posicao', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('novos', sa.Integer(), nullable=False),
+    sa.Column('atualizados', sa.Integer(), nullable=False),
+    sa.Column('data_inicio', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('data_atualizacao', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('nome')
+    )
+
+
+def downgrade():
+    op.drop_table('sync_checkpoints')
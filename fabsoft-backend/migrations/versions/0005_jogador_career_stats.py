@@ -0,0 +1,57 @@
+"""estatisticas de carreira dos jogadores
+
+Tabela jogador_career_stats, preenchida pelo nba_importer e lida pela
+rota /jogadores/{slug}/career-stats no lugar da chamada à API da NBA.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('jogador_career_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('jogador_id', sa.Integer(), nullable=False),
+    sa.Column('ordem', sa.Integer(), nullable=False),
+    sa.Column('temporada', sa.String(), nullable=False),
+    sa.Column('team_abbreviation', sa.String(), nullable=False),
+    sa.Column('jogos_disputados', sa.Integer(), nullable=False),
+    sa.Column('minutos_por_jogo', sa.Float(), nullable=False),
+    sa.Column('field_goals_made', sa.Float(), nullable=False),
+    sa.Column('field_goals_attempted', sa.Float(), nullable=False),
+    sa.Column('field_goal_percentage', sa.Float(), nullable=False),
+    sa.Column('three_pointers_made', sa.Float(), nullable=False),
+    sa.Column('three_pointers_attempted', sa.Float(), nullable=False),
+    sa.Column('three_point_percentage', sa.Float(), nullable=False),
+    sa.Column('free_throws_made', sa.Float(), nullable=False),
+    sa.Column('free_throws_attempted', sa.Float(), nullable=False),
+    sa.Column('free_throw_percentage', sa.Float(), nullable=False),
+    sa.Column('rebounds_offensive', sa.Float(), nullable=False),
+    sa.Column('rebounds_defensive', sa.Float(), nullable=False),
+    sa.Column('rebounds_total', sa.Float(), nullable=False),
+    sa.Column('assists', sa.Float(), nullable=False),
+    sa.Column('steals', sa.Float(), nullable=False),
+    sa.Column('blocks', sa.Float(), nullable=False),
+    sa.Column('turnovers', sa.Float(), nullable=False),
+    sa.Column('personal_fouls', sa.Float(), nullable=False),
+    sa.Column('points', sa.Float(), nullable=False),
+    sa.Column('data_atualizacao', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.ForeignKeyConstraint(['jogador_id'], ['jogadores.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('jogador_id', 'ordem', name='_jogador_career_stats_ordem_uc')
+    )
+    op.create_index(op.f('ix_jogador_career_stats_id'), 'jogador_career_stats', ['id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_jogador_career_stats_id'), table_name='jogador_career_stats')
+    op.drop_table('jogador_career_stats')
@@ -0,0 +1,33 @@
+"""jogos ao vivo
+
+Tabela jogos_ao_vivo: liderança (lease) e último snapshot de cada jogo
+acompanhado ao vivo, compartilhados entre processos.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('jogos_ao_vivo',
+    sa.Column('game_api_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('lider', sa.String(), nullable=True),
+    sa.Column('lease_ate', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('snapshot', sa.JSON(), nullable=True),
+    sa.Column('data_atualizacao', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('game_api_id')
+    )
+
+
+def downgrade():
+    op.drop_table('jogos_ao_vivo')
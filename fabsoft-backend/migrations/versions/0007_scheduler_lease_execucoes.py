@@ -0,0 +1,47 @@
+"""scheduler: lease e execuções
+
+Tabelas leases (liderança entre processos, usada para que só um processo rode o
+agendador) e execucoes_jobs (histórico das tarefas agendadas). A tabela
+apscheduler_jobs é criada pelo próprio APScheduler e fica fora das migrações.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('leases',
+    sa.Column('nome', sa.String(), nullable=False),
+    sa.Column('dono', sa.String(), nullable=True),
+    sa.Column('expira_em', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('nome')
+    )
+    op.create_table('execucoes_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.String(), nullable=False),
+    sa.Column('processo', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('erro', sa.String(), nullable=True),
+    sa.Column('data_inicio', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('data_fim', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('duracao_segundos', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_execucoes_jobs_id'), 'execucoes_jobs', ['id'], unique=False)
+    op.create_index('ix_execucoes_jobs_job_id_data_inicio', 'execucoes_jobs', ['job_id', 'data_inicio'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_execucoes_jobs_job_id_data_inicio', table_name='execucoes_jobs')
+    op.drop_index(op.f('ix_execucoes_jobs_id'), table_name='execucoes_jobs')
+    op.drop_table('execucoes_jobs')
+    op.drop_table('leases')
@@ -0,0 +1,48 @@
+"""jobs
+
+Tabela jobs: sincronizações administrativas em segundo plano, com progresso,
+pedido de cancelamento, resultado e histórico.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tipo', sa.String(), nullable=False),
+    sa.Column('parametros', sa.JSON(), nullable=True),
+    sa.Column('origem', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('cancelar', sa.Boolean(), nullable=False),
+    sa.Column('processo', sa.String(), nullable=True),
+    sa.Column('feitos', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=True),
+    sa.Column('falhas', sa.Integer(), nullable=False),
+    sa.Column('erros', sa.JSON(), nullable=True),
+    sa.Column('erro', sa.String(), nullable=True),
+    sa.Column('resultado', sa.JSON(), nullable=True),
+    sa.Column('data_criacao', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column('data_inicio', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('data_atualizacao', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('data_fim', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_jobs_id'), 'jobs', ['id'], unique=False)
+    op.create_index('ix_jobs_status_id', 'jobs', ['status', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_jobs_status_id', table_name='jobs')
+    op.drop_index(op.f('ix_jobs_id'), table_name='jobs')
+    op.drop_table('jobs')
@@ -0,0 +1,33 @@
+"""sincronizacao incremental de premios
+
+Tabela jogador_premios_sync: hash do último payload de prémios de cada jogador
+e quando ele foi consultado, para a sincronização semanal pular quem não mudou.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('jogador_premios_sync',
+    sa.Column('jogador_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('payload_hash', sa.String(length=64), nullable=False),
+    sa.Column('total_premios', sa.Integer(), nullable=False),
+    sa.Column('data_verificacao', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('data_alteracao', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['jogador_id'], ['jogadores.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('jogador_id')
+    )
+
+
+def downgrade():
+    op.drop_table('jogador_premios_sync')
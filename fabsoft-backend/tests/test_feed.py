@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app import crud, models
+from app.database import Base
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    sessao = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield sessao
+    finally:
+        sessao.close()
+        engine.dispose()
+
+@pytest.fixture
+def dados_feed(db):
+    """
+    Um leitor que segue e avalia, e 30 avaliações de outros usuários com curtidas e
+    comentários. Cada avaliação tem autor e visitante próprios, para que um lazy load
+    por linha apareça na contagem de consultas.
+    """
+    liga = models.Liga(nome="NBA", pais="USA")
+    leitor = models.Usuario(username="leitor", email="leitor@example.com", senha="x")
+    db.add_all([liga, leitor])
+    db.flush()
+
+    inicio = datetime(2025, 1, 1)
+
+    time_do_leitor = models.Time(nome="Time do Leitor", sigla="TDL", slug="time-do-leitor", liga_id=liga.id)
+    db.add(time_do_leitor)
+    db.flush()
+
+    def criar_jogo(i, dias):
+        # Sempre contra o time que o leitor avalia (para o "para você"), com um visitante novo
+        visitante = models.Time(nome=f"Visitante {i}", sigla=f"V{i}", slug=f"visitante-{i}", liga_id=liga.id)
+        db.add(visitante)
+        db.flush()
+        jogo = models.Jogo(data_jogo=inicio + timedelta(days=dias), temporada="2024-25", liga_id=liga.id,
+                           time_casa_id=time_do_leitor.id, time_visitante_id=visitante.id)
+        db.add(jogo)
+        db.flush()
+        return jogo
+
+    db.add(models.Avaliacao_Jogo(usuario_id=leitor.id, jogo_id=criar_jogo("leitor", 0).id, nota_geral=4))
+
+    for i in range(30):
+        autor = models.Usuario(username=f"autor{i}", email=f"autor{i}@example.com", senha="x")
+        db.add(autor)
+        db.flush()
+        db.add(models.Seguidor(seguidor_id=leitor.id, seguido_id=autor.id))
+        avaliacao = models.Avaliacao_Jogo(
+            usuario_id=autor.id, jogo_id=criar_jogo(i, i + 1).id, nota_geral=3,
+            data_avaliacao=inicio + timedelta(days=i + 1)
+        )
+        db.add(avaliacao)
+        db.flush()
+        if i % 2 == 0:
+            db.add(models.Curtida_Avaliacao(usuario_id=leitor.id, avaliacao_id=avaliacao.id))
+        db.add(models.Comentario_Avaliacao(usuario_id=autor.id, avaliacao_id=avaliacao.id, comentario="boa"))
+    db.commit()
+    return leitor.id
+
+def _contar_consultas(db, funcao):
+    """Número de comandos SQL da chamada, incluindo a serialização (lazy loads contariam aqui)."""
+    contagem = {"n": 0}
+
+    def contar(*args):
+        contagem["n"] += 1
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", contar)
+    try:
+        db.expire_all()
+        itens = funcao()
+        serializados = [item.model_dump() for item in itens]
+    finally:
+        event.remove(engine, "before_cursor_execute", contar)
+    return contagem["n"], serializados
+
+@pytest.mark.parametrize("feed", [crud.get_personalized_feed, crud.get_following_feed])
+def test_feed_faz_o_mesmo_numero_de_consultas_para_qualquer_limit(db, dados_feed, feed):
+    consultas_5, itens_5 = _contar_consultas(db, lambda: feed(db, usuario_id=dados_feed, limit=5))
+    consultas_25, itens_25 = _contar_consultas(db, lambda: feed(db, usuario_id=dados_feed, limit=25))
+
+    assert len(itens_5) == 5
+    assert len(itens_25) == 25
+    assert consultas_25 == consultas_5
+
+def test_feed_traz_os_totais_de_cada_avaliacao(db, dados_feed):
+    itens = crud.get_following_feed(db, usuario_id=dados_feed, limit=30)
+
+    assert all(item.total_comentarios == 1 for item in itens)
+    assert sum(item.total_curtidas for item in itens) == 15
+    assert all(item.ja_curtiu == (item.total_curtidas == 1) for item in itens)
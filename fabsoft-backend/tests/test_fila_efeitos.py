@@ -0,0 +1,18 @@
+from fastapi.testclient import TestClient
+from app import main
+from app.config import settings
+from app.services import fila_efeitos
+
+def test_lifespan_inicia_e_para_os_workers_da_fila(monkeypatch):
+    # Só a fila de efeitos interessa aqui; agendador e jobs não sobem no teste
+    monkeypatch.setattr(main, "start_scheduler", lambda: None)
+    monkeypatch.setattr(main, "stop_scheduler", lambda: None)
+    monkeypatch.setattr(main.jobs, "iniciar_workers", lambda: None)
+    monkeypatch.setattr(main.jobs, "parar_workers", lambda: None)
+    monkeypatch.setattr(settings, "FILA_EFEITOS_ATIVA", True)
+
+    with TestClient(main.app):
+        # Sem o lifespan ligado ao FastAPI, nenhum worker sobe e tarefas_pendentes só cresce
+        assert len(fila_efeitos._fila._threads) == settings.FILA_EFEITOS_WORKERS
+
+    assert fila_efeitos._fila._threads == []
@@ -0,0 +1,79 @@
+import time
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import models
+from app.config import settings
+from app.database import Base
+from app.services import jobs
+
+@pytest.fixture
+def sessao(tmp_path, monkeypatch):
+    # Arquivo, e não memória: a thread de batimento grava por outra conexão
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    fabrica = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(jobs, "SessionLocal", fabrica)
+    yield fabrica
+    engine.dispose()
+
+def _job(sessao, job_id):
+    db = sessao()
+    try:
+        return db.get(models.Job, job_id)
+    finally:
+        db.close()
+
+def _executar(monkeypatch, funcao):
+    monkeypatch.setattr(jobs, "_funcao", lambda tipo: funcao)
+    return jobs.executar("sync_nba_teams", origem="teste")
+
+def test_batimento_impede_que_uma_etapa_longa_seja_dada_como_abandonada(sessao, monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_TIMEOUT_SEM_PROGRESSO_SEGUNDOS", 0.4)
+
+    def etapa_longa(db):
+        time.sleep(1.0) # Sem avancar()/checar(): só o batimento mostra que o processo está vivo
+        outro = sessao()
+        try:
+            jobs._reservar(outro) # O que outro worker faria nesse meio-tempo
+        finally:
+            outro.close()
+        return {"quando": datetime(2025, 1, 1)}
+
+    assert _executar(monkeypatch, etapa_longa) == {"quando": datetime(2025, 1, 1)}
+
+    job = _job(sessao, 1)
+    assert job.status == "sucesso"
+    assert job.resultado == {"quando": "2025-01-01 00:00:00"} # datetime não é JSON: vira texto
+
+def test_job_abandonado_nao_e_sobrescrito_pelo_processo_original(sessao, monkeypatch):
+    def dado_como_abandonado(db):
+        db.query(models.Job).update({"status": "erro", "erro": "Abandonado"})
+        db.commit()
+        return {"ok": True}
+
+    _executar(monkeypatch, dado_como_abandonado)
+
+    job = _job(sessao, 1)
+    assert job.status == "erro"
+    assert job.resultado is None
+
+def test_falha_na_gravacao_final_levanta_depois_das_tentativas(sessao, monkeypatch):
+    tentativas = []
+    gravar = jobs._ProgressoJob.gravar
+
+    def gravar_com_banco_fora(self, levantar=False, **campos):
+        if "status" in campos:
+            tentativas.append(campos["status"])
+            raise RuntimeError("conexão perdida")
+        return gravar(self, levantar=levantar, **campos)
+
+    monkeypatch.setattr(jobs._ProgressoJob, "gravar", gravar_com_banco_fora)
+    monkeypatch.setattr(jobs.time, "sleep", lambda segundos: None)
+
+    with pytest.raises(RuntimeError):
+        _executar(monkeypatch, lambda db: {"ok": True})
+
+    assert tentativas == ["sucesso"] * jobs.TENTATIVAS_FINALIZAR
+    assert _job(sessao, 1).status == "executando"
@@ -0,0 +1,158 @@
+import asyncio
+import time
+import types
+import httpx
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database import Base
+from app.dependencies import get_db
+from app.main import app
+from app.services import live_tracker, nba_client
+
+ATRASO_API_SEGUNDOS = 0.5 # Cada chamada à API "lenta" bloqueia a thread por esse tempo
+
+def _resposta_falsa(endpoint_cls, game_id, **parametros):
+    """Frames mínimos dos três endpoints usados pelo rastreador."""
+    nome = endpoint_cls.__name__
+    if nome == "BoxScoreSummaryV2":
+        df = pd.DataFrame([{"GAME_STATUS_TEXT": "Q1", "LIVE_PERIOD": 1, "HOME_TEAM_ID": 2}])
+        return types.SimpleNamespace(game_summary=types.SimpleNamespace(get_data_frame=lambda: df))
+    if nome == "BoxScoreTraditionalV2":
+        times = pd.DataFrame([{"TEAM_ID": t, "TEAM_NAME": f"T{t}", "TEAM_ABBREVIATION": f"T{t}", "PTS": 10,
+                               "FG_PCT": .5, "FG3_PCT": .3, "FT_PCT": .8, "REB": 3, "AST": 2, "TO": 1} for t in (1, 2)])
+        jogadores = pd.DataFrame([{"TEAM_ID": t, "PLAYER_ID": t * 100 + i, "PLAYER_NAME": f"P{t}{i}", "START_POSITION": "G",
+                                   "MIN": "10:05", "PTS": 2, "REB": 1, "AST": 0, "STL": 0, "BLK": 0}
+                                  for t in (1, 2) for i in range(5)])
+        return types.SimpleNamespace(player_stats=types.SimpleNamespace(get_data_frame=lambda: jogadores),
+                                     team_stats=types.SimpleNamespace(get_data_frame=lambda: times))
+    pbp = pd.DataFrame([{"EVENTNUM": n, "PCTIMESTRING": "11:00", "PERIOD": 1, "HOMEDESCRIPTION": f"e{n}",
+                         "VISITORDESCRIPTION": None, "NEUTRALDESCRIPTION": None} for n in range(1, 4)])
+    return types.SimpleNamespace(play_by_play=types.SimpleNamespace(get_data_frame=lambda: pbp))
+
+def _api_lenta(endpoint_cls, game_id, **parametros):
+    time.sleep(ATRASO_API_SEGUNDOS) # Bloqueante, como o requests do nba_api
+    return _resposta_falsa(endpoint_cls, game_id)
+
+@pytest.fixture
+def api_lenta(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    sessao = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def override_get_db():
+        db = sessao()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    monkeypatch.setattr(nba_client, "chamar", _api_lenta)
+    app.dependency_overrides[get_db] = override_get_db
+    yield
+    del app.dependency_overrides[get_db]
+    live_tracker.parar()
+    engine.dispose()
+
+def test_endpoints_respondem_enquanto_o_rastreador_consulta_a_api(api_lenta):
+    async def cenario():
+        await live_tracker._iniciar_backend()
+        rastreador = live_tracker.RastreadorJogo(42)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://teste") as cliente:
+            assert (await cliente.get("/jogos/upcoming")).status_code == 200
+
+            inicio = time.perf_counter()
+            rodada = asyncio.create_task(rastreador.atualizar())
+            latencias = []
+            while not rodada.done():
+                t = time.perf_counter()
+                resposta = await cliente.get("/jogos/upcoming")
+                latencias.append(time.perf_counter() - t)
+                assert resposta.status_code == 200
+                await asyncio.sleep(0.02)
+            await rodada
+            return latencias, time.perf_counter() - inicio, rastreador
+
+    latencias, duracao, rastreador = asyncio.run(cenario())
+
+    # Com as chamadas no event loop, cada requisição esperaria a chamada inteira à API
+    assert len(latencias) >= 5
+    assert max(latencias) < ATRASO_API_SEGUNDOS / 2
+    assert rastreador.estado is not None and len(rastreador.play_by_play) == 3
+    # Resumo e box score em paralelo, depois o play-by-play: duas esperas, não três
+    assert duracao < 3 * ATRASO_API_SEGUNDOS
+
+# --- Protocolo de snapshot/delta ---
+
+def _estado(periodo=1, pontos_casa=10, pontos_jogador=2, jogadores_casa=5):
+    """Estado (LiveBoxscore sem play-by-play) montado pelo mesmo caminho do rastreador."""
+    times = pd.DataFrame([{"TEAM_ID": t, "TEAM_NAME": f"T{t}", "TEAM_ABBREVIATION": f"T{t}", "PTS": pontos_casa if t == 2 else 10,
+                           "FG_PCT": .5, "FG3_PCT": .3, "FT_PCT": .8, "REB": 3, "AST": 2, "TO": 1} for t in (1, 2)])
+    jogadores = pd.DataFrame([{"TEAM_ID": t, "PLAYER_ID": t * 100 + i, "PLAYER_NAME": f"P{t}{i}", "START_POSITION": "G",
+                               "MIN": "10:05", "PTS": pontos_jogador if (t, i) == (2, 0) else 2, "REB": 1, "AST": 0, "STL": 0, "BLK": 0}
+                              for t in (1, 2) for i in range(jogadores_casa if t == 2 else 5)])
+    return {"game_id": "0000000042", "game_status_text": f"Q{periodo}", "period": periodo,
+            **live_tracker.montar_times(jogadores, times, home_team_id=2)}
+
+def _evento(n):
+    return {"event_num": n, "clock": "11:00", "period": 1, "description": f"e{n}"}
+
+def test_aplicar_o_delta_reconstroi_o_estado_novo():
+    anterior = _estado()
+    atual = _estado(periodo=2, pontos_casa=14, pontos_jogador=6, jogadores_casa=6)
+
+    delta = live_tracker.calcular_delta(anterior, atual, [_evento(4)])
+
+    assert live_tracker.aplicar_delta(anterior, delta) == atual
+    assert delta["jogo"] == {"game_status_text": "Q2", "period": 2}
+    assert delta["times"] == {"home_team": {"points": 14}}
+    assert "away_team" not in delta.get("jogadores", {})
+    alterado, novo = delta["jogadores"]["home_team"]
+    assert alterado == {"player_id": 200, "points": 6} # Só o que mudou
+    assert novo == atual["home_team"]["players"][-1] # Jogador novo vai completo
+    assert delta["play_by_play"] == [_evento(4)]
+
+def test_rodada_sem_mudancas_nao_gera_delta():
+    assert live_tracker.calcular_delta(_estado(), _estado(), []) is None
+    # Só eventos novos: o delta leva apenas o play-by-play
+    assert live_tracker.calcular_delta(_estado(), _estado(), [_evento(4)]) == {"play_by_play": [_evento(4)]}
+
+def _rastreador_com_deltas(quantidade):
+    """Rastreador seguidor que recebeu um snapshot (seq 100) e `quantidade` deltas em ordem."""
+    rastreador = live_tracker.RastreadorJogo(42)
+
+    async def receber_tudo():
+        await rastreador.receber({"tipo": "snapshot", "seq": 100, "dados": {**_estado(), "play_by_play": []}})
+        for i in range(1, quantidade + 1):
+            delta = live_tracker.calcular_delta(rastreador.estado, _estado(pontos_casa=10 + i), [_evento(i)])
+            await rastreador.receber({"tipo": "delta", "seq": 100 + i, **delta})
+
+    asyncio.run(receber_tudo())
+    return rastreador
+
+def test_last_event_id_recebe_so_os_deltas_perdidos():
+    rastreador = _rastreador_com_deltas(5)
+
+    mensagens = rastreador.mensagens_desde(102)
+
+    assert [m["seq"] for m in mensagens] == [103, 104, 105]
+    assert all(m["tipo"] == "delta" for m in mensagens)
+    assert rastreador.mensagens_desde(105) == []
+    # Reaplicar os deltas perdidos sobre o estado do cliente chega ao estado atual
+    estado_cliente = _estado(pontos_casa=12)
+    for mensagem in mensagens:
+        estado_cliente = live_tracker.aplicar_delta(estado_cliente, mensagem)
+    assert estado_cliente == rastreador.estado
+
+@pytest.mark.parametrize("ultimo_seq", [None, 100, 50, 999])
+def test_last_event_id_fora_do_historico_recebe_o_snapshot(ultimo_seq):
+    # Com mais deltas que o histórico guarda, o seq 100 (e o 101) já saíram dele
+    rastreador = _rastreador_com_deltas(live_tracker.HISTORICO_MENSAGENS + 1)
+
+    mensagens = rastreador.mensagens_desde(ultimo_seq)
+
+    assert mensagens == [rastreador.mensagem_snapshot()]
+    assert mensagens[0]["seq"] == 100 + live_tracker.HISTORICO_MENSAGENS + 1
+    assert len(mensagens[0]["dados"]["play_by_play"]) == live_tracker.HISTORICO_MENSAGENS + 1
@@ -0,0 +1,162 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app import crud, models, schemas
+from app.database import Base
+
+CONTADORES = ("total_avaliacoes", "avaliacoes_com_detalhes", "avaliacoes_time_favorito", "times_avaliados",
+              "total_comentarios", "total_seguindo", "total_seguidores")
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    sessao = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield sessao
+    finally:
+        sessao.close()
+        engine.dispose()
+
+@pytest.fixture
+def dados(db):
+    """Dois usuários (um torcedor do time da casa) e três jogos entre times diferentes."""
+    liga = models.Liga(nome="NBA", pais="USA")
+    db.add(liga)
+    db.flush()
+    times = [models.Time(nome=f"Time {i}", sigla=f"T{i}", slug=f"time-{i}", liga_id=liga.id) for i in range(4)]
+    db.add_all(times)
+    db.flush()
+    ana = models.Usuario(username="ana", email="ana@example.com", senha="x", time_favorito_id=times[0].id)
+    bia = models.Usuario(username="bia", email="bia@example.com", senha="x")
+    db.add_all([ana, bia])
+    db.flush()
+    jogos = [
+        models.Jogo(data_jogo=datetime(2025, 1, i + 1), temporada="2024-25", liga_id=liga.id,
+                    time_casa_id=times[i].id, time_visitante_id=times[i + 1].id)
+        for i in range(3)
+    ]
+    db.add_all(jogos)
+    db.commit()
+    return ana.id, bia.id, [jogo.id for jogo in jogos]
+
+def _contadores(progresso):
+    valores = {campo: getattr(progresso, campo) for campo in CONTADORES}
+    valores["avaliacoes_recentes"] = sorted(avaliacao_id for avaliacao_id, _ in progresso.avaliacoes_recentes)
+    return valores
+
+def _conferir_com_recalculo(db, usuario_id):
+    """Os contadores incrementais gravados devem bater com um recálculo completo a partir do banco."""
+    db.expire_all()
+    incremental = _contadores(db.get(models.Progresso_Conquista, usuario_id))
+    recalculado = _contadores(crud._calcular_progressos(db, [usuario_id])[usuario_id])
+    db.rollback() # Descarta o recálculo, para não esconder divergências nos próximos passos
+    assert incremental == recalculado
+    return incremental
+
+def _avaliacao(**notas):
+    return schemas.AvaliacaoJogoCreate(nota_geral=4, **notas)
+
+def test_contadores_acompanham_o_recalculo_a_cada_mutacao(db, dados):
+    ana, bia, jogos = dados
+
+    primeira = crud.create_avaliacao_jogo(db, _avaliacao(), usuario_id=ana, jogo_id=jogos[0])
+    _conferir_com_recalculo(db, ana)
+    segunda = crud.create_avaliacao_jogo(db, _avaliacao(nota_ataque_casa=3, nota_defesa_casa=3), usuario_id=ana, jogo_id=jogos[1])
+    assert _conferir_com_recalculo(db, ana)["avaliacoes_com_detalhes"] == 1
+
+    crud.update_avaliacao(db, primeira.id, _avaliacao(nota_ataque_casa=4, nota_defesa_casa=2), user_id=ana)
+    assert _conferir_com_recalculo(db, ana)["avaliacoes_com_detalhes"] == 2
+    crud.update_avaliacao(db, segunda.id, _avaliacao(nota_ataque_casa=None, nota_defesa_casa=None), user_id=ana)
+    assert _conferir_com_recalculo(db, ana)["avaliacoes_com_detalhes"] == 1
+
+    crud.delete_avaliacao(db, primeira.id, user_id=ana)
+    contadores = _conferir_com_recalculo(db, ana)
+    assert contadores["total_avaliacoes"] == 1
+    assert contadores["avaliacoes_time_favorito"] == 0
+
+    crud.follow_user(db, seguidor_id=ana, seguido_id=bia)
+    _conferir_com_recalculo(db, ana)
+    _conferir_com_recalculo(db, bia)
+    crud.create_comentario(db, schemas.ComentarioCreate(comentario="boa"), usuario_id=bia, avaliacao_id=segunda.id)
+    assert _conferir_com_recalculo(db, bia)["total_comentarios"] == 1
+    crud.unfollow_user(db, seguidor_id=ana, seguido_id=bia)
+    assert _conferir_com_recalculo(db, ana)["total_seguindo"] == 0
+    assert _conferir_com_recalculo(db, bia)["total_seguidores"] == 0
+
+def _sem_progresso(db, usuario_id):
+    return db.get(models.Progresso_Conquista, usuario_id) is None
+
+def test_primeiro_evento_por_update_conta_os_detalhes_novos(db, dados):
+    ana, _, jogos = dados
+    # Avaliação anterior ao motor incremental: há rollup do jogo, mas nenhum progresso
+    avaliacao = models.Avaliacao_Jogo(usuario_id=ana, jogo_id=jogos[1], nota_geral=3)
+    db.add(avaliacao)
+    db.flush()
+    crud.recalcular_rollup_jogo(db, jogos[1])
+    db.commit()
+    assert _sem_progresso(db, ana)
+
+    crud.update_avaliacao(db, avaliacao.id, _avaliacao(nota_ataque_casa=4, nota_defesa_casa=4), user_id=ana)
+
+    assert _conferir_com_recalculo(db, ana)["avaliacoes_com_detalhes"] == 1
+
+@pytest.mark.parametrize("acao", ["avaliacao", "remocao", "comentario", "seguir", "deixar_de_seguir"])
+def test_primeiro_evento_nao_conta_a_acao_duas_vezes(db, dados, acao):
+    ana, bia, jogos = dados
+    # Histórico gravado sem o motor: os dois usuários começam sem linha de progresso
+    existente = models.Avaliacao_Jogo(usuario_id=ana, jogo_id=jogos[0], nota_geral=3)
+    db.add_all([existente, models.Seguidor(seguidor_id=bia, seguido_id=ana)])
+    db.commit()
+    assert _sem_progresso(db, ana) and _sem_progresso(db, bia)
+
+    if acao == "avaliacao":
+        crud.create_avaliacao_jogo(db, _avaliacao(), usuario_id=ana, jogo_id=jogos[1])
+    elif acao == "remocao":
+        crud.delete_avaliacao(db, existente.id, user_id=ana)
+    elif acao == "comentario":
+        crud.create_comentario(db, schemas.ComentarioCreate(comentario="boa"), usuario_id=ana, avaliacao_id=existente.id)
+    elif acao == "seguir":
+        crud.follow_user(db, seguidor_id=ana, seguido_id=bia)
+    else:
+        crud.unfollow_user(db, seguidor_id=bia, seguido_id=ana)
+
+    _conferir_com_recalculo(db, ana)
+    if acao in ("seguir", "deixar_de_seguir"):
+        _conferir_com_recalculo(db, bia)
+
+def test_primeiro_evento_concorrente_aplica_a_acao_na_linha_ja_criada(db, dados, monkeypatch):
+    ana, _, jogos = dados
+    existente = models.Avaliacao_Jogo(usuario_id=ana, jogo_id=jogos[0], nota_geral=3)
+    db.add(existente)
+    db.commit()
+    # O que outro evento simultâneo gravaria: o estado sem o comentário desta transação
+    concorrente = {campo: getattr(p, campo) for p in [crud._calcular_progressos(db, [ana])[ana]]
+                   for campo in CONTADORES + ("avaliacoes_recentes",)}
+    db.rollback()
+
+    buscar = crud._buscar_progresso
+    chamadas = []
+
+    def buscar_durante_a_corrida(db_, usuario_id):
+        chamadas.append(usuario_id)
+        if len(chamadas) == 1:
+            return None # A linha ainda não existia quando esta transação olhou
+        if len(chamadas) == 2:
+            db_.add(models.Progresso_Conquista(usuario_id=usuario_id, **concorrente)) # ...e a outra a gravou em seguida
+            db_.flush()
+        return buscar(db_, usuario_id)
+
+    def insert_duplicado(db_, usuario_ids=None):
+        raise IntegrityError("INSERT INTO progresso_conquistas", {}, Exception("duplicate key value violates unique constraint"))
+
+    monkeypatch.setattr(crud, "_buscar_progresso", buscar_durante_a_corrida)
+    monkeypatch.setattr(crud, "_calcular_progressos", insert_duplicado)
+    crud.create_comentario(db, schemas.ComentarioCreate(comentario="boa"), usuario_id=ana, avaliacao_id=existente.id)
+    monkeypatch.undo()
+
+    assert len(chamadas) >= 2
+    assert _conferir_com_recalculo(db, ana)["total_comentarios"] == 1
@@ -1,6 +1,29 @@
 "use client";
 import { useState, useEffect } from "react";
 
+// Aplica um delta do WebSocket ao último snapshot: só os campos alterados chegam
+function aplicarDelta(atual, delta) {
+  if (!atual || delta.seq <= atual.seq) return atual;
+
+  const novo = { ...atual, ...(delta.jogo || {}), seq: delta.seq };
+  for (const lado of ["home_team", "away_team"]) {
+    const jogadores = delta.jogadores?.[lado] || [];
+    if (!delta.times?.[lado] && jogadores.length === 0) continue;
+
+    const players = [...atual[lado].players];
+    for (const jogador of jogadores) {
+      const indice = players.findIndex((p) => p.player_id === jogador.player_id);
+      if (indice === -1) players.push(jogador);
+      else players[indice] = { ...players[indice], ...jogador };
+    }
+    novo[lado] = { ...atual[lado], ...(delta.times?.[lado] || {}), players };
+  }
+  if (delta.play_by_play) {
+    novo.play_by_play = [...atual.play_by_play, ...delta.play_by_play];
+  }
+  return novo;
+}
+
 export default function BoxScore({ gameId }) {
   const [boxScore, setBoxScore] = useState(null);
   const [connectionStatus, setConnectionStatus] = useState("Conectando...");
@@ -15,8 +38,12 @@ export default function BoxScore({ gameId }) {
 
     ws.onopen = () => setConnectionStatus("Conectado");
     ws.onmessage = (event) => {
-      const data = JSON.parse(event.data);
-      setBoxScore(data);
+      const mensagem = JSON.parse(event.data);
+      if (mensagem.tipo === "snapshot") {
+        setBoxScore({ ...mensagem.dados, seq: mensagem.seq });
+      } else if (mensagem.tipo === "delta") {
+        setBoxScore((atual) => aplicarDelta(atual, mensagem));
+      }
     };
     ws.onclose = () => setConnectionStatus("Desconectado");
     ws.onerror = () => setConnectionStatus("Erro de conexão");